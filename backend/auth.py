@@ -4,14 +4,16 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
-from database import get_db
+from database import get_async_db
 from models import User
+from password_pool import pwd_context
+from principal_cache import PrincipalCache
 
 load_dotenv()
 
@@ -19,7 +21,12 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "change-this-secret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = int(os.environ.get("ACCESS_TOKEN_EXPIRE_HOURS", "8"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Active users resolved from tokens; AUTH_CACHE_SIZE=0 or AUTH_CACHE_TTL_SECONDS=0 disables
+principal_cache = PrincipalCache(
+    max_size=int(os.environ.get("AUTH_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("AUTH_CACHE_TTL_SECONDS", "30")),
+)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
@@ -39,9 +46,9 @@ def create_access_token(user_id: str, role: str) -> str:
     )
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,13 +63,22 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+    generation = principal_cache.generation(user_id)
+
+    def load(db: Session) -> User | None:
+        return db.query(User).filter(User.id == user_id, User.is_active == True).first()
+
+    user = await db.run_sync(load)
     if user is None:
         raise credentials_exception
+    principal_cache.put(user_id, user, generation)
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
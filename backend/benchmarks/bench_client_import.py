@@ -0,0 +1,126 @@
+"""
+Client onboarding — one POST /api/clients per row vs. client_import (COPY + merge).
+
+Generates a CSV of --rows clients (a quarter with an IT portal password),
+then times:
+
+    one at a time   what the create endpoint does per client: PAN lookup,
+                    INSERT, credential encryption, search index upsert,
+                    commit — on --baseline-rows rows, extrapolated to --rows
+    import          client_import.run() on the whole file (all new PANs)
+    re-import       the same file again (every row merges into an existing
+                    client, re-encrypting its stored credentials)
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_client_import --rows 50000
+
+Generated clients have PANs starting IMP and are deleted at the end unless
+--keep is given. The target database must already have database/schema.sql
+and the migrations applied. Never point this at production data.
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+
+from cryptography.fernet import Fernet
+
+os.environ.setdefault("CREDENTIAL_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+from sqlalchemy import create_engine, delete, select    # noqa: E402
+from sqlalchemy.orm import Session                       # noqa: E402
+
+import client_import                                     # noqa: E402
+import crypto                                            # noqa: E402
+import search_index                                      # noqa: E402
+from models import Client                                # noqa: E402
+from routers.clients import ENCRYPTED_FIELDS             # noqa: E402
+from schemas import ClientCreate                         # noqa: E402
+
+COLUMNS = ["pan", "constitution", "display_name", "legal_name", "date_of_incorporation_birth",
+           "primary_phone", "primary_email", "city", "state", "it_portal_user_id", "it_portal_password"]
+
+
+def _row(prefix: str, i: int) -> list:
+    return [f"{prefix}{i:05d}Z", "Company", f"Import Test {i} Pvt Ltd", f"IMPORT TEST {i} PRIVATE LIMITED", "2001-04-01",
+            f"98{i:08d}", f"accounts{i}@example.com", "Mumbai", "Maharashtra",
+            f"ITU{i:06d}", f"Pw#{i}" if i % 4 == 0 else ""]
+
+
+def make_csv(prefix: str, n: int) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for i in range(n):
+        writer.writerow(_row(prefix, i))
+    return buf.getvalue().encode()
+
+
+def one_at_a_time(engine, n: int) -> float:
+    """Seconds to create n clients the way POST /api/clients does."""
+    start = time.perf_counter()
+    with Session(engine) as db:
+        for i in range(n):
+            body = ClientCreate(**{k: v for k, v in zip(COLUMNS, _row("IMPC", i)) if v})
+            if db.query(Client).filter(Client.pan == body.pan).first():
+                continue
+            data = body.model_dump()
+            creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+            client = Client(**data)
+            crypto.store(client, creds, ENCRYPTED_FIELDS)
+            db.add(client)
+            db.flush()
+            search_index.index(db, client)
+            db.commit()
+            db.refresh(client)
+    return time.perf_counter() - start
+
+
+def bulk(engine, data: bytes) -> tuple[float, client_import.ClientImportReport]:
+    start = time.perf_counter()
+    with Session(engine) as db:
+        report = client_import.run(db, client_import.read(io.BytesIO(data), "bench.csv"), ENCRYPTED_FIELDS)
+    return time.perf_counter() - start, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--baseline-rows", type=int, default=500)
+    parser.add_argument("--keep", action="store_true", help="leave the generated clients in place")
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        if conn.execute(select(Client.id).where(Client.pan.like("IMP%")).limit(1)).first():
+            print("ERROR: clients with IMP… PANs already exist — delete them or use another database.")
+            sys.exit(1)
+
+    data = make_csv("IMPB", args.rows)
+    print(f"\n{args.rows} rows, {len(data) / 2 ** 20:.1f} MiB CSV, CREDENTIAL_STORAGE={crypto.STORAGE}\n")
+    try:
+        secs = one_at_a_time(engine, args.baseline_rows)
+        rate = args.baseline_rows / secs
+        print(f"  one at a time  {args.baseline_rows:>7} rows  {secs:8.1f} s  {rate:8.0f} rows/s"
+              f"   (~{args.rows / rate / 60:.0f} min for {args.rows})")
+        for label in ("import", "re-import"):
+            secs, report = bulk(engine, data)
+            done = report.inserted + report.updated
+            print(f"  {label:<13}  {done:>7} rows  {secs:8.1f} s  {done / secs:8.0f} rows/s"
+                  f"   ({report.inserted} new, {report.updated} updated, {len(report.errors)} errors)")
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(delete(Client).where(Client.pan.like("IMP%")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Client search latency at scale — contains (ILIKE) vs fuzzy (trigram ranked).
+
+Seeds synthetic clients into a scratch database up to --clients rows, then
+times the same queries GET /api/clients issues, with and without the
+trigram indexes (the "without" run drops them inside a transaction that is
+rolled back afterwards).
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_client_search --clients 100000
+
+The target database must already have database/schema.sql and the
+migrations applied. Never point this at production data.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+from sqlalchemy import create_engine, func, insert, select, text
+
+from models import Client
+
+WORDS = [
+    "Reliance", "Industries", "Tata", "Steel", "Infosys", "Mahindra", "Bajaj", "Finance",
+    "Shree", "Ganesh", "Traders", "Agro", "Foods", "Textiles", "Pharma", "Chemicals",
+    "Logistics", "Constructions", "Enterprises", "Exports", "Motors", "Electricals",
+    "Jewellers", "Hospitality", "Realty", "Solutions", "Ventures", "Healthcare",
+    "Krishna", "Lakshmi", "Sai", "Balaji", "Patel", "Shah", "Mehta", "Agarwal", "Gupta",
+]
+SUFFIXES = ["Pvt Ltd", "Ltd", "LLP", "& Co", "& Sons", "HUF", "Trust"]
+TRGM_INDEXES = ["idx_clients_display_name_trgm", "idx_clients_legal_name_trgm", "idx_clients_pan_trgm"]
+
+
+def _fake_pan(i: int) -> str:
+    letters = string.ascii_uppercase
+    return (
+        "".join(letters[(i // 26 ** k) % 26] for k in range(3))
+        + "PB" + f"{i % 10000:04d}" + letters[(i // 10000) % 26]
+    )
+
+
+def _name(rng: random.Random) -> str:
+    return " ".join(rng.sample(WORDS, 2)) + " " + rng.choice(SUFFIXES)
+
+
+def _typo(rng: random.Random, s: str) -> str:
+    i = rng.randrange(1, len(s) - 1)
+    return s[:i] + s[i + 1:]          # drop one character
+
+
+def seed(engine, target: int, rng: random.Random):
+    with engine.begin() as conn:
+        have = conn.execute(select(func.count()).select_from(Client)).scalar()
+        if have >= target:
+            return have
+        print(f"Seeding {target - have} clients…")
+        batch = []
+        for i in range(have, target):
+            name = _name(rng)
+            batch.append({
+                "pan": _fake_pan(i), "constitution": "Company",
+                "display_name": name, "legal_name": name.upper(),
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(Client), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Client), batch)
+        conn.execute(text("ANALYZE clients"))
+    return target
+
+
+def contains_query(term: str, limit: int):
+    like = f"%{term}%"
+    return (
+        select(Client)
+        .where(Client.display_name.ilike(like) | Client.legal_name.ilike(like) | Client.pan.ilike(like))
+        .order_by(Client.display_name, Client.id)
+        .limit(limit + 1)
+    )
+
+
+def fuzzy_query(term: str, limit: int):
+    score = func.greatest(
+        func.word_similarity(term, Client.display_name),
+        func.word_similarity(term, Client.legal_name),
+        func.similarity(term, Client.pan),
+    )
+    return (
+        select(Client)
+        .where(Client.display_name.op("%>")(term) | Client.legal_name.op("%>")(term) | Client.pan.op("%")(term))
+        .order_by(score.desc(), Client.id)
+        .limit(limit)
+    )
+
+
+def _time(conn, stmts) -> list[float]:
+    out = []
+    for stmt in stmts:
+        start = time.perf_counter()
+        conn.execute(stmt).fetchall()
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def _report(label: str, samples: list[float]):
+    samples = sorted(samples)
+    p = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    print(f"  {label:<28} p50 {p(0.50):8.2f} ms   p95 {p(0.95):8.2f} ms   "
+          f"p99 {p(0.99):8.2f} ms   mean {statistics.mean(samples):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    engine = create_engine(url)
+    total = seed(engine, args.clients, rng)
+
+    terms = [rng.choice(WORDS)[: rng.randint(4, 7)] for _ in range(args.queries)]
+    typos = [_typo(rng, _name(rng).rsplit(" ", 1)[0]) for _ in range(args.queries)]
+
+    print(f"\n{total} clients, {args.queries} queries per case, limit {args.limit}\n")
+    with engine.connect() as conn:
+        print("With trigram indexes:")
+        _report("contains (ILIKE '%x%')", _time(conn, [contains_query(t, args.limit) for t in terms]))
+        _report("fuzzy (typo, ranked top-N)", _time(conn, [fuzzy_query(t, args.limit) for t in typos]))
+
+        trans = conn.begin()
+        for idx in TRGM_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {idx}"))
+        print("\nWithout trigram indexes (sequential scans):")
+        _report("contains (ILIKE '%x%')", _time(conn, [contains_query(t, args.limit) for t in terms]))
+        _report("fuzzy (typo, ranked top-N)", _time(conn, [fuzzy_query(t, args.limit) for t in typos]))
+        trans.rollback()
+
+
+if __name__ == "__main__":
+    main()
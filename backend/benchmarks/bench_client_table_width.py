@@ -0,0 +1,129 @@
+"""
+Client list scans with credentials inline vs. in client_credentials.
+
+Builds two copies of the clients table in a scratch schema (bench_width) at
+--clients rows: "inline" has the thirteen credential columns on every row, as
+clients did before migration 006; "split" keeps them in a 1:1 side table.
+Both get the same identity/contact data, Fernet-sized tokens in every
+password column and the same indexes. It then runs the queries the client
+list issues against each and reports table size, execution time and buffers
+touched (shared hit / read, from EXPLAIN (ANALYZE, BUFFERS)).
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_client_table_width --clients 100000
+
+Needs database/schema.sql and the migrations applied (for the column types).
+The bench_width schema is dropped at the end unless --keep is given.
+Never point this at production data.
+"""
+import argparse
+import os
+import statistics
+import sys
+
+from sqlalchemy import create_engine, text
+
+from models import ClientCredentials
+
+SCHEMA = "bench_width"
+CREDENTIAL_COLUMNS = [c.name for c in ClientCredentials.__table__.columns if c.name not in ("client_id", "created_at", "updated_at")]
+# ClientListItem's columns — what GET /api/clients actually selects
+LIST_COLUMNS = "id, pan, constitution, display_name, legal_name, is_active, is_direct_client, is_on_retainer, primary_phone, primary_email, din, created_at"
+
+QUERIES = {
+    "first page (keyset, 50)":  "SELECT {cols} FROM {t} ORDER BY display_name, id LIMIT 51",
+    "full list, active":        "SELECT {cols} FROM {t} WHERE is_active ORDER BY display_name, id",
+    "contains '%tata%' (seq)":  "SELECT {cols} FROM {t} WHERE display_name ILIKE '%tata%' OR pan ILIKE '%tata%' ORDER BY display_name, id",
+    "count(*) active":          "SELECT count(*) FROM {t} WHERE is_active",
+}
+
+
+def _value(column: str) -> str:
+    if column == "credentials_sealed":
+        return "NULL"
+    if "password" in column:
+        # same length as a Fernet token for a short password
+        return "'gAAAAAB' || repeat(md5(random()::text), 4)"
+    return "'user' || (g % 100000)::text"
+
+
+def build(conn, n: int):
+    creds_ddl = ", ".join(f"{c} {'BYTEA' if c == 'credentials_sealed' else 'TEXT'}" for c in CREDENTIAL_COLUMNS)
+    base = (
+        "gen_random_uuid(), 'B' || lpad(g::text, 9, '0'), 'Company', "
+        "'Client ' || md5(g::text), 'CLIENT ' || upper(md5(g::text)), g % 10 <> 0, "
+        "'98' || lpad(g::text, 8, '0'), 'c' || g || '@example.com', "
+        "'Plot ' || g || ', Industrial Area', 'Mumbai', 'Maharashtra', '400001'"
+    )
+    base_cols = "id, pan, constitution, display_name, legal_name, is_active, primary_phone, primary_email, address_line1, city, state, pin_code"
+    cred_cols = ", ".join(CREDENTIAL_COLUMNS)
+    cred_values = ", ".join(_value(c) for c in CREDENTIAL_COLUMNS)
+
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.inline (LIKE public.clients INCLUDING DEFAULTS, {creds_ddl})"))
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.split (LIKE public.clients INCLUDING DEFAULTS)"))
+    conn.execute(text(f"CREATE TABLE {SCHEMA}.split_credentials (client_id UUID PRIMARY KEY, {creds_ddl})"))
+
+    print(f"Seeding {n} clients into {SCHEMA}.inline and {SCHEMA}.split…")
+    conn.execute(text(
+        f"INSERT INTO {SCHEMA}.inline ({base_cols}, {cred_cols}) "
+        f"SELECT {base}, {cred_values} FROM generate_series(1, :n) g"
+    ), {"n": n})
+    conn.execute(text(
+        f"INSERT INTO {SCHEMA}.split ({base_cols}) SELECT {base_cols} FROM {SCHEMA}.inline"
+    ))
+    conn.execute(text(
+        f"INSERT INTO {SCHEMA}.split_credentials (client_id, {cred_cols}) SELECT id, {cred_cols} FROM {SCHEMA}.inline"
+    ))
+    for t in ("inline", "split"):
+        conn.execute(text(f"ALTER TABLE {SCHEMA}.{t} ADD PRIMARY KEY (id)"))
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.{t} (display_name, id)"))
+        conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.{t}"))
+    conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.split_credentials"))
+
+
+def _size(conn, table: str) -> str:
+    return conn.execute(text(f"SELECT pg_size_pretty(pg_table_size('{SCHEMA}.{table}'))")).scalar()
+
+
+def measure(conn, sql: str, repeat: int) -> tuple[float, int, int]:
+    """Median execution ms, and shared buffers hit / read on the last run."""
+    times, plan = [], None
+    for _ in range(repeat):
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar()[0]
+        times.append(plan["Execution Time"])
+    top = plan["Plan"]
+    return statistics.median(times), top.get("Shared Hit Blocks", 0), top.get("Shared Read Blocks", 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="leave the bench_width schema in place")
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+
+    engine = create_engine(url, isolation_level="AUTOCOMMIT")     # VACUUM can't run in a transaction
+    with engine.connect() as conn:
+        build(conn, args.clients)
+        print(f"\n{args.clients} clients, median of {args.repeat} runs, buffers are 8 kB pages\n")
+        print(f"  table size   inline {_size(conn, 'inline'):>10}   split {_size(conn, 'split'):>10}"
+              f"   (+ client_credentials {_size(conn, 'split_credentials')})\n")
+        for label, sql in QUERIES.items():
+            for t in ("inline", "split"):
+                ms, hit, read = measure(conn, sql.format(cols=LIST_COLUMNS, t=f"{SCHEMA}.{t}"), args.repeat)
+                print(f"  {label:<26} {t:<7} {ms:9.2f} ms   buffers hit {hit:>7}  read {read:>7}")
+        if not args.keep:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
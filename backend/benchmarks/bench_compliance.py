@@ -0,0 +1,122 @@
+"""
+Compliance expiry queries at scale — range scans and the rolling calendar.
+
+Seeds synthetic clients up to --clients rows (as bench_client_search does),
+gives most of them a DSC expiry and some a passport expiry within two years
+either side of today, and adds one dated other registration per three
+clients. Then times, over --queries runs each:
+
+    upcoming page        compliance.upcoming() — the first page of
+                         GET /api/compliance/upcoming?within=30d
+    upcoming, no index   the same with migration 008's partial indexes and
+                         idx_other_reg_valid_until dropped (in a transaction
+                         that is rolled back afterwards)
+    calendar build       the grouped query that (re)builds the calendar
+    calendar read        what GET /api/compliance/calendar does once the
+                         calendar is built: summarise(), after a version
+                         check (checked) or trusting a recent one (within TTL)
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_compliance --clients 100000
+
+The target database must already have database/schema.sql and the
+migrations applied. Never point this at production data.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import Session
+
+import compliance
+from benchmarks.bench_client_search import _report, seed as seed_clients
+from models import Client, OtherRegistration
+
+DATE_INDEXES = ["idx_clients_dsc_expiry", "idx_clients_passport_expiry", "idx_gst_cancellation_date",
+                "idx_epf_esi_cancellation_date", "idx_other_reg_valid_until"]
+
+
+def seed_dates(engine, clients: int, rng: random.Random):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE clients SET dsc_expiry_date = current_date + (random() * 1460 - 730)::int "
+            "WHERE dsc_expiry_date IS NULL AND random() < 0.7"
+        ))
+        conn.execute(text(
+            "UPDATE clients SET passport_expiry = current_date + (random() * 1460 - 730)::int "
+            "WHERE passport_expiry IS NULL AND random() < 0.3"
+        ))
+        have = conn.execute(select(func.count()).select_from(OtherRegistration)).scalar()
+        want = clients // 3 - have
+        if want > 0:
+            print(f"Seeding {want} other registrations…")
+            ids = conn.execute(select(Client.id).order_by(func.random()).limit(want)).scalars().all()
+            today = date.today()
+            rows = [{
+                "client_id": i, "registration_type": rng.choice(["FSSAI", "IEC", "Trade License", "Drug License"]),
+                "registration_number": f"BENCH{n:07d}", "valid_until": today + timedelta(days=rng.randint(-730, 730)),
+            } for n, i in enumerate(ids)]
+            for k in range(0, len(rows), 5000):
+                conn.execute(insert(OtherRegistration), rows[k:k + 5000])
+
+
+def _time(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    engine = create_engine(url)
+    total = seed_clients(engine, args.clients, rng)
+    seed_dates(engine, total, rng)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE clients"))
+        conn.execute(text("VACUUM ANALYZE other_registrations"))
+
+    today = date.today()
+    start, end = today, today + timedelta(days=30)
+    lookback = today - timedelta(days=compliance.LOOKBACK_DAYS)
+    horizon = today + timedelta(days=compliance.HORIZON_DAYS)
+    with Session(engine) as db:
+        due = compliance.summarise(compliance.calendar.current(db)[1], start, end, compliance.KINDS)["total"]
+        print(f"\n{total} clients, {due} items due in the next 30 days, {args.queries} runs per case\n")
+
+        upcoming = lambda: compliance.upcoming(db, start, end, compliance.KINDS, args.limit + 1)
+        _report("upcoming page", _time(upcoming, args.queries))
+        _report("calendar build", _time(lambda: compliance._counts(db, lookback, horizon), max(5, args.queries // 10)))
+        checked = lambda: compliance.summarise(compliance.calendar.current(db)[1], start, end, compliance.KINDS)
+        _report("calendar read, checked", _time(checked, args.queries))
+        cached = lambda: compliance.summarise(compliance.calendar.current(db, max_age=60)[1], start, end, compliance.KINDS)
+        _report("calendar read, within TTL", _time(cached, args.queries))
+
+        for idx in DATE_INDEXES:
+            db.execute(text(f"DROP INDEX IF EXISTS {idx}"))
+        _report("upcoming page, no index", _time(upcoming, max(5, args.queries // 10)))
+        db.rollback()
+
+
+if __name__ == "__main__":
+    main()
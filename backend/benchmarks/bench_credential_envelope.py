@@ -0,0 +1,79 @@
+"""
+Credential storage layouts — Fernet token per field vs. one AES-GCM envelope per record.
+
+For rows shaped like clients (eight credential fields, all set) and bank
+accounts (one), reports stored bytes per row and the time to write (encrypt)
+and read back (decrypt) --rows records in each layout. No database needed:
+this is the CPU and storage the layouts differ by, not query time.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_credential_envelope --rows 1000
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+from types import SimpleNamespace
+
+from cryptography.fernet import Fernet
+
+os.environ.setdefault("CREDENTIAL_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+import crypto                                                  # noqa: E402
+from routers.bank_accounts import ENCRYPTED_FIELDS as BANK_FIELDS  # noqa: E402
+from routers.clients import ENCRYPTED_FIELDS as CLIENT_FIELDS      # noqa: E402
+
+
+def _rows(n: int, fields: list[str]) -> list[SimpleNamespace]:
+    empty = dict.fromkeys(fields) | {"credentials_sealed": None}
+    return [SimpleNamespace(__tablename__="bench", id=uuid.uuid4(), **empty) for _ in range(n)]
+
+
+def _plain(fields: list[str]) -> dict:
+    return {f: f"Secret#{f}-2024" for f in fields}
+
+
+def _stored_bytes(row, fields: list[str]) -> int:
+    if row.credentials_sealed:
+        return len(row.credentials_sealed)
+    return sum(len(getattr(row, f) or "") for f in fields)
+
+
+def _measure(n: int, fields: list[str], storage: str, repeat: int) -> tuple[float, float, float]:
+    writes, reads = [], []
+    for _ in range(repeat):
+        rows = _rows(n, fields)
+        values = _plain(fields)
+        start = time.perf_counter()
+        for r in rows:
+            crypto.store(r, values, fields, storage=storage)
+        writes.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        for r in rows:
+            crypto.read(r, fields)
+        reads.append((time.perf_counter() - start) * 1000)
+    size = statistics.mean(_stored_bytes(r, fields) for r in rows)
+    return size, statistics.median(writes), statistics.median(reads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"\nmedian of {args.repeat} runs, {args.rows} rows per run\n")
+    for label, fields in [
+        (f"clients ({len(CLIENT_FIELDS)} fields/row)", CLIENT_FIELDS),
+        (f"bank accounts ({len(BANK_FIELDS)} field/row)", BANK_FIELDS),
+    ]:
+        print(f"  {label}")
+        for storage in ("fields", "envelope"):
+            size, write_ms, read_ms = _measure(args.rows, fields, storage, args.repeat)
+            print(f"    {storage:<9} {size:7.0f} B/row   write {write_ms:8.2f} ms   read {read_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+CPU cost of credentials in list responses — decrypt everything vs. mask by default.
+
+Builds rows shaped like the list endpoints' (one encrypted field per bank
+account / registration, eight per client) and times crypto.present() with
+reveal=all against the default masked path. No database needed: this is the
+per-call CPU the list endpoints no longer spend.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_credential_masking --rows 200
+"""
+import argparse
+import os
+import statistics
+import time
+from types import SimpleNamespace
+
+from cryptography.fernet import Fernet
+
+os.environ.setdefault("CREDENTIAL_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+import crypto                                                  # noqa: E402
+from routers.bank_accounts import ENCRYPTED_FIELDS as BANK_FIELDS  # noqa: E402
+from routers.clients import ENCRYPTED_FIELDS as CLIENT_FIELDS      # noqa: E402
+
+
+def _rows(n: int, fields: list[str]) -> list[SimpleNamespace]:
+    token = {f: crypto.encrypt(f"secret-{f}") for f in fields}
+    return [SimpleNamespace(**token) for _ in range(n)]
+
+
+def _time_call(rows_n: int, fields: list[str], reveal: set[str], repeat: int) -> list[float]:
+    out = []
+    for _ in range(repeat):
+        rows = _rows(rows_n, fields)         # fresh rows: present() rewrites them in place
+        start = time.perf_counter()
+        for r in rows:
+            crypto.present(r, fields, reveal)
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def _report(label: str, decrypted: list[float], masked: list[float]):
+    d, m = statistics.median(decrypted), statistics.median(masked)
+    print(f"  {label:<30} reveal=all {d:8.3f} ms   masked {m:8.3f} ms   saved {d - m:8.3f} ms/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"\nmedian of {args.repeat} calls, {args.rows} rows per call\n")
+    for label, fields in [
+        (f"bank accounts ({len(BANK_FIELDS)} field/row)", BANK_FIELDS),
+        (f"clients ({len(CLIENT_FIELDS)} fields/row)", CLIENT_FIELDS),
+    ]:
+        decrypted = _time_call(args.rows, fields, set(fields), args.repeat)
+        masked = _time_call(args.rows, fields, set(), args.repeat)
+        _report(label, decrypted, masked)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Client dossier PDFs — inline rendering vs. the dossier pool vs. the cache.
+
+Loads --clients clients from the database the way GET /clients/{id}/dossier
+does, then times rendering all of their dossiers:
+
+    inline    dossier._render() one after another in this process — what a
+              single request thread would manage without the pool
+    pool      dossier.render_many() across DOSSIER_POOL_WORKERS processes
+              (the first batch includes starting the workers)
+    cached    the same batch again, served from dossier.cache after the
+              per-client version lookup
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        DOSSIER_POOL_WORKERS=4 python -m benchmarks.bench_dossier --clients 200
+
+The target database must already have database/schema.sql and the
+migrations applied (seed clients with bench_client_import --keep). Never
+point this at production data.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from cryptography.fernet import Fernet
+
+os.environ.setdefault("CREDENTIAL_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+from sqlalchemy import create_engine, select    # noqa: E402
+from sqlalchemy.orm import Session               # noqa: E402
+
+import dossier                                   # noqa: E402
+from models import Client                        # noqa: E402
+from routers import clients                      # noqa: E402
+
+
+def load(engine, n: int) -> tuple[list, dict, list[dict]]:
+    """Ids, versions and outlines of the first n clients by PAN."""
+    with Session(engine) as db:
+        ids = db.scalars(select(Client.id).order_by(Client.pan).limit(n)).all()
+        found = dossier.versions(db, ids)
+        outlines = [dossier.build(clients._load_full(db, i, clients.FULL_SECTIONS, set())) for i in ids]
+    return ids, found, outlines
+
+
+async def pooled(outlines: list[dict]) -> float:
+    start = time.perf_counter()
+    await dossier.render_many(outlines)
+    return time.perf_counter() - start
+
+
+def cached(engine, ids: list) -> tuple[float, int]:
+    """Seconds to look every dossier up again — one version query, then the cache — and the hits."""
+    start = time.perf_counter()
+    with Session(engine) as db:
+        versions = dossier.versions(db, ids)
+    hits = sum(dossier.cache.get(dossier.cache.key(i, v.version, set())) is not None for i, v in versions.items())
+    return time.perf_counter() - start, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+    if not dossier.available():
+        print("ERROR: reportlab is not installed.")
+        sys.exit(1)
+    engine = create_engine(url)
+    ids, found, outlines = load(engine, args.clients)
+    if not outlines:
+        print("ERROR: no clients — seed some first (bench_client_import --keep).")
+        sys.exit(1)
+    n = len(outlines)
+
+    print(f"\n{n} dossiers, {dossier.WORKERS} pool workers\n")
+    start = time.perf_counter()
+    pdfs = [dossier._render(o) for o in outlines]
+    secs = time.perf_counter() - start
+    print(f"  inline   {secs:7.2f} s   {n / secs:7.1f} PDFs/s   {sum(map(len, pdfs)) / 2 ** 20:6.1f} MiB")
+
+    for label in ("pool", "pool (warm)"):
+        secs = asyncio.run(pooled(outlines))
+        print(f"  {label:<11}{secs:5.2f} s   {n / secs:7.1f} PDFs/s")
+
+    for i, pdf in zip(ids, pdfs):
+        dossier.cache.put(dossier.cache.key(i, found[i].version, set()), pdf)
+    secs, hits = cached(engine, ids)
+    print(f"  cached   {secs:7.2f} s   {n / secs:7.0f} PDFs/s   ({hits}/{n} hits; raise DOSSIER_CACHE_MB if short)")
+    dossier.shutdown()
+
+
+if __name__ == "__main__":
+    main()
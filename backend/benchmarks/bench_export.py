@@ -0,0 +1,110 @@
+"""
+Whole-book export — one GET /clients/{id}/full per client vs. export.write().
+
+Runs against whatever clients the database already holds (seed some with
+bench_client_import --keep), and times:
+
+    per client    the load GET /clients/{id}/full does for each client —
+                  what the browser export had to request one by one — on
+                  --baseline-clients clients, extrapolated to the whole book
+    csv / ndjson / xlsx
+                  export.write() streaming the book, chunks discarded
+
+With --memory each export runs again under tracemalloc to report its peak
+Python allocation, which should not grow with the number of clients.
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_export --memory
+
+The target database must already have database/schema.sql and the
+migrations applied. Never point this at production data.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from cryptography.fernet import Fernet
+
+os.environ.setdefault("CREDENTIAL_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+from sqlalchemy import create_engine, func, select    # noqa: E402
+from sqlalchemy.orm import Session, selectinload       # noqa: E402
+
+import crypto                                          # noqa: E402
+import export                                          # noqa: E402
+from models import Client                              # noqa: E402
+from routers import clients                            # noqa: E402
+
+
+def per_client(engine, n: int) -> float:
+    """Seconds to load n clients the way GET /clients/{id}/full does, one request each."""
+    with Session(engine) as db:
+        ids = db.scalars(select(Client.id).order_by(Client.pan).limit(n)).all()
+    start = time.perf_counter()
+    for client_id in ids:
+        with Session(engine) as db:
+            client = (db.query(Client)
+                      .options(clients.LOAD_CREDENTIALS,
+                               selectinload(Client.gst_registrations), selectinload(Client.bank_accounts),
+                               selectinload(Client.epf_esi_registrations), selectinload(Client.other_registrations))
+                      .filter(Client.id == client_id).first())
+            crypto.present(client, clients.ENCRYPTED_FIELDS)
+            clients._client_fields(client)
+    return time.perf_counter() - start
+
+
+def stream(engine, format: str, memory: bool) -> tuple[float, int, float]:
+    """Seconds, bytes written and peak traced MiB (0 without memory)."""
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    size = 0
+    with Session(engine) as db:
+        for chunk in export.write(db, format):
+            size += len(chunk)
+    secs = time.perf_counter() - start
+    peak = 0.0
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return secs, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline-clients", type=int, default=500)
+    parser.add_argument("--memory", action="store_true", help="also report peak memory of each export")
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        total = conn.execute(select(func.count()).select_from(Client)).scalar()
+    if not total:
+        print("ERROR: no clients to export — seed some first (bench_client_import --keep).")
+        sys.exit(1)
+
+    print(f"\n{total} clients\n")
+    n = min(args.baseline_clients, total)
+    secs = per_client(engine, n)
+    print(f"  per client    {n:>7} clients  {secs:7.1f} s   (~{total * secs / n:.0f} s for the book)")
+    for format in ("csv", "ndjson", "xlsx"):
+        if format == "xlsx" and export.openpyxl is None:
+            print("  xlsx          skipped (openpyxl not installed)")
+            continue
+        secs, size, _ = stream(engine, format, memory=False)
+        line = f"  {format:<12}  {total:>7} clients  {secs:7.1f} s   {total / secs:7.0f} clients/s  {size / 2 ** 20:7.1f} MiB"
+        if args.memory:
+            line += f"   peak {stream(engine, format, memory=True)[2]:.1f} MiB"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Client groups over a large book — GET /api/clients/{id}/group and /api/groups.
+
+Builds (once; found again by PAN on later runs) a synthetic book of
+--clients clients in families of about --family: a few companies and the
+people who direct, hold or sign for them. One link in --cross goes to
+another family, so some groups grow well past a family. Then times, over
+--queries runs each:
+
+    build          loading every link and building the forest
+    check          a read that checks the tables (four count queries) when
+                   nothing has changed; other reads trust them for
+                   GROUPS_CHECK_SECONDS
+    group          groups.client_group for a random client, names included
+    page           the first page of /api/groups (50 groups)
+    deep page      a page from the middle of the listing, by cursor
+    union          recording a new link between two groups (in memory)
+    split          forgetting it again, which takes the joined group apart
+    re-rank        the listing's first read after a change (a re-sort)
+    catch-up       a read after another worker added a director (and deleted
+                   the one it added before)
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_groups --clients 100000
+
+The target database must already have database/schema.sql and the
+migrations applied. Never point this at production data.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, delete, insert, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+import groups
+from benchmarks.bench_client_search import _report
+from models import Client, Director, Partner, Shareholder
+
+PREFIX = "GRPB"     # PANs of the synthetic book: GRPB + kind + 5 digits
+
+
+def build(engine, clients: int, family: int, cross: int, rng: random.Random) -> None:
+    with engine.begin() as conn:
+        if conn.execute(select(Client.id).where(Client.pan == f"{PREFIX}C00000")).scalar():
+            return
+        print(f"Building a book of {clients} clients…")
+        ids = [uuid.uuid4() for _ in range(clients)]
+        companies = ids[: clients // 2]
+        people = ids[clients // 2:]
+        conn.execute(insert(Client), [
+            {"id": i, "pan": f"{PREFIX}C{n:05d}", "constitution": "Company", "display_name": f"Company {n}", "legal_name": f"COMPANY {n}"}
+            for n, i in enumerate(companies)
+        ] + [
+            {"id": i, "pan": f"{PREFIX}P{n:05d}", "constitution": "Individual", "display_name": f"Person {n}", "legal_name": f"PERSON {n}"}
+            for n, i in enumerate(people)
+        ])
+        half = max(1, family // 2)
+        directors, holders, partners = set(), [], []
+        for f in range(0, len(companies), half):
+            cos, ppl = companies[f:f + half], people[f:f + half]
+            for co in cos:
+                for _ in range(rng.randint(1, 3)):
+                    p = rng.choice(people) if rng.randrange(cross) == 0 else rng.choice(ppl)
+                    kind = rng.random()
+                    if kind < 0.5:
+                        directors.add((co, p))
+                    elif kind < 0.85:
+                        holders.append({"company_client_id": co, "holder_type": "Individual", "individual_client_id": p, "percentage": 10})
+                    else:
+                        partners.append({"firm_llp_client_id": co, "individual_client_id": p, "role": "Partner"})
+        for table, rows in ((Director, [{"company_client_id": c, "individual_client_id": p, "designation": "Director"} for c, p in directors]),
+                            (Shareholder, holders), (Partner, partners)):
+            for k in range(0, len(rows), 5000):
+                conn.execute(insert(table), rows[k:k + 5000])
+        print(f"  {len(directors) + len(holders) + len(partners)} links")
+
+
+def _time(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--family", type=int, default=10)
+    parser.add_argument("--cross", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+
+    engine = create_engine(url)
+    rng = random.Random(args.seed)
+    build(engine, args.clients, args.family, args.cross, rng)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in ("directors", "shareholders", "partners", "gst_signatories"):
+            conn.execute(text(f"VACUUM ANALYZE {table}"))
+
+    with Session(engine) as db:
+        forest = groups.index
+        _report("build", _time(lambda: forest.rebuild(db), max(3, args.queries // 10)))
+        ranked, _ = forest.ranked()
+        linked = [uuid.UUID(int=m) for _, _, ms in ranked for m in ms]
+        print(f"\n{forest.snapshot()['links']} links, {len(linked)} linked clients in {len(ranked)} groups, "
+              f"largest {-ranked[0][0]}, {args.queries} runs per case\n")
+
+        _report("check", _time(lambda: forest.current(db, max_age=0), args.queries))
+        _report("group", _time(lambda: groups.client_group(db, rng.choice(linked)), args.queries))
+        _report("page", _time(lambda: groups.list_groups(db, 2, 50), args.queries))
+        middle = groups.list_groups(db, 2, len(ranked) // 2)[0][-1]
+        after = groups.decode_cursor(groups.encode_cursor(middle))
+        _report("deep page", _time(lambda: groups.list_groups(db, 2, 50, after), args.queries))
+
+        now = datetime.now(timezone.utc)
+        big, other = uuid.UUID(int=ranked[0][2][0]), uuid.UUID(int=ranked[-1][2][0])
+        bridge = Director(company_client_id=big, individual_client_id=other, is_active=True, updated_at=now)
+        unions, splits, reranks = [], [], []
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            forest.record(bridge)
+            unions.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            forest.forget(groups.link(bridge))
+            splits.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            forest.ranked()
+            reranks.append((time.perf_counter() - start) * 1000)
+        _report("union", unions)
+        _report("split", splits)
+        _report("re-rank", reranks)
+
+        def catch_up():
+            a, b = rng.choice(linked), rng.choice(linked)
+            added = db.execute(postgresql.insert(Director).values(company_client_id=a, individual_client_id=b, designation="Director")
+                               .on_conflict_do_nothing().returning(Director.company_client_id)).first()
+            db.commit()
+            start = time.perf_counter()
+            forest.current(db, max_age=0)
+            elapsed = (time.perf_counter() - start) * 1000
+            if added:
+                db.execute(delete(Director).where(Director.company_client_id == a, Director.individual_client_id == b))
+                db.commit()
+            return elapsed
+
+        _report("catch-up", [catch_up() for _ in range(args.queries)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+GST portal refresh — writing lookup results, and whole refresh passes.
+
+Builds (once; found again by GSTIN on later runs) --registrations GST
+registrations under one synthetic client, then times:
+
+    write (VALUES)        gst_portal.write for --batch lookup results: one
+                          UPDATE ... FROM (VALUES ...) and one search upsert
+    write (row by row)    the same results as one UPDATE per registration
+    pass, concurrency N   gst_portal.refresh_stale over every registration
+                          against MockProvider answering in --latency ms,
+                          N lookups at a time and no rate limit, reported
+                          as seconds per pass and lookups a second
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_gst_refresh --registrations 2000
+
+The target database must already have database/schema.sql and the
+migrations applied. Never point this at production data.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+import gst_portal
+from benchmarks.bench_client_search import _report
+from models import Client, GSTRegistration
+
+PAN = "GSTRB0000A"      # the synthetic client; its GSTINs are 27GSTRB + 4 digits + A1Z5
+
+
+def build(engine, registrations: int) -> None:
+    with engine.begin() as conn:
+        client_id = conn.execute(select(Client.id).where(Client.pan == PAN)).scalar()
+        if client_id is None:
+            client_id = uuid.uuid4()
+            conn.execute(insert(Client).values(id=client_id, pan=PAN, constitution="Company",
+                                               display_name="GST refresh bench", legal_name="GST REFRESH BENCH"))
+        have = set(conn.execute(select(GSTRegistration.gstin).where(GSTRegistration.client_id == client_id)).scalars())
+        missing = [n for n in range(registrations) if f"27GSTRB{n:04d}A1Z5" not in have]
+        if missing:
+            print(f"Adding {len(missing)} registrations…")
+            conn.execute(insert(GSTRegistration), [{"client_id": client_id, "gstin": f"27GSTRB{n:04d}A1Z5"} for n in missing])
+
+
+def _stale(engine):
+    with engine.begin() as conn:
+        conn.execute(update(GSTRegistration).where(GSTRegistration.gstin.like("27GSTRB%")).values(last_fetched_at=None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registrations", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=gst_portal.BATCH)
+    parser.add_argument("--latency", type=float, default=50, help="mock portal latency, ms")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+    if args.registrations > 10_000:
+        print("ERROR: --registrations is at most 10000 (four-digit GSTINs).")
+        sys.exit(1)
+
+    engine = create_engine(url)
+    build(engine, args.registrations)
+    portal = gst_portal.MockProvider(args.latency)
+
+    with Session(engine) as db:
+        regs = dict(db.execute(select(GSTRegistration.id, GSTRegistration.gstin)
+                               .where(GSTRegistration.gstin.like("27GSTRB%")).limit(args.batch)).all())
+        found = asyncio.run(gst_portal.lookup_many(regs, gst_portal.MockProvider()))
+        print(f"\n{args.registrations} registrations, batches of {len(found)}, {args.queries} runs per write case\n")
+
+        def values_write():
+            gst_portal.write(db, found)
+            db.commit()
+
+        def row_write():
+            for reg_id, t in found.items():
+                db.execute(update(GSTRegistration).where(GSTRegistration.id == reg_id).values(
+                    trade_name=t.trade_name, gstin_status=t.status, principal_address=t.principal_address,
+                    nature_of_business=t.nature_of_business, einvoice_applicable=t.einvoice_applicable,
+                    last_fetched_at=datetime.now(timezone.utc)))
+            db.commit()
+
+        for label, fn in (("write (VALUES)", values_write), ("write (row by row)", row_write)):
+            samples = []
+            for _ in range(args.queries):
+                start = time.perf_counter()
+                fn()
+                samples.append((time.perf_counter() - start) * 1000)
+            _report(label, samples)
+
+    print()
+    gst_portal.BATCH = args.batch
+    gst_portal._limit = gst_portal.RateLimit(0)
+    factory = sessionmaker(engine)
+    for n in args.concurrency:
+        gst_portal.CONCURRENCY = n
+        _stale(engine)
+        start = time.perf_counter()
+        written = asyncio.run(gst_portal.refresh_stale(factory, portal))
+        elapsed = time.perf_counter() - start
+        print(f"  pass, concurrency {n:<3}        {elapsed:8.2f} s    {written / elapsed:8.1f} lookups/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+List endpoints — full ORM entities vs. column projection.
+
+For GET /api/clients and GET /api/gst at --rows rows, times the two ways of
+producing the response: loading ORM entities and validating them into the list
+schema (the old path), and projection.project()/rows() feeding plain dicts to
+the same validation (the current path). Reports median latency and the peak
+Python memory allocated while building one response (tracemalloc).
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_list_projection --rows 10000
+
+Seeds clients (and one GSTIN per client) up to --rows if the scratch database
+has fewer. The target database must already have database/schema.sql and the
+migrations applied. Never point this at production data.
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+import projection
+from benchmarks.bench_client_search import seed as seed_clients
+from models import Client, GSTRegistration
+from schemas import ClientListItem, GSTListItem
+
+
+def seed_gst(engine, target: int):
+    with engine.begin() as conn:
+        have = conn.execute(select(func.count()).select_from(GSTRegistration)).scalar()
+        if have >= target:
+            return
+        print(f"Seeding {target - have} GST registrations…")
+        free = conn.execute(
+            select(Client.id, Client.pan)
+            .where(~select(GSTRegistration.id).where(GSTRegistration.client_id == Client.id).exists())
+            .limit(target - have)
+        ).all()
+        rows = [{"client_id": cid, "gstin": f"27{pan}1Z5", "state": "Maharashtra", "registration_type": "Regular"} for cid, pan in free]
+        for i in range(0, len(rows), 5000):
+            conn.execute(insert(GSTRegistration), rows[i:i + 5000])
+
+
+def orm_path(db: Session, model, schema, order_by, limit: int) -> list:
+    entities = db.query(model).order_by(*order_by).limit(limit).all()
+    return TypeAdapter(list[schema]).validate_python(entities, from_attributes=True)
+
+
+def projected_path(db: Session, model, schema, order_by, limit: int) -> list:
+    rows = projection.rows(db, projection.project(model, schema).order_by(*order_by).limit(limit))
+    return TypeAdapter(list[schema]).validate_python(rows)
+
+
+def measure(engine, fn, args, repeat: int) -> tuple[float, float, int]:
+    """Median ms, peak MiB allocated during one call, rows returned."""
+    times = []
+    for _ in range(repeat):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            out = fn(db, *args)
+            times.append((time.perf_counter() - start) * 1000)
+    gc.collect()
+    with Session(engine) as db:
+        tracemalloc.start()
+        out = fn(db, *args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return statistics.median(times), peak / 2 ** 20, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+
+    engine = create_engine(url)
+    seed_clients(engine, args.rows, random.Random(args.seed))
+    seed_gst(engine, args.rows)
+
+    cases = [
+        ("GET /clients", Client, ClientListItem, (Client.display_name, Client.id)),
+        ("GET /gst", GSTRegistration, GSTListItem, (GSTRegistration.gstin,)),
+    ]
+    print(f"\nmedian of {args.repeat} runs, up to {args.rows} rows per list\n")
+    for label, model, schema, order_by in cases:
+        call = (model, schema, order_by, args.rows)
+        for name, fn in [("orm entities", orm_path), ("projection", projected_path)]:
+            ms, mib, n = measure(engine, fn, call, args.repeat)
+            print(f"  {label:<14} {name:<13} {n:>6} rows   {ms:9.2f} ms   peak {mib:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
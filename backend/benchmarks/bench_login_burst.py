@@ -0,0 +1,106 @@
+"""
+Login burst vs. read latency.
+
+Drives a running API in two phases. First, readers alone call
+GET /api/clients?limit=20 to get a baseline. Then the same readers run while
+--logins concurrent clients hammer POST /api/auth/login. It reports login
+throughput, how many logins were shed with 503, and read p50/p95/p99 for
+both phases. A healthy setup keeps read latency close to the baseline during
+the burst.
+
+Usage:
+    cd backend
+    uvicorn main:app --port 8000            # in another shell
+    BENCH_API_URL=http://localhost:8000 BENCH_EMAIL=admin@cafirm.com BENCH_PASSWORD=... \\
+        python -m benchmarks.bench_login_burst --logins 32 --readers 8 --seconds 20
+
+Needs httpx (pip install httpx). Use a scratch deployment, not production.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+
+def _report(label: str, samples: list[float]):
+    if not samples:
+        print(f"  {label:<24} no samples")
+        return
+    samples = sorted(samples)
+    p = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    print(f"  {label:<24} n={len(samples):<6} p50 {p(0.50):8.2f} ms   p95 {p(0.95):8.2f} ms   "
+          f"p99 {p(0.99):8.2f} ms   mean {statistics.mean(samples):8.2f} ms")
+
+
+async def reader(http: httpx.AsyncClient, headers: dict, stop: float, out: list[float]):
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        r = await http.get("/api/clients", params={"limit": 20}, headers=headers)
+        r.raise_for_status()
+        out.append((time.perf_counter() - start) * 1000)
+
+
+async def login_loop(http: httpx.AsyncClient, creds: dict, stop: float, stats: dict):
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        r = await http.post("/api/auth/login", json=creds)
+        if r.status_code == 503:
+            stats["shed"] += 1
+            await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+            continue
+        r.raise_for_status()
+        stats["ok"] += 1
+        stats["latency"].append((time.perf_counter() - start) * 1000)
+
+
+async def run(args, base_url: str, creds: dict):
+    limits = httpx.Limits(max_connections=args.readers + args.logins + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as http:
+        r = await http.post("/api/auth/login", json=creds)
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        baseline: list[float] = []
+        stop = time.perf_counter() + args.seconds
+        await asyncio.gather(*(reader(http, headers, stop, baseline) for _ in range(args.readers)))
+
+        during: list[float] = []
+        stats = {"ok": 0, "shed": 0, "latency": []}
+        stop = time.perf_counter() + args.seconds
+        await asyncio.gather(
+            *(reader(http, headers, stop, during) for _ in range(args.readers)),
+            *(login_loop(http, creds, stop, stats) for _ in range(args.logins)),
+        )
+
+        pool = (await http.get("/health/hash-pool", headers=headers)).json()
+
+    print(f"\n{args.readers} readers, {args.logins} concurrent login clients, {args.seconds}s per phase\n")
+    _report("reads (baseline)", baseline)
+    _report("reads (during burst)", during)
+    _report("logins", stats["latency"])
+    print(f"\n  logins/s {stats['ok'] / args.seconds:8.2f}   shed with 503: {stats['shed']}")
+    print(f"  hash pool: {pool}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    base_url = os.environ.get("BENCH_API_URL")
+    email, password = os.environ.get("BENCH_EMAIL"), os.environ.get("BENCH_PASSWORD")
+    if not (base_url and email and password):
+        print("ERROR: set BENCH_API_URL, BENCH_EMAIL and BENCH_PASSWORD (an admin account).")
+        sys.exit(1)
+
+    asyncio.run(run(args, base_url, {"email": email, "password": password}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Response serialisation — FastAPI's response_model path vs. projection.respond().
+
+For --rows ClientListItem and GSTListItem rows (dicts, as projection.rows()
+returns them), times turning the endpoint's return value into response bytes:
+
+    response_model + json    what every endpoint did: FastAPI validates
+                             through the response field, dumps to Python
+                             objects, and the stdlib json encoder writes them
+    response_model + orjson  the same, with ORJSONResponse (now the default
+                             response class, used by non-GET endpoints)
+    respond() TypeAdapter    cached TypeAdapter validates and pydantic-core
+                             writes the JSON directly (list/detail GETs)
+
+All three must produce the same JSON; the benchmark checks that before timing.
+No database needed.
+
+Usage:
+    cd backend
+    python -m benchmarks.bench_serialisation --rows 10000
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+import projection
+from schemas import ClientListItem, GSTListItem
+
+STATES = ["Maharashtra", "Gujarat", "Karnataka", "Tamil Nadu", "Delhi"]
+
+
+def client_rows(n: int, rng: random.Random) -> list[dict]:
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": uuid.UUID(int=rng.getrandbits(128)),
+            "pan": f"AAAC{i:05d}K",
+            "constitution": rng.choice(["Company", "Individual", "LLP", "Partnership Firm"]),
+            "display_name": f"Client {i} Pvt Ltd",
+            "legal_name": f"CLIENT {i} PRIVATE LIMITED",
+            "is_active": rng.random() > 0.1,
+            "is_direct_client": rng.random() > 0.3,
+            "is_on_retainer": rng.random() > 0.5,
+            "primary_phone": f"98{i:08d}",
+            "primary_email": f"accounts{i}@example.com",
+            "din": f"{i:08d}" if rng.random() > 0.7 else None,
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+
+
+def gst_rows(n: int, rng: random.Random) -> list[dict]:
+    return [
+        {
+            "id": uuid.UUID(int=rng.getrandbits(128)),
+            "client_id": uuid.UUID(int=rng.getrandbits(128)),
+            "gstin": f"27AAAC{i:05d}K1Z5",
+            "state": rng.choice(STATES),
+            "registration_type": "Regular",
+            "registration_date": date(2017, 7, 1) + timedelta(days=i % 2000),
+            "cancellation_date": None,
+            "trade_name": f"Client {i} Traders",
+            "gstin_status": "Active",
+            "principal_address": f"Plot {i}, MIDC Industrial Area, Andheri East, Mumbai 400093",
+            "nature_of_business": "Wholesale Business, Retail Business",
+            "einvoice_applicable": rng.random() > 0.5,
+            "last_fetched_at": None,
+            "is_active": True,
+        }
+        for i in range(n)
+    ]
+
+
+def _response_model_path(schema, response_class):
+    field = create_model_field(name="Response", type_=list[schema], mode="serialization")
+
+    def run(rows: list[dict]) -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=rows, is_coroutine=True))
+        return response_class(content).body
+
+    return run
+
+
+def _respond_path(schema):
+    return lambda rows: projection.respond(schema, None, rows).body
+
+
+def measure(fn, rows: list[dict], repeat: int) -> tuple[float, int]:
+    """Median ms and response size in bytes."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(rows)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [
+        ("ClientListItem", ClientListItem, client_rows(args.rows, rng)),
+        ("GSTListItem", GSTListItem, gst_rows(args.rows, rng)),
+    ]
+    print(f"\n{args.rows} rows, median of {args.repeat} runs\n")
+    for label, schema, rows in cases:
+        paths = [
+            ("response_model + json", _response_model_path(schema, JSONResponse)),
+            ("response_model + orjson", _response_model_path(schema, ORJSONResponse)),
+            ("respond() TypeAdapter", _respond_path(schema)),
+        ]
+        expected = json.loads(paths[0][1](rows[:50]))
+        for name, fn in paths[1:]:
+            assert json.loads(fn(rows[:50])) == expected, f"{label}: {name} output differs"
+        baseline = None
+        for name, fn in paths:
+            ms, size = measure(fn, rows, args.repeat)
+            baseline = baseline or ms
+            print(f"  {label:<15} {name:<24} {ms:9.2f} ms  {baseline / ms:5.1f}x   {size / 1024:8.0f} kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Dashboard counts — trigger-maintained dashboard_stats against counting live.
+
+Seeds synthetic clients up to --clients rows (as bench_client_search does),
+then times, over --queries runs each:
+
+    stats read           stats.counts() + summary() — GET /api/stats
+    group by             the same numbers counted from the tables on every
+                         request (the query stats.reconcile() runs)
+
+and what the triggers cost writers, inserting --batch clients in one
+statement and updating them all (both rolled back afterwards), with the
+dashboard_stats triggers enabled and then disabled (inside the same
+rolled-back transaction).
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_stats --clients 100000
+
+The target database must already have database/schema.sql and the
+migrations applied. Never point this at production data.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+import stats
+from benchmarks.bench_client_search import _report, seed as seed_clients
+
+TRIGGERS = ["dashboard_stats_insert", "dashboard_stats_update", "dashboard_stats_delete"]
+
+
+def _time(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def _writes(db: Session, batch: int, triggers: bool) -> tuple[float, float]:
+    """ms to insert batch clients in one statement, then to update them all; rolled back."""
+    if not triggers:
+        for trigger in TRIGGERS:
+            db.execute(text(f"ALTER TABLE clients DISABLE TRIGGER {trigger}"))
+    start = time.perf_counter()
+    db.execute(text(
+        "INSERT INTO clients (pan, constitution, display_name, legal_name) "
+        "SELECT 'ZZ' || lpad(g::text, 8, '0'), 'Individual', 'Bench', 'Bench' FROM generate_series(1, :n) g"
+    ), {"n": batch})
+    inserted = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    db.execute(text("UPDATE clients SET is_on_retainer = NOT is_on_retainer WHERE pan LIKE 'ZZ%'"))
+    updated = (time.perf_counter() - start) * 1000
+    db.rollback()
+    return inserted, updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+
+    engine = create_engine(url)
+    total = seed_clients(engine, args.clients, random.Random(args.seed))
+    with Session(engine) as db:
+        fixed = stats.reconcile(db)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE clients"))
+        conn.execute(text("VACUUM ANALYZE dashboard_stats"))
+
+    print(f"\n{total} clients ({len(fixed)} stale counts corrected first), {args.queries} runs per case\n")
+    with Session(engine) as db:
+        _report("stats read", _time(lambda: stats.summary(stats.counts(db)), args.queries))
+        _report("group by", _time(lambda: db.execute(stats._ACTUAL).all(), max(5, args.queries // 10)))
+        db.rollback()
+
+        runs = 3
+        with_triggers = [_writes(db, args.batch, True) for _ in range(runs)]
+        without = [_writes(db, args.batch, False) for _ in range(runs)]
+
+    print(f"\n{args.batch}-row writes (ms, best of {runs})   insert     update")
+    print(f"  with triggers                  {min(w[0] for w in with_triggers):8.1f}   {min(w[1] for w in with_triggers):8.1f}")
+    print(f"  without                        {min(w[0] for w in without):8.1f}   {min(w[1] for w in without):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
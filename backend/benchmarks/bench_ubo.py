@@ -0,0 +1,152 @@
+"""
+Beneficial ownership over a large group — GET /api/clients/{id}/ubo.
+
+Builds (once; found again by PAN on later runs) a synthetic group of
+--entities holding companies in --layers layers above one target company.
+Every company is held by two to four companies of the layers above or by
+people from a pool of --people; the top layer only by people. One holding in
+fifty points back down the group, so the group also has cross-holdings.
+Then times, over --queries runs each:
+
+    index build    loading the ownership index in full (first read, or
+                   after a delete)
+    index update   bringing it up to date after one holding was edited
+    resolve        walking and resolving the group from the index
+    ubo            everything the endpoint does when nothing has changed
+                   (ownership.ubo: version check, resolve, names)
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.bench_ubo --entities 3000
+
+The target database must already have database/schema.sql and the
+migrations applied. Never point this at production data.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import Session
+
+import ownership
+from benchmarks.bench_client_search import _report
+from models import Client, Shareholder
+
+PREFIX = "UBOB"     # PANs of the synthetic group: UBOB + kind + 5 digits
+
+
+def build(engine, entities: int, layers: int, people: int, rng: random.Random) -> uuid.UUID:
+    target_pan = f"{PREFIX}T00000"
+    with engine.begin() as conn:
+        found = conn.execute(select(Client.id).where(Client.pan == target_pan)).scalar()
+        if found:
+            return found
+        print(f"Building a group of {entities} companies and {people} people…")
+        person_ids = [uuid.uuid4() for _ in range(people)]
+        company_ids = [uuid.uuid4() for _ in range(entities)]
+        target = uuid.uuid4()
+        conn.execute(insert(Client), [
+            {"id": i, "pan": f"{PREFIX}P{n:05d}", "constitution": "Individual", "display_name": f"Person {n}", "legal_name": f"PERSON {n}"}
+            for n, i in enumerate(person_ids)
+        ] + [
+            {"id": i, "pan": f"{PREFIX}C{n:05d}", "constitution": "Company", "display_name": f"Holdco {n}", "legal_name": f"HOLDCO {n}"}
+            for n, i in enumerate(company_ids)
+        ] + [
+            {"id": target, "pan": target_pan, "constitution": "Company", "display_name": "Target", "legal_name": "TARGET"}
+        ])
+
+        per_layer = max(1, entities // layers)
+        tiers = [company_ids[k:k + per_layer] for k in range(0, entities, per_layer)]
+        rows = []
+
+        def hold(owned, holders):
+            split = [rng.random() + 0.2 for _ in holders]
+            for (is_person, holder), weight in zip(holders, split):
+                rows.append({
+                    "company_client_id": owned,
+                    "holder_type": "Individual" if is_person else "Company",
+                    "individual_client_id": holder if is_person else None,
+                    "holding_entity_client_id": None if is_person else holder,
+                    "percentage": round(100 * weight / sum(split), 2),
+                })
+
+        hold(target, [(False, c) for c in rng.sample(tiers[0], min(4, len(tiers[0])))])
+        for depth, tier in enumerate(tiers):
+            above = [c for t in tiers[depth + 1:depth + 3] for c in t]
+            below = [c for t in tiers[:depth] for c in t]
+            for company in tier:
+                holders = set()
+                for _ in range(rng.randint(2, 4)):
+                    if below and rng.random() < 0.02:
+                        holders.add((False, rng.choice(below)))
+                    elif above and rng.random() < 0.7:
+                        holders.add((False, rng.choice(above)))
+                    else:
+                        holders.add((True, rng.choice(person_ids)))
+                hold(company, list(holders))
+        for k in range(0, len(rows), 5000):
+            conn.execute(insert(Shareholder), rows[k:k + 5000])
+        print(f"  {len(rows)} holdings")
+        return target
+
+
+def _time(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=3000)
+    parser.add_argument("--layers", type=int, default=12)
+    parser.add_argument("--people", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+
+    engine = create_engine(url)
+    target = build(engine, args.entities, args.layers, args.people, random.Random(args.seed))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE shareholders"))
+        conn.execute(text("VACUUM ANALYZE partners"))
+
+    with Session(engine) as db:
+        report = ownership.ubo(db, target)
+        index = ownership.index.current(db)
+        print(f"\n{sum(map(len, index.values()))} holdings in the index, {report['entities']} entities above the target, "
+              f"{len(report['owners'])} ultimate owners, {len(report['cycles'])} cycle(s), {args.queries} runs per case\n")
+
+        def rebuild():
+            ownership.index = ownership.OwnershipIndex()
+            ownership.index.current(db)
+
+        def edit():
+            db.execute(text("UPDATE shareholders SET percentage = percentage WHERE id = "
+                            "(SELECT id FROM shareholders WHERE company_client_id = :t LIMIT 1)"), {"t": target})
+            db.commit()
+            start = time.perf_counter()
+            ownership.index.current(db)
+            return (time.perf_counter() - start) * 1000
+
+        _report("index build", _time(rebuild, max(5, args.queries // 5)))
+        _report("index update", [edit() for _ in range(args.queries)])
+        _report("resolve", _time(lambda: ownership.resolve(target, index), args.queries))
+        _report("ubo", _time(lambda: ownership.ubo(db, target), args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Query-count check for the relationship endpoints.
+
+Every endpoint below renders linked client names (director / shareholder /
+partner names, GST signatories). Those used to be lazy-loaded one row at a
+time, so the number of SELECTs grew with the result size. This script seeds
+the same shape of data at two sizes, calls each endpoint through the app and
+fails if the statement count differs between the two — i.e. if anything has
+gone back to loading per row.
+
+Usage:
+    cd backend
+    BENCH_DATABASE_URL=postgresql://postgres:pw@localhost:5432/ca_bench \\
+        python -m benchmarks.check_query_counts --small 3 --large 60
+
+Seeded rows are deleted again at the end. Never point this at production data.
+"""
+import argparse
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete, event
+from sqlalchemy.orm import sessionmaker
+
+from auth import get_current_user
+from database import ThreadedSession, get_async_db
+from main import app
+from models import Client, Director, GSTRegistration, GSTSignatory, Partner, Shareholder, User
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_):
+        self.count += 1
+
+    @contextmanager
+    def measure(self):
+        start = self.count
+        box = {}
+        yield box
+        box["statements"] = self.count - start
+
+
+def _client(tag: str, i: int, constitution: str) -> Client:
+    return Client(
+        pan=f"Q{tag}{i:04d}Z"[:10], constitution=constitution, date_of_incorporation_birth=date(2000, 1, 1),
+        display_name=f"qcount {tag} {constitution} {i}", legal_name=f"QCOUNT {tag} {constitution} {i}",
+    )
+
+
+def seed(Session, n: int) -> dict:
+    """One company and one firm, linked to n individuals through every relationship table."""
+    tag = uuid.uuid4().hex[:4].upper()
+    db = Session()
+    try:
+        company = _client(tag, 0, "Company")
+        firm = _client(tag, 1, "Partnership Firm")
+        people = [_client(tag, 10 + i, "Individual") for i in range(n)]
+        db.add_all([company, firm, *people])
+        db.flush()
+
+        gst = GSTRegistration(client_id=company.id, gstin=f"27Q{tag}{n:04d}Z1Z"[:15])
+        db.add(gst)
+        db.flush()
+        for p in people:
+            db.add(Director(company_client_id=company.id, individual_client_id=p.id, designation="Director"))
+            db.add(Shareholder(company_client_id=company.id, holder_type="Individual", individual_client_id=p.id))
+            db.add(Partner(firm_llp_client_id=firm.id, individual_client_id=p.id, role="Partner"))
+            db.add(GSTSignatory(gst_registration_id=gst.id, signatory_client_id=p.id))
+        db.commit()
+        return {"company": company.id, "firm": firm.id, "gst": gst.id, "people": [p.id for p in people]}
+    finally:
+        db.close()
+
+
+def cleanup(Session, ids: dict):
+    db = Session()
+    try:
+        # company/firm first: their cascades take the link rows and the GSTIN with them
+        db.execute(delete(Client).where(Client.id.in_([ids["company"], ids["firm"]])))
+        db.execute(delete(Client).where(Client.id.in_(ids["people"])))
+        db.commit()
+    finally:
+        db.close()
+
+
+def endpoints(ids: dict) -> dict:
+    return {
+        "GET /directors":          f"/api/directors?company_client_id={ids['company']}",
+        "GET /shareholders":       f"/api/shareholders?company_client_id={ids['company']}",
+        "GET /partners":           f"/api/partners?firm_llp_client_id={ids['firm']}",
+        "GET /gst/{id}":           f"/api/gst/{ids['gst']}",
+        "GET /clients/{id}/full":  f"/api/clients/{ids['company']}/full",
+    }
+
+
+def run(client: TestClient, counter: StatementCounter, Session, n: int) -> dict:
+    ids = seed(Session, n)
+    try:
+        counts = {}
+        for label, url in endpoints(ids).items():
+            with counter.measure() as m:
+                r = client.get(url)
+            r.raise_for_status()
+            counts[label] = m["statements"]
+        return counts
+    finally:
+        cleanup(Session, ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small", type=int, default=3)
+    parser.add_argument("--large", type=int, default=60)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        print("ERROR: set BENCH_DATABASE_URL to a scratch database.")
+        sys.exit(1)
+
+    engine = create_engine(url)
+    Session = sessionmaker(autoflush=False, bind=engine)
+    counter = StatementCounter(engine)
+
+    async def bench_db():
+        db = ThreadedSession(Session())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    app.dependency_overrides[get_async_db] = bench_db
+    app.dependency_overrides[get_current_user] = lambda: User(role="admin", is_active=True)
+    client = TestClient(app)
+
+    small = run(client, counter, Session, args.small)
+    large = run(client, counter, Session, args.large)
+
+    print(f"\n{'endpoint':<26}{f'{args.small} rows':>10}{f'{args.large} rows':>10}")
+    failed = []
+    for label in small:
+        mark = "" if small[label] == large[label] else "   <-- grows with rows"
+        print(f"  {label:<24}{small[label]:>10}{large[label]:>10}{mark}")
+        if mark:
+            failed.append(label)
+    if failed:
+        print(f"\nFAIL: query count depends on result size for {', '.join(failed)}")
+        sys.exit(1)
+    print("\nOK: constant query count")
+
+
+if __name__ == "__main__":
+    main()
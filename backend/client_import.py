@@ -0,0 +1,419 @@
+"""
+Bulk client import from CSV or Excel.
+
+The file is read incrementally (csv module / openpyxl read-only mode) and
+handled in batches, each its own transaction:
+
+    1. validate the batch against ClientCreate, plus the enum columns and
+       PANs repeated within the file, collecting per-row errors
+    2. look up which PANs are already clients, in one query
+    3. encrypt the credential fields in the configured layout; an existing
+       client's stored credentials are merged with the file's
+    4. COPY the rows into temporary staging tables
+    5. merge: UPDATE the existing clients from staging, INSERT the new ones,
+       upsert client_credentials, and re-index the batch for search
+
+Blank cells never overwrite — an existing client keeps every value the file
+leaves empty. With existing="skip", rows whose PAN is already a client are
+reported instead of merged. Columns are ClientCreate's field names (header
+matching ignores case and treats spaces as underscores); dates may be
+YYYY-MM-DD or DD/MM/YYYY.
+
+The API exposes this as POST /api/clients/import; from the shell:
+
+    cd backend
+    python client_import.py clients.xlsx [--existing skip] [--dry-run] [--report errors.csv]
+
+Excel files need openpyxl.
+"""
+import argparse
+import csv
+import io
+import re
+import sys
+import time
+import uuid
+from datetime import date, datetime
+from itertools import islice
+from typing import IO, Iterator, Optional
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import crypto
+import search_index
+from models import Client, ClientCredentials
+from schemas import ClientCreate, ClientImportError, ClientImportReport
+
+try:
+    import openpyxl
+except ImportError:     # pragma: no cover - depends on the install
+    openpyxl = None
+
+BATCH_SIZE = 2000
+
+# ClientCreate's fields by the table they are stored in
+CLIENT_COLUMNS     = [f for f in ClientCreate.model_fields if f in Client.__table__.columns]
+CREDENTIAL_COLUMNS = [f for f in ClientCreate.model_fields if f in ClientCredentials.__table__.columns]
+STAGED_CREDENTIALS = ["client_id", *CREDENTIAL_COLUMNS, "credentials_sealed"]
+
+# Postgres enums: one bad value would fail the whole batch's COPY, so check them per row
+ENUMS = {name: Client.__table__.columns[name].type.enums for name in ("constitution", "gender")}
+DATE_FIELDS = {n for n, f in ClientCreate.model_fields.items() if f.annotation in (date, Optional[date])}
+TEXT_FIELDS = {n for n, f in ClientCreate.model_fields.items() if f.annotation in (str, Optional[str])}
+REQUIRED    = [n for n, f in ClientCreate.model_fields.items() if f.is_required()]
+
+_ROWS = TypeAdapter(list[ClientCreate])
+_DMY = re.compile(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})")
+
+
+# ── Reading ──
+
+def _column(name) -> str:
+    return re.sub(r"\s+", "_", str(name or "").strip()).lower()
+
+
+def _unquote(row: list[str]) -> list[str]:
+    """Undo export's formula guard: '=..., '+..., '-..., '@... back to the text itself."""
+    return [v[1:] if v[:1] == "'" and v[1:2] in ("=", "+", "-", "@", "\t", "\r") else v for v in row]
+
+
+def _records(header, rows) -> Iterator[tuple[int, dict]]:
+    """Check the header, then yield (line, {field: value}) for each non-blank row."""
+    columns = [_column(h) for h in header]
+    unknown = sorted({c for c in columns if c and c not in ClientCreate.model_fields})
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    missing = [f for f in REQUIRED if f not in columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    def generate():
+        for line, row in enumerate(rows, start=2):
+            record = {}
+            for col, value in zip(columns, row):
+                if isinstance(value, str):
+                    value = value.strip()
+                if col and value is not None and value != "":
+                    record[col] = value
+            if record:
+                yield line, record
+
+    return generate()
+
+
+def read_csv(f: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    reader = csv.reader(io.TextIOWrapper(f, encoding="utf-8-sig", newline=""))
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("The file is empty")
+    return _records(header, map(_unquote, reader))
+
+
+def read_xlsx(f: IO[bytes]) -> Iterator[tuple[int, dict]]:
+    if openpyxl is None:
+        raise ValueError("Excel import needs openpyxl installed; upload a CSV instead")
+    rows = openpyxl.load_workbook(f, read_only=True, data_only=True).active.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty")
+    return _records(header, rows)
+
+
+def read(f: IO[bytes], filename: str) -> Iterator[tuple[int, dict]]:
+    """Records of a .csv or .xlsx file. Raises ValueError for an unusable file or header."""
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return read_csv(f)
+    if name.endswith(".xlsx"):
+        return read_xlsx(f)
+    raise ValueError("Upload a .csv or .xlsx file")
+
+
+# ── Validation ──
+
+def _prepare(record: dict) -> dict:
+    """Spreadsheet values -> what ClientCreate accepts (numbers as text, datetimes and DD/MM/YYYY as dates)."""
+    out = {}
+    for name, value in record.items():
+        if name in DATE_FIELDS:
+            if isinstance(value, datetime):
+                value = value.date()
+            elif isinstance(value, str) and (m := _DMY.fullmatch(value)):
+                day, month, year = map(int, m.groups())
+                try:
+                    value = date(year, month, day)
+                except ValueError:
+                    pass        # left as text for the validation error
+        elif name in TEXT_FIELDS and isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(int(value)) if float(value).is_integer() else str(value)
+        out[name] = value
+    return out
+
+
+def _messages(error: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+
+def _validate(batch: list[tuple[int, dict]], seen: dict[str, int], report: ClientImportReport) -> list[tuple[int, ClientCreate]]:
+    records = [_prepare(r) for _, r in batch]
+    try:
+        models = _ROWS.validate_python(records)
+    except ValidationError:
+        # Some row is bad — redo them one by one to tell which
+        models = []
+        for (line, _), record in zip(batch, records):
+            try:
+                models.append(ClientCreate.model_validate(record))
+            except ValidationError as e:
+                models.append(None)
+                report.errors.append(ClientImportError(row=line, pan=record.get("pan"), errors=_messages(e)))
+
+    checked = []
+    for (line, _), model in zip(batch, models):
+        if model is None:
+            continue
+        errors = [
+            f"{name}: must be one of {', '.join(allowed)}"
+            for name, allowed in ENUMS.items()
+            if getattr(model, name) is not None and getattr(model, name) not in allowed
+        ]
+        if model.pan in seen:
+            errors.append(f"pan: repeats row {seen[model.pan]}")
+        if errors:
+            report.errors.append(ClientImportError(row=line, pan=model.pan, errors=errors))
+            continue
+        seen[model.pan] = line
+        checked.append((line, model))
+    return checked
+
+
+# ── Loading ──
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value) -> str:
+    """One field in COPY's text format."""
+    if value is None:
+        return r"\N"
+    if isinstance(value, str):
+        return value.translate(_ESCAPES)
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, bytes):
+        return "\\\\x" + value.hex()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, list):
+        items = ('"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"' for v in value)
+        return ("{" + ",".join(items) + "}").translate(_ESCAPES)
+    return str(value).translate(_ESCAPES)
+
+
+def _copy(db: Session, table: str, columns: list[str], rows: list[dict]):
+    buf = io.StringIO()
+    for row in rows:
+        # None and text are nearly every value: handled inline, the rest by _copy_value
+        buf.write("\t".join([
+            r"\N" if v is None else v.translate(_ESCAPES) if v.__class__ is str else _copy_value(v)
+            for v in map(row.get, columns)
+        ]))
+        buf.write("\n")
+    buf.seek(0)
+    cursor = db.connection().connection.cursor()
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+
+
+def _stage(db: Session):
+    """Temporary staging tables shaped like the targets minus their constraints, dropped at commit."""
+    cols = ", ".join(CLIENT_COLUMNS)
+    db.execute(text(
+        f"CREATE TEMP TABLE import_clients ON COMMIT DROP AS "
+        f"SELECT id, {cols}, true AS is_new FROM clients WITH NO DATA"
+    ))
+    db.execute(text(
+        f"CREATE TEMP TABLE import_credentials ON COMMIT DROP AS "
+        f"SELECT {', '.join(STAGED_CREDENTIALS)} FROM client_credentials WITH NO DATA"
+    ))
+    db.execute(text(
+        f"CREATE TEMP TABLE import_search ON COMMIT DROP AS "
+        f"SELECT {', '.join(search_index.COLUMNS)} FROM search_documents WITH NO DATA"
+    ))
+
+
+class _NewCredentials:
+    """A new client's credentials row as crypto.store() sees it, without ORM instrumentation."""
+    credential_context = ClientCredentials.credential_context
+
+    def __init__(self, client_id: uuid.UUID):
+        self.client_id = self.id = client_id
+        self.credentials_sealed = None
+        for c in CREDENTIAL_COLUMNS:
+            setattr(self, c, None)
+
+
+# Merged clients come back with what their search document needs
+_RETURNING = "id, pan, din, tan, cin_llpin, display_name, legal_name, constitution"
+_SET_CLIENT = ", ".join(f"{c} = COALESCE(s.{c}, c.{c})" for c in CLIENT_COLUMNS if c != "pan")
+_UPDATE_CLIENTS = text(
+    f"UPDATE clients c SET {_SET_CLIENT} FROM import_clients s WHERE c.id = s.id AND NOT s.is_new "
+    f"RETURNING {', '.join('c.' + col for col in _RETURNING.split(', '))}"
+)
+_INSERT_CLIENTS = text(
+    f"INSERT INTO clients (id, {', '.join(CLIENT_COLUMNS)}) "
+    f"SELECT id, {', '.join(CLIENT_COLUMNS)} FROM import_clients WHERE is_new "
+    f"ON CONFLICT DO NOTHING RETURNING {_RETURNING}"
+)
+_SET_CREDENTIALS = ", ".join(f"{c} = EXCLUDED.{c}" for c in STAGED_CREDENTIALS[1:])
+_UPSERT_CREDENTIALS = text(
+    f"INSERT INTO client_credentials ({', '.join(STAGED_CREDENTIALS)}) "
+    f"SELECT {', '.join(STAGED_CREDENTIALS)} FROM import_credentials "
+    f"ON CONFLICT (client_id) DO UPDATE SET {_SET_CREDENTIALS}"
+)
+
+
+def _merge(db: Session, checked: list[tuple[int, ClientCreate]], encrypted_fields: list[str], existing: str,
+           report: ClientImportReport):
+    ids = dict(db.execute(select(Client.pan, Client.id).where(Client.pan.in_([m.pan for _, m in checked]))).all())
+    if existing == "skip":
+        for line, m in checked:
+            if m.pan in ids:
+                report.errors.append(ClientImportError(row=line, pan=m.pan, errors=["PAN already exists"]))
+        checked = [(line, m) for line, m in checked if m.pan not in ids]
+        ids = {}
+
+    # Stored credentials of existing clients the file has credentials for — merged, not replaced
+    with_creds = [ids[m.pan] for _, m in checked
+                  if m.pan in ids and any(f in m.model_fields_set for f in CREDENTIAL_COLUMNS)]
+    stored = {}
+    if with_creds:
+        for cc in db.scalars(select(ClientCredentials).where(ClientCredentials.client_id.in_(with_creds))):
+            db.expunge(cc)      # changed below only to stage its new values
+            stored[cc.client_id] = cc
+
+    clients, credentials, lines = [], [], {}
+    for line, m in checked:
+        is_new = m.pan not in ids
+        client_id = uuid.uuid4() if is_new else ids[m.pan]
+        # New clients take ClientCreate's defaults; existing ones only what the file sets
+        data = m.model_dump() if is_new else m.model_dump(include=m.model_fields_set)
+        creds = {f: data.pop(f) for f in CREDENTIAL_COLUMNS if f in data}
+        creds = {f: v for f, v in creds.items() if v is not None and v not in (crypto.MASK, crypto.UNREADABLE)}    # masked in an export
+        clients.append({**data, "id": client_id, "is_new": is_new})
+        lines[client_id] = (line, m.pan)
+        if creds:
+            cc = stored.get(client_id) or _NewCredentials(client_id)
+            secrets = {f: creds.pop(f) for f in encrypted_fields if f in creds}
+            for f, v in creds.items():
+                setattr(cc, f, v)
+            crypto.store(cc, secrets, encrypted_fields)
+            credentials.append({c: getattr(cc, c) for c in STAGED_CREDENTIALS})
+
+    _stage(db)
+    _copy(db, "import_clients", ["id", *CLIENT_COLUMNS, "is_new"], clients)
+    updated = db.execute(_UPDATE_CLIENTS).all()
+    inserted = db.execute(_INSERT_CLIENTS).all()
+    merged = {r.id for r in updated} | {r.id for r in inserted}
+    _copy(db, "import_credentials", STAGED_CREDENTIALS, [c for c in credentials if c["client_id"] in merged])
+    db.execute(_UPSERT_CREDENTIALS)
+    _copy(db, "import_search", search_index.COLUMNS, search_index.documents(Client, updated + inserted))
+    search_index.upsert_from(db, "import_search")
+
+    report.inserted += len(inserted)
+    report.updated += len(updated)
+    known = set(ids.values())
+    for client_id, (line, pan) in lines.items():
+        if client_id in merged:
+            continue
+        why = "Client was deleted during the import" if client_id in known \
+            else "PAN was added by someone else during the import; re-run to merge"
+        report.errors.append(ClientImportError(row=line, pan=pan, errors=[why]))
+
+
+def run(db: Session, records: Iterator[tuple[int, dict]], encrypted_fields: list[str], existing: str = "update",
+        batch_size: int = BATCH_SIZE, dry_run: bool = False, progress=None) -> ClientImportReport:
+    """
+    Import records (from read()) in batches of batch_size. A batch the
+    database rejects is rolled back and all its rows reported; the others
+    stay committed. dry_run rolls every batch back.
+    """
+    report = ClientImportReport(dry_run=dry_run)
+    seen: dict[str, int] = {}       # PAN -> first row it appeared on
+    while batch := list(islice(records, batch_size)):
+        report.rows += len(batch)
+        checked = _validate(batch, seen, report)
+        if checked:
+            counts = report.inserted, report.updated, len(report.errors)
+            try:
+                _merge(db, checked, encrypted_fields, existing, report)
+                if dry_run:
+                    db.rollback()
+                else:
+                    db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                report.inserted, report.updated = counts[:2]
+                del report.errors[counts[2]:]
+                message = str(getattr(e, "orig", None) or e).strip().splitlines()[0]
+                report.errors += [ClientImportError(row=line, pan=m.pan, errors=[f"batch rejected: {message}"])
+                                  for line, m in checked]
+        if progress:
+            progress(report)
+    report.errors.sort(key=lambda e: e.row)
+    return report
+
+
+def write_errors(report: ClientImportReport, f: IO[str]):
+    writer = csv.writer(f)
+    writer.writerow(["row", "pan", "errors"])
+    for e in report.errors:
+        writer.writerow([e.row, e.pan or "", "; ".join(e.errors)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", help=".csv or .xlsx, one client per row")
+    parser.add_argument("--existing", choices=["update", "skip"], default="update",
+                        help="what to do with rows whose PAN is already a client")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate and merge, then roll back")
+    parser.add_argument("--report", help="write the per-row errors to this CSV file")
+    args = parser.parse_args()
+
+    # Here rather than at the top: the clients router imports this module
+    from database import SessionLocal
+    from routers.clients import ENCRYPTED_FIELDS
+
+    start = time.perf_counter()
+
+    def progress(r: ClientImportReport):
+        elapsed = time.perf_counter() - start
+        print(f"  {r.rows:>8} rows  {r.inserted:>8} inserted  {r.updated:>8} updated  {len(r.errors):>6} errors"
+              f"  {r.rows / elapsed:8.0f} rows/s", flush=True)
+
+    with open(args.file, "rb") as f, SessionLocal() as db:
+        try:
+            records = read(f, args.file)
+        except ValueError as e:
+            sys.exit(f"ERROR: {e}")
+        report = run(db, records, ENCRYPTED_FIELDS, existing=args.existing, batch_size=args.batch_size,
+                     dry_run=args.dry_run, progress=progress)
+
+    verb = "Would import" if args.dry_run else "Imported"
+    print(f"\n{verb} {report.inserted + report.updated}/{report.rows} rows "
+          f"({report.inserted} new, {report.updated} updated) in {time.perf_counter() - start:.1f}s")
+    if report.errors:
+        if args.report:
+            with open(args.report, "w", newline="") as out:
+                write_errors(report, out)
+            print(f"{len(report.errors)} rows not imported — see {args.report}")
+        else:
+            print(f"{len(report.errors)} rows not imported:")
+            write_errors(report, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
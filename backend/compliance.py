@@ -0,0 +1,241 @@
+"""
+Compliance expiry engine — what lapses when, across the whole book.
+
+Five dated columns feed it:
+
+    dsc                   clients.dsc_expiry_date
+    passport              clients.passport_expiry
+    other_registration    other_registrations.valid_until (MSME, FSSAI, IEC ...)
+    gst_cancellation      gst_registrations.cancellation_date
+    epf_esi_cancellation  epf_esi_registrations.cancellation_date
+
+upcoming() lists what falls due in a window of days as a UNION ALL of one
+range scan per source, each over a partial index of its non-null dates
+(migration 008) and each cut off at the page size before the union is
+sorted, so a page costs the same whether the window holds ten rows or ten
+thousand. Only active clients are included, and only active other
+registrations (an inactive one has been renewed under a new number or
+surrendered).
+
+The dashboard asks a cheaper question — how many per day and per source —
+and that is answered from a rolling calendar held in memory: per-day counts
+of every source from LOOKBACK_DAYS back to HORIZON_DAYS ahead, built by one
+grouped query. It is rebuilt when the date changes or when any of the four
+tables' versions (see conditional.py) moves.
+Checking those versions is most of the cost of a read, so
+GET /compliance/calendar re-checks at most every CALENDAR_TTL_SECONDS and
+otherwise answers straight from memory; the upcoming list checks every
+time, so its rows and ETag are always current.
+Each worker process keeps its own calendar.
+"""
+import base64
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import String, cast, func, literal, null, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+import conditional
+from models import Client, EPFESIRegistration, GSTRegistration, OtherRegistration
+
+LOOKBACK_DAYS = int(os.environ.get("COMPLIANCE_LOOKBACK_DAYS", "366"))
+HORIZON_DAYS = int(os.environ.get("COMPLIANCE_HORIZON_DAYS", "366"))
+# How long a calendar read may trust the last version check (0: check every time)
+CALENDAR_TTL_SECONDS = float(os.environ.get("COMPLIANCE_CALENDAR_TTL_SECONDS", "5"))
+
+# kind: (model, dated column, reference, registration type, extra criteria)
+SOURCES = {
+    "dsc":                  (Client,             Client.dsc_expiry_date,               Client.dsc_provider,                   None,                                  ()),
+    "passport":             (Client,             Client.passport_expiry,               Client.passport_no,                    None,                                  ()),
+    "other_registration":   (OtherRegistration,  OtherRegistration.valid_until,        OtherRegistration.registration_number, OtherRegistration.registration_type,  (OtherRegistration.is_active,)),
+    "gst_cancellation":     (GSTRegistration,    GSTRegistration.cancellation_date,    GSTRegistration.gstin,                 GSTRegistration.registration_type,    ()),
+    "epf_esi_cancellation": (EPFESIRegistration, EPFESIRegistration.cancellation_date, EPFESIRegistration.establishment_code, EPFESIRegistration.registration_type, ()),
+}
+# Each kind starts with a different letter, so the database orders them as Python does under any collation
+KINDS = list(SOURCES)
+
+_UNITS = {"d": 1, "w": 7, "m": 30, "y": 365}
+
+
+def parse_window(value: str | None, name: str, limit: int) -> int:
+    """`30d`, `6w`, `3m` (30-day months), `1y` or plain days -> days, at most limit."""
+    if not value:
+        return 0
+    raw = value.strip().lower()
+    unit = raw[-1] if raw[-1:] in _UNITS else "d"
+    number = raw[:-1] if raw[-1:] in _UNITS else raw
+    if not number.isdigit():
+        raise HTTPException(status_code=400, detail=f"{name}: expected a number of days, weeks, months or years, e.g. 30d")
+    days = int(number) * _UNITS[unit]
+    if days > limit:
+        raise HTTPException(status_code=400, detail=f"{name}: at most {limit} days")
+    return days
+
+
+def parse_kinds(kind: str | None) -> list[str]:
+    """`kind=` query value (comma-separated sources) -> sources, all when omitted."""
+    if not kind:
+        return KINDS
+    names = [k.strip() for k in kind.split(",") if k.strip()]
+    unknown = set(names) - set(KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kind: {', '.join(sorted(unknown))}")
+    return [k for k in KINDS if k in names]
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["due_date"].isoformat(), row["kind"], str(row["entity_id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[date, str, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        due, kind, entity_id = json.loads(raw)
+        return date.fromisoformat(due), str(kind), uuid.UUID(entity_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _source(kind: str, *columns):
+    """select(*columns) over one source's rows, joined to their (active) client."""
+    model, _, _, _, extra = SOURCES[kind]
+    stmt = select(*columns)
+    if model is not Client:
+        stmt = stmt.select_from(model).join(Client, Client.id == model.client_id)
+    return stmt.where(Client.is_active, *extra)
+
+
+# ── Listing ──
+
+def _branch(kind: str, start: date, end: date, after, limit: int):
+    model, column, reference, reg_type, _ = SOURCES[kind]
+    stmt = _source(
+        kind,
+        literal(kind, String).label("kind"),
+        column.label("due_date"),
+        model.id.label("entity_id"),
+        Client.id.label("client_id"),
+        Client.pan.label("client_pan"),
+        Client.display_name.label("client_name"),
+        cast(reference, String).label("reference"),
+        cast(reg_type if reg_type is not None else null(), String).label("registration_type"),
+    ).where(column.between(start, end))
+    if after:
+        # kind is constant within a branch, so the (due_date, kind, entity_id)
+        # keyset reduces to a plain range on this branch's own index
+        due, after_kind, entity_id = after
+        if kind < after_kind:
+            stmt = stmt.where(column > due)
+        elif kind == after_kind:
+            stmt = stmt.where(tuple_(column, model.id) > tuple_(due, entity_id))
+        else:
+            stmt = stmt.where(column >= due)
+    # No page can need more than `limit` rows from any one source
+    return select(*stmt.order_by(column, model.id).limit(limit).subquery().c)
+
+
+def upcoming(db: Session, start: date, end: date, kinds: list[str], limit: int, after=None) -> list[dict]:
+    """Up to limit items due between start and end (inclusive), by (due_date, kind, entity_id)."""
+    if not kinds:
+        return []
+    merged = union_all(*(_branch(k, start, end, after, limit) for k in kinds)).subquery()
+    rows = db.execute(
+        select(merged).order_by(merged.c.due_date, merged.c.kind, merged.c.entity_id).limit(limit)
+    ).mappings().all()
+    today = date.today()
+    return [{**r, "days_left": (r["due_date"] - today).days} for r in rows]
+
+
+# ── Rolling calendar ──
+
+def _version(db: Session, today: date) -> str:
+    tables = (Client, GSTRegistration, EPFESIRegistration, OtherRegistration)
+    return "|".join([today.isoformat(), *(conditional.collection_version(db, m) for m in tables)])
+
+
+def _counts(db: Session, start: date, end: date) -> dict[date, dict[str, int]]:
+    branches = []
+    for kind, (_, column, _, _, _) in SOURCES.items():
+        branches.append(
+            _source(kind, literal(kind, String).label("kind"), column.label("due_date"), func.count().label("n"))
+            .where(column.between(start, end))
+            .group_by(column)
+        )
+    days: dict[date, dict[str, int]] = {}
+    for kind, due, n in db.execute(union_all(*branches)):
+        days.setdefault(due, {})[kind] = n
+    return days
+
+
+class ComplianceCalendar:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._checked = 0.0         # monotonic time the version was last confirmed
+        self._days: dict[date, dict[str, int]] = {}
+        self.hits = 0
+        self.builds = 0
+        self.last_build_ms = 0.0
+
+    def current(self, db: Session, max_age: float = 0) -> tuple[str, dict[date, dict[str, int]]]:
+        """
+        The calendar's version and per-day counts, rebuilt first if the book
+        has changed. A version confirmed less than max_age seconds ago (on
+        the same date) is trusted without querying.
+        """
+        today = date.today()
+        with self._lock:
+            if (self._version and self._version.startswith(today.isoformat())
+                    and time.monotonic() - self._checked < max_age):
+                self.hits += 1
+                return self._version, self._days
+        version = _version(db, today)
+        with self._lock:
+            if version == self._version:
+                self._checked = time.monotonic()
+                self.hits += 1
+                return version, self._days
+        # Built outside the lock: under the async engine run_sync callers share
+        # one thread, and a lock held across a query would deadlock them. Two
+        # requests racing here both build the same thing, which is harmless.
+        started = time.perf_counter()
+        days = _counts(db, today - timedelta(days=LOOKBACK_DAYS), today + timedelta(days=HORIZON_DAYS))
+        with self._lock:
+            self._version, self._days = version, days
+            self._checked = time.monotonic()
+            self.builds += 1
+            self.last_build_ms = round((time.perf_counter() - started) * 1000, 2)
+        return version, days
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "days":          len(self._days),
+                "hits":          self.hits,
+                "builds":        self.builds,
+                "last_build_ms": self.last_build_ms,
+            }
+
+
+calendar = ComplianceCalendar()
+
+
+def summarise(days: dict[date, dict[str, int]], start: date, end: date, kinds: list[str]) -> dict:
+    """Counts between start and end (inclusive) for kinds: in total, per kind and per day."""
+    by_kind = dict.fromkeys(kinds, 0)
+    out = []
+    day = start
+    while day <= end:
+        counts = {k: n for k, n in days.get(day, {}).items() if k in by_kind}
+        if counts:
+            for k, n in counts.items():
+                by_kind[k] += n
+            out.append({"day": day, "total": sum(counts.values()), "by_kind": counts})
+        day += timedelta(days=1)
+    return {"start": start, "end": end, "total": sum(by_kind.values()), "by_kind": by_kind, "days": out}
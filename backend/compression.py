@@ -0,0 +1,128 @@
+"""
+Response compression — brotli where the client accepts it, else gzip.
+
+JSON lists compress 5-10x, which matters more than the CPU spent on it once
+the client list runs to thousands of rows. Bodies under `minimum_size` bytes
+go out as they are (the headers would eat the saving), as do responses that
+already have a Content-Encoding and media types that are compressed
+already (images, PDFs, zip archives, Office files).
+
+brotli is optional: without the package every client gets gzip.
+"""
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:     # pragma: no cover - depends on the install
+    brotli = None
+
+# Media types not worth compressing again
+INCOMPRESSIBLE = ("image/", "video/", "audio/", "application/pdf", "application/zip", "application/gzip",
+                  "application/vnd.openxmlformats")      # .xlsx/.docx are zip archives
+
+
+def _gzip(level: int):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)    # wbits 31 = gzip container
+    return compressor.compress, compressor.flush
+
+
+def _brotli(quality: int):
+    compressor = brotli.Compressor(quality=quality)
+    return compressor.process, compressor.finish
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and _accepts(accept, "br"):
+            coding, factory = "br", lambda: _brotli(self.brotli_quality)
+        elif _accepts(accept, "gzip"):
+            coding, factory = "gzip", lambda: _gzip(self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self.app, self.minimum_size, coding, factory)(scope, receive, send)
+
+
+class _Responder:
+    """Holds back http.response.start until the first body chunk shows whether to compress."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, coding: str, factory) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.coding = coding
+        self.factory = factory
+        self.start: Message | None = None
+        self.compress = self.finish = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or media_type.startswith(INCOMPRESSIBLE)
+            )
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compress, self.finish = self.factory()
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.coding
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            if not more_body:
+                message["body"] = self.compress(body) + self.finish()
+                headers["Content-Length"] = str(len(message["body"]))
+            else:
+                message["body"] = self.compress(body)
+            await self.send(start)
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+        out = self.compress(body)
+        if not more_body:
+            out += self.finish()
+        message["body"] = out
+        await self.send(message)
@@ -0,0 +1,75 @@
+"""
+Conditional GET for list endpoints.
+
+A collection's version is its row count plus max(updated_at), both
+answered from indexes without reading the rows the list would return, plus
+the transactions writing the table that the read could not see yet
+(table_writers(), migration 013). Rows are stamped with clock_timestamp()
+once their transaction has an id, so a writer that was not running when the
+version was read stamps later than any row it covered: an insert or update
+moves the max, a delete lowers the count. One that was running is in the
+version, and leaves it when it commits, even with stamps older than the max.
+Nothing is locked: writers never wait on readers or on each other. SQLite
+has no in-flight writers to report and versions by count and max alone.
+
+    def query(db):
+        tag = conditional.etag(request, conditional.collection_version(db, Client))
+        if conditional.fresh(request, tag):
+            return conditional.not_modified(tag)
+        response.headers.update(conditional.headers(tag))
+        ...materialise rows...
+
+The ETag also covers the request's query string, so each filter, page and
+fields= selection has its own. Read the version before the rows: a write
+committed in between then only makes the next request miss, never pins
+stale rows to a current tag. Tags are weak — the same list is sent gzip,
+brotli or uncompressed — and Cache-Control: no-cache makes the browser
+revalidate on every request instead of trusting its copy.
+"""
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Authenticated data: the browser may keep it, shared caches must not, and every use is revalidated
+CACHE_CONTROL = "private, no-cache"
+
+
+def version(db: Session, model, *criteria) -> tuple:
+    """(row count, latest updated_at, writers in flight) of model's rows matching criteria, in one statement."""
+    columns = [func.count(), func.max(model.updated_at)]
+    if db.get_bind().dialect.name == "postgresql":
+        columns.append(func.table_writers(model.__tablename__))
+    count, latest, *writers = db.execute(select(*columns).select_from(model).where(*criteria)).one()
+    return count, latest, (writers[0] or "") if writers else ""
+
+
+def collection_version(db: Session, model, *criteria) -> str:
+    """version() of model's rows matching criteria, as the string an ETag is derived from."""
+    count, latest, writers = version(db, model, *criteria)
+    return f"{model.__tablename__}:{count}:{latest.isoformat() if latest else '-'}:{writers}"
+
+
+def etag(request: Request, version: str) -> str:
+    key = f"{version}|{request.url.path}?{request.url.query}"
+    return f'W/"{hashlib.blake2b(key.encode(), digest_size=12).hexdigest()}"'
+
+
+def fresh(request: Request, tag: str) -> bool:
+    """Does the client's If-None-Match already name this version?"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = tag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == opaque for t in header.split(","))
+
+
+def headers(tag: str) -> dict[str, str]:
+    return {"ETag": tag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(tag: str) -> Response:
+    return Response(status_code=304, headers=headers(tag))
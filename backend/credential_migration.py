@@ -0,0 +1,170 @@
+"""
+Online maintenance jobs for stored credentials.
+
+    --to envelope   seal each record's Fernet-per-column passwords into its
+                    credentials_sealed AES-GCM envelope, clearing the columns
+    --to fields     the reverse, e.g. before rolling back CREDENTIAL_STORAGE
+    --rotate        re-encrypt every credential not yet under the primary
+                    CREDENTIAL_ENCRYPTION_KEY, keeping each row's layout
+
+Rows are walked in primary-key order in batches of --batch-size. Each batch is
+its own short transaction (rows locked FOR UPDATE only until its commit), with
+--pause seconds between batches to keep the load on a live database down.
+Progress is printed after every batch.
+
+Every job can be stopped and re-run: --to only selects rows still in the old
+layout and --rotate skips rows already under the primary key. With
+--state-file the last committed id per table is also recorded, so a restarted
+rotation continues where it stopped instead of re-reading finished rows.
+
+Key rotation:
+    1. Generate a new key; set it as CREDENTIAL_ENCRYPTION_KEY and move the old
+       one to CREDENTIAL_PREVIOUS_KEYS. Restart the API — it reads both.
+    2. python credential_migration.py --rotate --state-file rotation.json
+    3. Once it reports 0 rows left, drop the old key from CREDENTIAL_PREVIOUS_KEYS.
+
+Run database/migrations/005_credential_envelope.sql before --to envelope.
+
+Usage:
+    cd backend
+    python credential_migration.py --to envelope [--batch-size 500] [--pause 0.1] [--dry-run]
+    python credential_migration.py --rotate [--state-file rotation.json]
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import func, or_, select
+
+import crypto
+from database import SessionLocal
+from models import BankAccount, ClientCredentials, EPFESIRegistration, GSTRegistration, OtherRegistration
+from routers import bank_accounts, clients, epf_esi, gst, other_registrations
+
+TABLES = [
+    (ClientCredentials,  clients.ENCRYPTED_FIELDS),
+    (GSTRegistration,    gst.ENCRYPTED_FIELDS),
+    (BankAccount,        bank_accounts.ENCRYPTED_FIELDS),
+    (EPFESIRegistration, epf_esi.ENCRYPTED_FIELDS),
+    (OtherRegistration,  other_registrations.ENCRYPTED_FIELDS),
+]
+
+
+def _has_credentials(model, fields: list[str]):
+    return or_(model.credentials_sealed.isnot(None), *(getattr(model, f).isnot(None) for f in fields))
+
+
+def _pending(model, fields: list[str], job: str):
+    """Rows the job has to look at."""
+    if job == "envelope":
+        return model.credentials_sealed.is_(None) & or_(*(getattr(model, f).isnot(None) for f in fields))
+    if job == "fields":
+        return model.credentials_sealed.isnot(None)
+    return _has_credentials(model, fields)       # rotate: which are stale is only known per row
+
+
+class Checkpoint:
+    """Last committed id per table, kept in a JSON file so a stopped job can resume."""
+
+    def __init__(self, path: str | None, job: str):
+        self.path, self.job, self.tables = path, job, {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("job") == job:
+                self.tables = state["tables"]
+
+    def last_id(self, table: str) -> uuid.UUID | None:
+        value = self.tables.get(table)
+        return uuid.UUID(value) if value else None
+
+    def save(self, table: str, last_id):
+        self.tables[table] = str(last_id)
+        if self.path:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"job": self.job, "tables": self.tables}, f)
+            os.replace(tmp, self.path)
+
+
+def run_table(model, fields: list[str], job: str, args, checkpoint: Checkpoint) -> int:
+    table = model.__tablename__
+    last_id = checkpoint.last_id(table)
+    condition = _pending(model, fields, job)
+    with SessionLocal() as db:
+        remaining = db.scalar(select(func.count()).select_from(model).where(
+            condition if last_id is None else condition & (model.id > last_id)
+        ))
+    if last_id is not None:
+        print(f"  {table:<24} resuming after {last_id}")
+
+    changed = seen = 0
+    start = time.perf_counter()
+    while True:
+        with SessionLocal() as db:
+            stmt = select(model).where(condition).order_by(model.id).limit(args.batch_size).with_for_update()
+            if last_id is not None:
+                stmt = stmt.where(model.id > last_id)
+            rows = db.scalars(stmt).all()
+            if not rows:
+                break
+            for row in rows:
+                if job == "rotate" and crypto.is_current(row, fields):
+                    continue
+                try:
+                    values = crypto.read(row, fields)
+                except crypto.UndecryptableCredential:
+                    # Key missing from CREDENTIAL_PREVIOUS_KEYS? — leave the row as it is, don't drop it
+                    print(f"  skipped {table} {row.id}: cannot decrypt")
+                    continue
+                storage = ("envelope" if row.credentials_sealed else "fields") if job == "rotate" else job
+                crypto.store(row, values, fields, storage=storage)
+                changed += 1
+            last_id = rows[-1].id
+            seen += len(rows)
+            if args.dry_run:
+                db.rollback()
+            else:
+                db.commit()
+                checkpoint.save(table, last_id)
+
+        elapsed = time.perf_counter() - start
+        rate = seen / elapsed if elapsed else 0
+        eta = f"{(remaining - seen) / rate:6.0f}s" if rate and remaining > seen else "     -"
+        print(f"  {table:<24} {seen:>8}/{remaining:<8} scanned  {changed:>8} rewritten  "
+              f"{rate:8.0f} rows/s  eta {eta}", flush=True)
+        if args.pause:
+            time.sleep(args.pause)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--to", choices=["envelope", "fields"])
+    mode.add_argument("--rotate", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--state-file", help="JSON checkpoint to resume from and update after each batch")
+    parser.add_argument("--dry-run", action="store_true", help="convert and roll back each batch")
+    args = parser.parse_args()
+
+    job = "rotate" if args.rotate else args.to
+    checkpoint = Checkpoint(None if args.dry_run else args.state_file, job)
+    start = time.perf_counter()
+    total = 0
+    for model, fields in TABLES:
+        total += run_table(model, fields, job, args, checkpoint)
+    verb = "Would rewrite" if args.dry_run else "Rewrote"
+    target = "the primary key" if job == "rotate" else f"'{job}'"
+    print(f"\n{verb} {total} rows to {target} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
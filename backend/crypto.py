@@ -2,31 +2,94 @@
 Handles two-way encryption of portal credentials stored in the database.
 Uses Fernet symmetric encryption — the key lives in .env (CREDENTIAL_ENCRYPTION_KEY).
 
+Two storage layouts, picked for writes by CREDENTIAL_STORAGE:
+  fields   — one Fernet token per credential column (original layout)
+  envelope — all of a record's credentials sealed together with AES-256-GCM
+             into its credentials_sealed column; the per-field columns stay NULL
+Reads understand both, so rows can be converted in place while the API runs
+(python credential_migration.py).
+
+Key rotation: new writes always use CREDENTIAL_ENCRYPTION_KEY; keys listed in
+CREDENTIAL_PREVIOUS_KEYS are only used to read rows written before the switch,
+until `python credential_migration.py --rotate` has re-encrypted them.
+
 To generate a key:
     python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
 """
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+import base64
+import json
+import logging
 import os
+import uuid
 from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import inspect
 
 load_dotenv()
 
-_fernet: Fernet | None = None
+STORAGE = os.environ.get("CREDENTIAL_STORAGE", "fields")
+if STORAGE not in ("fields", "envelope"):
+    raise RuntimeError(f"CREDENTIAL_STORAGE must be 'fields' or 'envelope', not {STORAGE!r}")
+
+log = logging.getLogger(__name__)
+
+
+
+class UndecryptableCredential(Exception):
+    """A stored credential no configured key opens — usually a key missing from CREDENTIAL_PREVIOUS_KEYS."""
+
+
+_fernet: MultiFernet | None = None
+_primary: Fernet | None = None
+_aeads: dict[bytes, AESGCM] | None = None     # key id -> cipher, primary first
 
 
-def _get_fernet() -> Fernet:
-    global _fernet
+def _master_keys() -> list[str]:
+    """CREDENTIAL_ENCRYPTION_KEY first, then any CREDENTIAL_PREVIOUS_KEYS still needed to read old rows."""
+    key = os.environ.get("CREDENTIAL_ENCRYPTION_KEY")
+    if not key:
+        raise RuntimeError(
+            "CREDENTIAL_ENCRYPTION_KEY is not set in .env.\n"
+            "Generate one with: python -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\""
+        )
+    previous = [k.strip() for k in os.environ.get("CREDENTIAL_PREVIOUS_KEYS", "").split(",") if k.strip()]
+    return [key] + [k for k in previous if k != key]
+
+
+def _get_fernet() -> MultiFernet:
+    """Encrypts with the primary key, decrypts with any configured key."""
+    global _fernet, _primary
     if _fernet is None:
-        key = os.environ.get("CREDENTIAL_ENCRYPTION_KEY")
-        if not key:
-            raise RuntimeError(
-                "CREDENTIAL_ENCRYPTION_KEY is not set in .env.\n"
-                "Generate one with: python -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\""
-            )
-        _fernet = Fernet(key.encode())
+        fernets = [Fernet(k.encode()) for k in _master_keys()]
+        _primary = fernets[0]
+        _fernet = MultiFernet(fernets)
     return _fernet
 
 
+def _get_aeads() -> dict[bytes, AESGCM]:
+    """AES-256-GCM keys for envelopes, derived from the Fernet keys so there is one secret per key version."""
+    global _aeads
+    if _aeads is None:
+        aeads = {}
+        for master in _master_keys():
+            raw = base64.urlsafe_b64decode(master.encode())
+            key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"ca-credential-envelope-v1").derive(raw)
+            digest = hashes.Hash(hashes.SHA256())
+            digest.update(key)
+            aeads[digest.finalize()[:4]] = AESGCM(key)
+        _aeads = aeads
+    return _aeads
+
+
+def _primary_key_id() -> bytes:
+    return next(iter(_get_aeads()))
+
+
 def encrypt(value: str | None) -> str | None:
     if not value:
         return value
@@ -38,5 +101,222 @@ def decrypt(value: str | None) -> str | None:
         return value
     try:
         return _get_fernet().decrypt(value.encode()).decode()
-    except (InvalidToken, Exception):
+    except InvalidToken:
+        log.warning("Credential token could not be decrypted with any configured key")
+        raise UndecryptableCredential("Credential token could not be decrypted with any configured key") from None
+
+
+# ── Envelopes ──
+# Layout: version (1 byte) | key id (4) | nonce (12) | header length (2, big-endian) | header | ciphertext+tag
+# The key id names the master key the envelope was sealed with, so rotation
+# knows which rows are stale without decrypting them. The header lists which
+# fields are set (comma-separated, plaintext) so masking needs no decrypt; it
+# is authenticated as associated data together with the table name and row
+# id, so a blob cannot be moved to another row. Version 1 envelopes carry no
+# key id and are opened by trying each configured key.
+
+_ENVELOPE_V1 = 1
+_ENVELOPE_V2 = 2
+
+
+def _aad(context: str, header: bytes) -> bytes:
+    return context.encode() + b"\x00" + header
+
+
+def seal(values: dict, context: str) -> bytes | None:
+    """Seal the non-empty values into one envelope under the primary key; None when there is nothing to store."""
+    values = {k: v for k, v in values.items() if v}
+    if not values:
         return None
+    header = ",".join(sorted(values)).encode()
+    nonce = os.urandom(12)
+    key_id = _primary_key_id()
+    body = _get_aeads()[key_id].encrypt(nonce, json.dumps(values, separators=(",", ":")).encode(), _aad(context, header))
+    return bytes([_ENVELOPE_V2]) + key_id + nonce + len(header).to_bytes(2, "big") + header + body
+
+
+def _split(blob: bytes) -> tuple[bytes | None, bytes, bytes, bytes]:
+    """(key id or None for v1, nonce, header, ciphertext)"""
+    if blob[0] == _ENVELOPE_V1:
+        key_id, rest = None, blob[1:]
+    elif blob[0] == _ENVELOPE_V2:
+        key_id, rest = blob[1:5], blob[5:]
+    else:
+        raise ValueError(f"Unknown credential envelope version {blob[0]}")
+    nonce = rest[:12]
+    n = int.from_bytes(rest[12:14], "big")
+    return key_id, nonce, rest[14:14 + n], rest[14 + n:]
+
+
+def sealed_fields(blob: bytes | None) -> set[str]:
+    """Names of the fields stored in an envelope — read from its header, without decrypting."""
+    if not blob:
+        return set()
+    _, _, header, _ = _split(bytes(blob))
+    return set(header.decode().split(",")) if header else set()
+
+
+def unseal(blob: bytes | None, context: str) -> dict:
+    if not blob:
+        return {}
+    key_id, nonce, header, body = _split(bytes(blob))
+    aeads = _get_aeads()
+    candidates = [aeads[key_id]] if key_id in aeads else [] if key_id else list(aeads.values())
+    for aead in candidates:
+        try:
+            return json.loads(aead.decrypt(nonce, body, _aad(context, header)))
+        except InvalidTag:
+            continue
+    log.warning("Credential envelope for %s could not be opened with any configured key", context)
+    raise UndecryptableCredential(f"Credential envelope for {context} could not be opened with any configured key")
+
+
+def _context(obj) -> str:
+    return getattr(obj, "credential_context", None) or f"{obj.__tablename__}:{obj.id}"
+
+
+def read(obj, fields: list[str]) -> dict:
+    """All credential fields of a record, decrypted — one AEAD open for envelopes, one Fernet per field otherwise.
+
+    Raises UndecryptableCredential when any stored one cannot be opened.
+    """
+    if getattr(obj, "credentials_sealed", None):
+        values = unseal(obj.credentials_sealed, _context(obj))
+        return {f: values.get(f) for f in fields}
+    return {f: decrypt(getattr(obj, f, None)) for f in fields}
+
+
+def is_current(obj, fields: list[str]) -> bool:
+    """True when every stored credential of obj is already under the primary key (nothing to rotate)."""
+    blob = getattr(obj, "credentials_sealed", None)
+    if blob:
+        return _split(bytes(blob))[0] == _primary_key_id()
+    _get_fernet()
+    for f in fields:
+        token = getattr(obj, f, None)
+        if token:
+            try:
+                _primary.decrypt(token.encode())
+            except InvalidToken:
+                return False
+    return True
+
+
+def split_credentials(data: dict, fields: list[str]) -> dict:
+    """Pop the credential fields out of a create/update payload (MASK and UNREADABLE dropped) for store()."""
+    popped = {f: data.pop(f) for f in fields if f in data}
+    return {f: v for f, v in popped.items() if v not in (MASK, UNREADABLE)}
+
+
+def store(obj, updates: dict, fields: list[str], storage: str | None = None):
+    """Write plaintext credential updates onto obj in the configured layout; fields not in updates keep their value.
+
+    An envelope that cannot be opened is only replaced when updates cover
+    every field it holds; otherwise UndecryptableCredential is raised rather
+    than dropping the fields that were not resent.
+    """
+    storage = storage or STORAGE
+    if not updates:
+        return
+    if storage == "fields" and not getattr(obj, "credentials_sealed", None):
+        for f, v in updates.items():
+            setattr(obj, f, encrypt(v))
+        return
+    if obj.id is None:
+        obj.id = uuid.uuid4()           # the row id is bound into the envelope
+    try:
+        current = read(obj, fields)
+    except UndecryptableCredential:
+        if sealed_fields(obj.credentials_sealed) - set(updates):
+            raise
+        current = {}
+    values = {**current, **updates}
+    if storage == "envelope":
+        obj.credentials_sealed = seal(values, _context(obj))
+        for f in fields:
+            setattr(obj, f, None)
+    else:
+        # Back to one token per column (storage switched back to fields)
+        obj.credentials_sealed = None
+        for f in fields:
+            setattr(obj, f, encrypt(values.get(f)))
+
+
+# ── Masking ──
+# Read endpoints send MASK in place of a stored credential unless the caller
+# named it in reveal= (or fetched the record's /secrets), so a list view does
+# not pay one Fernet decrypt per password nobody looks at. A revealed field
+# no configured key opens comes back as UNREADABLE, never as empty, and
+# split_credentials() drops both markers so saving a form that still holds
+# one leaves the stored ciphertext alone.
+
+MASK = "********"
+UNREADABLE = "<unreadable>"
+
+
+def parse_reveal(reveal: str | None, fields: list[str]) -> set[str]:
+    """`reveal=` query value ("all" or comma-separated field names) -> fields to decrypt."""
+    if not reveal:
+        return set()
+    names = {f.strip() for f in reveal.split(",") if f.strip()}
+    if "all" in names:
+        return set(fields)
+    unknown = names - set(fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot reveal: {', '.join(sorted(unknown))}")
+    return names
+
+
+def present(obj, fields: list[str], reveal: set[str] = frozenset()):
+    """
+    Decrypt the revealed credential fields of obj and mask the rest, for a
+    response. A session-attached obj is expunged first, so the masked or
+    plaintext values can never be flushed over the stored ciphertext; read
+    any unloaded relationships of it before calling this.
+    """
+    if not fields:
+        return obj
+    blob = getattr(obj, "credentials_sealed", None)
+    if blob:
+        stored = sealed_fields(blob)
+        values = _open(blob, _context(obj), stored) if stored & set(reveal) else {}
+        _detach(obj)
+        for f in fields:
+            if f in stored:
+                setattr(obj, f, values.get(f) if f in reveal else MASK)
+        return obj
+    shown = {f: _decrypt_or_mark(val) if f in reveal else MASK for f in fields if (val := getattr(obj, f, None))}
+    if shown:
+        _detach(obj)
+    for f, v in shown.items():
+        setattr(obj, f, v)
+    return obj
+
+
+def _detach(obj):
+    state = inspect(obj, raiseerr=False)
+    if state is not None and state.session is not None:
+        state.session.expunge(obj)
+
+
+def _open(blob: bytes, context: str, stored: set[str]) -> dict:
+    try:
+        return unseal(blob, context)
+    except UndecryptableCredential:
+        return dict.fromkeys(stored, UNREADABLE)
+
+
+def _decrypt_or_mark(value: str | None) -> str | None:
+    try:
+        return decrypt(value)
+    except UndecryptableCredential:
+        return UNREADABLE
+
+
+def secrets(obj, fields: list[str]) -> dict:
+    """Every credential field of obj, decrypted (UNREADABLE where no key opens it) — for the /secrets endpoints."""
+    blob = getattr(obj, "credentials_sealed", None)
+    if blob:
+        values = _open(blob, _context(obj), sealed_fields(blob))
+        return {f: values.get(f) for f in fields}
+    return {f: _decrypt_or_mark(getattr(obj, f, None)) for f in fields}
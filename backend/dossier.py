@@ -0,0 +1,513 @@
+"""
+Client dossier PDFs, rendered on the server.
+
+The same landscape "Full Profile" layout the browser used to draw with jsPDF
+(frontend/src/utils/exportClient.js): a header on every page, then Overview,
+KYC / DSC for individuals, Credentials, GST, Directors and Shareholders for
+companies, Partners for firms and LLPs, Bank Accounts, EPF / ESI and Other
+Registrations.
+
+The work is split in two:
+
+    build()    runs in the API process: the GET /clients/{id}/full payload
+               -> a plain outline of section titles and text cells
+    _render()  runs in DOSSIER_POOL_WORKERS spawned processes: outline ->
+               PDF bytes with reportlab, off the event loop and the GIL
+
+Finished PDFs are kept in an in-process LRU cache of DOSSIER_CACHE_MB,
+keyed on the client's aggregate version (see versions()) and the revealed
+credential fields. Any edit to the client, its credentials, registrations,
+directors, shareholders or partners — or to a linked person whose name
+appears in it — changes the version, so a cached PDF is never stale; old
+versions simply age out. The cache holds decrypted credentials in memory
+only and is per uvicorn worker.
+
+Single renders beyond DOSSIER_POOL_MAX_PENDING fail fast with 503 like the
+bcrypt pool; batch renders (render_many) queue behind a semaphore instead.
+reportlab is optional: without it the dossier endpoints answer 400.
+Counters are reported by GET /health/dossiers.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Session
+
+try:
+    from reportlab.lib.colors import Color
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:     # pragma: no cover - depends on the install
+    SimpleDocTemplate = None
+    Flowable = object
+
+WORKERS = int(os.environ.get("DOSSIER_POOL_WORKERS", str(min(2, os.cpu_count() or 1))))
+MAX_PENDING = int(os.environ.get("DOSSIER_POOL_MAX_PENDING", str(WORKERS * 4)))
+RETRY_AFTER_SECONDS = int(os.environ.get("DOSSIER_POOL_RETRY_AFTER", "2"))
+CACHE_BYTES = int(float(os.environ.get("DOSSIER_CACHE_MB", "64")) * 2 ** 20)
+
+# Bump when the layout changes so cached PDFs of the old layout are not served
+LAYOUT_VERSION = 1
+
+
+def available() -> bool:
+    return SimpleDocTemplate is not None
+
+
+# ── Outline (API process) ──
+
+def _v(val) -> str:
+    """Cell text, as exportClient.js's v() prints it."""
+    if val is None or val == "":
+        return "—"
+    if isinstance(val, bool):
+        return "Yes" if val else "No"
+    if isinstance(val, float) and val.is_integer():
+        return str(int(val))
+    return str(val)
+
+
+def _kv(title: str, pairs: list[tuple[str, object]]) -> dict:
+    return {"title": title, "rows": [(k, _v(val)) for k, val in pairs if val is not None and val != ""]}
+
+
+def _table(title: str, head: list[str], rows: list[list]) -> dict:
+    return {"title": title, "head": head, "rows": [[_v(c) for c in r] for r in rows]}
+
+
+def _status(r: dict, inactive: str = "Inactive") -> str:
+    return "Active" if r["is_active"] else inactive
+
+
+def build(c: dict, generated: datetime | None = None) -> dict:
+    """The dossier outline of a GET /clients/{id}/full payload (every section included)."""
+    generated = generated or datetime.now()
+    address = ", ".join(p for p in (c["address_line1"], c["address_line2"], c["city"], c["state"], c["pin_code"]) if p)
+    sections = [_kv("Overview", [
+        ("PAN", c["pan"]),
+        ("Legal Name", c["legal_name"]),
+        ("Constitution", c["constitution"]),
+        ("CIN / LLPIN", c["cin_llpin"]),
+        ("TAN", c["tan"]),
+        ("Date of Incorp / Birth", c["date_of_incorporation_birth"]),
+        ("Client Since", c["client_since"]),
+        ("Primary Phone", c["primary_phone"]),
+        ("Secondary Phone", c["secondary_phone"]),
+        ("Primary Email", c["primary_email"]),
+        ("Secondary Email", c["secondary_email"]),
+        ("Address", address),
+        ("Direct Client", c["is_direct_client"]),
+        ("On Retainer", c["is_on_retainer"]),
+        ("Active", c["is_active"]),
+        ("Notes", c["notes"]),
+    ])]
+    if c["constitution"] == "Individual":
+        sections.append(_kv("KYC / DSC", [
+            ("Father's Name", c["father_name"]),
+            ("Mother's Name", c["mother_name"]),
+            ("Gender", c["gender"]),
+            ("Nationality", c["nationality"]),
+            ("Aadhaar No.", c["aadhaar_no"]),
+            ("DIN", c["din"]),
+            ("Passport No.", c["passport_no"]),
+            ("Passport Expiry", c["passport_expiry"]),
+            ("MCA User ID", c["mca_user_id"]),
+            ("MCA Password", c["mca_password"]),
+            ("DSC Provider", c["dsc_provider"]),
+            ("DSC Expiry Date", c["dsc_expiry_date"]),
+            ("DSC Token Password", c["dsc_token_password"]),
+        ]))
+    sections.append(_kv("Credentials", [
+        ("IT Portal User ID", c["it_portal_user_id"]),
+        ("IT Portal Password", c["it_portal_password"]),
+        ("IT Portal User ID (TDS)", c["it_portal_user_id_tds"]),
+        ("IT Password (TDS)", c["it_password_tds"]),
+        ("Password for 26AS", c["password_26as"]),
+        ("Password for AIS / TIS", c["password_ais_tis"]),
+        ("TRACES User ID (Deductor)", c["traces_user_id_deductor"]),
+        ("TRACES Password (Deductor)", c["traces_password_deductor"]),
+        ("TRACES User ID (Tax Payer)", c["traces_user_id_taxpayer"]),
+        ("TRACES Password (Tax Payer)", c["traces_password_taxpayer"]),
+    ]))
+    sections.append(_table(
+        "GST Registrations",
+        ["GSTIN", "State", "Type", "Reg Date", "User ID", "Password", "EWB User ID", "EWB Password", "Status", "Signatories"],
+        [[r["gstin"], r["state"], r["registration_type"], r["registration_date"], r["gst_user_id"], r["gst_password"],
+          r["ewb_user_id"], r["ewb_password"], _status(r), ", ".join(s["signatory_name"] or "" for s in r["signatories"]) or None]
+         for r in c["gst"]],
+    ))
+    if c["constitution"] == "Company":
+        sections.append(_table(
+            "Directors",
+            ["Name", "DIN", "Designation", "Appointed", "Cessation", "Status", "KMP"],
+            [[r["individual_name"], r["din"], r["designation"], r["date_of_appointment"], r["date_of_cessation"],
+              _status(r), r["is_kmp"]] for r in c["directors"]],
+        ))
+        sections.append(_table(
+            "Shareholders",
+            ["Name", "PAN", "Holder Type", "Share Type", "No. of Shares", "Face Value", "%", "Date Acquired", "Status"],
+            [[r["holder_name"], r["holder_pan"], r["holder_type"], r["share_type"], r["number_of_shares"], r["face_value"],
+              f"{_v(r['percentage'])}%" if r["percentage"] is not None else None, r["date_acquired"], _status(r)]
+             for r in c["shareholders"]],
+        ))
+    if c["constitution"] in ("Partnership Firm", "LLP"):
+        sections.append(_table(
+            "Partners",
+            # The standard PDF fonts have no rupee sign
+            ["Name", "Role", "Profit %", "Capital (Rs.)", "Joined", "Exited", "Status"],
+            [[r["individual_name"], r["role"], r["profit_sharing_ratio"], r["capital_contribution"], r["date_of_joining"],
+              r["date_of_exit"], _status(r, "Exited")] for r in c["partners"]],
+        ))
+    sections.append(_table(
+        "Bank Accounts",
+        ["Bank", "Account No.", "IFSC", "Branch", "Type", "Net Banking ID", "Net Banking Pwd", "Primary"],
+        [[r["bank_name"], r["account_number"], r["ifsc_code"], r["branch_name"], r["account_type"],
+          r["net_banking_user_id"], r["net_banking_password"], "Yes" if r["is_primary"] else None] for r in c["bank_accounts"]],
+    ))
+    sections.append(_table(
+        "EPF / ESI",
+        ["Type", "Estab. Code", "State", "Reg Date", "Portal ID", "Password", "DSC Holder", "Auth Signatory", "Status"],
+        [[r["registration_type"], r["establishment_code"], r["state"], r["registration_date"], r["portal_user_id"],
+          r["portal_password"], r["dsc_holder_name"], r["authorised_signatory"], _status(r)] for r in c["epf_esi"]],
+    ))
+    sections.append(_table(
+        "Other Registrations",
+        ["Type", "Reg. Number", "Reg Date", "Valid Until", "Issuing Authority", "Portal ID", "Password", "Status"],
+        [[r["registration_type"], r["registration_number"], r["registration_date"], r["valid_until"], r["issuing_authority"],
+          r["portal_user_id"], r["portal_password"], _status(r)] for r in c["other_registrations"]],
+    ))
+    return {
+        "title": c["display_name"],
+        "subtitle": f"PAN: {c['pan']}   ·   {c['constitution']}   ·   {c['legal_name'] or ''}",
+        "generated": f"Generated: {generated:%d %b %Y, %I:%M %p}",
+        "sections": sections,
+    }
+
+
+def filename(display_name: str) -> str:
+    return f"{display_name} — Full Profile.pdf"
+
+
+def disposition(name: str) -> str:
+    """Content-Disposition for a download name that may not be ASCII."""
+    fallback = name.encode("ascii", "replace").decode().replace('"', "'")
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+# ── Render (pool processes) ──
+
+if SimpleDocTemplate is not None:
+    def _rgb(r, g, b):
+        return Color(r / 255, g / 255, b / 255)
+
+    C_BLACK, C_DARK, C_GRAY = _rgb(30, 30, 30), _rgb(60, 60, 60), _rgb(102, 102, 102)
+    C_LIGHT, C_RULE, C_ACCENT = _rgb(153, 153, 153), _rgb(220, 220, 220), _rgb(180, 180, 180)
+    C_HEAD_FILL, C_EMPTY = _rgb(245, 245, 245), _rgb(160, 160, 160)
+    MARGIN = 14 * mm
+
+    KEY = ParagraphStyle("key", fontName="Helvetica-Bold", fontSize=8, leading=10, textColor=C_DARK)
+    VALUE = ParagraphStyle("value", fontName="Courier", fontSize=8, leading=10, textColor=C_BLACK)
+    HEAD = ParagraphStyle("head", fontName="Helvetica-Bold", fontSize=7.5, leading=9, textColor=C_DARK)
+    CELL = ParagraphStyle("cell", fontName="Helvetica", fontSize=7.5, leading=9, textColor=C_BLACK)
+    EMPTY = ParagraphStyle("empty", fontName="Helvetica", fontSize=8, leading=10, textColor=C_EMPTY)
+
+
+class _Heading(Flowable):
+    """Small grey capitals over a hairline, kept on the page of what follows."""
+
+    def __init__(self, title: str):
+        super().__init__()
+        self.title = title.upper()
+        self.keepWithNext = 1
+
+    def wrap(self, avail_width, avail_height):
+        self.width = avail_width
+        return avail_width, 7 * mm
+
+    def draw(self):
+        c = self.canv
+        c.setFont("Helvetica-Bold", 7.5)
+        c.setFillColor(C_LIGHT)
+        c.drawString(0, 3.5 * mm, self.title)
+        c.setStrokeColor(C_RULE)
+        c.setLineWidth(0.3 * mm)
+        c.line(0, 2 * mm, self.width, 2 * mm)
+
+
+def _header(outline: dict):
+    def draw(canvas, doc):
+        width, height = doc.pagesize
+        canvas.saveState()
+        canvas.setFillColor(C_BLACK)
+        canvas.setFont("Helvetica-Bold", 13)
+        canvas.drawString(MARGIN, height - 12 * mm, outline["title"])
+        canvas.setFont("Helvetica", 7.5)
+        canvas.setFillColor(C_GRAY)
+        canvas.drawString(MARGIN, height - 19 * mm, outline["subtitle"])
+        canvas.drawRightString(width - MARGIN, height - 19 * mm, outline["generated"])
+        canvas.setStrokeColor(C_ACCENT)
+        canvas.setLineWidth(0.5 * mm)
+        canvas.line(MARGIN, height - 23 * mm, width - MARGIN, height - 23 * mm)
+        canvas.restoreState()
+    return draw
+
+
+def _flowables(section: dict, width: float) -> list:
+    out = [_Heading(section["title"])]
+    rows = section["rows"]
+    if "head" not in section:
+        if rows:
+            table = Table([[Paragraph(escape(k), KEY), Paragraph(escape(v), VALUE)] for k, v in rows],
+                          colWidths=[55 * mm, width - 55 * mm])
+            table.setStyle(TableStyle([
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("TOPPADDING", (0, 0), (-1, -1), 2 * mm), ("BOTTOMPADDING", (0, 0), (-1, -1), 2 * mm),
+                ("LEFTPADDING", (0, 0), (-1, -1), 4 * mm), ("RIGHTPADDING", (0, 0), (-1, -1), 4 * mm),
+            ]))
+            out.append(table)
+        out.append(Spacer(0, 8 * mm if rows else 4 * mm))
+        return out
+    if not rows:
+        out += [Paragraph("No records.", EMPTY), Spacer(0, 6 * mm)]
+        return out
+    cols = len(section["head"])
+    table = Table([[Paragraph(escape(h), HEAD) for h in section["head"]]]
+                  + [[Paragraph(escape(cell), CELL) for cell in r] for r in rows],
+                  colWidths=[width / cols] * cols, repeatRows=1)
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), C_HEAD_FILL),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.3 * mm, C_RULE),
+        ("LINEBELOW", (0, 1), (-1, -1), 0.2 * mm, C_RULE),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]))
+    out += [table, Spacer(0, 8 * mm)]
+    return out
+
+
+def _render(outline: dict) -> bytes:
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buf, pagesize=landscape(A4), title=f"{outline['title']} — Full Profile",
+        leftMargin=MARGIN, rightMargin=MARGIN, topMargin=28 * mm, bottomMargin=MARGIN,
+    )
+    story = []
+    for section in outline["sections"]:
+        story += _flowables(section, doc.width)
+    header = _header(outline)
+    doc.build(story, onFirstPage=header, onLaterPages=header)
+    return buf.getvalue()
+
+
+# ── Versions and cache (API process) ──
+
+# Per client, for each table a dossier prints from: its row count, newest
+# updated_at and, where it prints names of linked clients, their newest
+# updated_at. Counting catches deletions, which max(updated_at) alone would
+# miss. Each table's max is kept apart instead of one max of all, and the
+# writers of these tables that the read cannot see yet (table_writers(),
+# migration 013) are appended, so a write in flight that commits with stamps
+# older than a max already seen still changes the version.
+_VERSIONS = text("""
+    WITH ids AS (SELECT unnest(CAST(:ids AS uuid[])) AS id),
+    parts AS (
+        SELECT c.id AS client_id, 'c' AS src, c.updated_at, NULL::timestamptz AS name_at FROM clients c JOIN ids ON ids.id = c.id
+        UNION ALL SELECT cc.client_id, 'cc', cc.updated_at, NULL FROM client_credentials cc JOIN ids ON ids.id = cc.client_id
+        UNION ALL SELECT g.client_id, 'g', g.updated_at, NULL FROM gst_registrations g JOIN ids ON ids.id = g.client_id
+        UNION ALL SELECT g.client_id, 's', s.updated_at, c.updated_at
+                  FROM gst_signatories s JOIN gst_registrations g ON g.id = s.gst_registration_id
+                  JOIN ids ON ids.id = g.client_id JOIN clients c ON c.id = s.signatory_client_id
+        UNION ALL SELECT d.company_client_id, 'd', d.updated_at, c.updated_at
+                  FROM directors d JOIN ids ON ids.id = d.company_client_id JOIN clients c ON c.id = d.individual_client_id
+        UNION ALL SELECT sh.company_client_id, 'sh', sh.updated_at, c.updated_at
+                  FROM shareholders sh JOIN ids ON ids.id = sh.company_client_id
+                  LEFT JOIN clients c ON c.id = COALESCE(sh.individual_client_id, sh.holding_entity_client_id)
+        UNION ALL SELECT p.firm_llp_client_id, 'p', p.updated_at, c.updated_at
+                  FROM partners p JOIN ids ON ids.id = p.firm_llp_client_id JOIN clients c ON c.id = p.individual_client_id
+        UNION ALL SELECT b.client_id, 'b', b.updated_at, NULL FROM bank_accounts b JOIN ids ON ids.id = b.client_id
+        UNION ALL SELECT e.client_id, 'e', e.updated_at, NULL FROM epf_esi_registrations e JOIN ids ON ids.id = e.client_id
+        UNION ALL SELECT o.client_id, 'o', o.updated_at, NULL FROM other_registrations o JOIN ids ON ids.id = o.client_id
+    ),
+    per_table AS (
+        SELECT client_id, src, src || ':' || count(*) || ':' || max(updated_at)::text
+                               || coalesce(':' || max(name_at)::text, '') AS part
+        FROM parts GROUP BY client_id, src
+    )
+    SELECT p.client_id, c.pan, c.display_name,
+           string_agg(p.part, '|' ORDER BY p.src) || '|' || coalesce(table_writers(
+               'clients', 'client_credentials', 'gst_registrations', 'gst_signatories', 'directors',
+               'shareholders', 'partners', 'bank_accounts', 'epf_esi_registrations', 'other_registrations'), '') AS version
+    FROM per_table p JOIN clients c ON c.id = p.client_id
+    GROUP BY p.client_id, c.pan, c.display_name
+""").bindparams(bindparam("ids", type_=ARRAY(UUID(as_uuid=True))))
+
+
+def versions(db: Session, client_ids: list[uuid.UUID]) -> dict:
+    """client id -> (pan, display_name, aggregate version) for each client that exists."""
+    return {r.client_id: r for r in db.execute(_VERSIONS, {"ids": list(client_ids)})}
+
+
+class DossierCache:
+    """LRU of rendered PDFs bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(client_id: uuid.UUID, version: str, revealed: set[str]) -> tuple:
+        return client_id, version, tuple(sorted(revealed)), LAYOUT_VERSION
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pdf
+
+    def put(self, key: tuple, pdf: bytes):
+        if len(pdf) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = pdf
+            self.size += len(pdf)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":   len(self._entries),
+                "bytes":     self.size,
+                "max_bytes": self.max_bytes,
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "hit_rate":  round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+cache = DossierCache(CACHE_BYTES)
+
+
+# ── Pool (API process) ──
+
+class RenderMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_ms = 0.0
+        self._total_ms = 0.0
+
+    def try_acquire(self, limit: int | None) -> bool:
+        with self._lock:
+            if limit is not None and self.in_flight >= limit:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self._total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers":     WORKERS,
+                "max_pending": MAX_PENDING,
+                "in_flight":   self.in_flight,
+                "completed":   self.completed,
+                "rejected":    self.rejected,
+                "avg_ms":      round(self._total_ms / self.completed, 2) if self.completed else None,
+                "max_ms":      round(self.max_ms, 2),
+            }
+
+
+metrics = RenderMetrics()
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn, not fork: the API process has running threads and open DB connections
+                _executor = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def _submit(outline: dict, limit: int | None) -> bytes:
+    if not metrics.try_acquire(limit):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many dossiers being rendered right now, please retry shortly",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), _render, outline)
+    finally:
+        metrics.release(time.perf_counter() - start)
+
+
+async def render(outline: dict) -> bytes:
+    """One dossier; 503 when DOSSIER_POOL_MAX_PENDING renders are already queued or running."""
+    return await _submit(outline, MAX_PENDING)
+
+
+async def render_many(outlines: list[dict]) -> list[bytes]:
+    """Many dossiers across all pool workers; never rejected, and at most two per worker handed over at a time."""
+    gate = asyncio.Semaphore(WORKERS * 2)
+
+    async def one(outline: dict) -> bytes:
+        async with gate:
+            return await _submit(outline, None)
+
+    return await asyncio.gather(*(one(o) for o in outlines))
+
+
+def snapshot() -> dict:
+    return {"pool": metrics.snapshot(), "cache": cache.snapshot()}
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,211 @@
+"""
+Whole-book export — every client and its registrations, streamed.
+
+GET /api/export writes the book in one of three formats:
+
+    ndjson  one line per client (ClientResponse), its registrations nested
+            under gst / bank_accounts / epf_esi / other_registrations as in
+            GET /clients/{id}/full
+    csv     one table per file (table=clients|gst|bank_accounts|epf_esi|
+            other_registrations); registration rows carry the client's PAN
+    xlsx    every table as its own sheet
+
+Rows come off a server-side cursor (yield_per) one partition at a time; each
+partition is written out and dropped before the next is fetched, so memory
+stays flat however large the book is. openpyxl's write-only mode spools the
+sheets to disk, and the finished workbook is streamed from there.
+
+Credentials are masked ("********") unless named in reveal=, and revealed
+ones are decrypted a partition at a time as the rows go out. The clients
+table uses ClientCreate's columns, so a CSV or sheet exported from here can
+be edited and fed back through POST /api/clients/import (masked values are
+ignored there). Text that a spreadsheet would run as a formula (starting
+with =, +, -, @, tab or CR) goes out as text: quoted with a leading ' in
+CSV, which the import strips again, and as a string cell in XLSX.
+
+Everything is read in one REPEATABLE READ transaction, so the tables agree
+with each other even while the book is being edited.
+"""
+import csv
+import io
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Iterator
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import crypto
+import projection
+from models import BankAccount, Client, ClientCredentials, EPFESIRegistration, GSTRegistration, OtherRegistration
+from routers import bank_accounts, clients, epf_esi, gst, other_registrations
+from schemas import BankAccountResponse, ClientCreate, ClientResponse, EPFESIResponse, GSTResponse, OtherRegResponse
+
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+except ImportError:     # pragma: no cover - depends on the install
+    openpyxl = None
+
+FORMATS = {
+    "csv":    ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "xlsx":   ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+PARTITION = 1000            # rows fetched from the server-side cursor at a time
+CHUNK = 64 * 1024           # bytes per read when streaming the spooled workbook
+
+
+def _names(schema, *exclude: str) -> list[str]:
+    return [f for f in schema.model_fields if f not in exclude]
+
+
+# Registration tables: model, response schema, credential fields, row order within a client
+SECTIONS = {
+    "gst":                 (GSTRegistration,    GSTResponse,         gst.ENCRYPTED_FIELDS,                 GSTRegistration.gstin),
+    "bank_accounts":       (BankAccount,        BankAccountResponse, bank_accounts.ENCRYPTED_FIELDS,       BankAccount.bank_name),
+    "epf_esi":             (EPFESIRegistration, EPFESIResponse,      epf_esi.ENCRYPTED_FIELDS,             EPFESIRegistration.registration_type),
+    "other_registrations": (OtherRegistration,  OtherRegResponse,    other_registrations.ENCRYPTED_FIELDS, OtherRegistration.registration_type),
+}
+TABLES = ["clients", *SECTIONS]
+SHEETS = {"clients": "Clients", "gst": "GST", "bank_accounts": "Bank Accounts",
+          "epf_esi": "EPF-ESI", "other_registrations": "Other Registrations"}
+
+# Every credential field reveal= can name, across all tables
+CREDENTIAL_FIELDS = sorted(set(clients.ENCRYPTED_FIELDS).union(*(s[2] for s in SECTIONS.values())))
+
+# Column names of each flat (csv/xlsx) table
+COLUMNS = {
+    "clients": _names(ClientCreate),
+    **{name: ["client_pan", "client_name", *_names(schema, "signatories")] for name, (_, schema, _, _) in SECTIONS.items()},
+}
+
+_client_row = projection.attributes(ClientCreate)
+_client_doc = projection.attributes(ClientResponse)
+_section_fields = {name: projection.attributes(schema, "signatories") for name, (_, schema, _, _) in SECTIONS.items()}
+
+
+def _partitions(db: Session, stmt, table: str) -> Iterator[list[SimpleNamespace]]:
+    """
+    Rows of stmt, PARTITION at a time off a server-side cursor, as plain
+    attribute bags crypto.present() and projection.attributes() work on —
+    no ORM entities to track, cascade or expunge.
+    """
+    for part in db.execute(stmt.execution_options(yield_per=PARTITION)).partitions():
+        yield [SimpleNamespace(**r._mapping, credential_context=f"{table}:{r.id}") for r in part]
+
+
+def _clients(db: Session) -> Iterator[list[SimpleNamespace]]:
+    # Envelopes of client credentials are bound to "clients:<client id>"
+    creds = ClientCredentials.__table__.c
+    stmt = (select(Client.__table__, *(creds[n] for n in (*clients.CREDENTIAL_COLUMNS, "credentials_sealed")))
+            .outerjoin(ClientCredentials.__table__)
+            .order_by(Client.pan))
+    return _partitions(db, stmt, "clients")
+
+
+def _section(db: Session, name: str, revealed: set[str]) -> Iterator[list[dict]]:
+    model, _, encrypted, order = SECTIONS[name]
+    fields = _section_fields[name]
+    stmt = (select(model.__table__, Client.pan.label("client_pan"), Client.display_name.label("client_name"))
+            .join(Client, model.client_id == Client.id)
+            .order_by(Client.pan, order, model.id))
+    for part in _partitions(db, stmt, model.__tablename__):
+        yield [{"client_pan": r.client_pan, "client_name": r.client_name, **fields(crypto.present(r, encrypted, revealed))}
+               for r in part]
+
+
+def rows(db: Session, table: str, revealed: set[str]) -> Iterator[list[dict]]:
+    """Partitions of one flat table, as dicts keyed by COLUMNS[table]."""
+    if table != "clients":
+        return _section(db, table, revealed)
+    return ([_client_row(crypto.present(c, clients.ENCRYPTED_FIELDS, revealed)) for c in part] for part in _clients(db))
+
+
+def documents(db: Session, revealed: set[str]) -> Iterator[list[dict]]:
+    """Partitions of clients with their registrations nested — one query per section per partition."""
+    for part in _clients(db):
+        docs = {c.id: _client_doc(crypto.present(c, clients.ENCRYPTED_FIELDS, revealed)) for c in part}
+        for name, (model, _, encrypted, order) in SECTIONS.items():
+            fields = _section_fields[name]
+            for doc in docs.values():
+                doc[name] = []
+            stmt = select(model.__table__).where(model.client_id.in_(list(docs))).order_by(order, model.id)
+            for r in db.execute(stmt):
+                r = SimpleNamespace(**r._mapping, credential_context=f"{model.__tablename__}:{r.id}")
+                docs[r.client_id][name].append(fields(crypto.present(r, encrypted, revealed)))
+        yield list(docs.values())
+
+
+# ── Writers ──
+
+def write_ndjson(db: Session, revealed: set[str]) -> Iterator[bytes]:
+    for docs in documents(db, revealed):
+        yield b"".join(orjson.dumps(d, option=orjson.OPT_APPEND_NEWLINE) for d in docs)
+
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_START = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_value(value):
+    if isinstance(value, str) and value.startswith(FORMULA_START):
+        return "'" + value
+    return value
+
+
+def write_csv(db: Session, table: str, revealed: set[str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS[table])
+    for part in rows(db, table, revealed):
+        writer.writerows([_csv_value(v) for v in r.values()] for r in part)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()       # header of an empty table
+
+
+def _cell(ws, value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)     # Excel has no time zones
+    if isinstance(value, str) and value.startswith(FORMULA_START):
+        cell = WriteOnlyCell(ws, value)
+        cell.data_type = "s"        # text, not a formula
+        return cell
+    return value
+
+
+def write_xlsx(db: Session, revealed: set[str]) -> Iterator[bytes]:
+    wb = openpyxl.Workbook(write_only=True)
+    for table in TABLES:
+        ws = wb.create_sheet(SHEETS[table])
+        ws.freeze_panes = "A2"
+        ws.append(COLUMNS[table])
+        for part in rows(db, table, revealed):
+            for r in part:
+                ws.append([_cell(ws, v) for v in r.values()])
+    with tempfile.TemporaryFile() as f:
+        wb.save(f)
+        f.seek(0)
+        while chunk := f.read(CHUNK):
+            yield chunk
+
+
+def write(db: Session, format: str, table: str = "clients", revealed: set[str] = frozenset()) -> Iterator[bytes]:
+    """The export as a stream of byte chunks; table only applies to csv."""
+    # One snapshot for every table and partition
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    if format == "ndjson":
+        yield from write_ndjson(db, revealed)
+    elif format == "xlsx":
+        yield from write_xlsx(db, revealed)
+    else:
+        yield from write_csv(db, table, revealed)
@@ -0,0 +1,487 @@
+"""
+Client groups — the clients linked to each other, directly or not.
+
+Two clients are linked when one is an active director, partner, shareholder
+(the individual or holding entity) or GST signatory (of a registration) of
+the other. A group is everyone reachable along those links, a connected
+component of the relationship graph — what we bill and review together.
+
+Every worker keeps the groups in memory as a union-find (disjoint-set)
+forest over the linked clients, with union by size and path halving. Each
+root also keeps the list of its members, so a group is read without a
+search. A new link is one union. A union-find cannot take a link back out,
+so a deleted or deactivated link takes its group apart instead and joins it
+up again from the links of its members: the cost of a removal is the size
+of that one group, not of the book.
+
+The routers pass every link they create, change or delete to the forest of
+their own worker (record() / forget()). Other workers catch up the way the
+ownership index does: each table's version (see conditional.py) is checked
+on a read — at most every GROUPS_CHECK_SECONDS, as counting the tables is
+most of what a read costs — and the rows written since are fetched and
+applied. "Since" is the latest updated_at read while nobody was writing
+the table; until there has been such a read the table is fetched whole.
+A count that no longer adds up means rows went away (deleted on another
+worker, or with a cascade from a client or GST registration), and the keys
+are compared to find which: on Postgres only those of the buckets, by the
+key's last byte, whose counts differ. The forest is reloaded in full every
+GROUPS_REBUILD_SECONDS and from POST /api/groups/rebuild.
+"""
+import base64
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+import conditional
+from models import Client, Director, GSTRegistration, GSTSignatory, Partner, Shareholder
+
+# Reload the whole forest at least this often (catches writes the delta could not see)
+REBUILD_SECONDS = float(os.environ.get("GROUPS_REBUILD_SECONDS", "3600"))
+# Trust the tables unchanged for this long after checking them. This worker's
+# own writes reach its forest at once; other workers' may wait this long.
+CHECK_SECONDS = float(os.environ.get("GROUPS_CHECK_SECONDS", "5"))
+
+KINDS = ("director", "partner", "shareholder", "gst_signatory")
+
+
+class Link(NamedTuple):
+    """
+    One link row. Clients and keys are UUID.int, which hash in C: a full
+    load puts a few hundred thousand of them in dicts and sets.
+    """
+    kind:       str                 # one of KINDS
+    key:        int                 # the row's id (for a director, company and individual in one int)
+    entity_id:  Optional[int]       # the company, firm / LLP or GST registrant
+    client_id:  Optional[int]       # its director, partner, holder or signatory
+    is_active:  bool
+    updated_at: object
+
+    @property
+    def joins(self) -> bool:
+        return self.is_active and self.entity_id is not None and self.client_id is not None \
+            and self.entity_id != self.client_id
+
+
+def _sources() -> dict:
+    """kind -> (table, its id column (None: keyed by the pair), entity column, linked client column)."""
+    holder = case(
+        (Shareholder.holder_type == "Individual", Shareholder.individual_client_id),
+        else_=Shareholder.holding_entity_client_id,
+    )
+    return {
+        "director":      (Director, None, Director.company_client_id, Director.individual_client_id),
+        "partner":       (Partner, Partner.id, Partner.firm_llp_client_id, Partner.individual_client_id),
+        "shareholder":   (Shareholder, Shareholder.id, Shareholder.company_client_id, holder),
+        "gst_signatory": (GSTSignatory, GSTSignatory.id, GSTRegistration.client_id, GSTSignatory.signatory_client_id),
+    }
+
+
+def _select(model, *columns):
+    stmt = select(*columns).select_from(model)
+    if model is GSTSignatory:
+        stmt = stmt.join(GSTRegistration, GSTRegistration.id == GSTSignatory.gst_registration_id)
+    return stmt
+
+
+def _int(client: Optional[uuid.UUID]) -> Optional[int]:
+    return None if client is None else client.int
+
+
+def _pair(company: uuid.UUID, individual: uuid.UUID) -> int:
+    return company.int << 128 | individual.int
+
+
+def _state(db: Session) -> dict:
+    """
+    kind -> conditional.version() of its table: (row count, latest updated_at,
+    writers in flight). Read before the rows it covers: a write committed in
+    between is fetched again next time rather than missed.
+    """
+    return {kind: conditional.version(db, model) for kind, (model, *_) in _sources().items()}
+
+
+def _settled(state: dict, since: dict) -> dict:
+    """
+    since, moved up to the latest updated_at of each kind nobody was writing
+    in state: every row committed after that read is stamped later.
+    """
+    return {**since, **{kind: latest for kind, (_, latest, writers) in state.items() if not writers}}
+
+
+def _load(db: Session, since: Optional[dict] = None) -> list[Link]:
+    """
+    Every link row, or only those of the kinds in since updated at or after
+    since[kind] (all of a kind whose since is None).
+    """
+    links = []
+    for kind, (model, key, entity, client) in _sources().items():
+        if since is not None and kind not in since:
+            continue
+        columns = (entity, client) if key is None else (key, entity, client)
+        stmt = _select(model, *columns, model.is_active, model.updated_at)
+        if since is not None and since[kind] is not None:
+            stmt = stmt.where(model.updated_at >= since[kind])
+        if key is None:
+            links += [Link(kind, _pair(e, c), e.int, c.int, active, updated) for e, c, active, updated in db.execute(stmt)]
+        else:
+            links += [Link(kind, k.int, _int(e), _int(c), active, updated) for k, e, c, active, updated in db.execute(stmt)]
+    return links
+
+
+def _bucket(kind: str):
+    """
+    The last byte of a row's key — key & 0xff in the forest — as SQL, for
+    comparing counts by bucket when rows have gone (Postgres only).
+    """
+    _, key, _, client = _sources()[kind]
+    return func.get_byte(func.uuid_send(client if key is None else key), 15)
+
+
+def link(row) -> Link:
+    """The Link of a Director, Partner, Shareholder or GSTSignatory row."""
+    if isinstance(row, Director):
+        return Link("director", _pair(row.company_client_id, row.individual_client_id),
+                    row.company_client_id.int, row.individual_client_id.int, row.is_active, row.updated_at)
+    if isinstance(row, Partner):
+        return Link("partner", row.id.int, _int(row.firm_llp_client_id), _int(row.individual_client_id),
+                    row.is_active, row.updated_at)
+    if isinstance(row, Shareholder):
+        holder = row.individual_client_id if row.holder_type == "Individual" else row.holding_entity_client_id
+        return Link("shareholder", row.id.int, _int(row.company_client_id), _int(holder), row.is_active, row.updated_at)
+    if isinstance(row, GSTSignatory):
+        return Link("gst_signatory", row.id.int, _int(row.gst_registration.client_id), _int(row.signatory_client_id),
+                    row.is_active, row.updated_at)
+    raise TypeError(f"not a link row: {type(row).__name__}")
+
+
+class ClientGroups:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Optional[dict] = None
+        self._since: dict = {}                                    # kind -> see _settled()
+        self._links: dict[tuple[str, int], Link] = {}             # every row, active or not
+        self._counts: dict[str, int] = defaultdict(int)           # rows of each kind in _links
+        self._buckets: dict[tuple[str, int], int] = defaultdict(int)    # ... and of each (kind, key & 0xff)
+        self._incident: dict[int, set] = {}                       # client -> its joining links' (kind, key)
+        self._parent: dict[int, int] = {}                         # the forest, over linked clients only
+        self._members: dict[int, list[int]] = {}                  # root -> its group
+        self._ranked: Optional[tuple[list, list]] = None          # see ranked(); None once anything changed
+        self._built = 0.0           # monotonic time of the last full load
+        self._checked = 0.0         # ... and of the last check against the tables
+        self.hits = 0
+        self.updates = 0
+        self.splits = 0
+        self.builds = 0
+        self.last_build_ms = 0.0
+
+    # ── Union-find ──
+
+    def _find(self, client: int) -> int:
+        parent = self._parent
+        while parent[client] != client:
+            parent[client] = parent[parent[client]]
+            client = parent[client]
+        return client
+
+    def _union(self, a: int, b: int) -> None:
+        for c in (a, b):
+            if c not in self._parent:
+                self._parent[c] = c
+                self._members[c] = [c]
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        if len(self._members[a]) < len(self._members[b]):
+            a, b = b, a
+        self._parent[b] = a
+        self._members[a] += self._members.pop(b)
+
+    def _split(self, clients: set) -> None:
+        """Take apart the groups of these clients and join them up again from the links left."""
+        roots = {self._find(c) for c in clients if c in self._parent}
+        for root in roots:
+            members = self._members.pop(root)
+            for m in members:
+                del self._parent[m]
+                if not self._incident.get(m):
+                    self._incident.pop(m, None)
+            for m in members:
+                for kind_key in self._incident.get(m, ()):
+                    joined = self._links[kind_key]
+                    if joined.entity_id == m:
+                        self._union(joined.entity_id, joined.client_id)
+            self.splits += 1
+
+    # ── Changes ──
+
+    def _apply(self, changed: list[Link], gone: list[tuple[str, int]]) -> None:
+        """Record changed rows and remove gone ones (called under the lock)."""
+        split = set()
+        for new in changed:
+            kind_key = (new.kind, new.key)
+            old = self._links.get(kind_key)
+            if old is None:
+                self._counts[new.kind] += 1
+                self._buckets[new.kind, new.key & 0xff] += 1
+            elif old.updated_at is not None and new.updated_at is not None and old.updated_at > new.updated_at:
+                continue
+            self._links[kind_key] = new
+            same = old is not None and old.joins and new.joins and \
+                (old.entity_id, old.client_id) == (new.entity_id, new.client_id)
+            if same:
+                continue
+            if old is not None and old.joins:
+                self._detach(kind_key, old)
+                split.add(old.entity_id)
+            if new.joins:
+                self._incident.setdefault(new.entity_id, set()).add(kind_key)
+                self._incident.setdefault(new.client_id, set()).add(kind_key)
+                self._union(new.entity_id, new.client_id)
+        for kind_key in gone:
+            old = self._links.pop(kind_key, None)
+            if old is None:
+                continue
+            self._counts[old.kind] -= 1
+            self._buckets[old.kind, old.key & 0xff] -= 1
+            if old.joins:
+                self._detach(kind_key, old)
+                split.add(old.entity_id)
+        if split:
+            self._split(split)
+        self._ranked = None
+
+    def _detach(self, kind_key: tuple, old: Link) -> None:
+        for c in (old.entity_id, old.client_id):
+            self._incident[c].discard(kind_key)
+
+    def record(self, row) -> None:
+        """A link row was created or updated (and committed) on this worker."""
+        with self._lock:
+            self._apply([link(row)], [])
+
+    def forget(self, gone: Link) -> None:
+        """A link row was deleted (and committed) on this worker."""
+        with self._lock:
+            self._apply([], [(gone.kind, gone.key)])
+
+    # ── Reads ──
+
+    def current(self, db: Session, max_age: float = CHECK_SECONDS) -> "ClientGroups":
+        """
+        Bring the forest up to date with the tables; returns self. Tables
+        checked less than max_age seconds ago are trusted without querying.
+        """
+        with self._lock:
+            now = time.monotonic()
+            full = self._state is None or now - self._built >= REBUILD_SECONDS
+            if not full and now - self._checked < max_age:
+                self.hits += 1
+                return self
+        state = _state(db)
+        with self._lock:
+            if state == self._state and not full:
+                self._checked = time.monotonic()
+                self.hits += 1
+                return self
+            # Only the tables that moved; the others have nothing new to fetch
+            since = None if full else {
+                kind: self._since.get(kind) for kind in state if state[kind] != self._state[kind]
+            }
+        # Queried outside the lock, as OwnershipIndex.current() does
+        if since is not None:
+            changed = _load(db, since)
+            with self._lock:
+                self._apply(changed, [])
+                short = [kind for kind, (count, _, _) in state.items() if self._counts[kind] != count]
+            if short:
+                gone = self._missing(db, short)
+                with self._lock:
+                    self._apply([], gone)
+                    short = [kind for kind, (count, _, _) in state.items() if self._counts[kind] != count]
+            if not short:
+                with self._lock:
+                    self._state, self._since = state, _settled(state, self._since)
+                    self._checked = time.monotonic()
+                    self.updates += 1
+                return self
+        self.rebuild(db, state)
+        return self
+
+    def _missing(self, db: Session, kinds: list[str]) -> list[tuple[str, int]]:
+        """
+        The rows of these kinds that are in the forest but no longer in their
+        tables. On Postgres only the keys of buckets whose counts differ are
+        fetched — for one row deleted, 1/256th of the table.
+        """
+        gone = []
+        for kind in kinds:
+            model, key, entity, client = _sources()[kind]
+            stmt = select(entity, client) if key is None else select(key)
+            buckets = None
+            if db.get_bind().dialect.name == "postgresql":
+                bucket = _bucket(kind)
+                stored = dict(db.execute(select(bucket, func.count()).select_from(model).group_by(bucket)).all())
+                with self._lock:
+                    buckets = {b for b in range(256) if self._buckets[kind, b] != stored.get(b, 0)}
+                stmt = stmt.where(bucket.in_(buckets))
+            if key is None:
+                present = {_pair(e, c) for e, c in db.execute(stmt)}
+            else:
+                present = {k.int for k in db.scalars(stmt)}
+            with self._lock:
+                gone += [
+                    (k, row) for k, row in self._links
+                    if k == kind and (buckets is None or row & 0xff in buckets) and row not in present
+                ]
+        return gone
+
+    def rebuild(self, db: Session, state: Optional[dict] = None) -> dict:
+        """Load every link and build the forest from scratch; returns snapshot()."""
+        state = state or _state(db)
+        started = time.perf_counter()
+        built = ClientGroups()
+        built._apply(_load(db), [])
+        with self._lock:
+            self._links, self._counts, self._buckets = built._links, built._counts, built._buckets
+            self._incident = built._incident
+            self._parent, self._members, self._ranked = built._parent, built._members, None
+            self._state, self._since = state, _settled(state, self._since)
+            self._built = self._checked = time.monotonic()
+            self.builds += 1
+            self.last_build_ms = round((time.perf_counter() - started) * 1000, 2)
+        return self.snapshot()
+
+    def group(self, client_id: int) -> tuple[list[int], list[Link]]:
+        """The client's group (just the client, if it has no links) and the links that join it."""
+        with self._lock:
+            if client_id not in self._parent:
+                return [client_id], []
+            members = list(self._members[self._find(client_id)])
+            return members, [
+                self._links[kind_key]
+                for m in members for kind_key in self._incident[m]
+                if self._links[kind_key].entity_id == m
+            ]
+
+    def ranked(self) -> tuple[list, list]:
+        """
+        Every group as (-size, group_id, members), largest first, with the
+        sort keys alone alongside for bisecting. A group's id is its lowest
+        client id, the same on every worker. Sorted again only after a change.
+        The members are the forest's own lists, not copies: a page read just
+        as a link is added may show the new member a moment early.
+        """
+        with self._lock:
+            if self._ranked is None:
+                groups = sorted((-len(ms), min(ms), ms) for ms in self._members.values())
+                self._ranked = groups, [g[:2] for g in groups]
+            return self._ranked
+
+    def links_of(self, members) -> tuple[int, dict[int, int]]:
+        """How many links join these clients, and how many each of them has."""
+        with self._lock:
+            degree = {m: len(self._incident.get(m, ())) for m in members}
+        return sum(degree.values()) // 2, degree
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "links":         sum(len(ks) for ks in self._incident.values()) // 2,
+                "clients":       len(self._parent),
+                "groups":        len(self._members),
+                "hits":          self.hits,
+                "updates":       self.updates,
+                "splits":        self.splits,
+                "builds":        self.builds,
+                "last_build_ms": self.last_build_ms,
+            }
+
+
+index = ClientGroups()
+
+
+# ── Responses ──
+
+def _names(db: Session, ids) -> dict[uuid.UUID, object]:
+    rows = db.execute(
+        select(Client.id, Client.display_name, Client.legal_name, Client.pan, Client.constitution, Client.is_active)
+        .where(Client.id.in_(list(ids)))
+    )
+    return {r.id: r for r in rows}
+
+
+def client_group(db: Session, client_id: uuid.UUID) -> dict:
+    members, links = index.current(db).group(client_id.int)
+    _, degree = index.links_of(members)
+    names = _names(db, [uuid.UUID(int=m) for m in members])
+    return {
+        "group_id": uuid.UUID(int=min(members)),
+        "size":     len(members),
+        "members":  sorted((
+            {
+                "client_id":    row.id,
+                "display_name": row.display_name,
+                "legal_name":   row.legal_name,
+                "pan":          row.pan,
+                "constitution": row.constitution,
+                "is_active":    row.is_active,
+                "links":        degree[row.id.int],
+            }
+            for row in names.values()
+        ), key=lambda m: (-m["links"], m["display_name"])),
+        "links": sorted((
+            {"kind": l.kind, "entity_id": uuid.UUID(int=l.entity_id), "client_id": uuid.UUID(int=l.client_id)}
+            for l in links
+        ), key=lambda l: (l["kind"], l["entity_id"], l["client_id"])),
+    }
+
+
+def encode_cursor(group: dict) -> str:
+    raw = json.dumps([group["size"], str(group["group_id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        size, group_id = json.loads(raw)
+        return int(size), uuid.UUID(group_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def list_groups(db: Session, min_size: int, limit: int, after: Optional[tuple[int, uuid.UUID]] = None) -> tuple[list[dict], int]:
+    """
+    One page of groups of at least min_size clients, largest first (then by
+    group_id), and how many such groups there are. Pages bisect the ranking
+    kept in memory, so the cost of a page is its own size.
+    """
+    groups, keys = index.current(db).ranked()
+    total = bisect.bisect_right(keys, (-min_size, 1 << 128))
+    start = bisect.bisect_right(keys, (-after[0], after[1].int)) if after else 0
+    page = groups[start:min(total, start + limit)]
+    hubs, counts = [], []
+    for _, _, members in page:
+        count, degree = index.links_of(members)
+        hubs.append(uuid.UUID(int=max(members, key=lambda m: (degree[m], -m))))
+        counts.append(count)
+    names = _names(db, hubs)
+    return [
+        {
+            "group_id":      uuid.UUID(int=group_id),
+            "size":          -size,
+            "links":         count,
+            "hub_client_id": hub,
+            "hub_name":      names[hub].display_name if hub in names else None,
+        }
+        for (size, group_id, _), hub, count in zip(page, hubs, counts)
+    ], total
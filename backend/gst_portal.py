@@ -0,0 +1,527 @@
+"""
+GST portal lookups — the trade name, status, principal address, nature of
+business and e-invoice columns of gst_registrations (migration 001).
+
+A provider answers for one GSTIN at a time: `await provider.lookup(gstin)`
+returns a Taxpayer, or raises PortalError (retryable for timeouts, 429s and
+5xx) or NotFound. GST_LOOKUP_PROVIDER picks it:
+
+    mock   MockProvider — made-up but stable details worked out from the
+           GSTIN itself, never a network call. GST_MOCK_LATENCY_MS and
+           GST_MOCK_FAILURE_RATE make it slow and flaky on purpose, to
+           exercise the limits and retries below. For development and tests.
+    http   HTTPProvider — GET GST_LOOKUP_URL (a GSP's taxpayer search, with
+           {gstin} in it) with GST_LOOKUP_API_KEY in GST_LOOKUP_API_HEADER,
+           answering in the portal's field names (lgnm, tradeNam, sts, pradr,
+           nba, einvoiceStatus). Needs httpx installed.
+    unset  lookups are off: the lookup and refresh endpoints answer 503 and
+           nothing is refreshed in the background.
+
+refresh_stale() walks the active registrations not fetched in
+GST_REFRESH_MAX_AGE_DAYS, GST_REFRESH_BATCH at a time. Each batch is looked
+up GST_REFRESH_CONCURRENCY at a time and at most GST_REFRESH_RATE lookups a
+second (the portal throttles per GSP account), retrying transient failures
+GST_REFRESH_ATTEMPTS times with jittered exponential backoff, and written
+back with one UPDATE ... FROM (VALUES ...). A GSTIN the portal does not know
+is recorded as gstin_status "Not found"; one that kept failing is left stale
+for the next run. The API runs it every GST_REFRESH_SECONDS (0 turns this
+off), one worker at a time under an advisory lock; POST /api/gst/{id}/refresh
+refreshes a single registration on demand, and `python gst_portal.py` runs a
+pass by hand. Counters are reported by GET /health/gst-portal.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Boolean, Text, bindparam, cast, column, select, text, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+import search_index
+from models import GSTRegistration
+
+try:
+    import httpx
+except ImportError:     # pragma: no cover - depends on the install
+    httpx = None
+
+log = logging.getLogger(__name__)
+
+PROVIDER           = os.environ.get("GST_LOOKUP_PROVIDER", "").lower()
+TIMEOUT            = float(os.environ.get("GST_LOOKUP_TIMEOUT", "10"))       # seconds per attempt
+CONCURRENCY        = int(os.environ.get("GST_REFRESH_CONCURRENCY", "4"))
+RATE               = float(os.environ.get("GST_REFRESH_RATE", "5"))          # lookups per second, 0 = no limit
+ATTEMPTS           = int(os.environ.get("GST_REFRESH_ATTEMPTS", "4"))
+ON_DEMAND_ATTEMPTS = int(os.environ.get("GST_LOOKUP_ATTEMPTS", "2"))     # for the API's lookup and refresh endpoints
+BACKOFF            = float(os.environ.get("GST_REFRESH_BACKOFF", "0.5"))     # first retry delay, doubled per attempt
+BACKOFF_MAX        = float(os.environ.get("GST_REFRESH_BACKOFF_MAX", "30"))
+BATCH              = int(os.environ.get("GST_REFRESH_BATCH", "200"))
+MAX_AGE            = timedelta(days=float(os.environ.get("GST_REFRESH_MAX_AGE_DAYS", "30")))
+REFRESH_SECONDS    = int(os.environ.get("GST_REFRESH_SECONDS", "3600"))
+_REFRESH_LOCK = 0x4753      # pg advisory lock key: one refresher across workers
+
+NOT_FOUND = "Not found"     # gstin_status of a GSTIN the portal does not know
+
+GSTIN_PATTERN = re.compile(r"^\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z]$")
+
+# The first two digits of a GSTIN
+STATE_CODES = {
+    "01": "Jammu and Kashmir", "02": "Himachal Pradesh", "03": "Punjab", "04": "Chandigarh",
+    "05": "Uttarakhand", "06": "Haryana", "07": "Delhi", "08": "Rajasthan", "09": "Uttar Pradesh",
+    "10": "Bihar", "11": "Sikkim", "12": "Arunachal Pradesh", "13": "Nagaland", "14": "Manipur",
+    "15": "Mizoram", "16": "Tripura", "17": "Meghalaya", "18": "Assam", "19": "West Bengal",
+    "20": "Jharkhand", "21": "Odisha", "22": "Chhattisgarh", "23": "Madhya Pradesh", "24": "Gujarat",
+    "26": "Dadra and Nagar Haveli and Daman and Diu", "27": "Maharashtra", "29": "Karnataka",
+    "30": "Goa", "31": "Lakshadweep", "32": "Kerala", "33": "Tamil Nadu", "34": "Puducherry",
+    "35": "Andaman and Nicobar Islands", "36": "Telangana", "37": "Andhra Pradesh", "38": "Ladakh",
+    "97": "Other Territory", "99": "Centre Jurisdiction",
+}
+
+
+class Taxpayer(NamedTuple):
+    """What the portal says about one GSTIN."""
+    gstin:               str
+    legal_name:          Optional[str]
+    trade_name:          Optional[str]
+    status:              Optional[str]
+    registration_type:   Optional[str]
+    registration_date:   Optional[date]
+    principal_address:   Optional[str]
+    nature_of_business:  Optional[str]
+    einvoice_applicable: Optional[bool]
+
+    @property
+    def state_code(self) -> str:
+        return self.gstin[:2]
+
+    @property
+    def state(self) -> Optional[str]:
+        return STATE_CODES.get(self.state_code)
+
+
+class PortalError(Exception):
+    def __init__(self, message: str, retryable: bool = True, retry_after: float | None = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class NotFound(PortalError):
+    def __init__(self, gstin: str):
+        super().__init__(f"GSTIN {gstin} not found on the GST portal", retryable=False)
+
+
+# ── Providers ──
+
+# The portal's taxpayer types ("dty") -> gst_registration_type
+_REGISTRATION_TYPES = {
+    "Regular": "Regular", "Composition": "Composition", "SEZ Unit": "SEZ Unit",
+    "SEZ Developer": "SEZ Developer", "Casual": "Casual", "Non Resident": "Non-Resident",
+    "Non-Resident": "Non-Resident", "QRMP": "QRMP",
+}
+
+
+def _registration_type(dty: str | None) -> str | None:
+    return next((v for k, v in _REGISTRATION_TYPES.items() if dty and k in dty), None)
+
+
+class MockProvider:
+    """Stable details derived from the GSTIN — the same answer every time, offline."""
+
+    _STATUSES = ["Active"] * 18 + ["Cancelled", "Suspended"]
+    _NATURES = ["Retail Business", "Wholesale Business", "Supplier of Services", "Office / Sale Office",
+                "Factory / Manufacturing", "Warehouse / Depot", "Recipient of Goods or Services"]
+    _STREETS = ["MG Road", "Station Road", "Nehru Nagar", "Industrial Estate", "Market Yard", "Link Road"]
+    _SUFFIXES = {"C": " PRIVATE LIMITED", "F": " & CO", "T": " TRUST", "A": " ASSOCIATION"}
+
+    def __init__(self, latency_ms: float = 0, failure_rate: float = 0):
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+
+    async def lookup(self, gstin: str) -> Taxpayer:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise PortalError("mock portal unavailable")
+        if not GSTIN_PATTERN.match(gstin) or gstin[:2] not in STATE_CODES:
+            raise NotFound(gstin)
+        h = hashlib.blake2b(gstin.encode(), digest_size=16).digest()
+        pan = gstin[2:12]
+        name = f"TAXPAYER {pan}{self._SUFFIXES.get(pan[3], '')}"
+        state = STATE_CODES[gstin[:2]]
+        return Taxpayer(
+            gstin=gstin,
+            legal_name=name,
+            trade_name=f"{pan[5:9]} {'TRADERS' if h[0] % 2 else 'ENTERPRISES'}",
+            status=self._STATUSES[h[1] % len(self._STATUSES)],
+            registration_type="Composition" if h[2] % 8 == 0 else "Regular",
+            registration_date=date(2017, 7, 1) + timedelta(days=int.from_bytes(h[3:5], "big") % 2900),
+            principal_address=f"{h[5] % 200 + 1}, {self._STREETS[h[6] % len(self._STREETS)]}, {state}, "
+                              f"{int.from_bytes(h[7:10], 'big') % 800000 + 110000}",
+            nature_of_business=", ".join(sorted({self._NATURES[h[10] % 7], self._NATURES[h[11] % 7]})),
+            einvoice_applicable=h[12] % 3 == 0,
+        )
+
+    async def aclose(self):
+        pass
+
+
+def _portal_date(value: str | None) -> date | None:
+    try:
+        return datetime.strptime(value, "%d/%m/%Y").date() if value else None
+    except ValueError:
+        return None
+
+
+def _portal_address(pradr: dict | None) -> str | None:
+    if not pradr:
+        return None
+    if pradr.get("adr"):
+        return pradr["adr"]
+    a = pradr.get("addr") or {}
+    parts = [a.get(k) for k in ("bno", "flno", "bnm", "st", "loc", "dst", "stcd", "pncd")]
+    return ", ".join(p for p in parts if p) or None
+
+
+def parse_taxpayer(gstin: str, body: dict) -> Taxpayer:
+    """A taxpayer search answer in the portal's field names -> Taxpayer."""
+    data = body.get("data", body)
+    einvoice = data.get("einvoiceStatus")
+    return Taxpayer(
+        gstin=gstin,
+        legal_name=data.get("lgnm") or None,
+        trade_name=data.get("tradeNam") or None,
+        status=data.get("sts") or None,
+        registration_type=_registration_type(data.get("dty")),
+        registration_date=_portal_date(data.get("rgdt")),
+        principal_address=_portal_address(data.get("pradr")),
+        nature_of_business=", ".join(data.get("nba") or []) or None,
+        einvoice_applicable=None if einvoice is None else str(einvoice).lower() in ("yes", "true", "y"),
+    )
+
+
+class HTTPProvider:
+    """A GSP's taxpayer search API over HTTP."""
+
+    def __init__(self, url: str, api_key: str | None = None, header: str = "Authorization"):
+        if httpx is None:
+            raise RuntimeError("GST_LOOKUP_PROVIDER=http needs httpx installed")
+        self.url = url
+        self._client = httpx.AsyncClient(
+            timeout=TIMEOUT,
+            headers={header: api_key} if api_key else {},
+            limits=httpx.Limits(max_connections=CONCURRENCY),
+        )
+
+    async def lookup(self, gstin: str) -> Taxpayer:
+        try:
+            r = await self._client.get(self.url.format(gstin=gstin))
+        except httpx.HTTPError as e:
+            raise PortalError(f"GST portal request failed: {e!r}")
+        if r.status_code == 404:
+            raise NotFound(gstin)
+        if r.status_code == 429 or r.status_code >= 500:
+            retry_after = r.headers.get("Retry-After")
+            raise PortalError(f"GST portal answered {r.status_code}",
+                              retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+        if r.status_code >= 400:
+            raise PortalError(f"GST portal answered {r.status_code}", retryable=False)
+        return parse_taxpayer(gstin, r.json())
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_provider = None
+
+
+def provider():
+    """The configured provider (made on first use), or None when lookups are off."""
+    global _provider
+    if _provider is None and PROVIDER:
+        if PROVIDER == "mock":
+            _provider = MockProvider(float(os.environ.get("GST_MOCK_LATENCY_MS", "0")),
+                                     float(os.environ.get("GST_MOCK_FAILURE_RATE", "0")))
+        elif PROVIDER == "http":
+            _provider = HTTPProvider(os.environ["GST_LOOKUP_URL"], os.environ.get("GST_LOOKUP_API_KEY"),
+                                     os.environ.get("GST_LOOKUP_API_HEADER", "Authorization"))
+        else:
+            raise RuntimeError(f"GST_LOOKUP_PROVIDER must be 'mock' or 'http', got '{PROVIDER}'")
+    return _provider
+
+
+async def shutdown():
+    global _provider
+    if _provider is not None:
+        await _provider.aclose()
+        _provider = None
+
+
+# ── Lookups: rate limit, concurrency, retries ──
+
+class Metrics:
+    """Lookup and refresh counters for this worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups = self.retries = self.failures = self.not_found = self.written = self.runs = 0
+        self.last_run_at: datetime | None = None
+        self.last_run_seconds: float | None = None
+
+    def add(self, **counts):
+        with self._lock:
+            for name, n in counts.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "provider":         PROVIDER or None,
+                "lookups":          self.lookups,
+                "retries":          self.retries,
+                "failures":         self.failures,
+                "not_found":        self.not_found,
+                "written":          self.written,
+                "runs":             self.runs,
+                "last_run_at":      self.last_run_at,
+                "last_run_seconds": self.last_run_seconds,
+            }
+
+
+metrics = Metrics()
+
+
+class RateLimit:
+    """Spaces calls to wait() at least 1/rate seconds apart (rate <= 0: no limit)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+# Shared by every lookup in this worker, on demand or in the background
+_limit = RateLimit(RATE)
+
+
+async def lookup(gstin: str, attempts: int | None = None, portal=None) -> Taxpayer:
+    """One GSTIN, retrying transient failures with jittered exponential backoff."""
+    portal = portal or provider()
+    attempts = max(1, attempts or ATTEMPTS)
+    for attempt in range(attempts):
+        await _limit.wait()
+        metrics.add(lookups=1)
+        try:
+            return await asyncio.wait_for(portal.lookup(gstin), TIMEOUT)
+        except asyncio.TimeoutError:
+            error = PortalError(f"GST portal did not answer in {TIMEOUT:g}s")
+        except NotFound:
+            metrics.add(not_found=1)
+            raise
+        except PortalError as e:
+            error = e
+        if not error.retryable or attempt == attempts - 1:
+            metrics.add(failures=1)
+            raise error
+        metrics.add(retries=1)
+        await asyncio.sleep(min(BACKOFF_MAX, error.retry_after or BACKOFF * 2 ** attempt * random.uniform(0.5, 1)))
+
+
+async def lookup_many(gstins: dict, portal=None) -> dict:
+    """
+    {registration id: gstin} -> {registration id: Taxpayer, or None if the
+    portal does not know it}, CONCURRENCY lookups at a time. GSTINs that kept
+    failing are left out.
+    """
+    gate = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(gstin: str):
+        async with gate:
+            try:
+                return await lookup(gstin, portal=portal)
+            except NotFound:
+                return None
+            except PortalError as e:
+                log.warning("GSTIN %s not refreshed: %s", gstin, e)
+                return e
+
+    found = await asyncio.gather(*(one(g) for g in gstins.values()))
+    return {reg_id: t for reg_id, t in zip(gstins, found) if not isinstance(t, PortalError)}
+
+
+# ── Writes ──
+
+# Taxpayer field -> gst_registrations column, for the refreshed columns
+_COLUMNS = {
+    "trade_name":          "trade_name",
+    "status":              "gstin_status",
+    "principal_address":   "principal_address",
+    "nature_of_business":  "nature_of_business",
+    "einvoice_applicable": "einvoice_applicable",
+}
+_TYPES = {"einvoice_applicable": Boolean}
+
+
+def write(db: Session, found: dict, fetched_at: datetime | None = None) -> int:
+    """
+    Store lookup results — {registration id: Taxpayer, or None for "not
+    found"} — with last_fetched_at, and re-index their search documents (the
+    trade name is searchable). One UPDATE ... FROM (VALUES ...) on Postgres.
+    The caller commits. Returns the number of rows written.
+    """
+    fetched_at = fetched_at or datetime.now(timezone.utc)
+    table = GSTRegistration.__table__
+    hits = {reg_id: t for reg_id, t in found.items() if t is not None}
+    misses = [reg_id for reg_id, t in found.items() if t is None]
+    ids = []
+    if hits and db.get_bind().dialect.name == "postgresql":
+        rows = values(column("id", Text), *(column(c, _TYPES.get(c, Text)) for c in _COLUMNS.values()), name="portal").data(
+            [(str(reg_id), *(getattr(t, f) for f in _COLUMNS)) for reg_id, t in hits.items()]
+        )
+        # VALUES parameters arrive untyped; cast them to the columns' types
+        ids += db.execute(
+            update(table)
+            .where(table.c.id == cast(rows.c.id, UUID(as_uuid=True)))
+            .values(last_fetched_at=fetched_at, **{c: cast(rows.c[c], _TYPES.get(c, Text)) for c in _COLUMNS.values()})
+            .returning(table.c.id)
+        ).scalars().all()
+    elif hits:
+        # SQLite has no VALUES lists with column names; one executemany instead
+        db.execute(
+            update(table).where(table.c.id == bindparam("reg_id"))
+            .values(last_fetched_at=fetched_at, **{c: bindparam(c) for c in _COLUMNS.values()}),
+            [{"reg_id": reg_id, **{c: getattr(t, f) for f, c in _COLUMNS.items()}} for reg_id, t in hits.items()],
+        )
+        ids += hits
+    if misses:
+        ids += db.execute(
+            update(table).where(table.c.id.in_(misses))
+            .values(gstin_status=NOT_FOUND, last_fetched_at=fetched_at)
+            .returning(table.c.id)
+        ).scalars().all()
+    if ids:
+        search_index.index_rows(db, GSTRegistration, db.execute(
+            select(table.c.id, table.c.client_id, table.c.gstin, table.c.trade_name, table.c.state)
+            .where(table.c.id.in_(ids))
+        ))
+    metrics.add(written=len(ids))
+    return len(ids)
+
+
+# ── Background refresh ──
+
+def stale(db: Session, after=None, limit: int | None = None, now: datetime | None = None) -> dict:
+    """{id: gstin} of the next `limit` (default BATCH) active registrations (by id, after `after`) due a refresh."""
+    cutoff = (now or datetime.now(timezone.utc)) - MAX_AGE
+    q = (
+        select(GSTRegistration.id, GSTRegistration.gstin)
+        .where(GSTRegistration.is_active,
+               (GSTRegistration.last_fetched_at.is_(None)) | (GSTRegistration.last_fetched_at < cutoff))
+        .order_by(GSTRegistration.id)
+        .limit(limit or BATCH)
+    )
+    if after is not None:
+        q = q.where(GSTRegistration.id > after)
+    return dict(db.execute(q).all())
+
+
+async def refresh_stale(session_factory, portal=None) -> int | None:
+    """
+    One pass over the stale registrations; returns the number written, or
+    None when another worker's pass holds the lock.
+    """
+    portal = portal or provider()
+    started = time.perf_counter()
+
+    def locked(conn, take: bool) -> bool:
+        sql = "SELECT pg_try_advisory_lock(:key)" if take else "SELECT pg_advisory_unlock(:key)"
+        return conn.execute(text(sql), {"key": _REFRESH_LOCK}).scalar()
+
+    def next_batch(after) -> dict:
+        with session_factory() as db:
+            return stale(db, after)
+
+    def store(found: dict) -> int:
+        with session_factory() as db:
+            n = write(db, found)
+            db.commit()
+            return n
+
+    async def run() -> int:
+        written, after = 0, None
+        while batch := await asyncio.to_thread(next_batch, after):
+            after = max(batch)
+            found = await lookup_many(batch, portal)
+            if found:
+                written += await asyncio.to_thread(store, found)
+        metrics.add(runs=1)
+        metrics.last_run_at = datetime.now(timezone.utc)
+        metrics.last_run_seconds = round(time.perf_counter() - started, 3)
+        log.info("GST portal refresh: %d registrations written in %.1fs", written, metrics.last_run_seconds)
+        return written
+
+    with session_factory() as db:
+        bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return await run()
+    # The session-level lock lives on a connection of its own for the whole
+    # pass; lookups run between the short transactions that read and write
+    # each batch, never inside one
+    holder = await asyncio.to_thread(lambda: bind.connect().execution_options(isolation_level="AUTOCOMMIT"))
+    try:
+        if not await asyncio.to_thread(locked, holder, True):
+            return None
+        try:
+            return await run()
+        finally:
+            await asyncio.to_thread(locked, holder, False)
+    finally:
+        holder.close()
+
+
+async def refresh_forever(session_factory):
+    """Refresh now and every REFRESH_SECONDS; runs as a background task of the API."""
+    if REFRESH_SECONDS <= 0 or provider() is None:
+        return
+    while True:
+        try:
+            await refresh_stale(session_factory)
+        except Exception:
+            log.exception("GST portal refresh failed")
+        await asyncio.sleep(REFRESH_SECONDS)
+
+
+def snapshot() -> dict:
+    return metrics.snapshot()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    if provider() is None:
+        raise SystemExit("Set GST_LOOKUP_PROVIDER to 'mock' or 'http' first.")
+
+    async def main():
+        try:
+            return await refresh_stale(SessionLocal)
+        finally:
+            await shutdown()
+
+    n = asyncio.run(main())
+    print("another refresh is running" if n is None else f"gst_registrations: {n} refreshed")
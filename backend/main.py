@@ -3,18 +3,55 @@ CA Client Management System — FastAPI Backend
 Run with: uvicorn main:app --reload --port 8000
 API docs at: http://localhost:8000/docs
 """
+import asyncio
 import os
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
+
+import crypto
+import dossier
+import gst_portal
+import password_pool
+from compliance import calendar as compliance_calendar
+from ownership import index as ownership_index
+from groups import index as groups_index
+from compression import CompressionMiddleware
+from stats import reconcile_forever as reconcile_stats_forever
+from auth import principal_cache, require_admin
+from database import SessionLocal, engine, pool_status
+from routers import auth, clients, gst, directors, shareholders, partners, bank_accounts, epf_esi, other_registrations, search, export, compliance, stats, groups
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # dashboard_stats is kept by Postgres triggers; recount it now and then in case anything bypassed them
+    reconciler = None
+    if engine.dialect.name == "postgresql":
+        reconciler = asyncio.create_task(reconcile_stats_forever(SessionLocal))
+    # gst_registrations' portal columns go stale; look them up again in the background
+    refresher = asyncio.create_task(gst_portal.refresh_forever(SessionLocal))
+    yield
+    if reconciler:
+        reconciler.cancel()
+    refresher.cancel()
+    await gst_portal.shutdown()
+    # bcrypt and PDF worker processes (started on first use)
+    password_pool.shutdown()
+    dossier.shutdown()
 
-from routers import auth, clients, gst, directors, shareholders, partners, bank_accounts, epf_esi, other_registrations
 
 app = FastAPI(
     title="CA Client Management API",
     description="Backend for managing CA firm client database",
     version="1.0.0",
+    lifespan=lifespan,
+    # Endpoints that return dicts/entities are encoded with orjson (list and
+    # detail GETs serialise themselves through projection.respond)
+    default_response_class=ORJSONResponse,
 )
 
 # Allow requests from any origin
@@ -26,6 +63,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# brotli/gzip for bodies over 1 kB — the client list is mostly repetitive JSON
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+
+@app.exception_handler(crypto.UndecryptableCredential)
+async def undecryptable_credential(request: Request, exc: crypto.UndecryptableCredential):
+    # A save that would have to re-seal credentials no configured key opens
+    return ORJSONResponse(status_code=409, content={
+        "detail": "Stored credentials cannot be decrypted with the configured keys; "
+                  "add the old key to CREDENTIAL_PREVIOUS_KEYS or resend every credential field",
+    })
+
+
 # Register all routers under /api prefix (matches frontend's baseURL: '/api')
 app.include_router(auth.router, prefix="/api")
 app.include_router(clients.router, prefix="/api")
@@ -36,6 +87,11 @@ app.include_router(partners.router, prefix="/api")
 app.include_router(bank_accounts.router, prefix="/api")
 app.include_router(epf_esi.router, prefix="/api")
 app.include_router(other_registrations.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(export.router, prefix="/api")
+app.include_router(compliance.router, prefix="/api")
+app.include_router(stats.router, prefix="/api")
+app.include_router(groups.router, prefix="/api")
 
 
 @app.get("/health", tags=["Health"])
@@ -43,6 +99,54 @@ def health():
     return {"status": "ok", "message": "CA Client Management API is running"}
 
 
+@app.get("/health/pool", tags=["Health"], dependencies=[Depends(require_admin)])
+def health_pool():
+    """Connection-pool usage, checkout wait-time histogram and pre-ping failures (admin only)."""
+    return pool_status()
+
+
+@app.get("/health/auth-cache", tags=["Health"], dependencies=[Depends(require_admin)])
+def health_auth_cache():
+    """Principal cache size and hit rate for this worker (admin only)."""
+    return principal_cache.snapshot()
+
+
+@app.get("/health/hash-pool", tags=["Health"], dependencies=[Depends(require_admin)])
+def health_hash_pool():
+    """bcrypt pool queue depth, rejections and job times for this worker (admin only)."""
+    return password_pool.metrics.snapshot()
+
+
+@app.get("/health/dossiers", tags=["Health"], dependencies=[Depends(require_admin)])
+def health_dossiers():
+    """PDF render pool load and dossier cache hit rate for this worker (admin only)."""
+    return dossier.snapshot()
+
+
+@app.get("/health/compliance", tags=["Health"], dependencies=[Depends(require_admin)])
+def health_compliance():
+    """Rolling expiry calendar size, hits and rebuilds for this worker (admin only)."""
+    return compliance_calendar.snapshot()
+
+
+@app.get("/health/ownership", tags=["Health"], dependencies=[Depends(require_admin)])
+def health_ownership():
+    """Ownership index size, hits, incremental updates and full loads for this worker (admin only)."""
+    return ownership_index.snapshot()
+
+
+@app.get("/health/groups", tags=["Health"], dependencies=[Depends(require_admin)])
+def health_groups():
+    """Client group forest size, hits, incremental updates, splits and full loads for this worker (admin only)."""
+    return groups_index.snapshot()
+
+
+@app.get("/health/gst-portal", tags=["Health"], dependencies=[Depends(require_admin)])
+def health_gst_portal():
+    """GST portal lookups, retries, failures and background refresh runs for this worker (admin only)."""
+    return gst_portal.snapshot()
+
+
 # Serve React frontend static files
 # Check ./dist first (Railway/production), then ../frontend/dist (local dev)
 _base = os.path.dirname(__file__)
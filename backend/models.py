@@ -7,17 +7,23 @@ from datetime import date, datetime
 from typing import Optional, List
 
 from sqlalchemy import (
-    Boolean, Date, Text, Numeric, Integer,
-    ForeignKey, UniqueConstraint, func, Enum as SAEnum, CHAR
+    BigInteger, Boolean, Date, Text, Numeric, Integer, LargeBinary,
+    ForeignKey, UniqueConstraint, func, Enum as SAEnum, CHAR, Computed
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, synonym
+from sqlalchemy.dialects.postgresql import UUID, TIMESTAMP, ARRAY, TSVECTOR
 
 
 class Base(DeclarativeBase):
     pass
 
 
+def _credential(name: str):
+    """Client attribute stored on its ClientCredentials row."""
+    return association_proxy("credentials", name, creator=lambda value: ClientCredentials(**{name: value}))
+
+
 def _enum(*values, name: str):
     """Reference an existing PostgreSQL ENUM type without re-creating it."""
     return SAEnum(*values, name=name, create_type=False)
@@ -66,14 +72,9 @@ class Client(Base):
     passport_no:       Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     passport_expiry:   Mapped[Optional[date]] = mapped_column(Date, nullable=True)
 
-    # Individual KYC — MCA v3
-    mca_user_id:  Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    mca_password: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # encrypted
-
     # Individual KYC — DSC
     dsc_provider:       Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     dsc_expiry_date:    Mapped[Optional[date]] = mapped_column(Date, nullable=True)
-    dsc_token_password: Mapped[Optional[str]]  = mapped_column(Text, nullable=True)  # encrypted
 
     # Contact
     primary_phone:   Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -88,6 +89,48 @@ class Client(Base):
     state:         Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     pin_code:      Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
+    notes:      Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime]      = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime]      = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    # Relationships
+    gst_registrations:    Mapped[List["GSTRegistration"]]    = relationship("GSTRegistration",    back_populates="client", cascade="all, delete-orphan")
+    bank_accounts:        Mapped[List["BankAccount"]]        = relationship("BankAccount",        back_populates="client", cascade="all, delete-orphan")
+    epf_esi_registrations: Mapped[List["EPFESIRegistration"]] = relationship("EPFESIRegistration", back_populates="client", cascade="all, delete-orphan")
+    other_registrations:  Mapped[List["OtherRegistration"]]  = relationship("OtherRegistration",  back_populates="client", cascade="all, delete-orphan")
+
+    # Portal credentials live in client_credentials (1:1) so list scans never
+    # read them; these proxies keep them addressable as client.mca_password etc.
+    # and create the row on first write. Load with LOAD_CREDENTIALS where needed.
+    credentials: Mapped[Optional["ClientCredentials"]] = relationship("ClientCredentials", uselist=False, cascade="all, delete-orphan")
+
+    mca_user_id              = _credential("mca_user_id")
+    mca_password             = _credential("mca_password")
+    dsc_token_password       = _credential("dsc_token_password")
+    it_portal_user_id        = _credential("it_portal_user_id")
+    it_portal_password       = _credential("it_portal_password")
+    it_portal_user_id_tds    = _credential("it_portal_user_id_tds")
+    it_password_tds          = _credential("it_password_tds")
+    password_26as            = _credential("password_26as")
+    password_ais_tis         = _credential("password_ais_tis")
+    traces_user_id_deductor  = _credential("traces_user_id_deductor")
+    traces_password_deductor = _credential("traces_password_deductor")
+    traces_user_id_taxpayer  = _credential("traces_user_id_taxpayer")
+    traces_password_taxpayer = _credential("traces_password_taxpayer")
+    credentials_sealed       = _credential("credentials_sealed")
+
+
+class ClientCredentials(Base):
+    __tablename__ = "client_credentials"
+
+    client_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("clients.id", ondelete="CASCADE"), primary_key=True)
+    id = synonym("client_id")     # so credential jobs can walk this table by .id like the others
+
+    # MCA v3 / DSC
+    mca_user_id:        Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    mca_password:       Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # encrypted
+    dsc_token_password: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # encrypted
+
     # IT Portal
     it_portal_user_id:     Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     it_portal_password:    Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # encrypted
@@ -101,16 +144,15 @@ class Client(Base):
     traces_password_deductor: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # encrypted
     traces_user_id_taxpayer:  Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     traces_password_taxpayer: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # encrypted
+    credentials_sealed:       Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # AES-GCM envelope (CREDENTIAL_STORAGE=envelope)
 
-    notes:      Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime]      = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
-    updated_at: Mapped[datetime]      = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
 
-    # Relationships
-    gst_registrations:    Mapped[List["GSTRegistration"]]    = relationship("GSTRegistration",    back_populates="client", cascade="all, delete-orphan")
-    bank_accounts:        Mapped[List["BankAccount"]]        = relationship("BankAccount",        back_populates="client", cascade="all, delete-orphan")
-    epf_esi_registrations: Mapped[List["EPFESIRegistration"]] = relationship("EPFESIRegistration", back_populates="client", cascade="all, delete-orphan")
-    other_registrations:  Mapped[List["OtherRegistration"]]  = relationship("OtherRegistration",  back_populates="client", cascade="all, delete-orphan")
+    @property
+    def credential_context(self) -> str:
+        """Envelopes stay bound to the client row they were sealed for (see crypto._context)."""
+        return f"clients:{self.client_id}"
 
 
 # ── GST Registrations ────────────────────────────────────────────────────────
@@ -133,6 +175,7 @@ class GSTRegistration(Base):
     ewb_password:      Mapped[Optional[str]]  = mapped_column(Text, nullable=True)  # encrypted
     ewb_api_user_id:   Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     ewb_api_password:   Mapped[Optional[str]]      = mapped_column(Text, nullable=True)  # encrypted
+    credentials_sealed: Mapped[Optional[bytes]]    = mapped_column(LargeBinary, nullable=True)  # AES-GCM envelope
     # GST portal lookup data
     trade_name:         Mapped[Optional[str]]      = mapped_column(Text, nullable=True)
     gstin_status:       Mapped[Optional[str]]      = mapped_column(Text, nullable=True)
@@ -246,6 +289,7 @@ class BankAccount(Base):
     is_primary:           Mapped[bool]           = mapped_column(Boolean, nullable=False, default=False)
     net_banking_user_id:  Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     net_banking_password: Mapped[Optional[str]]  = mapped_column(Text, nullable=True)  # encrypted
+    credentials_sealed:   Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # AES-GCM envelope
     notes:                Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     created_at:           Mapped[datetime]       = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at:           Mapped[datetime]       = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -268,6 +312,7 @@ class EPFESIRegistration(Base):
     is_active:            Mapped[bool]           = mapped_column(Boolean, nullable=False, default=True)
     portal_user_id:       Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     portal_password:      Mapped[Optional[str]]  = mapped_column(Text, nullable=True)  # encrypted
+    credentials_sealed:   Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # AES-GCM envelope
     dsc_holder_name:      Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     authorised_signatory: Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     notes:                Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
@@ -292,9 +337,38 @@ class OtherRegistration(Base):
     state_jurisdiction:  Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     portal_user_id:      Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     portal_password:     Mapped[Optional[str]]  = mapped_column(Text, nullable=True)  # encrypted
+    credentials_sealed:  Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # AES-GCM envelope
     is_active:           Mapped[bool]           = mapped_column(Boolean, nullable=False, default=True)
     notes:               Mapped[Optional[str]]  = mapped_column(Text, nullable=True)
     created_at:          Mapped[datetime]       = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at:          Mapped[datetime]       = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
 
     client: Mapped["Client"] = relationship("Client", back_populates="other_registrations")
+
+
+# ── Search Documents ─────────────────────────────────────────────────────────
+
+class SearchDocument(Base):
+    """One row per searchable record (client or registration); maintained by search_index.py."""
+    __tablename__ = "search_documents"
+
+    entity_type: Mapped[str]           = mapped_column(Text, primary_key=True)
+    entity_id:   Mapped[uuid.UUID]     = mapped_column(UUID(as_uuid=True), primary_key=True)
+    client_id:   Mapped[uuid.UUID]     = mapped_column(UUID(as_uuid=True), ForeignKey("clients.id", ondelete="CASCADE"), nullable=False)
+    title:       Mapped[str]           = mapped_column(Text, nullable=False)
+    subtitle:    Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    identifiers: Mapped[List[str]]     = mapped_column(ARRAY(Text), nullable=False)   # normalised: upper-case, no spaces / dashes
+    search_text: Mapped[str]           = mapped_column(Text, nullable=False)
+    tsv:         Mapped[str]           = mapped_column(TSVECTOR, Computed("to_tsvector('simple', search_text)", persisted=True))
+    updated_at:  Mapped[datetime]      = mapped_column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# ── Dashboard Stats ──────────────────────────────────────────────────────────
+
+class DashboardStat(Base):
+    """One dashboard count; maintained by the dashboard_stats triggers and reconciled by stats.py."""
+    __tablename__ = "dashboard_stats"
+
+    metric: Mapped[str] = mapped_column(Text, primary_key=True)
+    key:    Mapped[str] = mapped_column(Text, primary_key=True)
+    count:  Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,426 @@
+"""
+Ultimate beneficial ownership — who owns a client through any number of layers.
+
+A client is owned by its active shareholders (the individual or, for a
+Company / Trust / HUF / LLP holder, the holding entity — itself a client
+with shareholders of its own) and, for a firm or LLP, by its active
+partners. Each such link is an edge from the owned client to its owner.
+
+Every worker keeps those edges in memory as an adjacency index, owned
+client -> its edges, so a report never goes back to the database to follow
+a chain. Like the compliance calendar, the index is checked against each
+table's version (see conditional.py) on every read. When a version has
+moved, only the rows written since are fetched and replaced in the index —
+since the latest updated_at read while nobody was writing that table. The
+index is loaded in full the first time, when rows have been deleted (a
+count that no longer adds up) and every REBUILD_SECONDS in any case.
+
+A report walks the group from the client upwards and resolves it:
+
+- Each edge's fraction is its percentage (a partner's profit-sharing
+  ratio) or, where that was left blank, its part by shares (capital) of
+  whatever the stated percentages leave.
+- The group is split into strongly connected components, which is also
+  how cross-holdings (cycles) are detected and reported.
+- The client's 100% is pushed up through the components in topological
+  order. An owner that has owners of its own passes its portion on, and
+  an owner that has none keeps it.
+- Within a cycle the portion is passed round until what is still going
+  round is negligible. That sums the geometric series of the circular
+  paths. Whatever never leaves a cycle (one nobody outside owns) is
+  reported as circular.
+
+A natural person holding more than the threshold (10% by default, as in the
+PML Rules) is a beneficial owner. If there is none, the client's active
+directors are returned as its senior managing officials.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+import conditional
+from models import Client, Director, Partner, Shareholder
+
+THRESHOLD = float(os.environ.get("UBO_THRESHOLD_PERCENT", "10"))
+# Reload the whole index at least this often (catches writes the delta could not see)
+REBUILD_SECONDS = float(os.environ.get("UBO_INDEX_REBUILD_SECONDS", "300"))
+MAX_ROUNDS = 1000           # times round a cycle before what is still moving is called circular
+_EPSILON = 1e-9             # a portion this small (of the client's 100%) has stopped moving
+
+
+class Edge(NamedTuple):
+    kind:       str                     # shareholder | partner
+    id:         uuid.UUID
+    owned_id:   uuid.UUID
+    owner_id:   Optional[uuid.UUID]     # None: holder not linked to a client
+    percentage: Optional[float]
+    units:      Optional[float]         # number of shares / capital contribution
+    is_active:  bool
+    updated_at: object
+
+
+def _sources() -> dict:
+    holder = case(
+        (Shareholder.holder_type == "Individual", Shareholder.individual_client_id),
+        else_=Shareholder.holding_entity_client_id,
+    )
+    return {
+        "shareholder": (Shareholder, (Shareholder.id, Shareholder.company_client_id, holder, Shareholder.percentage,
+                                      Shareholder.number_of_shares, Shareholder.is_active, Shareholder.updated_at)),
+        "partner":     (Partner, (Partner.id, Partner.firm_llp_client_id, Partner.individual_client_id, Partner.profit_sharing_ratio,
+                                  Partner.capital_contribution, Partner.is_active, Partner.updated_at)),
+    }
+
+
+def _state(db: Session) -> dict:
+    """kind -> conditional.version() of its table; read before the rows it covers."""
+    return {kind: conditional.version(db, model) for kind, (model, _) in _sources().items()}
+
+
+def _settled(state: dict, since: dict) -> dict:
+    """since, moved up to the latest updated_at of each kind nobody was writing in state."""
+    return {**since, **{kind: latest for kind, (_, latest, writers) in state.items() if not writers}}
+
+
+def _load(db: Session, since: Optional[dict] = None) -> list[Edge]:
+    """Every ownership row, or only those updated at or after since[kind] (all of a kind whose since is None)."""
+    edges = []
+    for kind, (model, columns) in _sources().items():
+        stmt = select(*columns)
+        if since is not None and since[kind] is not None:
+            stmt = stmt.where(model.updated_at >= since[kind])
+        for id_, owned, owner, pct, units, active, updated in db.execute(stmt):
+            edges.append(Edge(kind, id_, owned, owner, None if pct is None else float(pct),
+                              None if units is None else float(units), active, updated))
+    return edges
+
+
+class OwnershipIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state: Optional[dict] = None
+        self._since: dict = {}                                    # kind -> see _settled()
+        self._rows: dict[tuple[str, uuid.UUID], Edge] = {}        # every row, active or not
+        self._counts: dict[str, int] = defaultdict(int)           # rows of each kind in _rows
+        self._edges: dict[uuid.UUID, tuple[Edge, ...]] = {}       # owned -> its active edges
+        self._owners: dict[int, tuple] = {}                       # owned.int -> _fractions(its active edges)
+        self._built = 0.0           # monotonic time of the last full load
+        self.hits = 0
+        self.updates = 0
+        self.builds = 0
+        self.last_build_ms = 0.0
+
+    def current(self, db: Session) -> dict[int, tuple]:
+        """
+        owned client -> [(owner, fraction of it held)], brought up to date
+        first. Clients are keyed by UUID.int, which hashes in C: resolving a
+        large group looks up thousands of them.
+        """
+        state = _state(db)
+        with self._lock:
+            full = self._state is None or time.monotonic() - self._built >= REBUILD_SECONDS
+            if state == self._state and not full:
+                self.hits += 1
+                return self._owners
+            since = None if full else {kind: self._since.get(kind) for kind in state}
+        # Queried outside the lock, as ComplianceCalendar.current() does
+        if since is not None:
+            changed = _load(db, since)
+            with self._lock:
+                owners = self._apply(changed, state)
+                if owners is not None:
+                    return owners
+        started = time.perf_counter()
+        rows = {(e.kind, e.id): e for e in _load(db)}
+        edges, counts = defaultdict(tuple), defaultdict(int)
+        for e in rows.values():
+            counts[e.kind] += 1
+            if e.is_active:
+                edges[e.owned_id] += (e,)
+        owners = {owned.int: _fractions(es) for owned, es in edges.items()}
+        with self._lock:
+            self._rows, self._counts, self._edges, self._owners = rows, counts, dict(edges), owners
+            self._state, self._since = state, _settled(state, self._since)
+            self._built = time.monotonic()
+            self.builds += 1
+            self.last_build_ms = round((time.perf_counter() - started) * 1000, 2)
+            return self._owners
+
+    def _apply(self, changed: list[Edge], state: dict) -> Optional[dict]:
+        """
+        Replace the changed rows (called under the lock). Returns the new
+        index, or None when the counts show rows were deleted and only a
+        full load will do.
+        """
+        replaced, touched = {}, set()
+        for e in changed:
+            old = self._rows.get((e.kind, e.id))
+            if old is None:
+                self._counts[e.kind] += 1
+            elif old.updated_at > e.updated_at:
+                continue
+            else:
+                touched.add(old.owned_id)
+            self._rows[(e.kind, e.id)] = replaced[(e.kind, e.id)] = e
+            touched.add(e.owned_id)
+        if any(self._counts[kind] != count for kind, (count, _, _) in state.items()):
+            return None
+        # Copied, not changed in place: reports in flight keep a consistent index
+        owners = dict(self._owners)
+        for owned in touched:
+            kept = tuple(e for e in self._edges.get(owned, ()) if (e.kind, e.id) not in replaced)
+            added = tuple(e for e in replaced.values() if e.owned_id == owned and e.is_active)
+            if kept or added:
+                self._edges[owned] = kept + added
+                owners[owned.int] = _fractions(kept + added)
+            else:
+                self._edges.pop(owned, None)
+                owners.pop(owned.int, None)
+        self._owners = owners
+        self._state, self._since = state, _settled(state, self._since)
+        self.updates += 1
+        return owners
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "edges":         sum(len(e) for e in self._edges.values()),
+                "hits":          self.hits,
+                "updates":       self.updates,
+                "builds":        self.builds,
+                "last_build_ms": self.last_build_ms,
+            }
+
+
+index = OwnershipIndex()
+
+
+# ── Resolution ──
+
+def _fractions(edges: tuple[Edge, ...]) -> tuple[tuple[Optional[int], Optional[float]], ...]:
+    """
+    One owned client's edges -> ((owner_id.int, fraction of it held), ...). Holders
+    with no percentage split what the recorded percentages leave by their
+    shares (capital); fraction is None for a holder with neither.
+    """
+    stated, units = defaultdict(float), defaultdict(float)
+    for e in edges:
+        if e.percentage is not None:
+            stated[e.kind] += e.percentage / 100
+        elif e.units:
+            units[e.kind] += e.units
+    out = []
+    for e in edges:
+        if e.percentage is not None:
+            fraction = e.percentage / 100
+        elif e.units:
+            fraction = max(1 - stated[e.kind], 0.0) * e.units / units[e.kind]
+        else:
+            fraction = None
+        out.append((e.owner_id.int if e.owner_id is not None else None, fraction))
+    return tuple(out)
+
+
+def _group(client_id: uuid.UUID, index: dict) -> tuple[list, list, list[int]]:
+    """
+    The clients above client_id, numbered breadth-first from 0 (the client):
+    their ids (UUID.int), adjacency (number -> [(owner number or None, fraction)]; None
+    for a client with no owners of its own) and depth (fewest links up from
+    the client).
+    """
+    root = client_id.int
+    number = {root: 0}
+    ids, adjacency, depth = [root], [], [0]
+    i = 0
+    while i < len(ids):
+        owners = index.get(ids[i])
+        row = None
+        if owners is not None:
+            row = []
+            for owner, fraction in owners:
+                j = None
+                if owner is not None:
+                    j = number.get(owner)
+                    if j is None:
+                        j = number[owner] = len(ids)
+                        ids.append(owner)
+                        depth.append(depth[i] + 1)
+                row.append((j, fraction))
+        adjacency.append(row)
+        i += 1
+    return ids, adjacency, depth
+
+
+def _components(adjacency: list) -> tuple[list[list[int]], list[int]]:
+    """
+    Strongly connected components of the group (Tarjan, iterative), owners
+    before what they own, so reversed they are in topological order from the
+    client upwards; and each client's rank in reverse finishing order, an
+    order in which most holdings (all but those closing a cycle) point forwards.
+    """
+    n = len(adjacency)
+    index, low, on_stack = [-1] * n, [0] * n, [False] * n
+    stack, found, finished = [], [], []
+    index[0] = low[0] = 0
+    counter = 1
+    stack.append(0)
+    on_stack[0] = True
+    work = [(0, iter(adjacency[0] or ()))]
+    while work:
+        node, children = work[-1]
+        for child, _ in children:
+            if child is None:
+                continue
+            if index[child] < 0:
+                index[child] = low[child] = counter
+                counter += 1
+                stack.append(child)
+                on_stack[child] = True
+                work.append((child, iter(adjacency[child] or ())))
+                break
+            if on_stack[child]:
+                low[node] = min(low[node], index[child])
+        else:
+            work.pop()
+            finished.append(node)
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                found.append(component)
+    rank = [0] * n
+    for r, node in enumerate(reversed(finished)):
+        rank[node] = r
+    return found, rank
+
+
+def resolve(client_id: uuid.UUID, index: dict[int, tuple]) -> dict:
+    """
+    Effective holdings in client_id: the fraction of the whole each terminal
+    owner (one with no owners of its own) ends up with, and what could not
+    be attributed.
+    """
+    ids, adjacency, depth = _group(client_id, index)
+    n = len(ids)
+    inflow, held = [0.0] * n, [0.0] * n
+    inflow[0] = 1.0
+    unattributed = 1.0 if adjacency[0] is None else 0.0
+    circular = 0.0
+    cycles = []
+
+    def push(node: int):
+        nonlocal unattributed
+        portion, inflow[node] = inflow[node], 0.0
+        attributed = 0.0
+        for owner, fraction in adjacency[node]:
+            if owner is None or fraction is None:
+                continue
+            share = portion * fraction
+            attributed += share
+            if adjacency[owner] is None:
+                held[owner] += share
+            else:
+                inflow[owner] += share
+        # Holdings that add up to less than 100%, or could not be valued
+        unattributed += max(portion - attributed, 0.0)
+
+    components, rank = _components(adjacency)
+    for component in reversed(components):
+        node = component[0]
+        if adjacency[node] is None:
+            continue                            # a terminal owner, already in held
+        if len(component) == 1 and all(o != node for o, _ in adjacency[node]):
+            push(node)
+            continue
+        # A cycle: sweep it in rank order, each member passing on what has
+        # reached it so far, until what is still going round is negligible
+        cycles.append(sorted(uuid.UUID(int=ids[m]) for m in component))
+        component.sort(key=rank.__getitem__)
+        for _ in range(MAX_ROUNDS):
+            if sum(inflow[m] for m in component) <= _EPSILON:
+                break
+            for member in component:
+                if inflow[member]:
+                    push(member)
+        for member in component:
+            circular += inflow[member]
+            inflow[member] = 0.0
+
+    direct: dict[uuid.UUID, float] = defaultdict(float)
+    for owner, fraction in adjacency[0] or ():
+        if owner is not None and fraction is not None:
+            direct[uuid.UUID(int=ids[owner])] += fraction
+    owners = [i for i in range(n) if held[i]]
+    return {
+        "held":         {uuid.UUID(int=ids[i]): held[i] for i in owners},
+        "layers":       {uuid.UUID(int=ids[i]): depth[i] for i in owners},
+        "unattributed": unattributed,
+        "circular":     circular,
+        "cycles":       cycles,
+        "direct":       direct,
+        "entities":     sum(1 for row in adjacency if row is not None),
+    }
+
+
+def ubo(db: Session, client_id: uuid.UUID, threshold: float = THRESHOLD) -> dict:
+    """The UBO report for client_id: every ultimate owner with its effective holding, in percent."""
+    result = resolve(client_id, index.current(db))
+    ids = set(result["held"]) | {m for cycle in result["cycles"] for m in cycle}
+    clients = {
+        c.id: c for c in db.execute(
+            select(Client.id, Client.display_name, Client.pan, Client.constitution).where(Client.id.in_(ids))
+        )
+    } if ids else {}
+
+    owners = []
+    for owner_id, fraction in result["held"].items():
+        c = clients.get(owner_id)
+        percent = fraction * 100
+        natural = c is not None and c.constitution == "Individual"
+        owners.append({
+            "client_id":            owner_id,
+            "name":                 c.display_name if c else None,
+            "pan":                  c.pan if c else None,
+            "constitution":         c.constitution if c else None,
+            "effective_percentage": round(percent, 4),
+            "direct_percentage":    round(result["direct"][owner_id] * 100, 4) if owner_id in result["direct"] else None,
+            "layers":               result["layers"][owner_id],
+            "is_natural_person":    natural,
+            "is_beneficial_owner":  natural and percent > threshold,
+        })
+    owners.sort(key=lambda o: (-o["effective_percentage"], o["name"] or ""))
+
+    officials = []
+    if not any(o["is_beneficial_owner"] for o in owners):
+        rows = db.execute(
+            select(Client.id, Client.display_name, Client.pan, Director.designation)
+            .join(Director, Director.individual_client_id == Client.id)
+            .where(and_(Director.company_client_id == client_id, Director.is_active))
+            .order_by(Client.display_name)
+        )
+        officials = [{"client_id": r.id, "name": r.display_name, "pan": r.pan, "designation": r.designation} for r in rows]
+
+    return {
+        "client_id":                 client_id,
+        "threshold":                 threshold,
+        "owners":                    owners,
+        "unattributed_percentage":   round(result["unattributed"] * 100, 4),
+        "circular_percentage":       round(result["circular"] * 100, 4),
+        "cycles":                    [[{"client_id": m, "name": clients[m].display_name if m in clients else None} for m in cycle]
+                                      for cycle in result["cycles"]],
+        "entities":                  result["entities"],
+        "senior_managing_officials": officials,
+    }
@@ -0,0 +1,126 @@
+"""
+Bounded process pool for bcrypt.
+
+A bcrypt verify costs ~250 ms of CPU. Run in the request threadpool, a burst
+of logins holds the GIL and the threads that ordinary reads need. Hashing and
+verification for the API run here instead: HASH_POOL_WORKERS processes, and at
+most HASH_POOL_MAX_PENDING jobs queued or running per uvicorn worker. Beyond
+that the request fails straight away with 503 + Retry-After rather than
+queueing behind the burst.
+
+Scripts (seed.py, create_admin.py) keep using auth.hash_password inline.
+Counters are reported by GET /health/hash-pool.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+WORKERS = int(os.environ.get("HASH_POOL_WORKERS", str(min(2, os.cpu_count() or 1))))
+MAX_PENDING = int(os.environ.get("HASH_POOL_MAX_PENDING", str(WORKERS * 4)))
+RETRY_AFTER_SECONDS = int(os.environ.get("HASH_POOL_RETRY_AFTER", "2"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# ── Run inside the pool processes ──
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+# ── Run in the API process ──
+
+class HashPoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_ms = 0.0
+        self._total_ms = 0.0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= MAX_PENDING:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return True
+
+    def release(self, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self._total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers":      WORKERS,
+                "max_pending":  MAX_PENDING,
+                "in_flight":    self.in_flight,
+                "queue_depth":  max(0, self.in_flight - WORKERS),
+                "max_in_flight": self.max_in_flight,
+                "completed":    self.completed,
+                "rejected":     self.rejected,
+                "avg_ms":       round(self._total_ms / self.completed, 2) if self.completed else None,
+                "max_ms":       round(self.max_ms, 2),
+            }
+
+
+metrics = HashPoolMetrics()
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn, not fork: the API process has running threads and open DB connections
+                _executor = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def _submit(fn, *args):
+    if not metrics.try_acquire():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in requests right now, please retry shortly",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        metrics.release(time.perf_counter() - start)
+
+
+async def hash_password(password: str) -> str:
+    return await _submit(_hash, password)
+
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await _submit(_verify, plain, hashed)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,101 @@
+"""
+Connection-pool telemetry for the sync and async engines.
+
+Each engine gets a QueuePool subclass that times how long a checkout waits,
+plus event listeners that count invalidations and failed pre-pings.
+Reported by GET /health/pool so the pool can be sized from real numbers.
+"""
+import threading
+import time
+
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (ms) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.pre_ping_failures = 0
+        self.max_wait_ms = 0.0
+        self._total_wait_ms = 0.0
+        self._buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)   # last bucket = +Inf
+
+    def observe_wait(self, seconds: float, timed_out: bool = False):
+        ms = seconds * 1000
+        idx = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if ms <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self._buckets[idx] += 1
+            self._total_wait_ms += ms
+            self.max_wait_ms = max(self.max_wait_ms, ms)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def count_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def count_pre_ping_failure(self):
+        with self._lock:
+            self.pre_ping_failures += 1
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        with self._lock:
+            observed = self.checkouts + self.timeouts
+            histogram = {
+                f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self._buckets)
+            }
+            histogram["gt_%dms" % WAIT_BUCKETS_MS[-1]] = self._buckets[-1]
+            return {
+                "pool_size":         pool.size(),
+                "max_overflow":      pool._max_overflow,
+                "timeout_s":         pool.timeout(),
+                "checked_out":       pool.checkedout(),
+                "idle":              pool.checkedin(),
+                "overflow":          max(pool.overflow(), 0),
+                "checkouts":         self.checkouts,
+                "timeouts":          self.timeouts,
+                "invalidations":     self.invalidations,
+                "pre_ping_failures": self.pre_ping_failures,
+                "avg_wait_ms":       round(self._total_wait_ms / observed, 3) if observed else 0.0,
+                "max_wait_ms":       round(self.max_wait_ms, 3),
+                "wait_histogram":    histogram,
+            }
+
+
+def instrumented_pool(base: type[QueuePool], metrics: PoolMetrics) -> type[QueuePool]:
+    """QueuePool subclass that records how long each checkout waited (queue wait plus any new-connection setup)."""
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                conn = super()._do_get()
+            except sa_exc.TimeoutError:
+                metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.observe_wait(time.perf_counter() - start)
+            return conn
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def attach_listeners(sync_engine, metrics: PoolMetrics):
+    """Count invalidated connections and failed pre-pings on an (underlying sync) engine."""
+
+    @event.listens_for(sync_engine.pool, "invalidate")
+    def _on_invalidate(dbapi_conn, record, exception):
+        metrics.count_invalidation()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(ctx):
+        if ctx.is_pre_ping:
+            metrics.count_pre_ping_failure()
@@ -0,0 +1,97 @@
+"""
+In-process cache of authenticated users for get_current_user.
+
+Every API call used to re-read its user row just to confirm the account is
+still active. Active users are now kept here, keyed by user id, for up to
+AUTH_CACHE_TTL_SECONDS and at most AUTH_CACHE_SIZE entries (least recently
+used evicted first). PUT /auth/users/{id} invalidates the entry as soon as it
+commits, so deactivation and role changes take effect on the next request in
+this worker; other uvicorn workers pick them up within the TTL. A request
+that read the user before that commit cannot put its stale copy back
+afterwards: it takes generation() before loading and put() drops the entry
+if an invalidation came in between.
+
+Hit/miss counters are reported by GET /health/auth-cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from models import User
+
+
+def _detached_copy(user: User) -> User:
+    """A session-free User carrying only column values, safe to share between requests."""
+    return User(**{c.name: getattr(user, c.name) for c in User.__table__.columns})
+
+
+class PrincipalCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self._generations: dict[str, int] = {}     # bumped by invalidate(); one per user ever invalidated
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: str) -> User | None:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, user_id: str) -> int:
+        """Take before loading the user from the database; pass to put()."""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, user_id: str, user: User, generation: int):
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                return      # invalidated while this copy was being loaded
+            self._entries[user_id] = (expires, _detached_copy(user))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: str):
+        user_id = str(user_id)
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled":       self.enabled,
+                "ttl_seconds":   self.ttl_seconds,
+                "max_size":      self.max_size,
+                "size":          len(self._entries),
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "hit_rate":      round(self.hits / lookups, 4) if lookups else None,
+                "evictions":     self.evictions,
+                "invalidations": self.invalidations,
+            }
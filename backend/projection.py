@@ -0,0 +1,136 @@
+"""
+Column-projected reads and sparse fieldsets.
+
+A list endpoint that loads full ORM entities pays for every mapped column,
+an identity-map entry and change tracking per row, only for the response
+model to keep a handful of fields. project() instead builds a Core select()
+of exactly the columns a response schema declares; run it with rows() and the
+result is plain dicts that FastAPI validates straight into the response model.
+
+    stmt = projection.project(Client, ClientListItem).where(Client.is_active)
+    return projection.rows(db, stmt)
+
+Only use this where the schema's fields are all plain columns of the model;
+project_joined() covers fields read from a joined table, anything else
+computed still needs the ORM path.
+
+Sparse fieldsets: endpoints take `fields=id,display_name,pan`, check it with
+parse_fields() against their response schema, narrow what they load with it
+(project(..., only), load_only(), or by skipping relationship loads) and
+hand the result to respond(), which validates and serialises just those
+fields. Without fields= every field is returned, as before.
+
+respond() is also the fast path for the responses themselves: it validates
+rows straight into a cached TypeAdapter for the schema and has pydantic-core
+write the JSON bytes, instead of FastAPI validating through response_model,
+dumping to Python objects and encoding those again.
+"""
+from functools import cache
+from operator import attrgetter
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session, load_only as _load_only
+
+FIELDS_HELP = "Comma-separated response fields to return (default: all)"
+
+
+@cache
+def _columns(model, names: tuple[str, ...]) -> tuple:
+    table = model.__table__.columns
+    missing = [name for name in names if name not in table]
+    if missing:
+        raise TypeError(f"Not columns of {model.__tablename__}: {', '.join(missing)}")
+    return tuple(getattr(model, name) for name in names)
+
+
+def columns(model, schema: type[BaseModel], only: tuple[str, ...] | None = None, *extra: str) -> tuple:
+    """model's columns for schema's fields (or just `only`), plus any `extra` the query needs internally."""
+    names = tuple(dict.fromkeys((*(only or schema.model_fields), *extra)))
+    return _columns(model, names)
+
+
+def project(model, schema: type[BaseModel], only: tuple[str, ...] | None = None, *extra: str) -> Select:
+    return select(*columns(model, schema, only, *extra))
+
+
+def project_joined(model, schema: type[BaseModel], only: tuple[str, ...] | None, joined: dict) -> Select:
+    """
+    project() for a schema some of whose fields come from other tables:
+    `joined` maps those fields to column expressions (typically of an aliased,
+    outer-joined Client). The caller adds the joins the chosen fields need.
+    """
+    names = only or tuple(schema.model_fields)
+    return select(*(joined[n].label(n) if n in joined else getattr(model, n) for n in names)).select_from(model)
+
+
+def rows(db: Session, stmt: Select) -> list[dict]:
+    return [dict(r._mapping) for r in db.execute(stmt)]
+
+
+def attributes(schema: type[BaseModel], *exclude: str):
+    """A function reading schema's fields (minus exclude) off an object into a dict — no per-row column reflection."""
+    names = tuple(f for f in schema.model_fields if f not in exclude)
+    get = attrgetter(*names)
+    return lambda obj: dict(zip(names, get(obj)))
+
+
+# ── Sparse fieldsets ──
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> tuple[str, ...] | None:
+    """`fields=` query value -> the named fields in schema order; None means all of them."""
+    if not fields:
+        return None
+    names = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = names - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return tuple(f for f in schema.model_fields if f in names)
+
+
+def wants(only: tuple[str, ...] | None, names) -> bool:
+    """Does the response need any of names?"""
+    return only is None or not set(only).isdisjoint(names)
+
+
+def wanted(only: tuple[str, ...] | None, names: list[str]) -> list[str]:
+    """The subset of names the response needs (all of them without fields=)."""
+    return list(names) if only is None else [n for n in names if n in only]
+
+
+def load_only(model, only: tuple[str, ...] | None, *extra: str) -> list:
+    """ORM loader options restricting an entity query to the requested columns (none without fields=)."""
+    if only is None:
+        return []
+    table = model.__table__.columns
+    return [_load_only(*(getattr(model, n) for n in dict.fromkeys(("id", *only, *extra)) if n in table))]
+
+
+@cache
+def _subset(schema: type[BaseModel], only: tuple[str, ...]) -> type[BaseModel]:
+    fields = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in only}
+    return create_model(f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **fields)
+
+
+@cache
+def _adapter(schema: type[BaseModel], only: tuple[str, ...] | None, many: bool) -> TypeAdapter:
+    model = schema if only is None else _subset(schema, only)
+    return TypeAdapter(list[model] if many else model)
+
+
+def respond(schema: type[BaseModel], only: tuple[str, ...] | None, data, response: Response | None = None):
+    """
+    data (dicts or ORM objects, or a list of them) validated against schema and
+    serialised as JSON — every field, or just `only`. Pass the endpoint's
+    injected Response to keep headers set on it (FastAPI drops them when a
+    Response is returned). A Response passed as data (e.g. a 304) goes out as
+    it is.
+    """
+    if isinstance(data, Response):
+        return data
+    adapter = _adapter(schema, only, isinstance(data, list))
+    out = Response(adapter.dump_json(adapter.validate_python(data, from_attributes=True)), media_type="application/json")
+    if response is not None:
+        out.headers.update(response.headers)
+    return out
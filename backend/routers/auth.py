@@ -1,59 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_async_db
 from models import User
 from schemas import LoginRequest, TokenResponse, UserCreate, UserUpdate, UserResponse
-from auth import hash_password, verify_password, create_access_token, get_current_user, require_admin
+from auth import create_access_token, get_current_user, require_admin, principal_cache
+from password_pool import hash_password, verify_password
+import projection
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
+# bcrypt is deliberately slow — it runs in password_pool's processes, never on the event loop
+# or in the request threadpool. A saturated pool answers 503 + Retry-After.
+
 @router.post("/login", response_model=TokenResponse)
-def login(body: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == body.email, User.is_active == True).first()
-    if not user or not verify_password(body.password, user.password_hash):
+async def login(body: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    def load(db: Session) -> User | None:
+        return db.query(User).filter(User.email == body.email, User.is_active == True).first()
+
+    user = await db.run_sync(load)
+    if not user or not await verify_password(body.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
     token = create_access_token(str(user.id), user.role)
     return {"access_token": token, "token_type": "bearer", "user": user}
 
 
 @router.get("/me", response_model=UserResponse)
-def me(current_user: User = Depends(get_current_user)):
+async def me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
 @router.post("/users", response_model=UserResponse, dependencies=[Depends(require_admin)])
-def create_user(body: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == body.email).first():
-        raise HTTPException(status_code=400, detail="Email already registered")
-    user = User(
-        name=body.name,
-        email=body.email,
-        password_hash=hash_password(body.password),
-        role=body.role,
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+async def create_user(body: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    password_hash = await hash_password(body.password)
+
+    def create(db: Session) -> User:
+        if db.query(User).filter(User.email == body.email).first():
+            raise HTTPException(status_code=400, detail="Email already registered")
+        user = User(
+            name=body.name,
+            email=body.email,
+            password_hash=password_hash,
+            role=body.role,
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+
+    return await db.run_sync(create)
 
 
 @router.get("/users", response_model=list[UserResponse], dependencies=[Depends(require_admin)])
-def list_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+async def list_users(
+    fields: str | None   = Query(None, description=projection.FIELDS_HELP),
+    db:     AsyncSession = Depends(get_async_db),
+):
+    only = projection.parse_fields(fields, UserResponse)
+
+    def query(db: Session) -> list[User]:
+        return db.query(User).options(*projection.load_only(User, only)).all()
+
+    return projection.respond(UserResponse, only, await db.run_sync(query))
 
 
 @router.put("/users/{user_id}", response_model=UserResponse, dependencies=[Depends(require_admin)])
-def update_user(user_id: str, body: UserUpdate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    for field, value in body.model_dump(exclude_none=True).items():
-        if field == "password":
-            user.password_hash = hash_password(value)
-        else:
+async def update_user(user_id: str, body: UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    data = body.model_dump(exclude_none=True)
+    if "password" in data:
+        data["password_hash"] = await hash_password(data.pop("password"))
+
+    def update(db: Session) -> User:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        for field, value in data.items():
             setattr(user, field, value)
-    db.commit()
-    db.refresh(user)
-    return user
+        db.commit()
+        principal_cache.invalidate(str(user.id))
+        db.refresh(user)
+        return user
+
+    return await db.run_sync(update)
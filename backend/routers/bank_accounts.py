@@ -1,93 +1,150 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Optional
 import uuid
 
-from database import get_db
+from database import get_async_db
 from models import BankAccount
 from schemas import BankAccountCreate, BankAccountUpdate, BankAccountResponse
 from auth import get_current_user
 from models import User
+import conditional
 import crypto
+import projection
+import search_index
 
 router = APIRouter(prefix="/bank-accounts", tags=["Bank Accounts"])
 
-
-def _encrypt(data: dict) -> dict:
-    if data.get("net_banking_password"):
-        data["net_banking_password"] = crypto.encrypt(data["net_banking_password"])
-    return data
+ENCRYPTED_FIELDS = ["net_banking_password"]
 
 
 def _decrypt(b: BankAccount) -> BankAccount:
-    if b.net_banking_password:
-        b.net_banking_password = crypto.decrypt(b.net_banking_password)
-    return b
+    return crypto.present(b, ENCRYPTED_FIELDS, set(ENCRYPTED_FIELDS))
 
 
 @router.get("", response_model=list[BankAccountResponse])
-def list_bank_accounts(
+async def list_bank_accounts(
+    request:   Request,
+    response:  Response,
     client_id: uuid.UUID | None = None,
-    db: Session = Depends(get_db),
-    _:  User    = Depends(get_current_user),
+    reveal:    str | None       = Query(None, description="Credentials to decrypt: 'all' or comma-separated field names (default: masked)"),
+    fields:    str | None       = Query(None, description=projection.FIELDS_HELP),
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(get_current_user),
 ):
-    q = db.query(BankAccount)
-    if client_id:
-        q = q.filter(BankAccount.client_id == client_id)
-    return [_decrypt(b) for b in q.all()]
+    revealed = crypto.parse_reveal(reveal, ENCRYPTED_FIELDS)
+    only = projection.parse_fields(fields, BankAccountResponse)
+    creds = projection.wanted(only, ENCRYPTED_FIELDS)
+    extra = ("credentials_sealed",) if creds else ()
+    scope = [BankAccount.client_id == client_id] if client_id else []
+
+    def query(db: Session) -> Response | list[BankAccount]:
+        if revealed:
+            # Decrypted passwords never go into the browser cache
+            response.headers["Cache-Control"] = "no-store"
+        else:
+            tag = conditional.etag(request, conditional.collection_version(db, BankAccount, *scope))
+            if conditional.fresh(request, tag):
+                return conditional.not_modified(tag)
+            response.headers.update(conditional.headers(tag))
+        q = db.query(BankAccount).options(*projection.load_only(BankAccount, only, *extra)).filter(*scope)
+        return [crypto.present(b, creds, revealed) for b in q.all()]
+
+    return projection.respond(BankAccountResponse, only, await db.run_sync(query), response)
 
 
 @router.post("", response_model=BankAccountResponse, status_code=201)
-def create_bank_account(
+async def create_bank_account(
     body: BankAccountCreate,
-    db:   Session = Depends(get_db),
-    _:    User    = Depends(get_current_user),
+    db:   AsyncSession = Depends(get_async_db),
+    _:    User         = Depends(get_current_user),
 ):
-    data = _encrypt(body.model_dump())
-    b = BankAccount(**data)
-    db.add(b)
-    db.commit()
-    db.refresh(b)
-    return _decrypt(b)
+    def create(db: Session) -> BankAccount:
+        data = body.model_dump()
+        creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+        b = BankAccount(**data)
+        crypto.store(b, creds, ENCRYPTED_FIELDS)
+        db.add(b)
+        db.flush()
+        search_index.index(db, b)
+        db.commit()
+        db.refresh(b)
+        return _decrypt(b)
+
+    return await db.run_sync(create)
 
 
 @router.get("/{account_id}", response_model=BankAccountResponse)
-def get_bank_account(
+async def get_bank_account(
     account_id: uuid.UUID,
-    db:         Session = Depends(get_db),
-    _:          User    = Depends(get_current_user),
+    fields:     str | None   = Query(None, description=projection.FIELDS_HELP),
+    db:         AsyncSession = Depends(get_async_db),
+    _:          User         = Depends(get_current_user),
 ):
-    b = db.query(BankAccount).filter(BankAccount.id == account_id).first()
-    if not b:
-        raise HTTPException(status_code=404, detail="Bank account not found")
-    return _decrypt(b)
+    only = projection.parse_fields(fields, BankAccountResponse)
+
+    def load(db: Session) -> BankAccount:
+        b = db.query(BankAccount).filter(BankAccount.id == account_id).first()
+        if not b:
+            raise HTTPException(status_code=404, detail="Bank account not found")
+        return _decrypt(b)
+
+    return projection.respond(BankAccountResponse, only, await db.run_sync(load))
+
+
+@router.get("/{account_id}/secrets", response_model=dict[str, Optional[str]])
+async def get_bank_account_secrets(
+    account_id: uuid.UUID,
+    db:         AsyncSession = Depends(get_async_db),
+    _:          User         = Depends(get_current_user),
+):
+    """Decrypted credentials of one record — what the list masks."""
+    def load(db: Session) -> dict:
+        b = db.query(BankAccount).filter(BankAccount.id == account_id).first()
+        if not b:
+            raise HTTPException(status_code=404, detail="Bank account not found")
+        return crypto.secrets(b, ENCRYPTED_FIELDS)
+
+    return await db.run_sync(load)
 
 
 @router.put("/{account_id}", response_model=BankAccountResponse)
-def update_bank_account(
+async def update_bank_account(
     account_id: uuid.UUID,
     body:       BankAccountUpdate,
-    db:         Session = Depends(get_db),
-    _:          User    = Depends(get_current_user),
+    db:         AsyncSession = Depends(get_async_db),
+    _:          User         = Depends(get_current_user),
 ):
-    b = db.query(BankAccount).filter(BankAccount.id == account_id).first()
-    if not b:
-        raise HTTPException(status_code=404, detail="Bank account not found")
-    data = _encrypt(body.model_dump(exclude_none=True))
-    for field, value in data.items():
-        setattr(b, field, value)
-    db.commit()
-    db.refresh(b)
-    return _decrypt(b)
+    def update(db: Session) -> BankAccount:
+        b = db.query(BankAccount).filter(BankAccount.id == account_id).first()
+        if not b:
+            raise HTTPException(status_code=404, detail="Bank account not found")
+        data = body.model_dump(exclude_none=True)
+        creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+        for field, value in data.items():
+            setattr(b, field, value)
+        crypto.store(b, creds, ENCRYPTED_FIELDS)
+        search_index.index(db, b)
+        db.commit()
+        db.refresh(b)
+        return _decrypt(b)
+
+    return await db.run_sync(update)
 
 
 @router.delete("/{account_id}", status_code=204)
-def delete_bank_account(
+async def delete_bank_account(
     account_id: uuid.UUID,
-    db:         Session = Depends(get_db),
-    _:          User    = Depends(get_current_user),
+    db:         AsyncSession = Depends(get_async_db),
+    _:          User         = Depends(get_current_user),
 ):
-    b = db.query(BankAccount).filter(BankAccount.id == account_id).first()
-    if not b:
-        raise HTTPException(status_code=404, detail="Bank account not found")
-    db.delete(b)
-    db.commit()
+    def delete(db: Session) -> None:
+        b = db.query(BankAccount).filter(BankAccount.id == account_id).first()
+        if not b:
+            raise HTTPException(status_code=404, detail="Bank account not found")
+        search_index.remove(db, b)
+        db.delete(b)
+        db.commit()
+
+    await db.run_sync(delete)
@@ -1,17 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from starlette.concurrency import run_in_threadpool
+from typing import Literal, Optional
+import base64
+import io
+import json
 import uuid
+import zipfile
+from datetime import date
 
-from database import get_db
-from models import Client
-from schemas import ClientCreate, ClientUpdate, ClientResponse, ClientListItem
-from auth import get_current_user
+from database import SessionLocal, get_async_db
+from models import Client, ClientCredentials, Director, Shareholder, Partner
+from schemas import (
+    ClientCreate, ClientUpdate, ClientResponse, ClientListItem, ClientFull, ClientImportReport,
+    BankAccountResponse, EPFESIResponse, OtherRegResponse, DossierBatch, UBOReport, ClientGroup,
+)
+from auth import get_current_user, require_admin
 from models import User
+import client_import
+import conditional
 import crypto
+import dossier
+import groups
+import ownership
+import projection
+import search_index
+from routers import gst, directors, shareholders, partners, bank_accounts, epf_esi, other_registrations
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
+FUZZY_DEFAULT_LIMIT = 20
+
+# Sections GET /clients/{id}/full can return, in tab order
+FULL_SECTIONS = ["gst", "directors", "shareholders", "partners", "bank_accounts", "epf_esi", "other_registrations"]
+
 # Fields that must be encrypted before storing
 ENCRYPTED_FIELDS = [
     "mca_password", "dsc_token_password",
@@ -20,101 +44,458 @@ ENCRYPTED_FIELDS = [
 ]
 
 
-def _encrypt_client(data: dict) -> dict:
-    for f in ENCRYPTED_FIELDS:
-        if data.get(f):
-            data[f] = crypto.encrypt(data[f])
-    return data
+# Logins and passwords live in client_credentials; only the endpoints that
+# return them join it in (the list never does)
+LOAD_CREDENTIALS = joinedload(Client.credentials)
+CREDENTIAL_COLUMNS = [c.name for c in ClientCredentials.__table__.columns if c.name not in ("client_id", "created_at", "updated_at", "credentials_sealed")]
+
+# Response fields of the /full parts that are read off plain entities
+_client_fields = projection.attributes(ClientResponse)
+_bank_fields = projection.attributes(BankAccountResponse)
+_epf_esi_fields = projection.attributes(EPFESIResponse)
+_other_fields = projection.attributes(OtherRegResponse)
+
+# Every credential field /full can reveal, across the client and its sections
+FULL_CREDENTIAL_FIELDS = sorted(set(
+    ENCRYPTED_FIELDS + gst.ENCRYPTED_FIELDS + bank_accounts.ENCRYPTED_FIELDS
+    + epf_esi.ENCRYPTED_FIELDS + other_registrations.ENCRYPTED_FIELDS
+))
 
 
 def _decrypt_client(client: Client) -> Client:
-    for f in ENCRYPTED_FIELDS:
-        val = getattr(client, f, None)
-        if val:
-            setattr(client, f, crypto.decrypt(val))
-    return client
+    return crypto.present(client, ENCRYPTED_FIELDS, set(ENCRYPTED_FIELDS))
+
+
+def _encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["display_name"], str(row["id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        display_name, client_id = json.loads(raw)
+        return str(display_name), uuid.UUID(client_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.get("", response_model=list[ClientListItem])
-def list_clients(
+async def list_clients(
+    request:      Request,
+    response:     Response,
     search:       Optional[str]  = Query(None, description="Search by name or PAN"),
+    match:        Literal["contains", "fuzzy"] = Query("contains", description="fuzzy: typo-tolerant, ranked by similarity"),
     constitution: Optional[str]  = Query(None),
     is_active:    Optional[bool] = Query(None),
     is_direct:    Optional[bool] = Query(None),
-    db:           Session        = Depends(get_db),
+    limit:        Optional[int]  = Query(None, ge=1, le=500, description="Page size; omit to return every match"),
+    cursor:       Optional[str]  = Query(None, description="X-Next-Cursor from the previous page"),
+    with_total:   bool           = Query(False, description="Also return the total match count in X-Total-Count"),
+    fields:       Optional[str]  = Query(None, description=projection.FIELDS_HELP),
+    db:           AsyncSession   = Depends(get_async_db),
     _:            User           = Depends(get_current_user),
 ):
-    q = db.query(Client)
-    if search:
-        like = f"%{search}%"
-        q = q.filter(
-            Client.display_name.ilike(like) |
-            Client.legal_name.ilike(like) |
-            Client.pan.ilike(like)
-        )
-    if constitution:
-        q = q.filter(Client.constitution == constitution)
-    if is_active is not None:
-        q = q.filter(Client.is_active == is_active)
-    if is_direct is not None:
-        q = q.filter(Client.is_direct_client == is_direct)
-    return q.order_by(Client.display_name).all()
+    """
+    Clients ordered by (display_name, id).
+
+    Paging is keyset-based: each page seeks straight to the last row of the
+    previous one through idx_clients_display_name_id, so page 500 costs the
+    same as page 1. The cursor for the next page comes back in the
+    X-Next-Cursor header (absent on the last page).
+
+    match=fuzzy instead returns the best `limit` (default 20) matches for
+    `search` ranked by trigram similarity, so "Reliance Indutries" still
+    finds "Reliance Industries Ltd". Ranked results are not paged.
+
+    Responses carry an ETag for the current state of the clients table; a
+    matching If-None-Match gets 304 before any client row is read.
+    """
+    fuzzy = match == "fuzzy" and bool(search)
+    if fuzzy and cursor:
+        raise HTTPException(status_code=400, detail="Fuzzy search results are not paged")
+    if fuzzy and not limit:
+        limit = FUZZY_DEFAULT_LIMIT
+    after = _decode_cursor(cursor) if cursor else None
+    only = projection.parse_fields(fields, ClientListItem)
+
+    def query(db: Session) -> Response | tuple[list[dict], Optional[int]]:
+        tag = conditional.etag(request, conditional.collection_version(db, Client))
+        if conditional.fresh(request, tag):
+            return conditional.not_modified(tag)
+        response.headers.update(conditional.headers(tag))
+        # Only ClientListItem's columns (or the fields= subset, plus the cursor keys) — no entities
+        q = projection.project(Client, ClientListItem, only, "display_name", "id")
+        if fuzzy:
+            # `search <% col` is word_similarity above the pg_trgm threshold,
+            # answered from the gin_trgm_ops indexes
+            q = q.where(
+                Client.display_name.op("%>")(search) |
+                Client.legal_name.op("%>")(search) |
+                Client.pan.op("%")(search)
+            )
+        elif search:
+            # Leading-wildcard ILIKE is also served by the trigram indexes
+            like = search_index.contains(search)
+            q = q.where(
+                Client.display_name.ilike(like, escape="\\") |
+                Client.legal_name.ilike(like, escape="\\") |
+                Client.pan.ilike(like, escape="\\")
+            )
+        if constitution:
+            q = q.where(Client.constitution == constitution)
+        if is_active is not None:
+            q = q.where(Client.is_active == is_active)
+        if is_direct is not None:
+            q = q.where(Client.is_direct_client == is_direct)
+        total = db.scalar(select(func.count()).select_from(q.subquery())) if with_total else None
+        if fuzzy:
+            score = func.greatest(
+                func.word_similarity(search, Client.display_name),
+                func.word_similarity(search, Client.legal_name),
+                func.similarity(search, Client.pan),
+            )
+            return projection.rows(db, q.order_by(score.desc(), Client.id).limit(limit)), total
+        if after:
+            q = q.where(tuple_(Client.display_name, Client.id) > after)
+        q = q.order_by(Client.display_name, Client.id)
+        if limit:
+            q = q.limit(limit + 1)
+        return projection.rows(db, q), total
+
+    result = await db.run_sync(query)
+    if isinstance(result, Response):
+        return result
+    rows, total = result
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    return projection.respond(ClientListItem, only, rows, response)
 
 
 @router.post("", response_model=ClientResponse, status_code=201)
-def create_client(
+async def create_client(
     body: ClientCreate,
-    db:   Session = Depends(get_db),
-    _:    User    = Depends(get_current_user),
+    db:   AsyncSession = Depends(get_async_db),
+    _:    User         = Depends(get_current_user),
 ):
-    if db.query(Client).filter(Client.pan == body.pan).first():
-        raise HTTPException(status_code=400, detail="PAN already exists")
-    data = _encrypt_client(body.model_dump())
-    client = Client(**data)
-    db.add(client)
-    db.commit()
-    db.refresh(client)
-    return _decrypt_client(client)
+    def create(db: Session) -> Client:
+        if db.query(Client).filter(Client.pan == body.pan).first():
+            raise HTTPException(status_code=400, detail="PAN already exists")
+        data = body.model_dump()
+        creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+        client = Client(**data)
+        crypto.store(client, creds, ENCRYPTED_FIELDS)
+        db.add(client)
+        db.flush()
+        search_index.index(db, client)
+        db.commit()
+        db.refresh(client)
+        return _decrypt_client(client)
+
+    return await db.run_sync(create)
+
+
+@router.post("/import", response_model=ClientImportReport, dependencies=[Depends(require_admin)])
+async def import_clients(
+    file:     UploadFile,
+    existing: Literal["update", "skip"] = Query("update", description="Rows whose PAN is already a client: merge into it, or report and skip"),
+    dry_run:  bool                      = Query(False, description="Validate and merge, then roll back"),
+):
+    """
+    Bulk-create or update clients from a .csv or .xlsx file with
+    ClientCreate's field names as column headers (admin only).
+
+    Rows go in batches through COPY into staging tables and a set-based merge
+    on PAN; blank cells leave an existing client's values alone. Every row
+    that was not inserted or updated comes back in `errors` with its line
+    number. See client_import.py, which also runs from the shell.
+    """
+    def load() -> ClientImportReport:
+        # Parsing, encryption and COPY are CPU- and psycopg2-bound: run on the
+        # sync engine in the threadpool, whatever DB_MODE is
+        with SessionLocal() as db:
+            try:
+                records = client_import.read(file.file, file.filename)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return client_import.run(db, records, ENCRYPTED_FIELDS, existing=existing, dry_run=dry_run)
+
+    return await run_in_threadpool(load)
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
-def get_client(
+async def get_client(
     client_id: uuid.UUID,
-    db:        Session = Depends(get_db),
-    _:         User    = Depends(get_current_user),
+    fields:    Optional[str] = Query(None, description=projection.FIELDS_HELP),
+    db:        AsyncSession = Depends(get_async_db),
+    _:         User         = Depends(get_current_user),
 ):
-    client = db.query(Client).filter(Client.id == client_id).first()
+    only = projection.parse_fields(fields, ClientResponse)
+
+    def load(db: Session) -> Client:
+        q = db.query(Client).options(*projection.load_only(Client, only))
+        if projection.wants(only, CREDENTIAL_COLUMNS):
+            q = q.options(LOAD_CREDENTIALS)
+        client = q.filter(Client.id == client_id).first()
+        if not client:
+            raise HTTPException(status_code=404, detail="Client not found")
+        return crypto.present(client, projection.wanted(only, ENCRYPTED_FIELDS), set(ENCRYPTED_FIELDS))
+
+    return projection.respond(ClientResponse, only, await db.run_sync(load))
+
+
+def _load_full(db: Session, client_id: uuid.UUID, sections: list[str], revealed: set[str]) -> Optional[dict]:
+    """The /full payload for one client (None if there is no such client): the client and every
+    child collection in `sections`, loaded with one SELECT ... IN per relationship."""
+    q = db.query(Client).options(LOAD_CREDENTIALS)
+    if "gst" in sections:
+        q = q.options(selectinload(Client.gst_registrations).options(gst.LOAD_SIGNATORIES))
+    if "bank_accounts" in sections:
+        q = q.options(selectinload(Client.bank_accounts))
+    if "epf_esi" in sections:
+        q = q.options(selectinload(Client.epf_esi_registrations))
+    if "other_registrations" in sections:
+        q = q.options(selectinload(Client.other_registrations))
+    client = q.filter(Client.id == client_id).first()
     if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    return _decrypt_client(client)
+        return None
+
+    crypto.present(client, ENCRYPTED_FIELDS, revealed)
+    data = _client_fields(client)
+    if "gst" in sections:
+        regs = sorted(client.gst_registrations, key=lambda r: r.gstin)
+        data["gst"] = [gst._build_response(r, revealed) for r in regs]
+    if "directors" in sections:
+        rows = db.query(Director).options(*directors.LOAD_NAMES).filter(Director.company_client_id == client_id).all()
+        data["directors"] = [directors._build_response(d) for d in rows]
+    if "shareholders" in sections:
+        rows = db.query(Shareholder).options(*shareholders.LOAD_NAMES).filter(Shareholder.company_client_id == client_id).all()
+        data["shareholders"] = [shareholders._build_response(sh) for sh in rows]
+    if "partners" in sections:
+        rows = db.query(Partner).options(*partners.LOAD_NAMES).filter(Partner.firm_llp_client_id == client_id).all()
+        data["partners"] = [partners._build_response(p) for p in rows]
+    if "bank_accounts" in sections:
+        data["bank_accounts"] = [_bank_fields(crypto.present(b, bank_accounts.ENCRYPTED_FIELDS, revealed)) for b in client.bank_accounts]
+    if "epf_esi" in sections:
+        data["epf_esi"] = [_epf_esi_fields(crypto.present(r, epf_esi.ENCRYPTED_FIELDS, revealed)) for r in client.epf_esi_registrations]
+    if "other_registrations" in sections:
+        data["other_registrations"] = [_other_fields(crypto.present(r, other_registrations.ENCRYPTED_FIELDS, revealed)) for r in client.other_registrations]
+    return data
+
+
+@router.get("/{client_id}/full", response_model=ClientFull, response_model_exclude_unset=True)
+async def get_client_full(
+    client_id: uuid.UUID,
+    include:   Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(FULL_SECTIONS)} (default: all)"),
+    reveal:    Optional[str] = Query(None, description="Credentials to decrypt: 'all' or comma-separated field names (default: masked)"),
+    db:        AsyncSession = Depends(get_async_db),
+    _:         User         = Depends(get_current_user),
+):
+    """
+    Client detail page in one round trip: the client and every child collection,
+    loaded in a single session with one SELECT ... IN per relationship.
+    Credentials are masked unless named in reveal= (field names apply to every
+    section that has them); GET /clients/{id}/secrets returns the client's own.
+    """
+    sections = FULL_SECTIONS
+    if include:
+        sections = [s.strip() for s in include.split(",") if s.strip()]
+        unknown = set(sections) - set(FULL_SECTIONS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown include section(s): {', '.join(sorted(unknown))}")
+    revealed = crypto.parse_reveal(reveal, FULL_CREDENTIAL_FIELDS)
+
+    def load(db: Session) -> dict:
+        data = _load_full(db, client_id, sections, revealed)
+        if data is None:
+            raise HTTPException(status_code=404, detail="Client not found")
+        return data
+
+    return await db.run_sync(load)
+
+
+@router.get("/{client_id}/ubo", response_model=UBOReport)
+async def get_client_ubo(
+    client_id: uuid.UUID,
+    threshold: float        = Query(ownership.THRESHOLD, ge=0, lt=100, description="Beneficial owner above this % (effective)"),
+    db:        AsyncSession = Depends(get_async_db),
+    _:         User         = Depends(get_current_user),
+):
+    """
+    Ultimate beneficial owners: the client's shareholders and partners
+    followed through every holding entity to the people at the top, each
+    with the percentage they effectively hold. Cross-holdings are detected
+    and reported (see ownership.py).
+    """
+    def load(db: Session) -> dict:
+        if not db.query(Client.id).filter(Client.id == client_id).first():
+            raise HTTPException(status_code=404, detail="Client not found")
+        return ownership.ubo(db, client_id, threshold)
+
+    return projection.respond(UBOReport, None, await db.run_sync(load))
+
+
+@router.get("/{client_id}/group", response_model=ClientGroup)
+async def get_client_group(
+    client_id: uuid.UUID,
+    db:        AsyncSession = Depends(get_async_db),
+    _:         User         = Depends(get_current_user),
+):
+    """
+    The client's group: every client linked to it through directors,
+    partners, shareholders or GST signatories, directly or through others,
+    and the links that join them (see groups.py).
+    """
+    def load(db: Session) -> dict:
+        if not db.query(Client.id).filter(Client.id == client_id).first():
+            raise HTTPException(status_code=404, detail="Client not found")
+        return groups.client_group(db, client_id)
+
+    return projection.respond(ClientGroup, None, await db.run_sync(load))
+
+
+_PDF = {200: {"content": {"application/pdf": {}}}}
+
+
+@router.get("/{client_id}/dossier", response_class=Response, responses=_PDF)
+async def get_client_dossier(
+    client_id: uuid.UUID,
+    reveal:    Optional[str] = Query(None, description="Credentials to print: 'all' or comma-separated field names (default: masked)"),
+    db:        AsyncSession = Depends(get_async_db),
+    _:         User         = Depends(get_current_user),
+):
+    """
+    The client's Full Profile PDF, rendered in the dossier process pool and
+    served from cache until anything it prints changes (see dossier.py).
+    """
+    if not dossier.available():
+        raise HTTPException(status_code=400, detail="PDF dossiers need reportlab installed")
+    revealed = crypto.parse_reveal(reveal, FULL_CREDENTIAL_FIELDS)
+
+    def load(db: Session) -> tuple:
+        found = dossier.versions(db, [client_id]).get(client_id)
+        if found is None:
+            raise HTTPException(status_code=404, detail="Client not found")
+        key = dossier.cache.key(client_id, found.version, revealed)
+        pdf = dossier.cache.get(key)
+        full = None if pdf else _load_full(db, client_id, FULL_SECTIONS, revealed)
+        return found, key, pdf, full
+
+    found, key, pdf, full = await db.run_sync(load)
+    if pdf is None:
+        pdf = await dossier.render(dossier.build(full))
+        dossier.cache.put(key, pdf)
+    return Response(pdf, media_type="application/pdf", headers={
+        "Content-Disposition": dossier.disposition(dossier.filename(found.display_name)),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.post("/dossiers", response_class=Response, responses={200: {"content": {"application/zip": {}}}})
+async def get_client_dossiers(
+    body: DossierBatch,
+    db:   AsyncSession = Depends(get_async_db),
+    user: User         = Depends(get_current_user),
+):
+    """
+    Full Profile PDFs of up to 200 clients in one zip. Cached ones are reused;
+    the rest are rendered concurrently across the dossier pool. Printing
+    credentials (reveal) is admin only here.
+    """
+    if not dossier.available():
+        raise HTTPException(status_code=400, detail="PDF dossiers need reportlab installed")
+    revealed = crypto.parse_reveal(body.reveal, FULL_CREDENTIAL_FIELDS)
+    if revealed and user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can print credentials in bulk")
+    client_ids = list(dict.fromkeys(body.client_ids))
+
+    def load(db: Session) -> tuple:
+        found = dossier.versions(db, client_ids)
+        missing = [str(i) for i in client_ids if i not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Client(s) not found: {', '.join(missing)}")
+        pdfs, todo = {}, {}
+        for client_id in client_ids:
+            key = dossier.cache.key(client_id, found[client_id].version, revealed)
+            pdf = dossier.cache.get(key)
+            if pdf is not None:
+                pdfs[client_id] = pdf
+            else:
+                todo[client_id] = (key, _load_full(db, client_id, FULL_SECTIONS, revealed))
+        return found, pdfs, todo
+
+    found, pdfs, todo = await db.run_sync(load)
+    rendered = await dossier.render_many([dossier.build(full) for _, full in todo.values()])
+    for (client_id, (key, _)), pdf in zip(todo.items(), rendered):
+        dossier.cache.put(key, pdf)
+        pdfs[client_id] = pdf
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:     # PDFs are compressed already
+        for client_id in client_ids:
+            c = found[client_id]
+            name = f"{c.pan} — {c.display_name}.pdf".replace("/", "-").replace("\\", "-")
+            zf.writestr(name, pdfs[client_id])
+    return Response(buf.getvalue(), media_type="application/zip", headers={
+        "Content-Disposition": f'attachment; filename="dossiers-{date.today():%Y%m%d}.zip"',
+        "Cache-Control": "no-store",
+    })
+
+
+@router.get("/{client_id}/secrets", response_model=dict[str, Optional[str]])
+async def get_client_secrets(
+    client_id: uuid.UUID,
+    db:        AsyncSession = Depends(get_async_db),
+    _:         User         = Depends(get_current_user),
+):
+    """The client's decrypted portal / MCA / TRACES credentials."""
+    def load(db: Session) -> dict:
+        client = db.query(Client).options(LOAD_CREDENTIALS).filter(Client.id == client_id).first()
+        if not client:
+            raise HTTPException(status_code=404, detail="Client not found")
+        return crypto.secrets(client, ENCRYPTED_FIELDS)
+
+    return await db.run_sync(load)
 
 
 @router.put("/{client_id}", response_model=ClientResponse)
-def update_client(
+async def update_client(
     client_id: uuid.UUID,
     body:      ClientUpdate,
-    db:        Session = Depends(get_db),
-    _:         User    = Depends(get_current_user),
+    db:        AsyncSession = Depends(get_async_db),
+    _:         User         = Depends(get_current_user),
 ):
-    client = db.query(Client).filter(Client.id == client_id).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    data = _encrypt_client(body.model_dump(exclude_none=True))
-    for field, value in data.items():
-        setattr(client, field, value)
-    db.commit()
-    db.refresh(client)
-    return _decrypt_client(client)
+    def update(db: Session) -> Client:
+        client = db.query(Client).options(LOAD_CREDENTIALS).filter(Client.id == client_id).first()
+        if not client:
+            raise HTTPException(status_code=404, detail="Client not found")
+        data = body.model_dump(exclude_none=True)
+        creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+        for field, value in data.items():
+            setattr(client, field, value)
+        crypto.store(client, creds, ENCRYPTED_FIELDS)
+        search_index.index(db, client)
+        db.commit()
+        db.refresh(client)
+        return _decrypt_client(client)
+
+    return await db.run_sync(update)
 
 
 @router.delete("/{client_id}", status_code=204)
-def deactivate_client(
+async def deactivate_client(
     client_id: uuid.UUID,
-    db:        Session = Depends(get_db),
-    _:         User    = Depends(get_current_user),
+    db:        AsyncSession = Depends(get_async_db),
+    _:         User         = Depends(get_current_user),
 ):
-    client = db.query(Client).filter(Client.id == client_id).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    client.is_active = False
-    db.commit()
+    def deactivate(db: Session) -> None:
+        client = db.query(Client).filter(Client.id == client_id).first()
+        if not client:
+            raise HTTPException(status_code=404, detail="Client not found")
+        client.is_active = False
+        db.commit()
+
+    await db.run_sync(deactivate)
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Optional
+
+from database import get_async_db
+from schemas import ComplianceCalendar, ComplianceItem
+from auth import get_current_user
+from models import User
+import compliance
+import conditional
+import projection
+
+router = APIRouter(prefix="/compliance", tags=["Compliance"])
+
+KIND_HELP = "Comma-separated sources (default all): " + ", ".join(compliance.KINDS)
+
+
+def _window(within: str, overdue: Optional[str]) -> tuple[date, date]:
+    today = date.today()
+    ahead = compliance.parse_window(within, "within", compliance.HORIZON_DAYS)
+    back = compliance.parse_window(overdue, "overdue", compliance.LOOKBACK_DAYS)
+    return today - timedelta(days=back), today + timedelta(days=ahead)
+
+
+@router.get("/upcoming", response_model=list[ComplianceItem])
+async def list_upcoming(
+    request:  Request,
+    response: Response,
+    within:   str           = Query("30d", description="How far ahead: e.g. 30d, 6w, 3m, 1y"),
+    overdue:  Optional[str] = Query(None, description="Also include what lapsed this far back, same units"),
+    kind:     Optional[str] = Query(None, description=KIND_HELP),
+    limit:    int           = Query(100, ge=1, le=500),
+    cursor:   Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields:   Optional[str] = Query(None, description=projection.FIELDS_HELP),
+    db:       AsyncSession  = Depends(get_async_db),
+    _:        User          = Depends(get_current_user),
+):
+    """
+    DSCs, passports and other registrations expiring, and GST / EPF-ESI
+    registrations being cancelled, from today (or `overdue` ago) until
+    `within` from now — soonest first, active clients only.
+
+    Pages are keyset-based on (due_date, kind, entity_id); the next page's
+    cursor comes back in X-Next-Cursor and the size of the whole window in
+    X-Total-Count. Responses carry an ETag that changes with the date and
+    with any write to the tables involved.
+    """
+    start, end = _window(within, overdue)
+    kinds = compliance.parse_kinds(kind)
+    after = compliance.decode_cursor(cursor) if cursor else None
+    only = projection.parse_fields(fields, ComplianceItem)
+
+    def query(db: Session) -> Response | list[dict]:
+        version, days = compliance.calendar.current(db)
+        tag = conditional.etag(request, version)
+        if conditional.fresh(request, tag):
+            return conditional.not_modified(tag)
+        response.headers.update(conditional.headers(tag))
+        response.headers["X-Total-Count"] = str(compliance.summarise(days, start, end, kinds)["total"])
+        return compliance.upcoming(db, start, end, kinds, limit + 1, after)
+
+    rows = await db.run_sync(query)
+    if isinstance(rows, Response):
+        return rows
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = compliance.encode_cursor(rows[-1])
+    return projection.respond(ComplianceItem, only, rows, response)
+
+
+@router.get("/calendar", response_model=ComplianceCalendar)
+async def get_calendar(
+    request:  Request,
+    response: Response,
+    within:   str           = Query("30d", description="How far ahead: e.g. 30d, 6w, 3m, 1y"),
+    overdue:  Optional[str] = Query(None, description="Also count what lapsed this far back, same units"),
+    kind:     Optional[str] = Query(None, description=KIND_HELP),
+    db:       AsyncSession  = Depends(get_async_db),
+    _:        User          = Depends(get_current_user),
+):
+    """
+    How much falls due in the window — in total, per source and per day —
+    for the dashboard. Answered from the in-memory rolling calendar (see
+    compliance.py) without touching the rows themselves; counts may trail a
+    write by up to COMPLIANCE_CALENDAR_TTL_SECONDS.
+    """
+    start, end = _window(within, overdue)
+    kinds = compliance.parse_kinds(kind)
+
+    def query(db: Session) -> Response | dict:
+        version, days = compliance.calendar.current(db, max_age=compliance.CALENDAR_TTL_SECONDS)
+        tag = conditional.etag(request, version)
+        if conditional.fresh(request, tag):
+            return conditional.not_modified(tag)
+        response.headers.update(conditional.headers(tag))
+        return compliance.summarise(days, start, end, kinds)
+
+    return projection.respond(ComplianceCalendar, None, await db.run_sync(query), response)
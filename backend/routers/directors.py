@@ -1,23 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, selectinload
 import uuid
 
-from database import get_db
-from models import Director, Client
+from database import get_async_db
+from models import Client, Director
 from schemas import DirectorCreate, DirectorUpdate, DirectorResponse
 from auth import get_current_user
 from models import User
+import groups
+import projection
 
 router = APIRouter(prefix="/directors", tags=["Directors"])
 
+# _build_response reads both linked clients — load them up front, one query each
+LOAD_NAMES = (selectinload(Director.individual), selectinload(Director.company))
+# Response fields that come from the linked clients
+NAME_FIELDS = ["din", "individual_name", "company_name"]
+
+# Reads select the response columns, joining the linked clients only for the name fields asked for
+_individual, _company = aliased(Client), aliased(Client)
+_JOINED = {"din": _individual.din, "individual_name": _individual.legal_name, "company_name": _company.legal_name}
+
+
+def _select(only: tuple[str, ...] | None):
+    stmt = projection.project_joined(Director, DirectorResponse, only, _JOINED)
+    if projection.wants(only, ["din", "individual_name"]):
+        stmt = stmt.outerjoin(_individual, _individual.id == Director.individual_client_id)
+    if projection.wants(only, ["company_name"]):
+        stmt = stmt.outerjoin(_company, _company.id == Director.company_client_id)
+    return stmt
+
 
 def _build_response(d: Director) -> dict:
+    individual = d.individual
+    company = d.company
     return {
         "company_client_id":    d.company_client_id,
         "individual_client_id": d.individual_client_id,
-        "din":                  d.individual.din if d.individual else None,
-        "individual_name":      d.individual.legal_name if d.individual else None,
-        "company_name":         d.company.legal_name if d.company else None,
+        "din":                  individual.din if individual else None,
+        "individual_name":      individual.legal_name if individual else None,
+        "company_name":         company.legal_name if company else None,
         "designation":          d.designation,
         "date_of_appointment":  d.date_of_appointment,
         "date_of_cessation":    d.date_of_cessation,
@@ -30,72 +53,91 @@ def _build_response(d: Director) -> dict:
 
 
 @router.get("", response_model=list[DirectorResponse])
-def list_directors(
+async def list_directors(
     company_client_id:    uuid.UUID | None = None,
     individual_client_id: uuid.UUID | None = None,
-    db: Session = Depends(get_db),
-    _:  User    = Depends(get_current_user),
+    fields:               str | None       = Query(None, description=projection.FIELDS_HELP),
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(get_current_user),
 ):
-    q = db.query(Director)
-    if company_client_id:
-        q = q.filter(Director.company_client_id == company_client_id)
-    if individual_client_id:
-        q = q.filter(Director.individual_client_id == individual_client_id)
-    return [_build_response(d) for d in q.all()]
+    only = projection.parse_fields(fields, DirectorResponse)
+
+    def query(db: Session) -> list[dict]:
+        stmt = _select(only)
+        if company_client_id:
+            stmt = stmt.where(Director.company_client_id == company_client_id)
+        if individual_client_id:
+            stmt = stmt.where(Director.individual_client_id == individual_client_id)
+        return projection.rows(db, stmt)
+
+    return projection.respond(DirectorResponse, only, await db.run_sync(query))
 
 
 @router.post("", response_model=DirectorResponse, status_code=201)
-def create_director(
+async def create_director(
     body: DirectorCreate,
-    db:   Session = Depends(get_db),
-    _:    User    = Depends(get_current_user),
+    db:   AsyncSession = Depends(get_async_db),
+    _:    User         = Depends(get_current_user),
 ):
-    existing = db.query(Director).filter(
-        Director.company_client_id == body.company_client_id,
-        Director.individual_client_id == body.individual_client_id,
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="This director-company relationship already exists")
-    d = Director(**body.model_dump())
-    db.add(d)
-    db.commit()
-    db.refresh(d)
-    return _build_response(d)
+    def create(db: Session) -> dict:
+        existing = db.query(Director).filter(
+            Director.company_client_id == body.company_client_id,
+            Director.individual_client_id == body.individual_client_id,
+        ).first()
+        if existing:
+            raise HTTPException(status_code=400, detail="This director-company relationship already exists")
+        d = Director(**body.model_dump())
+        db.add(d)
+        db.commit()
+        db.refresh(d)
+        groups.index.record(d)
+        return _build_response(d)
+
+    return await db.run_sync(create)
 
 
 @router.put("/{company_id}/{individual_id}", response_model=DirectorResponse)
-def update_director(
+async def update_director(
     company_id:    uuid.UUID,
     individual_id: uuid.UUID,
     body:          DirectorUpdate,
-    db:            Session = Depends(get_db),
-    _:             User    = Depends(get_current_user),
+    db:            AsyncSession = Depends(get_async_db),
+    _:             User         = Depends(get_current_user),
 ):
-    d = db.query(Director).filter(
-        Director.company_client_id == company_id,
-        Director.individual_client_id == individual_id,
-    ).first()
-    if not d:
-        raise HTTPException(status_code=404, detail="Director record not found")
-    for field, value in body.model_dump(exclude_none=True).items():
-        setattr(d, field, value)
-    db.commit()
-    db.refresh(d)
-    return _build_response(d)
+    def update(db: Session) -> dict:
+        d = db.query(Director).filter(
+            Director.company_client_id == company_id,
+            Director.individual_client_id == individual_id,
+        ).first()
+        if not d:
+            raise HTTPException(status_code=404, detail="Director record not found")
+        for field, value in body.model_dump(exclude_none=True).items():
+            setattr(d, field, value)
+        db.commit()
+        db.refresh(d)
+        groups.index.record(d)
+        return _build_response(d)
+
+    return await db.run_sync(update)
 
 
 @router.delete("/{company_id}/{individual_id}", status_code=204)
-def delete_director(
+async def delete_director(
     company_id:    uuid.UUID,
     individual_id: uuid.UUID,
-    db:            Session = Depends(get_db),
-    _:             User    = Depends(get_current_user),
+    db:            AsyncSession = Depends(get_async_db),
+    _:             User         = Depends(get_current_user),
 ):
-    d = db.query(Director).filter(
-        Director.company_client_id == company_id,
-        Director.individual_client_id == individual_id,
-    ).first()
-    if not d:
-        raise HTTPException(status_code=404, detail="Director record not found")
-    db.delete(d)
-    db.commit()
+    def delete(db: Session) -> None:
+        d = db.query(Director).filter(
+            Director.company_client_id == company_id,
+            Director.individual_client_id == individual_id,
+        ).first()
+        if not d:
+            raise HTTPException(status_code=404, detail="Director record not found")
+        gone = groups.link(d)
+        db.delete(d)
+        db.commit()
+        groups.index.forget(gone)
+
+    await db.run_sync(delete)
@@ -1,93 +1,150 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Optional
 import uuid
 
-from database import get_db
+from database import get_async_db
 from models import EPFESIRegistration
 from schemas import EPFESICreate, EPFESIUpdate, EPFESIResponse
 from auth import get_current_user
 from models import User
+import conditional
 import crypto
+import projection
+import search_index
 
 router = APIRouter(prefix="/epf-esi", tags=["EPF/ESI Registrations"])
 
-
-def _encrypt(data: dict) -> dict:
-    if data.get("portal_password"):
-        data["portal_password"] = crypto.encrypt(data["portal_password"])
-    return data
+ENCRYPTED_FIELDS = ["portal_password"]
 
 
 def _decrypt(r: EPFESIRegistration) -> EPFESIRegistration:
-    if r.portal_password:
-        r.portal_password = crypto.decrypt(r.portal_password)
-    return r
+    return crypto.present(r, ENCRYPTED_FIELDS, set(ENCRYPTED_FIELDS))
 
 
 @router.get("", response_model=list[EPFESIResponse])
-def list_epf_esi(
+async def list_epf_esi(
+    request:   Request,
+    response:  Response,
     client_id: uuid.UUID | None = None,
-    db: Session = Depends(get_db),
-    _:  User    = Depends(get_current_user),
+    reveal:    str | None       = Query(None, description="Credentials to decrypt: 'all' or comma-separated field names (default: masked)"),
+    fields:    str | None       = Query(None, description=projection.FIELDS_HELP),
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(get_current_user),
 ):
-    q = db.query(EPFESIRegistration)
-    if client_id:
-        q = q.filter(EPFESIRegistration.client_id == client_id)
-    return [_decrypt(r) for r in q.all()]
+    revealed = crypto.parse_reveal(reveal, ENCRYPTED_FIELDS)
+    only = projection.parse_fields(fields, EPFESIResponse)
+    creds = projection.wanted(only, ENCRYPTED_FIELDS)
+    extra = ("credentials_sealed",) if creds else ()
+    scope = [EPFESIRegistration.client_id == client_id] if client_id else []
+
+    def query(db: Session) -> Response | list[EPFESIRegistration]:
+        if revealed:
+            # Decrypted passwords never go into the browser cache
+            response.headers["Cache-Control"] = "no-store"
+        else:
+            tag = conditional.etag(request, conditional.collection_version(db, EPFESIRegistration, *scope))
+            if conditional.fresh(request, tag):
+                return conditional.not_modified(tag)
+            response.headers.update(conditional.headers(tag))
+        q = db.query(EPFESIRegistration).options(*projection.load_only(EPFESIRegistration, only, *extra)).filter(*scope)
+        return [crypto.present(r, creds, revealed) for r in q.all()]
+
+    return projection.respond(EPFESIResponse, only, await db.run_sync(query), response)
 
 
 @router.post("", response_model=EPFESIResponse, status_code=201)
-def create_epf_esi(
+async def create_epf_esi(
     body: EPFESICreate,
-    db:   Session = Depends(get_db),
-    _:    User    = Depends(get_current_user),
+    db:   AsyncSession = Depends(get_async_db),
+    _:    User         = Depends(get_current_user),
 ):
-    data = _encrypt(body.model_dump())
-    r = EPFESIRegistration(**data)
-    db.add(r)
-    db.commit()
-    db.refresh(r)
-    return _decrypt(r)
+    def create(db: Session) -> EPFESIRegistration:
+        data = body.model_dump()
+        creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+        r = EPFESIRegistration(**data)
+        crypto.store(r, creds, ENCRYPTED_FIELDS)
+        db.add(r)
+        db.flush()
+        search_index.index(db, r)
+        db.commit()
+        db.refresh(r)
+        return _decrypt(r)
+
+    return await db.run_sync(create)
 
 
 @router.get("/{reg_id}", response_model=EPFESIResponse)
-def get_epf_esi(
+async def get_epf_esi(
     reg_id: uuid.UUID,
-    db:     Session = Depends(get_db),
-    _:      User    = Depends(get_current_user),
+    fields: str | None   = Query(None, description=projection.FIELDS_HELP),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
 ):
-    r = db.query(EPFESIRegistration).filter(EPFESIRegistration.id == reg_id).first()
-    if not r:
-        raise HTTPException(status_code=404, detail="EPF/ESI registration not found")
-    return _decrypt(r)
+    only = projection.parse_fields(fields, EPFESIResponse)
+
+    def load(db: Session) -> EPFESIRegistration:
+        r = db.query(EPFESIRegistration).filter(EPFESIRegistration.id == reg_id).first()
+        if not r:
+            raise HTTPException(status_code=404, detail="EPF/ESI registration not found")
+        return _decrypt(r)
+
+    return projection.respond(EPFESIResponse, only, await db.run_sync(load))
+
+
+@router.get("/{reg_id}/secrets", response_model=dict[str, Optional[str]])
+async def get_epf_esi_secrets(
+    reg_id: uuid.UUID,
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
+):
+    """Decrypted credentials of one record — what the list masks."""
+    def load(db: Session) -> dict:
+        r = db.query(EPFESIRegistration).filter(EPFESIRegistration.id == reg_id).first()
+        if not r:
+            raise HTTPException(status_code=404, detail="EPF/ESI registration not found")
+        return crypto.secrets(r, ENCRYPTED_FIELDS)
+
+    return await db.run_sync(load)
 
 
 @router.put("/{reg_id}", response_model=EPFESIResponse)
-def update_epf_esi(
+async def update_epf_esi(
     reg_id: uuid.UUID,
     body:   EPFESIUpdate,
-    db:     Session = Depends(get_db),
-    _:      User    = Depends(get_current_user),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
 ):
-    r = db.query(EPFESIRegistration).filter(EPFESIRegistration.id == reg_id).first()
-    if not r:
-        raise HTTPException(status_code=404, detail="EPF/ESI registration not found")
-    data = _encrypt(body.model_dump(exclude_none=True))
-    for field, value in data.items():
-        setattr(r, field, value)
-    db.commit()
-    db.refresh(r)
-    return _decrypt(r)
+    def update(db: Session) -> EPFESIRegistration:
+        r = db.query(EPFESIRegistration).filter(EPFESIRegistration.id == reg_id).first()
+        if not r:
+            raise HTTPException(status_code=404, detail="EPF/ESI registration not found")
+        data = body.model_dump(exclude_none=True)
+        creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+        for field, value in data.items():
+            setattr(r, field, value)
+        crypto.store(r, creds, ENCRYPTED_FIELDS)
+        search_index.index(db, r)
+        db.commit()
+        db.refresh(r)
+        return _decrypt(r)
+
+    return await db.run_sync(update)
 
 
 @router.delete("/{reg_id}", status_code=204)
-def delete_epf_esi(
+async def delete_epf_esi(
     reg_id: uuid.UUID,
-    db:     Session = Depends(get_db),
-    _:      User    = Depends(get_current_user),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
 ):
-    r = db.query(EPFESIRegistration).filter(EPFESIRegistration.id == reg_id).first()
-    if not r:
-        raise HTTPException(status_code=404, detail="EPF/ESI registration not found")
-    db.delete(r)
-    db.commit()
+    def delete(db: Session) -> None:
+        r = db.query(EPFESIRegistration).filter(EPFESIRegistration.id == reg_id).first()
+        if not r:
+            raise HTTPException(status_code=404, detail="EPF/ESI registration not found")
+        search_index.remove(db, r)
+        db.delete(r)
+        db.commit()
+
+    await db.run_sync(delete)
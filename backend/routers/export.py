@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import date
+from typing import Literal
+
+from database import SessionLocal
+from auth import get_current_user
+from models import User
+import crypto
+import export
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+@router.get("", response_class=StreamingResponse)
+async def export_book(
+    format: Literal["csv", "ndjson", "xlsx"] = "csv",
+    table:  Literal["clients", "gst", "bank_accounts", "epf_esi", "other_registrations"] = Query("clients", description="Table to write (csv only — ndjson and xlsx include all)"),
+    reveal: str | None = Query(None, description="Credentials to decrypt: 'all' or comma-separated field names (default: masked; admin only)"),
+    user:   User = Depends(get_current_user),
+):
+    """
+    Every client and its registrations, streamed off a server-side cursor
+    (see export.py for the layout of each format).
+    """
+    revealed = crypto.parse_reveal(reveal, export.CREDENTIAL_FIELDS)
+    if revealed and user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can export decrypted credentials")
+    if format == "xlsx" and export.openpyxl is None:
+        raise HTTPException(status_code=400, detail="Excel export needs openpyxl installed; use format=csv")
+
+    def body():
+        # The sync engine: psycopg2 gives yield_per a named (server-side) cursor,
+        # and Starlette runs this generator in the threadpool a chunk at a time
+        with SessionLocal() as db:
+            yield from export.write(db, format, table, revealed)
+
+    media_type, ext = export.FORMATS[format]
+    name = table if format == "csv" else "client-book"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}-{date.today():%Y%m%d}.{ext}"',
+        # Decrypted or not, a full dump of the book does not belong in a cache
+        "Cache-Control": "no-store",
+    }
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
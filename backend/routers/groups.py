@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import get_async_db
+from schemas import ClientGroupSummary, ClientGroupsIndex
+from auth import get_current_user, require_admin
+from models import User
+import groups
+import projection
+
+router = APIRouter(prefix="/groups", tags=["Client Groups"])
+
+
+@router.get("", response_model=list[ClientGroupSummary])
+async def list_groups(
+    response: Response,
+    min_size: int           = Query(2, ge=1, description="Only groups of at least this many clients"),
+    limit:    int           = Query(50, ge=1, le=500),
+    cursor:   Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db:       AsyncSession  = Depends(get_async_db),
+    _:        User          = Depends(get_current_user),
+):
+    """
+    Client groups — clients linked through directors, partners, shareholders
+    or GST signatories — largest first, each with its best-linked client.
+
+    Served from this worker's in-memory group forest (see groups.py), so a
+    page costs the same however large the book. The next page's cursor comes
+    back in X-Next-Cursor and the number of groups in X-Total-Count.
+    """
+    after = groups.decode_cursor(cursor) if cursor else None
+
+    def query(db: Session) -> tuple[list[dict], int]:
+        return groups.list_groups(db, min_size, limit + 1, after)
+
+    rows, total = await db.run_sync(query)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = groups.encode_cursor(rows[-1])
+    response.headers["X-Total-Count"] = str(total)
+    return projection.respond(ClientGroupSummary, None, rows, response)
+
+
+@router.post("/rebuild", response_model=ClientGroupsIndex)
+async def rebuild_groups(
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(require_admin),
+):
+    """Reload every link and rebuild this worker's group forest from scratch (admin only)."""
+    def run(db: Session) -> dict:
+        return groups.index.rebuild(db)
+
+    return await db.run_sync(run)
@@ -1,170 +1,322 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Optional
 import uuid
 
-from database import get_db
+from database import get_async_db
 from models import GSTRegistration, GSTSignatory, Client
-from schemas import GSTCreate, GSTUpdate, GSTResponse, GSTListItem, GSTSignatoryCreate, GSTSignatoryInfo
+from schemas import GSTCreate, GSTUpdate, GSTResponse, GSTListItem, GSTSignatoryCreate, GSTSignatoryInfo, GSTINLookup
 from auth import get_current_user
 from models import User
+import conditional
 import crypto
+import groups
+import gst_portal
+import projection
+import search_index
 
 router = APIRouter(prefix="/gst", tags=["GST Registrations"])
 
 ENCRYPTED_FIELDS = ["gst_password", "ewb_password", "ewb_api_password"]
 
+# _build_response walks signatories and their clients — one query per level instead of per row
+LOAD_SIGNATORIES = selectinload(GSTRegistration.signatories).selectinload(GSTSignatory.signatory_client)
 
-def _encrypt(data: dict) -> dict:
-    for f in ENCRYPTED_FIELDS:
-        if data.get(f):
-            data[f] = crypto.encrypt(data[f])
-    return data
+# GSTResponse's plain fields, read off the entity in one go
+_fields = projection.attributes(GSTResponse, "signatories")
 
 
 def _decrypt(reg: GSTRegistration) -> GSTRegistration:
-    for f in ENCRYPTED_FIELDS:
-        val = getattr(reg, f, None)
-        if val:
-            setattr(reg, f, crypto.decrypt(val))
-    return reg
-
-
-def _build_response(reg: GSTRegistration) -> dict:
-    _decrypt(reg)
-    data = {c.name: getattr(reg, c.name) for c in reg.__table__.columns}
-    data["signatories"] = []
-    for sig in reg.signatories:
+    return crypto.present(reg, ENCRYPTED_FIELDS, set(ENCRYPTED_FIELDS))
+
+
+def _build_response(reg: GSTRegistration, reveal: set[str] | None = None, with_signatories: bool = True) -> dict:
+    """reveal=None decrypts every credential (single-record views); a set masks all but those."""
+    signatories = []
+    for sig in reg.signatories if with_signatories else []:
         c = sig.signatory_client
-        data["signatories"].append({
+        signatories.append({
             "id": sig.id,
             "signatory_client_id": sig.signatory_client_id,
             "signatory_name": c.legal_name if c else None,
             "signatory_pan":  c.pan if c else None,
             "is_active": sig.is_active,
         })
+    # present() detaches reg from the session, so the signatories are read first
+    if reveal is None:
+        _decrypt(reg)
+    else:
+        crypto.present(reg, ENCRYPTED_FIELDS, reveal)
+    data = _fields(reg)
+    data["signatories"] = signatories
     return data
 
 
 @router.get("", response_model=list[GSTListItem])
-def list_gst(
+async def list_gst(
+    request:   Request,
+    response:  Response,
     client_id: uuid.UUID | None = None,
-    db: Session = Depends(get_db),
-    _:  User    = Depends(get_current_user),
+    fields:    str | None       = Query(None, description=projection.FIELDS_HELP),
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(get_current_user),
 ):
-    q = db.query(GSTRegistration)
-    if client_id:
-        q = q.filter(GSTRegistration.client_id == client_id)
-    return q.order_by(GSTRegistration.gstin).all()
+    only = projection.parse_fields(fields, GSTListItem)
+
+    scope = [GSTRegistration.client_id == client_id] if client_id else []
+
+    def query(db: Session) -> Response | list[dict]:
+        tag = conditional.etag(request, conditional.collection_version(db, GSTRegistration, *scope))
+        if conditional.fresh(request, tag):
+            return conditional.not_modified(tag)
+        response.headers.update(conditional.headers(tag))
+        q = projection.project(GSTRegistration, GSTListItem, only).where(*scope)
+        return projection.rows(db, q.order_by(GSTRegistration.gstin))
+
+    return projection.respond(GSTListItem, only, await db.run_sync(query), response)
 
 
 @router.post("", response_model=GSTResponse, status_code=201)
-def create_gst(
+async def create_gst(
     body: GSTCreate,
-    db:   Session = Depends(get_db),
-    _:    User    = Depends(get_current_user),
+    db:   AsyncSession = Depends(get_async_db),
+    _:    User         = Depends(get_current_user),
+):
+    def create(db: Session) -> dict:
+        if db.query(GSTRegistration).filter(GSTRegistration.gstin == body.gstin).first():
+            raise HTTPException(status_code=400, detail="GSTIN already exists")
+        data = body.model_dump()
+        creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+        reg = GSTRegistration(**data)
+        crypto.store(reg, creds, ENCRYPTED_FIELDS)
+        db.add(reg)
+        db.flush()
+        search_index.index(db, reg)
+        db.commit()
+        db.refresh(reg)
+        db.refresh(reg, ["signatories"])
+        return _build_response(reg)
+
+    return await db.run_sync(create)
+
+
+def _portal():
+    portal = gst_portal.provider()
+    if portal is None:
+        raise HTTPException(status_code=503, detail="GST portal lookups are not configured on this server")
+    return portal
+
+
+async def _lookup(gstin: str, portal) -> gst_portal.Taxpayer:
+    try:
+        return await gst_portal.lookup(gstin, gst_portal.ON_DEMAND_ATTEMPTS, portal)
+    except gst_portal.NotFound:
+        raise
+    except gst_portal.PortalError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.get("/lookup/{gstin}", response_model=GSTINLookup)
+async def lookup_gstin(
+    gstin: str,
+    _:     User = Depends(get_current_user),
 ):
-    if db.query(GSTRegistration).filter(GSTRegistration.gstin == body.gstin).first():
-        raise HTTPException(status_code=400, detail="GSTIN already exists")
-    data = _encrypt(body.model_dump())
-    reg = GSTRegistration(**data)
-    db.add(reg)
-    db.commit()
-    db.refresh(reg)
-    db.refresh(reg, ["signatories"])
-    return _build_response(reg)
+    """What the GST portal has on a GSTIN, for pre-filling forms — nothing is saved."""
+    gstin = gstin.strip().upper()
+    if not gst_portal.GSTIN_PATTERN.match(gstin):
+        raise HTTPException(status_code=400, detail="Not a valid GSTIN")
+    try:
+        t = await _lookup(gstin, _portal())
+    except gst_portal.NotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {
+        "gstin":               t.gstin,
+        "legal_name":          t.legal_name,
+        "trade_name":          t.trade_name,
+        "gstin_status":        t.status,
+        "state":               t.state,
+        "state_code":          t.state_code,
+        "registration_type":   t.registration_type,
+        "registration_date":   t.registration_date,
+        "principal_address":   t.principal_address,
+        "nature_of_business":  t.nature_of_business,
+        "einvoice_applicable": t.einvoice_applicable,
+    }
 
 
 @router.get("/{gst_id}", response_model=GSTResponse)
-def get_gst(
+async def get_gst(
+    gst_id: uuid.UUID,
+    fields: str | None   = Query(None, description=projection.FIELDS_HELP),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
+):
+    only = projection.parse_fields(fields, GSTResponse)
+    with_signatories = projection.wants(only, ["signatories"])
+
+    def load(db: Session) -> dict:
+        q = db.query(GSTRegistration)
+        if with_signatories:
+            q = q.options(LOAD_SIGNATORIES)
+        reg = q.filter(GSTRegistration.id == gst_id).first()
+        if not reg:
+            raise HTTPException(status_code=404, detail="GST registration not found")
+        return _build_response(reg, with_signatories=with_signatories)
+
+    return projection.respond(GSTResponse, only, await db.run_sync(load))
+
+
+@router.get("/{gst_id}/secrets", response_model=dict[str, Optional[str]])
+async def get_gst_secrets(
     gst_id: uuid.UUID,
-    db:     Session = Depends(get_db),
-    _:      User    = Depends(get_current_user),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
 ):
-    reg = db.query(GSTRegistration).options(
-        joinedload(GSTRegistration.signatories).joinedload(GSTSignatory.signatory_client)
-    ).filter(GSTRegistration.id == gst_id).first()
-    if not reg:
-        raise HTTPException(status_code=404, detail="GST registration not found")
-    return _build_response(reg)
+    """Decrypted portal / EWB passwords of one registration."""
+    def load(db: Session) -> dict:
+        reg = db.query(GSTRegistration).filter(GSTRegistration.id == gst_id).first()
+        if not reg:
+            raise HTTPException(status_code=404, detail="GST registration not found")
+        return crypto.secrets(reg, ENCRYPTED_FIELDS)
+
+    return await db.run_sync(load)
 
 
 @router.put("/{gst_id}", response_model=GSTResponse)
-def update_gst(
+async def update_gst(
     gst_id: uuid.UUID,
     body:   GSTUpdate,
-    db:     Session = Depends(get_db),
-    _:      User    = Depends(get_current_user),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
+):
+    def update(db: Session) -> dict:
+        reg = db.query(GSTRegistration).filter(GSTRegistration.id == gst_id).first()
+        if not reg:
+            raise HTTPException(status_code=404, detail="GST registration not found")
+        data = body.model_dump(exclude_none=True)
+        creds = crypto.split_credentials(data, ENCRYPTED_FIELDS)
+        for field, value in data.items():
+            setattr(reg, field, value)
+        crypto.store(reg, creds, ENCRYPTED_FIELDS)
+        search_index.index(db, reg)
+        db.commit()
+        db.refresh(reg)
+        return _build_response(reg)
+
+    return await db.run_sync(update)
+
+
+@router.post("/{gst_id}/refresh", response_model=GSTResponse)
+async def refresh_gst(
+    gst_id: uuid.UUID,
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
 ):
-    reg = db.query(GSTRegistration).filter(GSTRegistration.id == gst_id).first()
-    if not reg:
-        raise HTTPException(status_code=404, detail="GST registration not found")
-    data = _encrypt(body.model_dump(exclude_none=True))
-    for field, value in data.items():
-        setattr(reg, field, value)
-    db.commit()
-    db.refresh(reg)
-    return _build_response(reg)
+    """Look the registration up on the GST portal now and store its trade name, status, address etc."""
+    portal = _portal()
+
+    def load(db: Session) -> str:
+        reg = db.query(GSTRegistration).filter(GSTRegistration.id == gst_id).first()
+        if not reg:
+            raise HTTPException(status_code=404, detail="GST registration not found")
+        gstin = reg.gstin
+        # No connection held while the portal answers
+        db.rollback()
+        return gstin
+
+    try:
+        found = {gst_id: await _lookup(await db.run_sync(load), portal)}
+    except gst_portal.NotFound:
+        found = {gst_id: None}
+
+    def store(db: Session) -> dict:
+        gst_portal.write(db, found)
+        db.commit()
+        reg = db.query(GSTRegistration).options(LOAD_SIGNATORIES).filter(GSTRegistration.id == gst_id).first()
+        if not reg:
+            raise HTTPException(status_code=404, detail="GST registration not found")
+        return _build_response(reg)
+
+    return await db.run_sync(store)
 
 
 @router.delete("/{gst_id}", status_code=204)
-def delete_gst(
+async def delete_gst(
     gst_id: uuid.UUID,
-    db:     Session = Depends(get_db),
-    _:      User    = Depends(get_current_user),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
 ):
-    reg = db.query(GSTRegistration).filter(GSTRegistration.id == gst_id).first()
-    if not reg:
-        raise HTTPException(status_code=404, detail="GST registration not found")
-    db.delete(reg)
-    db.commit()
+    def delete(db: Session) -> None:
+        reg = db.query(GSTRegistration).filter(GSTRegistration.id == gst_id).first()
+        if not reg:
+            raise HTTPException(status_code=404, detail="GST registration not found")
+        search_index.remove(db, reg)
+        # Its signatories go with it (ON DELETE CASCADE)
+        gone = [groups.link(sig) for sig in reg.signatories]
+        db.delete(reg)
+        db.commit()
+        for link in gone:
+            groups.index.forget(link)
+
+    await db.run_sync(delete)
 
 
 # ── Signatories ──
 
 @router.post("/{gst_id}/signatories", response_model=GSTSignatoryInfo, status_code=201)
-def add_signatory(
+async def add_signatory(
     gst_id: uuid.UUID,
     body:   GSTSignatoryCreate,
-    db:     Session = Depends(get_db),
-    _:      User    = Depends(get_current_user),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
 ):
-    reg = db.query(GSTRegistration).filter(GSTRegistration.id == gst_id).first()
-    if not reg:
-        raise HTTPException(status_code=404, detail="GST registration not found")
-    client = db.query(Client).filter(Client.id == body.signatory_client_id).first()
-    if not client:
-        raise HTTPException(status_code=404, detail="Signatory client not found")
-    existing = db.query(GSTSignatory).filter(
-        GSTSignatory.gst_registration_id == gst_id,
-        GSTSignatory.signatory_client_id == body.signatory_client_id
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Signatory already added to this GSTIN")
-    sig = GSTSignatory(gst_registration_id=gst_id, signatory_client_id=body.signatory_client_id)
-    db.add(sig)
-    db.commit()
-    db.refresh(sig)
-    return {
-        "id": sig.id,
-        "signatory_client_id": sig.signatory_client_id,
-        "signatory_name": client.legal_name,
-        "signatory_pan":  client.pan,
-        "is_active": sig.is_active,
-    }
+    def add(db: Session) -> dict:
+        reg = db.query(GSTRegistration).filter(GSTRegistration.id == gst_id).first()
+        if not reg:
+            raise HTTPException(status_code=404, detail="GST registration not found")
+        client = db.query(Client).filter(Client.id == body.signatory_client_id).first()
+        if not client:
+            raise HTTPException(status_code=404, detail="Signatory client not found")
+        existing = db.query(GSTSignatory).filter(
+            GSTSignatory.gst_registration_id == gst_id,
+            GSTSignatory.signatory_client_id == body.signatory_client_id
+        ).first()
+        if existing:
+            raise HTTPException(status_code=400, detail="Signatory already added to this GSTIN")
+        sig = GSTSignatory(gst_registration_id=gst_id, signatory_client_id=body.signatory_client_id)
+        db.add(sig)
+        db.commit()
+        db.refresh(sig)
+        groups.index.record(sig)
+        return {
+            "id": sig.id,
+            "signatory_client_id": sig.signatory_client_id,
+            "signatory_name": client.legal_name,
+            "signatory_pan":  client.pan,
+            "is_active": sig.is_active,
+        }
+
+    return await db.run_sync(add)
 
 
 @router.delete("/{gst_id}/signatories/{signatory_id}", status_code=204)
-def remove_signatory(
+async def remove_signatory(
     gst_id:       uuid.UUID,
     signatory_id: uuid.UUID,
-    db:           Session = Depends(get_db),
-    _:            User    = Depends(get_current_user),
+    db:           AsyncSession = Depends(get_async_db),
+    _:            User         = Depends(get_current_user),
 ):
-    sig = db.query(GSTSignatory).filter(
-        GSTSignatory.id == signatory_id,
-        GSTSignatory.gst_registration_id == gst_id
-    ).first()
-    if not sig:
-        raise HTTPException(status_code=404, detail="Signatory not found")
-    db.delete(sig)
-    db.commit()
+    def remove(db: Session) -> None:
+        sig = db.query(GSTSignatory).filter(
+            GSTSignatory.id == signatory_id,
+            GSTSignatory.gst_registration_id == gst_id
+        ).first()
+        if not sig:
+            raise HTTPException(status_code=404, detail="Signatory not found")
+        gone = groups.link(sig)
+        db.delete(sig)
+        db.commit()
+        groups.index.forget(gone)
+
+    await db.run_sync(remove)
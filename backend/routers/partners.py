@@ -1,88 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, selectinload
 import uuid
 
-from database import get_db
-from models import Partner
+from database import get_async_db
+from models import Client, Partner
 from schemas import PartnerCreate, PartnerUpdate, PartnerResponse
 from auth import get_current_user
 from models import User
+import groups
+import projection
 
 router = APIRouter(prefix="/partners", tags=["Partners"])
 
+# _build_response reads both linked clients — load them up front, one query each
+LOAD_NAMES = (selectinload(Partner.individual), selectinload(Partner.firm_llp))
+# Response fields that come from the linked clients
+NAME_FIELDS = ["individual_name", "firm_name"]
+_fields = projection.attributes(PartnerResponse, *NAME_FIELDS)
+
+# Reads select the response columns, joining the linked clients only for the name fields asked for
+_individual, _firm = aliased(Client), aliased(Client)
+_JOINED = {"individual_name": _individual.legal_name, "firm_name": _firm.legal_name}
+
+
+def _select(only: tuple[str, ...] | None):
+    stmt = projection.project_joined(Partner, PartnerResponse, only, _JOINED)
+    if projection.wants(only, ["individual_name"]):
+        stmt = stmt.outerjoin(_individual, _individual.id == Partner.individual_client_id)
+    if projection.wants(only, ["firm_name"]):
+        stmt = stmt.outerjoin(_firm, _firm.id == Partner.firm_llp_client_id)
+    return stmt
+
 
 def _build_response(p: Partner) -> dict:
-    data = {c.name: getattr(p, c.name) for c in p.__table__.columns}
-    data["individual_name"] = p.individual.legal_name if p.individual else None
-    data["firm_name"]       = p.firm_llp.legal_name if p.firm_llp else None
+    data = _fields(p)
+    individual = p.individual
+    firm = p.firm_llp
+    data["individual_name"] = individual.legal_name if individual else None
+    data["firm_name"]       = firm.legal_name if firm else None
     return data
 
 
 @router.get("", response_model=list[PartnerResponse])
-def list_partners(
+async def list_partners(
     firm_llp_client_id:   uuid.UUID | None = None,
     individual_client_id: uuid.UUID | None = None,
-    db: Session = Depends(get_db),
-    _:  User    = Depends(get_current_user),
+    fields:               str | None       = Query(None, description=projection.FIELDS_HELP),
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(get_current_user),
 ):
-    q = db.query(Partner)
-    if firm_llp_client_id:
-        q = q.filter(Partner.firm_llp_client_id == firm_llp_client_id)
-    if individual_client_id:
-        q = q.filter(Partner.individual_client_id == individual_client_id)
-    return [_build_response(p) for p in q.all()]
+    only = projection.parse_fields(fields, PartnerResponse)
+
+    def query(db: Session) -> list[dict]:
+        stmt = _select(only)
+        if firm_llp_client_id:
+            stmt = stmt.where(Partner.firm_llp_client_id == firm_llp_client_id)
+        if individual_client_id:
+            stmt = stmt.where(Partner.individual_client_id == individual_client_id)
+        return projection.rows(db, stmt)
+
+    return projection.respond(PartnerResponse, only, await db.run_sync(query))
 
 
 @router.post("", response_model=PartnerResponse, status_code=201)
-def create_partner(
+async def create_partner(
     body: PartnerCreate,
-    db:   Session = Depends(get_db),
-    _:    User    = Depends(get_current_user),
+    db:   AsyncSession = Depends(get_async_db),
+    _:    User         = Depends(get_current_user),
 ):
-    p = Partner(**body.model_dump())
-    db.add(p)
-    db.commit()
-    db.refresh(p)
-    return _build_response(p)
+    def create(db: Session) -> dict:
+        p = Partner(**body.model_dump())
+        db.add(p)
+        db.commit()
+        db.refresh(p)
+        groups.index.record(p)
+        return _build_response(p)
+
+    return await db.run_sync(create)
 
 
 @router.get("/{partner_id}", response_model=PartnerResponse)
-def get_partner(
+async def get_partner(
     partner_id: uuid.UUID,
-    db:         Session = Depends(get_db),
-    _:          User    = Depends(get_current_user),
+    fields:     str | None   = Query(None, description=projection.FIELDS_HELP),
+    db:         AsyncSession = Depends(get_async_db),
+    _:          User         = Depends(get_current_user),
 ):
-    p = db.query(Partner).filter(Partner.id == partner_id).first()
-    if not p:
-        raise HTTPException(status_code=404, detail="Partner record not found")
-    return _build_response(p)
+    only = projection.parse_fields(fields, PartnerResponse)
+
+    def load(db: Session) -> dict:
+        found = projection.rows(db, _select(only).where(Partner.id == partner_id))
+        if not found:
+            raise HTTPException(status_code=404, detail="Partner record not found")
+        return found[0]
+
+    return projection.respond(PartnerResponse, only, await db.run_sync(load))
 
 
 @router.put("/{partner_id}", response_model=PartnerResponse)
-def update_partner(
+async def update_partner(
     partner_id: uuid.UUID,
     body:       PartnerUpdate,
-    db:         Session = Depends(get_db),
-    _:          User    = Depends(get_current_user),
+    db:         AsyncSession = Depends(get_async_db),
+    _:          User         = Depends(get_current_user),
 ):
-    p = db.query(Partner).filter(Partner.id == partner_id).first()
-    if not p:
-        raise HTTPException(status_code=404, detail="Partner record not found")
-    for field, value in body.model_dump(exclude_none=True).items():
-        setattr(p, field, value)
-    db.commit()
-    db.refresh(p)
-    return _build_response(p)
+    def update(db: Session) -> dict:
+        p = db.query(Partner).filter(Partner.id == partner_id).first()
+        if not p:
+            raise HTTPException(status_code=404, detail="Partner record not found")
+        for field, value in body.model_dump(exclude_none=True).items():
+            setattr(p, field, value)
+        db.commit()
+        db.refresh(p)
+        groups.index.record(p)
+        return _build_response(p)
+
+    return await db.run_sync(update)
 
 
 @router.delete("/{partner_id}", status_code=204)
-def delete_partner(
+async def delete_partner(
     partner_id: uuid.UUID,
-    db:         Session = Depends(get_db),
-    _:          User    = Depends(get_current_user),
+    db:         AsyncSession = Depends(get_async_db),
+    _:          User         = Depends(get_current_user),
 ):
-    p = db.query(Partner).filter(Partner.id == partner_id).first()
-    if not p:
-        raise HTTPException(status_code=404, detail="Partner record not found")
-    db.delete(p)
-    db.commit()
+    def delete(db: Session) -> None:
+        p = db.query(Partner).filter(Partner.id == partner_id).first()
+        if not p:
+            raise HTTPException(status_code=404, detail="Partner record not found")
+        gone = groups.link(p)
+        db.delete(p)
+        db.commit()
+        groups.index.forget(gone)
+
+    await db.run_sync(delete)
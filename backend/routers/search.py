@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import get_async_db
+from models import SearchDocument, Client
+from schemas import SearchHit
+from auth import get_current_user
+from models import User
+import projection
+import search_index
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("", response_model=list[SearchHit])
+async def search(
+    q:     str = Query(..., min_length=3, description="PAN, GSTIN, DIN, account no., EPF/ESI code, registration no. or name"),
+    limit: int = Query(20, ge=1, le=100),
+    fields: str | None = Query(None, description=projection.FIELDS_HELP),
+    db:    AsyncSession = Depends(get_async_db),
+    _:     User         = Depends(get_current_user),
+):
+    """
+    One query across clients, GSTINs, bank accounts, EPF/ESI and other registrations.
+
+    Matches an exact identifier (GIN on identifiers), a substring of any
+    identifier or name (trigram GIN on search_text) or whole words (tsvector).
+    Exact identifier hits rank first, the rest by trigram word similarity.
+    """
+    q = q.strip()
+    norm = search_index.normalise(q)
+    doc = SearchDocument
+
+    exact = doc.identifiers.contains([norm])
+    matches = or_(
+        exact,
+        doc.search_text.ilike(search_index.contains(q), escape="\\"),
+        doc.search_text.ilike(search_index.contains(norm), escape="\\") if norm and norm != q else literal(False),
+        doc.tsv.op("@@")(func.plainto_tsquery("simple", q)),
+    )
+    score = func.word_similarity(q, doc.search_text)
+    only = projection.parse_fields(fields, SearchHit)
+    # Every document belongs to a client; the join is only for its name and PAN
+    with_client = projection.wants(only, ["client_name", "client_pan"])
+
+    def query(db: Session) -> list[dict]:
+        stmt = select(
+            doc.entity_type, doc.entity_id, doc.client_id, doc.title, doc.subtitle,
+            exact.label("exact"), score.label("score"),
+        )
+        if with_client:
+            stmt = stmt.add_columns(Client.display_name, Client.pan).join(Client, Client.id == doc.client_id)
+        rows = db.execute(
+            stmt.where(matches)
+            .order_by(case((exact, 1), else_=0).desc(), score.desc())
+            .limit(limit)
+        ).all()
+        return [
+            {
+                "entity_type": r.entity_type,
+                "entity_id":   r.entity_id,
+                "client_id":   r.client_id,
+                "client_name": r.display_name if with_client else None,
+                "client_pan":  r.pan if with_client else None,
+                "title":       r.title,
+                "subtitle":    r.subtitle,
+                "exact":       r.exact,
+                "score":       r.score,
+            }
+            for r in rows
+        ]
+
+    return projection.respond(SearchHit, only, await db.run_sync(query))
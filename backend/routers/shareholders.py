@@ -1,15 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, selectinload
 import uuid
 
-from database import get_db
+from database import get_async_db
 from models import Shareholder, Client
 from schemas import ShareholderCreate, ShareholderUpdate, ShareholderResponse
 from auth import get_current_user
 from models import User
+import groups
+import projection
 
 router = APIRouter(prefix="/shareholders", tags=["Shareholders"])
 
+# _holder_client may read either link — load both up front, one query each
+LOAD_NAMES = (selectinload(Shareholder.individual), selectinload(Shareholder.holding_entity))
+# Response fields that come from the linked client
+NAME_FIELDS = ["holder_name", "holder_pan"]
+_fields = projection.attributes(ShareholderResponse, *NAME_FIELDS)
+
+# Reads select the response columns, joining the linked clients only for the name fields asked for
+_individual, _entity = aliased(Client), aliased(Client)
+_is_individual = Shareholder.holder_type == "Individual"
+_JOINED = {
+    "holder_name": case((_is_individual, _individual.legal_name), else_=_entity.legal_name),
+    "holder_pan":  case((_is_individual, _individual.pan), else_=_entity.pan),
+}
+
+
+def _select(only: tuple[str, ...] | None):
+    stmt = projection.project_joined(Shareholder, ShareholderResponse, only, _JOINED)
+    if projection.wants(only, NAME_FIELDS):
+        stmt = (stmt.outerjoin(_individual, _individual.id == Shareholder.individual_client_id)
+                    .outerjoin(_entity, _entity.id == Shareholder.holding_entity_client_id))
+    return stmt
+
 
 def _holder_client(sh: Shareholder) -> Client | None:
     if sh.holder_type == "Individual":
@@ -19,74 +45,99 @@ def _holder_client(sh: Shareholder) -> Client | None:
 
 def _build_response(sh: Shareholder) -> dict:
     holder = _holder_client(sh)
-    data = {c.name: getattr(sh, c.name) for c in sh.__table__.columns}
+    data = _fields(sh)
     data["holder_name"] = holder.legal_name if holder else None
     data["holder_pan"]  = holder.pan if holder else None
     return data
 
 
 @router.get("", response_model=list[ShareholderResponse])
-def list_shareholders(
+async def list_shareholders(
     company_client_id: uuid.UUID | None = None,
-    db: Session = Depends(get_db),
-    _:  User    = Depends(get_current_user),
+    fields:            str | None       = Query(None, description=projection.FIELDS_HELP),
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(get_current_user),
 ):
-    q = db.query(Shareholder)
-    if company_client_id:
-        q = q.filter(Shareholder.company_client_id == company_client_id)
-    return [_build_response(sh) for sh in q.all()]
+    only = projection.parse_fields(fields, ShareholderResponse)
+
+    def query(db: Session) -> list[dict]:
+        stmt = _select(only)
+        if company_client_id:
+            stmt = stmt.where(Shareholder.company_client_id == company_client_id)
+        return projection.rows(db, stmt)
+
+    return projection.respond(ShareholderResponse, only, await db.run_sync(query))
 
 
 @router.post("", response_model=ShareholderResponse, status_code=201)
-def create_shareholder(
+async def create_shareholder(
     body: ShareholderCreate,
-    db:   Session = Depends(get_db),
-    _:    User    = Depends(get_current_user),
+    db:   AsyncSession = Depends(get_async_db),
+    _:    User         = Depends(get_current_user),
 ):
-    sh = Shareholder(**body.model_dump())
-    db.add(sh)
-    db.commit()
-    db.refresh(sh)
-    return _build_response(sh)
+    def create(db: Session) -> dict:
+        sh = Shareholder(**body.model_dump())
+        db.add(sh)
+        db.commit()
+        db.refresh(sh)
+        groups.index.record(sh)
+        return _build_response(sh)
+
+    return await db.run_sync(create)
 
 
 @router.get("/{sh_id}", response_model=ShareholderResponse)
-def get_shareholder(
-    sh_id: uuid.UUID,
-    db:    Session = Depends(get_db),
-    _:     User    = Depends(get_current_user),
+async def get_shareholder(
+    sh_id:  uuid.UUID,
+    fields: str | None   = Query(None, description=projection.FIELDS_HELP),
+    db:     AsyncSession = Depends(get_async_db),
+    _:      User         = Depends(get_current_user),
 ):
-    sh = db.query(Shareholder).filter(Shareholder.id == sh_id).first()
-    if not sh:
-        raise HTTPException(status_code=404, detail="Shareholder record not found")
-    return _build_response(sh)
+    only = projection.parse_fields(fields, ShareholderResponse)
+
+    def load(db: Session) -> dict:
+        found = projection.rows(db, _select(only).where(Shareholder.id == sh_id))
+        if not found:
+            raise HTTPException(status_code=404, detail="Shareholder record not found")
+        return found[0]
+
+    return projection.respond(ShareholderResponse, only, await db.run_sync(load))
 
 
 @router.put("/{sh_id}", response_model=ShareholderResponse)
-def update_shareholder(
+async def update_shareholder(
     sh_id: uuid.UUID,
     body:  ShareholderUpdate,
-    db:    Session = Depends(get_db),
-    _:     User    = Depends(get_current_user),
+    db:    AsyncSession = Depends(get_async_db),
+    _:     User         = Depends(get_current_user),
 ):
-    sh = db.query(Shareholder).filter(Shareholder.id == sh_id).first()
-    if not sh:
-        raise HTTPException(status_code=404, detail="Shareholder record not found")
-    for field, value in body.model_dump(exclude_none=True).items():
-        setattr(sh, field, value)
-    db.commit()
-    db.refresh(sh)
-    return _build_response(sh)
+    def update(db: Session) -> dict:
+        sh = db.query(Shareholder).filter(Shareholder.id == sh_id).first()
+        if not sh:
+            raise HTTPException(status_code=404, detail="Shareholder record not found")
+        for field, value in body.model_dump(exclude_none=True).items():
+            setattr(sh, field, value)
+        db.commit()
+        db.refresh(sh)
+        groups.index.record(sh)
+        return _build_response(sh)
+
+    return await db.run_sync(update)
 
 
 @router.delete("/{sh_id}", status_code=204)
-def delete_shareholder(
+async def delete_shareholder(
     sh_id: uuid.UUID,
-    db:    Session = Depends(get_db),
-    _:     User    = Depends(get_current_user),
+    db:    AsyncSession = Depends(get_async_db),
+    _:     User         = Depends(get_current_user),
 ):
-    sh = db.query(Shareholder).filter(Shareholder.id == sh_id).first()
-    if not sh:
-        raise HTTPException(status_code=404, detail="Shareholder record not found")
-    db.delete(sh)
-    db.commit()
+    def delete(db: Session) -> None:
+        sh = db.query(Shareholder).filter(Shareholder.id == sh_id).first()
+        if not sh:
+            raise HTTPException(status_code=404, detail="Shareholder record not found")
+        gone = groups.link(sh)
+        db.delete(sh)
+        db.commit()
+        groups.index.forget(gone)
+
+    await db.run_sync(delete)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import get_async_db
+from schemas import DashboardStats, StatsCorrection
+from auth import get_current_user, require_admin
+from models import User
+import projection
+import stats
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+@router.get("", response_model=DashboardStats)
+async def get_stats(
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(get_current_user),
+):
+    """
+    Dashboard counts of clients, GST and EPF/ESI registrations. Read from the
+    trigger-maintained dashboard_stats table (see stats.py), so the cost does
+    not grow with the book.
+    """
+    return projection.respond(DashboardStats, None, stats.summary(await db.run_sync(stats.counts)))
+
+
+@router.post("/reconcile", response_model=list[StatsCorrection])
+async def reconcile_stats(
+    db: AsyncSession = Depends(get_async_db),
+    _:  User         = Depends(require_admin),
+):
+    """Recount the tables now and correct any dashboard count that had drifted (admin only)."""
+    def run(db: Session) -> list[dict]:
+        return stats.reconcile(db)
+
+    return await db.run_sync(run)
@@ -10,7 +10,7 @@ Convention:
 import uuid
 from datetime import date, datetime
 from typing import Optional
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 # ── Users ─────────────────────────────────────────────────────────────────────
@@ -172,6 +172,21 @@ class ClientListItem(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ClientImportError(BaseModel):
+    row:    int                  # line in the file, header = 1
+    pan:    Optional[str] = None
+    errors: list[str]
+
+
+class ClientImportReport(BaseModel):
+    """Outcome of POST /clients/import — rows not inserted or updated are listed in errors."""
+    rows:     int = 0
+    inserted: int = 0
+    updated:  int = 0
+    errors:   list[ClientImportError] = []
+    dry_run:  bool = False
+
+
 class ClientResponse(ClientCreate):
     """Full detail — includes decrypted credentials."""
     id:         uuid.UUID
@@ -275,6 +290,21 @@ class GSTSignatoryCreate(BaseModel):
     signatory_client_id: uuid.UUID
 
 
+class GSTINLookup(BaseModel):
+    """What the GST portal says about a GSTIN — for pre-filling forms, not saved."""
+    gstin:               str
+    legal_name:          Optional[str]  = None
+    trade_name:          Optional[str]  = None
+    gstin_status:        Optional[str]  = None
+    state:               Optional[str]  = None
+    state_code:          Optional[str]  = None
+    registration_type:   Optional[str]  = None
+    registration_date:   Optional[date] = None
+    principal_address:   Optional[str]  = None
+    nature_of_business:  Optional[str]  = None
+    einvoice_applicable: Optional[bool] = None
+
+
 # ── Directors ─────────────────────────────────────────────────────────────────
 
 class DirectorCreate(BaseModel):
@@ -497,3 +527,182 @@ class OtherRegResponse(OtherRegCreate):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# ── Client 360 ────────────────────────────────────────────────────────────────
+
+class ClientFull(ClientResponse):
+    """Client plus its child collections — GET /clients/{id}/full.
+    Sections not asked for via include= are left out of the response."""
+    gst:                 Optional[list[GSTResponse]]         = None
+    directors:           Optional[list[DirectorResponse]]    = None
+    shareholders:        Optional[list[ShareholderResponse]] = None
+    partners:            Optional[list[PartnerResponse]]     = None
+    bank_accounts:       Optional[list[BankAccountResponse]] = None
+    epf_esi:             Optional[list[EPFESIResponse]]      = None
+    other_registrations: Optional[list[OtherRegResponse]]    = None
+
+
+class DossierBatch(BaseModel):
+    """POST /clients/dossiers — these clients' Full Profile PDFs in one zip."""
+    client_ids: list[uuid.UUID] = Field(min_length=1, max_length=200)
+    reveal:     Optional[str]   = None    # as GET /clients/{id}/full: 'all' or comma-separated field names
+
+
+# ── Beneficial Ownership ──────────────────────────────────────────────────────
+
+class UBOOwner(BaseModel):
+    """An ultimate owner: a person, or an entity nobody is recorded as owning."""
+    client_id:            uuid.UUID
+    name:                 Optional[str]
+    pan:                  Optional[str]
+    constitution:         Optional[str]
+    effective_percentage: float            # through every layer and path
+    direct_percentage:    Optional[float]  # held in the client itself, if any
+    layers:               int              # 1 = direct holder, 2 = holds a holder, ...
+    is_natural_person:    bool
+    is_beneficial_owner:  bool             # natural person above the threshold
+
+
+class UBOEntity(BaseModel):
+    client_id: uuid.UUID
+    name:      Optional[str]
+
+
+class UBOOfficial(BaseModel):
+    client_id:   uuid.UUID
+    name:        str
+    pan:         str
+    designation: str
+
+
+class UBOReport(BaseModel):
+    """GET /clients/{id}/ubo — the client's ownership resolved to its ultimate owners."""
+    client_id:                 uuid.UUID
+    threshold:                 float
+    owners:                    list[UBOOwner]
+    unattributed_percentage:   float              # holdings under 100%, unvalued or unlinked holders
+    circular_percentage:       float              # still going round a cross-holding
+    cycles:                    list[list[UBOEntity]]
+    entities:                  int                # entities in the group with recorded owners
+    senior_managing_officials: list[UBOOfficial]  # active directors, when there is no beneficial owner
+
+
+# ── Client Groups ─────────────────────────────────────────────────────────────
+
+class GroupMember(BaseModel):
+    client_id:    uuid.UUID
+    display_name: str
+    legal_name:   str
+    pan:          str
+    constitution: str
+    is_active:    bool
+    links:        int            # active links to others in the group
+
+
+class GroupLink(BaseModel):
+    kind:      str               # director, partner, shareholder, gst_signatory
+    entity_id: uuid.UUID         # the company, firm / LLP or GST registrant
+    client_id: uuid.UUID         # its director, partner, holder or signatory
+
+
+class ClientGroup(BaseModel):
+    """GET /clients/{id}/group — every client linked to this one, directly or not."""
+    group_id: uuid.UUID          # lowest client id in the group
+    size:     int
+    members:  list[GroupMember]  # most linked first
+    links:    list[GroupLink]
+
+
+class ClientGroupSummary(BaseModel):
+    group_id:      uuid.UUID
+    size:          int
+    links:         int
+    hub_client_id: uuid.UUID     # the member with the most links
+    hub_name:      Optional[str]
+
+
+class ClientGroupsIndex(BaseModel):
+    """POST /groups/rebuild — this worker's group forest after a full load."""
+    links:         int
+    clients:       int
+    groups:        int
+    hits:          int
+    updates:       int
+    splits:        int
+    builds:        int
+    last_build_ms: float
+
+
+# ── Global Search ─────────────────────────────────────────────────────────────
+
+class SearchHit(BaseModel):
+    entity_type: str            # client, gst, bank_account, epf_esi, other_registration
+    entity_id:   uuid.UUID
+    client_id:   uuid.UUID      # owning client — open /clients/{client_id}
+    client_name: str
+    client_pan:  str
+    title:       str
+    subtitle:    Optional[str] = None
+    exact:       bool          # an identifier matched the query exactly
+    score:       float
+
+
+# ── Compliance ────────────────────────────────────────────────────────────────
+
+class ComplianceItem(BaseModel):
+    kind:              str            # dsc, passport, other_registration, gst_cancellation, epf_esi_cancellation
+    due_date:          date
+    days_left:         int            # negative once lapsed
+    entity_id:         uuid.UUID      # the client for dsc / passport, else the registration
+    client_id:         uuid.UUID
+    client_pan:        str
+    client_name:       str
+    reference:         Optional[str] = None   # DSC provider, passport no., GSTIN, establishment code or registration no.
+    registration_type: Optional[str] = None
+
+
+class ComplianceDay(BaseModel):
+    day:     date
+    total:   int
+    by_kind: dict[str, int]
+
+
+class ComplianceCalendar(BaseModel):
+    start:   date
+    end:     date
+    total:   int
+    by_kind: dict[str, int]
+    days:    list[ComplianceDay]      # only days with something due
+
+
+# ── Dashboard Stats ───────────────────────────────────────────────────────────
+
+class ClientStats(BaseModel):
+    total:           int
+    active:          int
+    inactive:        int
+    direct:          int
+    referred:        int              # not direct clients (KYC held for a client's directors, partners, ...)
+    on_retainer:     int
+    by_constitution: dict[str, int]
+
+
+class RegistrationStats(BaseModel):
+    total:                int
+    active:               int
+    inactive:             int
+    by_registration_type: dict[str, int]
+
+
+class DashboardStats(BaseModel):
+    clients: ClientStats
+    gst:     RegistrationStats
+    epf_esi: RegistrationStats
+
+
+class StatsCorrection(BaseModel):
+    metric: str
+    key:    str
+    was:    int
+    now:    int
@@ -0,0 +1,164 @@
+"""
+Keeps the search_documents table in step with the records behind GET /api/search.
+
+Routers call index() / remove() inside the same transaction as the write they
+belong to, so search never disagrees with committed data. rebuild() re-indexes
+everything from scratch — seed.py runs it when the table is empty, or run it by
+hand after bulk changes made outside the API:
+
+    cd backend
+    python search_index.py
+"""
+import re
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import (
+    SearchDocument, Client, GSTRegistration, BankAccount,
+    EPFESIRegistration, OtherRegistration,
+)
+
+_SEPARATORS = re.compile(r"[\s\-/.]")
+
+
+def normalise(value: str) -> str:
+    """Canonical form of an identifier: upper-case, without spaces, dashes, dots or slashes."""
+    return _SEPARATORS.sub("", value).upper()
+
+
+def contains(value: str) -> str:
+    """ILIKE pattern for value anywhere in the text — its own %, _ and \\ match literally (use with escape="\\")."""
+    return "%" + re.sub(r"([\\%_])", r"\\\1", value) + "%"
+
+
+def _doc(entity_type: str, entity_id, client_id, title: str, subtitle, identifiers: list, words: list) -> dict:
+    idents = [normalise(i) for i in identifiers if i]
+    text = " ".join([w for w in words if w] + [i for i in identifiers if i] + idents)
+    return {
+        "entity_type": entity_type,
+        "entity_id":   entity_id,
+        "client_id":   client_id,
+        "title":       title,
+        "subtitle":    subtitle,
+        "identifiers": idents,
+        "search_text": text,
+    }
+
+
+def _client_doc(c: Client) -> dict:
+    return _doc("client", c.id, c.id, c.display_name, c.constitution,
+                [c.pan, c.din, c.tan, c.cin_llpin], [c.display_name, c.legal_name])
+
+
+def _gst_doc(r: GSTRegistration) -> dict:
+    return _doc("gst", r.id, r.client_id, f"GSTIN {r.gstin}", r.trade_name or r.state,
+                [r.gstin], [r.trade_name, r.state])
+
+
+def _bank_doc(b: BankAccount) -> dict:
+    return _doc("bank_account", b.id, b.client_id, f"{b.bank_name} a/c {b.account_number}", b.ifsc_code,
+                [b.account_number, b.ifsc_code], [b.bank_name, b.branch_name])
+
+
+def _epf_esi_doc(r: EPFESIRegistration) -> dict:
+    return _doc("epf_esi", r.id, r.client_id, f"{r.registration_type} {r.establishment_code}", r.state,
+                [r.establishment_code], [r.registration_type, r.state])
+
+
+def _other_reg_doc(r: OtherRegistration) -> dict:
+    return _doc("other_registration", r.id, r.client_id, f"{r.registration_type} {r.registration_number}",
+                r.issuing_authority, [r.registration_number], [r.registration_type, r.issuing_authority])
+
+
+# model class -> (entity_type, document builder)
+_BUILDERS = {
+    Client:             ("client",             _client_doc),
+    GSTRegistration:    ("gst",                _gst_doc),
+    BankAccount:        ("bank_account",       _bank_doc),
+    EPFESIRegistration: ("epf_esi",            _epf_esi_doc),
+    OtherRegistration:  ("other_registration", _other_reg_doc),
+}
+
+
+COLUMNS = ["entity_type", "entity_id", "client_id", "title", "subtitle", "identifiers", "search_text"]
+
+_insert = insert(SearchDocument.__table__)
+# One statement for any number of documents — executemany batches the rows,
+# instead of compiling a fresh multi-row VALUES per call
+_UPSERT = _insert.on_conflict_do_update(
+    index_elements=["entity_type", "entity_id"],
+    set_={
+        **{col: _insert.excluded[col] for col in COLUMNS[2:]},
+        "updated_at": func.now(),
+    },
+)
+
+
+def _upsert(db: Session, docs: list[dict]):
+    if not docs:
+        return
+    db.connection().execute(_UPSERT, docs)
+
+
+def index(db: Session, obj):
+    """(Re)index one record. The object must already be flushed so its id is set."""
+    _, build = _BUILDERS[type(obj)]
+    _upsert(db, [build(obj)])
+
+
+def documents(model, objs) -> list[dict]:
+    """search_documents rows for records of one model — ORM objects or rows with the builder's attributes."""
+    _, build = _BUILDERS[model]
+    return [build(obj) for obj in objs]
+
+
+def index_rows(db: Session, model, objs):
+    """(Re)index records of one model in one executemany — ORM objects or rows with the builder's attributes."""
+    _upsert(db, documents(model, objs))
+
+
+def upsert_from(db: Session, table: str):
+    """(Re)index from a staging table of documents() rows (COLUMNS) — for bulk loads that COPY them in."""
+    cols = ", ".join(COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in COLUMNS[2:])
+    db.execute(text(
+        f"INSERT INTO search_documents ({cols}) SELECT {cols} FROM {table} "
+        f"ON CONFLICT (entity_type, entity_id) DO UPDATE SET {updates}, updated_at = now()"
+    ))
+
+
+def remove(db: Session, obj):
+    entity_type, _ = _BUILDERS[type(obj)]
+    db.execute(delete(SearchDocument).where(
+        SearchDocument.entity_type == entity_type,
+        SearchDocument.entity_id == obj.id,
+    ))
+
+
+def rebuild(db: Session, batch_size: int = 1000) -> int:
+    """Replace the whole index in one transaction, streaming each source table in batches."""
+    db.execute(delete(SearchDocument))
+    count = 0
+    for model, (_, build) in _BUILDERS.items():
+        result = db.execute(select(model).execution_options(yield_per=batch_size))
+        for batch in result.scalars().partitions():
+            _upsert(db, [build(obj) for obj in batch])
+            count += len(batch)
+    db.commit()
+    return count
+
+
+def is_empty(db: Session) -> bool:
+    return db.execute(select(SearchDocument.entity_id).limit(1)).first() is None
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"Indexed {rebuild(db)} records")
+    finally:
+        db.close()
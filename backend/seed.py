@@ -3,6 +3,7 @@ Run once at startup to ensure the DB schema and default admin exist.
 Safe to re-run — skips anything that already exists.
 """
 import os
+import re
 import sys
 from dotenv import load_dotenv
 
@@ -18,6 +19,26 @@ ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL", "admin@ca.com")
 ADMIN_PASS  = os.environ.get("ADMIN_PASS",  "admin@123")
 
 
+def _statements(sql: str) -> list[str]:
+    """
+    Split a SQL script on semicolons, keeping $$-quoted function bodies whole.
+    -- comments outside those bodies are dropped first: a semicolon in one
+    would otherwise cut the statement after it in two.
+    """
+    statements, current = [], ""
+    for i, part in enumerate(sql.split("$$")):
+        if i % 2:
+            current += f"$${part}$$"
+            continue
+        first, *rest = re.sub(r"--[^\n]*", "", part).split(";")
+        current += first
+        for piece in rest:
+            statements.append(current.strip())
+            current = piece
+    statements.append(current.strip())
+    return [s for s in statements if s]
+
+
 def run_schema_sql():
     """Create enums and tables from schema.sql if they don't exist yet."""
     schema_path = os.path.join(os.path.dirname(__file__), "..", "database", "schema.sql")
@@ -28,10 +49,7 @@ def run_schema_sql():
         sql = f.read()
     with engine.connect() as conn:
         # Execute statement by statement so we can ignore "already exists" errors
-        for stmt in sql.split(";"):
-            stmt = stmt.strip()
-            if not stmt:
-                continue
+        for stmt in _statements(sql):
             try:
                 conn.execute(text(stmt))
                 conn.commit()
@@ -51,10 +69,7 @@ def run_migrations():
         with open(os.path.join(migrations_dir, fname)) as f:
             sql = f.read()
         with engine.connect() as conn:
-            for stmt in sql.split(";"):
-                stmt = stmt.strip()
-                if not stmt:
-                    continue
+            for stmt in _statements(sql):
                 try:
                     conn.execute(text(stmt))
                     conn.commit()
@@ -84,9 +99,23 @@ def seed_admin():
         db.close()
 
 
+def seed_search_index():
+    """Index existing records the first time search_documents is empty (e.g. right after migration 004)."""
+    import search_index
+    from models import Client
+    db = SessionLocal()
+    try:
+        if not search_index.is_empty(db) or db.query(Client.id).first() is None:
+            return
+        print(f"Search index built — {search_index.rebuild(db)} records")
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
     print("Running DB seed...")
     run_schema_sql()
     run_migrations()
     seed_admin()
+    seed_search_index()
     print("Seed complete")
@@ -0,0 +1,157 @@
+"""
+Dashboard counts — read from dashboard_stats, kept exact by triggers.
+
+Every INSERT, UPDATE and DELETE on clients, gst_registrations and
+epf_esi_registrations adds its net change to dashboard_stats in the same
+transaction (migration 009), so GET /api/stats reads a few dozen rows
+however large the book grows, and a rolled-back write never touches them.
+The database functions dashboard_stats_client_keys() and
+dashboard_stats_registration_keys() define which (metric, key) counts a row
+belongs to, for the triggers and for reconcile() alike.
+
+reconcile() recounts the tables and corrects any count that disagrees.
+Nothing should — but TRUNCATE, a restore, or a trigger disabled for
+maintenance would bypass them — so the API runs it once at startup and
+every STATS_RECONCILE_SECONDS after that (0 turns this off), one worker at
+a time under an advisory lock. Admins can also run it from
+POST /api/stats/reconcile or `python stats.py`. Corrections are logged.
+"""
+import asyncio
+import logging
+import os
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from models import DashboardStat
+
+log = logging.getLogger(__name__)
+
+RECONCILE_SECONDS = int(os.environ.get("STATS_RECONCILE_SECONDS", "3600"))
+_RECONCILE_LOCK = 0x5747      # pg advisory lock key: one reconciler across workers
+
+# The tables' real counts, grouped exactly as the triggers count them
+_ACTUAL = text("""
+    SELECT k.metric, k.key, count(*)
+    FROM clients r, dashboard_stats_client_keys(r.constitution::text, r.is_active, r.is_direct_client, r.is_on_retainer) k
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT k.metric, k.key, count(*)
+    FROM gst_registrations r, dashboard_stats_registration_keys('gst', r.registration_type::text, r.is_active) k
+    GROUP BY 1, 2
+    UNION ALL
+    SELECT k.metric, k.key, count(*)
+    FROM epf_esi_registrations r, dashboard_stats_registration_keys('epf_esi', r.registration_type::text, r.is_active) k
+    GROUP BY 1, 2
+""")
+
+
+def counts(db: Session) -> dict[tuple[str, str], int]:
+    return {(r.metric, r.key): r.count for r in db.query(DashboardStat)}
+
+
+def summary(stored: dict[tuple[str, str], int]) -> dict:
+    """dashboard_stats rows -> the DashboardStats response."""
+    def by(metric: str) -> dict[str, int]:
+        return {key: n for (m, key), n in sorted(stored.items()) if m == metric and n}
+
+    def registrations(table: str) -> dict:
+        active = by(f"{table}.is_active")
+        return {
+            "total":                stored.get((table, "total"), 0),
+            "active":               active.get("true", 0),
+            "inactive":             active.get("false", 0),
+            "by_registration_type": by(f"{table}.registration_type"),
+        }
+
+    active, direct, retainer = (by(f"clients.{f}") for f in ("is_active", "is_direct_client", "is_on_retainer"))
+    return {
+        "clients": {
+            "total":           stored.get(("clients", "total"), 0),
+            "active":          active.get("true", 0),
+            "inactive":        active.get("false", 0),
+            "direct":          direct.get("true", 0),
+            "referred":        direct.get("false", 0),
+            "on_retainer":     retainer.get("true", 0),
+            "by_constitution": by("clients.constitution"),
+        },
+        "gst":     registrations("gst"),
+        "epf_esi": registrations("epf_esi"),
+    }
+
+
+def reconcile(db: Session, wait: bool = True) -> list[dict] | None:
+    """
+    Correct dashboard_stats to the tables' real counts; returns the
+    corrections (empty when nothing had drifted), or None when wait is False
+    and another reconcile is already running.
+
+    Takes no lock that writers wait on. The tables and dashboard_stats are
+    read from one REPEATABLE READ snapshot, where both reflect the same
+    committed writes, so their difference is exactly the drift; it is then
+    added to the counts as they are now, which keeps whatever the triggers
+    applied after the snapshot.
+    """
+    with db.get_bind().connect() as conn:
+        # A session-level lock, held across the snapshot and the correction:
+        # a second reconciler must not take its snapshot before ours commits
+        if wait:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _RECONCILE_LOCK})
+        elif not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _RECONCILE_LOCK}).scalar():
+            return None
+        conn.commit()
+        try:
+            return _correct(conn)
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _RECONCILE_LOCK})
+            conn.commit()
+
+
+def _correct(conn) -> list[dict]:
+    default = conn.default_isolation_level
+    conn.execution_options(isolation_level="REPEATABLE READ")
+    actual = {(metric, key): n for metric, key, n in conn.execute(_ACTUAL)}
+    stored = {(r.metric, r.key): r.count for r in conn.execute(select(DashboardStat.metric, DashboardStat.key, DashboardStat.count))}
+    conn.commit()
+    conn.execution_options(isolation_level=default)
+
+    fixes = [
+        {"metric": metric, "key": key, "was": stored.get((metric, key), 0), "now": actual.get((metric, key), 0)}
+        for metric, key in sorted(actual.keys() | stored.keys())
+        if stored.get((metric, key), 0) != actual.get((metric, key), 0)
+    ]
+    if fixes:
+        stmt = insert(DashboardStat).values([{"metric": f["metric"], "key": f["key"], "count": f["now"] - f["was"]} for f in fixes])
+        conn.execute(stmt.on_conflict_do_update(index_elements=["metric", "key"],
+                                                set_={"count": DashboardStat.__table__.c.count + stmt.excluded.count}))
+        conn.commit()
+        for f in fixes:
+            log.warning("dashboard_stats %s=%s was %d, recounted %d", f["metric"], f["key"], f["was"], f["now"])
+    return fixes
+
+
+async def reconcile_forever(session_factory):
+    """Reconcile now and every RECONCILE_SECONDS; runs as a background task of the API."""
+    if RECONCILE_SECONDS <= 0:
+        return
+    def run():
+        with session_factory() as db:
+            reconcile(db, wait=False)
+
+    while True:
+        try:
+            await asyncio.to_thread(run)
+        except Exception:
+            log.exception("dashboard_stats reconcile failed")
+        await asyncio.sleep(RECONCILE_SECONDS)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as session:
+        fixed = reconcile(session)
+    print(f"dashboard_stats: {len(fixed)} counts corrected" if fixed else "dashboard_stats: no drift")
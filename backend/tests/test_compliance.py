@@ -0,0 +1,89 @@
+"""
+Compliance calendar — paging the upcoming list by cursor, and the summary.
+
+The upcoming list runs its keyset SQL on an in-memory SQLite database (no
+server): several kinds falling due on the same day is where a cursor that
+resumes in the wrong place skips or repeats rows.
+
+    cd backend && python -m pytest tests
+"""
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import compliance
+from models import Base, Client, EPFESIRegistration, GSTRegistration, OtherRegistration
+
+DUE = date(2026, 3, 31)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    tables = [m.__table__ for m in (Client, GSTRegistration, EPFESIRegistration, OtherRegistration)]
+    Base.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        for n in range(3):
+            client = Client(id=uuid.uuid4(), pan=f"AAAPA000{n}A", constitution="Individual",
+                            display_name=f"Client {n}", legal_name=f"CLIENT {n}",
+                            dsc_expiry_date=DUE, passport_expiry=DUE)
+            session.add(client)
+            session.add(OtherRegistration(id=uuid.uuid4(), client_id=client.id, registration_type="Trade Licence",
+                                          registration_number=f"TL{n}", valid_until=DUE))
+            session.add(GSTRegistration(id=uuid.uuid4(), client_id=client.id, gstin=f"27AAAPA000{n}A1Z5",
+                                        cancellation_date=date(2026, 4, 1)))
+        session.add(Client(id=uuid.uuid4(), pan="AAAPB0000B", constitution="Individual", display_name="Inactive",
+                           legal_name="INACTIVE", dsc_expiry_date=DUE, is_active=False))
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _key(row: dict) -> tuple:
+    return row["due_date"], row["kind"], row["entity_id"]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 5])
+def test_cursor_continues_across_kinds_due_the_same_day(db, limit):
+    start, end = date(2026, 1, 1), date(2026, 12, 31)
+    everything = compliance.upcoming(db, start, end, compliance.KINDS, 100)
+    assert len(everything) == 12
+    assert [_key(r) for r in everything] == sorted(_key(r) for r in everything)
+
+    pages, after = [], None
+    while True:
+        page = compliance.upcoming(db, start, end, compliance.KINDS, limit, after)
+        if not page:
+            break
+        pages += page
+        after = compliance.decode_cursor(compliance.encode_cursor(page[-1]))
+    assert [_key(r) for r in pages] == [_key(r) for r in everything]
+
+
+def test_cursor_on_a_kind_not_asked_for(db):
+    # Resuming after a passport row with only dsc and gst_cancellation listed
+    kinds = compliance.parse_kinds("gst_cancellation,dsc")
+    everything = compliance.upcoming(db, date(2026, 1, 1), date(2026, 12, 31), kinds, 100)
+    cut = everything[1]
+    after = (DUE, "passport", cut["entity_id"])
+    rest = compliance.upcoming(db, date(2026, 1, 1), date(2026, 12, 31), kinds, 100, after)
+    # dsc sorts before passport, so its rows due that day are all behind the cursor
+    assert [r["kind"] for r in rest] == ["gst_cancellation"] * 3
+
+
+def test_summarise_counts_by_kind_and_day():
+    days = {
+        date(2026, 3, 30): {"dsc": 2, "passport": 1},
+        date(2026, 3, 31): {"gst_cancellation": 4},
+        date(2026, 4, 2): {"dsc": 5},
+    }
+    summary = compliance.summarise(days, date(2026, 3, 30), date(2026, 4, 1), ["dsc", "gst_cancellation"])
+    assert summary["total"] == 6
+    assert summary["by_kind"] == {"dsc": 2, "gst_cancellation": 4}
+    assert summary["days"] == [
+        {"day": date(2026, 3, 30), "total": 2, "by_kind": {"dsc": 2}},
+        {"day": date(2026, 3, 31), "total": 4, "by_kind": {"gst_cancellation": 4}},
+    ]
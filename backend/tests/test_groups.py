@@ -0,0 +1,107 @@
+"""
+Client groups — the union-find forest, and taking it apart when a link goes.
+
+Links are built in memory. Tables stands in for the Session that
+ClientGroups._missing() reads the keys still stored from, answering as
+one on a database other than Postgres would.
+
+    cd backend && python -m pytest tests
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import groups
+from groups import ClientGroups, Link
+
+A, B, C, D, E = sorted(uuid.uuid4() for _ in range(5))
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def director(company, individual, is_active=True, at=T0) -> Link:
+    return Link("director", groups._pair(company, individual), company.int, individual.int, is_active, at)
+
+
+def partner(firm, individual, is_active=True, at=T0, key=None) -> Link:
+    return Link("partner", key or uuid.uuid4().int, firm.int, individual.int, is_active, at)
+
+
+class Tables:
+    """Link rows by table: UUID keys, (company, individual) pairs for directors."""
+
+    def __init__(self, **rows):
+        self.rows = rows
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="sqlite"))
+
+    def execute(self, stmt):
+        return list(self.rows.get(stmt.get_final_froms()[0].name, ()))
+
+    scalars = execute
+
+
+def _group(forest: ClientGroups, client) -> set:
+    members, _ = forest.group(client.int)
+    return {uuid.UUID(int=m) for m in members}
+
+
+def _forest(*links: Link) -> ClientGroups:
+    forest = ClientGroups()
+    forest._apply(list(links), [])
+    return forest
+
+
+def test_links_join_groups():
+    forest = _forest(director(A, B), partner(B, C), director(D, E))
+    assert _group(forest, A) == _group(forest, C) == {A, B, C}
+    assert _group(forest, D) == {D, E}
+    ranked, _ = forest.ranked()
+    assert [(-size, gid) for size, gid, _ in ranked] == [(3, A.int), (2, D.int)]
+
+
+def test_deleted_link_splits_its_group():
+    middle = partner(B, C)
+    forest = _forest(director(A, B), middle, director(C, D))
+    assert _group(forest, A) == {A, B, C, D}
+
+    forest.forget(middle)
+    assert _group(forest, A) == _group(forest, B) == {A, B}
+    assert _group(forest, C) == _group(forest, D) == {C, D}
+    assert forest.splits == 1
+    assert forest.snapshot()["links"] == 2
+
+
+def test_deactivated_link_splits_but_a_parallel_one_holds():
+    link = partner(A, B)
+    forest = _forest(link, director(A, B), director(B, C))
+    forest._apply([link._replace(is_active=False, updated_at=T0 + timedelta(seconds=1))], [])
+    assert _group(forest, A) == {A, B, C}
+
+    forest._apply([director(A, B, is_active=False, at=T0 + timedelta(seconds=1))], [])
+    assert _group(forest, A) == {A}
+    assert _group(forest, B) == {B, C}
+    # Both rows are still held, inactive, and counted
+    assert forest._counts["partner"] == 1 and forest._counts["director"] == 2
+
+
+def test_stale_row_does_not_undo_a_newer_one():
+    link = partner(A, B, at=T0 + timedelta(seconds=5))
+    forest = _forest(link)
+    forest._apply([link._replace(is_active=False, updated_at=T0)], [])
+    assert _group(forest, A) == {A, B}
+
+
+def test_rows_gone_from_the_tables_are_found_and_split():
+    kept, gone = partner(A, B), partner(B, C)
+    forest = _forest(kept, gone, director(C, D), director(D, E))
+    tables = Tables(partners=[uuid.UUID(int=kept.key)], directors=[(C, D)])
+
+    missing = forest._missing(tables, ["partner", "director"])
+    assert sorted(missing) == sorted([("partner", gone.key), ("director", groups._pair(D, E))])
+
+    forest._apply([], missing)
+    assert _group(forest, A) == {A, B}
+    assert _group(forest, C) == {C, D}
+    assert _group(forest, E) == {E}
+    assert forest._counts["partner"] == 1 and forest._counts["director"] == 1
@@ -0,0 +1,148 @@
+"""
+Ultimate beneficial ownership — resolving a group and keeping the index current.
+
+The index reads a Book, shareholdings and partnerships held in memory in
+place of the shareholders and partners tables, so nothing here needs a
+database.
+
+    cd backend && python -m pytest tests
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import ownership
+from ownership import Edge
+
+C, H, P, Q, X, Y = (uuid.uuid4() for _ in range(6))
+
+
+class Book:
+    """Ownership rows in memory, read the way the index reads its two tables."""
+
+    def __init__(self):
+        self.rows: dict[uuid.UUID, Edge] = {}
+        self.writers = ""           # table_writers() of every kind
+        self._clock = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def put(self, owned, owner, percentage=None, units=None, kind="shareholder", is_active=True, id=None) -> Edge:
+        self._clock += timedelta(seconds=1)
+        edge = Edge(kind, id or uuid.uuid4(), owned, owner, percentage, units, is_active, self._clock)
+        self.rows[edge.id] = edge
+        return edge
+
+    def delete(self, edge: Edge):
+        del self.rows[edge.id]
+
+    def state(self, db) -> dict:
+        out = {}
+        for kind in ("shareholder", "partner"):
+            stamps = [e.updated_at for e in self.rows.values() if e.kind == kind]
+            out[kind] = (len(stamps), max(stamps, default=None), self.writers)
+        return out
+
+    def load(self, db, since=None) -> list[Edge]:
+        return [
+            e for e in self.rows.values()
+            if since is None or since[e.kind] is None or e.updated_at >= since[e.kind]
+        ]
+
+
+def _index(*edges: Edge) -> dict:
+    """owned.int -> _fractions() of its active edges, as OwnershipIndex builds it."""
+    by_owned = defaultdict(tuple)
+    for e in edges:
+        if e.is_active:
+            by_owned[e.owned_id] += (e,)
+    return {owned.int: ownership._fractions(es) for owned, es in by_owned.items()}
+
+
+@pytest.fixture
+def book(monkeypatch) -> Book:
+    book = Book()
+    monkeypatch.setattr(ownership, "_state", book.state)
+    monkeypatch.setattr(ownership, "_load", book.load)
+    return book
+
+
+def test_cross_holding_passes_round_the_cycle():
+    # C is 60% P and 40% H; H is 50% C (a cross-holding) and 50% Q
+    book = Book()
+    result = ownership.resolve(C, _index(
+        book.put(C, P, 60), book.put(C, H, 40), book.put(H, C, 50), book.put(H, Q, 50),
+    ))
+    # What reaches C in all is 1 / (1 - 0.4 * 0.5) = 1.25 of it
+    assert result["held"] == {P: pytest.approx(0.75), Q: pytest.approx(0.25)}
+    assert result["layers"] == {P: 1, Q: 2}
+    assert result["direct"] == {P: pytest.approx(0.6), H: pytest.approx(0.4)}
+    assert result["cycles"] == [sorted([C, H])]
+    assert result["circular"] == pytest.approx(0, abs=1e-6)
+    assert result["unattributed"] == pytest.approx(0, abs=1e-6)
+    assert result["entities"] == 2
+
+
+def test_closed_cycle_is_reported_circular():
+    # X and Y own each other outright: nobody outside ends up with anything
+    book = Book()
+    result = ownership.resolve(X, _index(book.put(X, Y, 100), book.put(Y, X, 100)))
+    assert result["held"] == {}
+    assert result["circular"] == pytest.approx(1)
+    assert result["cycles"] == [sorted([X, Y])]
+
+
+def test_shares_split_what_percentages_leave():
+    book = Book()
+    result = ownership.resolve(C, _index(
+        book.put(C, P, 50), book.put(C, Q, units=30), book.put(C, X, units=10), book.put(C, None, 10),
+    ))
+    assert result["held"] == {P: pytest.approx(0.5), Q: pytest.approx(0.3), X: pytest.approx(0.1)}
+    # The holder not linked to a client is what cannot be attributed
+    assert result["unattributed"] == pytest.approx(0.1)
+
+
+def test_index_applies_changes_and_rebuilds_after_deletes(book):
+    index = ownership.OwnershipIndex()
+    first = book.put(C, P, 60)
+    book.put(C, H, 40)
+    owners = index.current(None)
+    assert sorted(f for _, f in owners[C.int]) == pytest.approx([0.4, 0.6])
+    assert index.builds == 1
+
+    # An update is fetched as a delta and replaces the row it changed
+    book.put(C, P, 70, id=first.id)
+    owners = index.current(None)
+    assert sorted(f for _, f in owners[C.int]) == pytest.approx([0.4, 0.7])
+    assert (index.builds, index.updates) == (1, 1)
+
+    # Unchanged tables are a hit
+    assert index.current(None) is owners
+    assert index.hits == 1
+
+    # A delete leaves a count that no longer adds up: loaded in full
+    book.delete(first)
+    owners = index.current(None)
+    assert [f for _, f in owners[C.int]] == pytest.approx([0.4])
+    assert index.builds == 2
+
+
+def test_index_does_not_miss_a_write_committed_late(book):
+    index = ownership.OwnershipIndex()
+    book.put(C, P, 60)
+    index.current(None)
+
+    # Read while another transaction is writing: its row is not visible yet
+    late = book.put(C, Q, 10)
+    del book.rows[late.id]
+    book.put(C, H, 30)
+    book.writers = "731"
+    index.current(None)
+    assert len(index._owners[C.int]) == 2
+
+    # It commits with a stamp older than the newest row already seen
+    book.rows[late.id] = late
+    book.writers = ""
+    owners = index.current(None)
+    assert sorted(f for _, f in owners[C.int]) == pytest.approx([0.1, 0.3, 0.6])
+    assert index.builds == 1
@@ -0,0 +1,7 @@
+-- Migration: Composite index for keyset pagination of GET /api/clients
+-- The list is ordered and paged by (display_name, id). The composite index
+-- also serves every lookup the old single-column display_name index did.
+
+CREATE INDEX IF NOT EXISTS idx_clients_display_name_id ON clients (display_name, id);
+
+DROP INDEX IF EXISTS idx_clients_display_name;
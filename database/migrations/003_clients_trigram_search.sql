@@ -0,0 +1,10 @@
+-- Migration: Trigram indexes for client search
+-- The search box matches display_name / legal_name / PAN with a leading
+-- wildcard, which btree indexes cannot serve. gin_trgm_ops indexes serve
+-- both ILIKE '%x%' and the similarity-ranked (match=fuzzy) mode.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_clients_display_name_trgm ON clients USING gin (display_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_legal_name_trgm   ON clients USING gin (legal_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_clients_pan_trgm          ON clients USING gin (pan gin_trgm_ops);
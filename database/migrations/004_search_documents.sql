@@ -0,0 +1,22 @@
+-- Migration: Denormalised search table for GET /api/search
+-- Rows are written by the API on every create/update/delete. Existing data
+-- is indexed by seed.py (search_index.rebuild) the first time it finds the
+-- table empty.
+
+CREATE TABLE IF NOT EXISTS search_documents (
+    entity_type     TEXT NOT NULL,
+    entity_id       UUID NOT NULL,
+    client_id       UUID NOT NULL REFERENCES clients (id) ON DELETE CASCADE,
+    title           TEXT NOT NULL,
+    subtitle        TEXT,
+    identifiers     TEXT[] NOT NULL,
+    search_text     TEXT NOT NULL,
+    tsv             TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', search_text)) STORED,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (entity_type, entity_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_docs_client      ON search_documents (client_id);
+CREATE INDEX IF NOT EXISTS idx_search_docs_identifiers ON search_documents USING gin (identifiers);
+CREATE INDEX IF NOT EXISTS idx_search_docs_text_trgm   ON search_documents USING gin (search_text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_search_docs_tsv         ON search_documents USING gin (tsv);
@@ -0,0 +1,11 @@
+-- Migration: Per-record credential envelope
+-- With CREDENTIAL_STORAGE=envelope the API seals all of a record's passwords
+-- into one AES-GCM blob instead of one Fernet token per column. Existing rows
+-- keep working as they are; convert them in batches with
+--     cd backend && python credential_migration.py --to envelope
+
+ALTER TABLE clients               ADD COLUMN IF NOT EXISTS credentials_sealed BYTEA;
+ALTER TABLE gst_registrations     ADD COLUMN IF NOT EXISTS credentials_sealed BYTEA;
+ALTER TABLE bank_accounts         ADD COLUMN IF NOT EXISTS credentials_sealed BYTEA;
+ALTER TABLE epf_esi_registrations ADD COLUMN IF NOT EXISTS credentials_sealed BYTEA;
+ALTER TABLE other_registrations   ADD COLUMN IF NOT EXISTS credentials_sealed BYTEA;
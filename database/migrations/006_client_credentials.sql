@@ -0,0 +1,82 @@
+-- Migration: Move client portal credentials into client_credentials (1:1)
+-- The clients table carried thirteen login / encrypted password columns plus
+-- the credential envelope, so every list scan and lookup read wide, often
+-- TOASTed tuples for data only the detail page and /secrets need.
+--
+-- The copy and the column drops are one DO block, so they commit or fail
+-- together: seed.py runs and commits each statement on its own and carries on
+-- past errors, and a failed copy must not be followed by the drops. The block
+-- does nothing once the old columns are gone.
+--
+-- DROP COLUMN only hides the old columns; rewrite the table afterwards to get
+-- the space back and the narrow tuples:
+--     VACUUM FULL clients;    (or pg_repack -t clients to avoid the exclusive lock)
+
+CREATE TABLE IF NOT EXISTS client_credentials (
+    client_id                   UUID PRIMARY KEY REFERENCES clients (id) ON DELETE CASCADE,
+    mca_user_id                 TEXT,
+    mca_password                TEXT,
+    dsc_token_password          TEXT,
+    it_portal_user_id           TEXT,
+    it_portal_password          TEXT,
+    it_portal_user_id_tds       TEXT,
+    it_password_tds             TEXT,
+    password_26as               TEXT,
+    password_ais_tis            TEXT,
+    traces_user_id_deductor     TEXT,
+    traces_password_deductor    TEXT,
+    traces_user_id_taxpayer     TEXT,
+    traces_password_taxpayer    TEXT,
+    credentials_sealed          BYTEA,
+    created_at                  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at                  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'clients' AND column_name = 'mca_user_id') THEN
+        INSERT INTO client_credentials (
+            client_id, mca_user_id, mca_password, dsc_token_password,
+            it_portal_user_id, it_portal_password, it_portal_user_id_tds, it_password_tds,
+            password_26as, password_ais_tis,
+            traces_user_id_deductor, traces_password_deductor, traces_user_id_taxpayer, traces_password_taxpayer,
+            credentials_sealed
+        )
+        SELECT
+            id, mca_user_id, mca_password, dsc_token_password,
+            it_portal_user_id, it_portal_password, it_portal_user_id_tds, it_password_tds,
+            password_26as, password_ais_tis,
+            traces_user_id_deductor, traces_password_deductor, traces_user_id_taxpayer, traces_password_taxpayer,
+            credentials_sealed
+        FROM clients
+        WHERE COALESCE(mca_user_id, mca_password, dsc_token_password,
+                       it_portal_user_id, it_portal_password, it_portal_user_id_tds, it_password_tds,
+                       password_26as, password_ais_tis,
+                       traces_user_id_deductor, traces_password_deductor,
+                       traces_user_id_taxpayer, traces_password_taxpayer) IS NOT NULL
+           OR credentials_sealed IS NOT NULL
+        ON CONFLICT (client_id) DO NOTHING;
+
+        ALTER TABLE clients
+            DROP COLUMN IF EXISTS mca_user_id,
+            DROP COLUMN IF EXISTS mca_password,
+            DROP COLUMN IF EXISTS dsc_token_password,
+            DROP COLUMN IF EXISTS it_portal_user_id,
+            DROP COLUMN IF EXISTS it_portal_password,
+            DROP COLUMN IF EXISTS it_portal_user_id_tds,
+            DROP COLUMN IF EXISTS it_password_tds,
+            DROP COLUMN IF EXISTS password_26as,
+            DROP COLUMN IF EXISTS password_ais_tis,
+            DROP COLUMN IF EXISTS traces_user_id_deductor,
+            DROP COLUMN IF EXISTS traces_password_deductor,
+            DROP COLUMN IF EXISTS traces_user_id_taxpayer,
+            DROP COLUMN IF EXISTS traces_password_taxpayer,
+            DROP COLUMN IF EXISTS credentials_sealed;
+    END IF;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS set_updated_at ON client_credentials;
+CREATE TRIGGER set_updated_at BEFORE UPDATE ON client_credentials
+    FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
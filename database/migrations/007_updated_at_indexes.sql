@@ -0,0 +1,7 @@
+-- Migration: updated_at indexes for list ETags
+-- GET /api/clients and GET /api/gst tag their responses with the table's
+-- count(*) and max(updated_at); these indexes let max() read one index entry
+-- instead of scanning the table on every conditional request.
+
+CREATE INDEX IF NOT EXISTS idx_clients_updated_at ON clients (updated_at);
+CREATE INDEX IF NOT EXISTS idx_gst_updated_at     ON gst_registrations (updated_at);
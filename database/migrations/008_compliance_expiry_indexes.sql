@@ -0,0 +1,13 @@
+-- Migration: Indexes for the compliance expiry engine
+-- GET /api/compliance/* range-scans every dated column it tracks over a
+-- window of days. Partial indexes keep the (many) rows without a date out of
+-- those scans, as idx_other_reg_valid_until already does for valid_until.
+-- The updated_at indexes let the rolling calendar check each table's version
+-- (count and max(updated_at)) from an index, as 007 did for clients and GST.
+
+CREATE INDEX IF NOT EXISTS idx_clients_dsc_expiry       ON clients (dsc_expiry_date) WHERE dsc_expiry_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_clients_passport_expiry  ON clients (passport_expiry) WHERE passport_expiry IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_gst_cancellation_date    ON gst_registrations (cancellation_date) WHERE cancellation_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_epf_esi_cancellation_date ON epf_esi_registrations (cancellation_date) WHERE cancellation_date IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_epf_esi_updated_at       ON epf_esi_registrations (updated_at);
+CREATE INDEX IF NOT EXISTS idx_other_reg_updated_at     ON other_registrations (updated_at);
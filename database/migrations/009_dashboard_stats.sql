@@ -0,0 +1,102 @@
+-- Migration: Dashboard counts kept by triggers
+-- GET /api/stats reads dashboard_stats instead of grouping the tables on
+-- every load. Statement-level triggers with transition tables apply each
+-- statement's net change, so a 50k-row import is one upsert per affected
+-- count rather than 50k, and an UPDATE that leaves every counted column
+-- alone writes nothing. backend/stats.py reconciles the table against the
+-- real counts when the API starts and periodically after that.
+
+CREATE TABLE IF NOT EXISTS dashboard_stats (
+    metric      TEXT NOT NULL,      -- clients, clients.constitution, gst.registration_type, ...
+    key         TEXT NOT NULL,      -- the value counted ('total' for a table's own count)
+    count       BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, key)
+);
+
+-- The counts one row contributes to, as (metric, key) pairs: one function
+-- per row shape, taking the counted columns so that the planner inlines it
+-- (a lateral VALUES over the row) instead of calling it row by row
+CREATE OR REPLACE FUNCTION dashboard_stats_client_keys(
+    constitution TEXT, is_active BOOLEAN, is_direct_client BOOLEAN, is_on_retainer BOOLEAN)
+RETURNS TABLE (metric TEXT, key TEXT) AS $$
+    VALUES ('clients',                  'total'),
+           ('clients.constitution',     constitution),
+           ('clients.is_active',        is_active::text),
+           ('clients.is_direct_client', is_direct_client::text),
+           ('clients.is_on_retainer',   is_on_retainer::text)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- GST and EPF/ESI registrations, counted under metric prefix 'gst' / 'epf_esi'
+CREATE OR REPLACE FUNCTION dashboard_stats_registration_keys(
+    prefix TEXT, registration_type TEXT, is_active BOOLEAN)
+RETURNS TABLE (metric TEXT, key TEXT) AS $$
+    VALUES (prefix,                        'total'),
+           (prefix || '.registration_type', coalesce(registration_type, 'Unspecified')),
+           (prefix || '.is_active',         is_active::text)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Applies one statement's net change. TG_ARGV[0] is the table's key call
+-- over a row r of the transition table(s), run as dynamic SQL because a
+-- generic trigger function cannot name the table's columns itself.
+-- Counts are upserted in (metric, key) order so concurrent writers lock them in the same order.
+CREATE OR REPLACE FUNCTION dashboard_stats_apply()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        delta := format('SELECT k.metric, k.key, 1 AS delta FROM new_rows r, %s k', TG_ARGV[0]);
+    ELSIF TG_OP = 'DELETE' THEN
+        delta := format('SELECT k.metric, k.key, -1 AS delta FROM old_rows r, %s k', TG_ARGV[0]);
+    ELSE
+        delta := format('SELECT k.metric, k.key, 1 AS delta FROM new_rows r, %1$s k '
+                        'UNION ALL SELECT k.metric, k.key, -1 FROM old_rows r, %1$s k', TG_ARGV[0]);
+    END IF;
+    EXECUTE format(
+        'INSERT INTO dashboard_stats AS s (metric, key, count) '
+        'SELECT metric, key, sum(delta) FROM (%s) d '
+        'GROUP BY 1, 2 HAVING sum(delta) <> 0 ORDER BY 1, 2 '
+        'ON CONFLICT (metric, key) DO UPDATE SET count = s.count + EXCLUDED.count', delta);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A trigger with transition tables can only fire on one event, hence three per table
+DO $$
+DECLARE
+    t    TEXT;
+    keys TEXT;
+BEGIN
+    FOR t, keys IN VALUES
+        ('clients',               'dashboard_stats_client_keys(r.constitution::text, r.is_active, r.is_direct_client, r.is_on_retainer)'),
+        ('gst_registrations',     'dashboard_stats_registration_keys(''gst'', r.registration_type::text, r.is_active)'),
+        ('epf_esi_registrations', 'dashboard_stats_registration_keys(''epf_esi'', r.registration_type::text, r.is_active)')
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS dashboard_stats_insert ON %I', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS dashboard_stats_update ON %I', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS dashboard_stats_delete ON %I', t);
+        EXECUTE format('CREATE TRIGGER dashboard_stats_insert AFTER INSERT ON %I '
+                       'REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply(%L)', t, keys);
+        EXECUTE format('CREATE TRIGGER dashboard_stats_update AFTER UPDATE ON %I '
+                       'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply(%L)', t, keys);
+        EXECUTE format('CREATE TRIGGER dashboard_stats_delete AFTER DELETE ON %I '
+                       'REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply(%L)', t, keys);
+    END LOOP;
+END;
+$$;
+
+-- Counts of the rows already there, as stats.reconcile() computes them.
+-- A re-run leaves existing counts to the triggers and the reconciler.
+INSERT INTO dashboard_stats (metric, key, count)
+SELECT k.metric, k.key, count(*)
+FROM clients r, dashboard_stats_client_keys(r.constitution::text, r.is_active, r.is_direct_client, r.is_on_retainer) k
+GROUP BY 1, 2
+UNION ALL
+SELECT k.metric, k.key, count(*)
+FROM gst_registrations r, dashboard_stats_registration_keys('gst', r.registration_type::text, r.is_active) k
+GROUP BY 1, 2
+UNION ALL
+SELECT k.metric, k.key, count(*)
+FROM epf_esi_registrations r, dashboard_stats_registration_keys('epf_esi', r.registration_type::text, r.is_active) k
+GROUP BY 1, 2
+ON CONFLICT (metric, key) DO NOTHING;
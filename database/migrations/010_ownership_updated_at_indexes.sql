@@ -0,0 +1,7 @@
+-- Migration: updated_at indexes for the ownership index
+-- backend/ownership.py checks shareholders and partners for writes (count and
+-- max(updated_at)) on every UBO report and then fetches only the rows updated
+-- since. These indexes serve both from the index instead of a table scan.
+
+CREATE INDEX IF NOT EXISTS idx_shareholders_updated_at ON shareholders (updated_at);
+CREATE INDEX IF NOT EXISTS idx_partners_updated_at     ON partners (updated_at);
@@ -0,0 +1,8 @@
+-- Migration: updated_at indexes for the client group forest
+-- backend/groups.py checks directors and gst_signatories (as well as
+-- shareholders and partners, indexed in 010) for writes — count and
+-- max(updated_at) — on every group read and then fetches only the rows
+-- updated since. These indexes serve both from the index instead of a scan.
+
+CREATE INDEX IF NOT EXISTS idx_gst_sig_updated_at   ON gst_signatories (updated_at);
+CREATE INDEX IF NOT EXISTS idx_directors_updated_at ON directors (updated_at);
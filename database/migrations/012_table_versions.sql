@@ -0,0 +1,53 @@
+-- Migration: commit-ordered table versions
+-- ETags, the compliance calendar, the ownership index, the client group
+-- forest and the dossier cache all asked "has this table changed?" with
+-- count(*) and max(updated_at). updated_at was NOW(), the transaction's
+-- start time, so an update that started before a newer write but committed
+-- after it moved neither: readers kept serving the old rows.
+--
+-- Now every write statement first bumps its table's row in table_versions.
+-- The row stays locked until the transaction ends, so writers to one table
+-- queue behind each other, and a reader sees a new version exactly when a
+-- write commits. updated_at is stamped with clock_timestamp() on insert as
+-- well as update, after that lock is taken: rows committed later always
+-- carry later stamps, which the "updated_at >= since" delta loads rely on.
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name  TEXT PRIMARY KEY,
+    version     BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION table_versions_bump()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOR t IN VALUES
+        ('clients'), ('client_credentials'), ('gst_registrations'), ('gst_signatories'), ('directors'),
+        ('shareholders'), ('partners'), ('bank_accounts'), ('epf_esi_registrations'), ('other_registrations')
+    LOOP
+        INSERT INTO table_versions (table_name) VALUES (t) ON CONFLICT DO NOTHING;
+        EXECUTE format('DROP TRIGGER IF EXISTS table_versions_bump ON %I', t);
+        EXECUTE format('CREATE TRIGGER table_versions_bump BEFORE INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION table_versions_bump()', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS set_updated_at ON %I', t);
+        EXECUTE format('CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON %I '
+                       'FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at()', t);
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,58 @@
+-- Migration: versions from in-flight writers instead of table_versions
+-- Migration 012 made every write statement bump its table's table_versions
+-- row and hold it until commit. That made versions exact, but only one
+-- transaction at a time could write each table: an import or a credential
+-- re-encryption batch held up every edit behind it, and two transactions
+-- writing two of the tables in opposite orders could deadlock.
+--
+-- Versions go back to count(*) and max(updated_at), plus the writers a
+-- reader cannot see yet. table_writers() lists the transactions in flight
+-- when the calling statement took its snapshot, leaving out those still
+-- running that hold no write lock on the named tables: they have not written
+-- them, and anything they write later is stamped after the read. A write
+-- that was in flight therefore changes the version when it commits, even if
+-- its stamps are older than the newest row the reader saw. Nothing blocks.
+--
+-- updated_at is stamped after the transaction has an id, so a writer a
+-- reader's snapshot does not list stamps after that snapshot was taken.
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOR t IN VALUES
+        ('clients'), ('client_credentials'), ('gst_registrations'), ('gst_signatories'), ('directors'),
+        ('shareholders'), ('partners'), ('bank_accounts'), ('epf_esi_registrations'), ('other_registrations')
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS table_versions_bump ON %I', t);
+    END LOOP;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS table_versions_bump();
+DROP TABLE IF EXISTS table_versions;
+
+CREATE OR REPLACE FUNCTION trigger_set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_current_xact_id();
+    NEW.updated_at = clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION table_writers(VARIADIC tables TEXT[])
+RETURNS TEXT AS $$
+    SELECT string_agg(x::text, ',' ORDER BY x)
+    FROM pg_snapshot_xip(pg_current_snapshot()) x
+    WHERE NOT EXISTS (
+        SELECT 1 FROM pg_locks t
+        WHERE t.locktype = 'transactionid' AND t.transactionid = x::xid AND t.granted
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_locks w
+              WHERE w.virtualtransaction = t.virtualtransaction AND w.locktype = 'relation'
+                AND w.mode = 'RowExclusiveLock' AND w.granted
+                AND w.relation = ANY (CAST(tables AS regclass[]))
+          )
+    )
+$$ LANGUAGE sql STABLE;
@@ -13,6 +13,9 @@
 -- Enable UUID generation
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
+-- Trigram indexes for substring / typo-tolerant client search
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
 -- =============================================================================
 -- ENUM TYPES
 -- =============================================================================
@@ -108,14 +111,9 @@ CREATE TABLE clients (
     passport_no                 TEXT,
     passport_expiry             DATE,
 
-    -- Individual KYC — MCA v3
-    mca_user_id                 TEXT,
-    mca_password                TEXT,           -- encrypted
-
     -- Individual KYC — DSC
     dsc_provider                TEXT,
     dsc_expiry_date             DATE,
-    dsc_token_password          TEXT,           -- encrypted
 
     -- Contact
     primary_phone               TEXT,
@@ -130,6 +128,42 @@ CREATE TABLE clients (
     state                       TEXT,
     pin_code                    TEXT,
 
+    -- Notes
+    notes                       TEXT,
+
+    created_at                  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at                  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Indexes for common lookups
+CREATE INDEX idx_clients_pan             ON clients (pan);
+CREATE INDEX idx_clients_constitution    ON clients (constitution);
+CREATE INDEX idx_clients_display_name_id ON clients (display_name, id);   -- keyset pagination of the client list
+CREATE INDEX idx_clients_is_active       ON clients (is_active);
+CREATE INDEX idx_clients_din             ON clients (din) WHERE din IS NOT NULL;
+CREATE INDEX idx_clients_tan             ON clients (tan) WHERE tan IS NOT NULL;
+CREATE INDEX idx_clients_updated_at      ON clients (updated_at);            -- list ETag (max(updated_at))
+CREATE INDEX idx_clients_dsc_expiry      ON clients (dsc_expiry_date) WHERE dsc_expiry_date IS NOT NULL;   -- compliance expiry scans
+CREATE INDEX idx_clients_passport_expiry ON clients (passport_expiry) WHERE passport_expiry IS NOT NULL;
+
+-- Trigram GIN indexes: serve ILIKE '%x%' and the ranked fuzzy search mode
+CREATE INDEX idx_clients_display_name_trgm ON clients USING gin (display_name gin_trgm_ops);
+CREATE INDEX idx_clients_legal_name_trgm   ON clients USING gin (legal_name gin_trgm_ops);
+CREATE INDEX idx_clients_pan_trgm          ON clients USING gin (pan gin_trgm_ops);
+
+
+-- =============================================================================
+-- TABLE: client_credentials  (1:1 with clients — portal logins, kept out of
+-- the clients heap so list scans and index lookups stay narrow)
+-- =============================================================================
+CREATE TABLE client_credentials (
+    client_id                   UUID PRIMARY KEY REFERENCES clients (id) ON DELETE CASCADE,
+
+    -- MCA v3 / DSC
+    mca_user_id                 TEXT,
+    mca_password                TEXT,           -- encrypted
+    dsc_token_password          TEXT,           -- encrypted
+
     -- IT Portal
     it_portal_user_id           TEXT,
     it_portal_password          TEXT,           -- encrypted
@@ -143,22 +177,12 @@ CREATE TABLE clients (
     traces_password_deductor    TEXT,           -- encrypted
     traces_user_id_taxpayer     TEXT,
     traces_password_taxpayer    TEXT,           -- encrypted
-
-    -- Notes
-    notes                       TEXT,
+    credentials_sealed          BYTEA,          -- AES-GCM envelope of the fields above (CREDENTIAL_STORAGE=envelope)
 
     created_at                  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     updated_at                  TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
--- Indexes for common lookups
-CREATE INDEX idx_clients_pan            ON clients (pan);
-CREATE INDEX idx_clients_constitution   ON clients (constitution);
-CREATE INDEX idx_clients_display_name   ON clients (display_name);
-CREATE INDEX idx_clients_is_active      ON clients (is_active);
-CREATE INDEX idx_clients_din            ON clients (din) WHERE din IS NOT NULL;
-CREATE INDEX idx_clients_tan            ON clients (tan) WHERE tan IS NOT NULL;
-
 
 -- =============================================================================
 -- TABLE: gst_registrations  (Sheet 2 — one row per GSTIN)
@@ -186,6 +210,7 @@ CREATE TABLE gst_registrations (
     ewb_password        TEXT,           -- encrypted
     ewb_api_user_id     TEXT,
     ewb_api_password    TEXT,           -- encrypted
+    credentials_sealed  BYTEA,          -- AES-GCM envelope of the passwords above
 
     -- GST portal lookup data (auto-fetched via GSTIN lookup)
     trade_name          TEXT,
@@ -202,6 +227,8 @@ CREATE TABLE gst_registrations (
 
 CREATE INDEX idx_gst_client_id ON gst_registrations (client_id);
 CREATE INDEX idx_gst_gstin     ON gst_registrations (gstin);
+CREATE INDEX idx_gst_updated_at ON gst_registrations (updated_at);
+CREATE INDEX idx_gst_cancellation_date ON gst_registrations (cancellation_date) WHERE cancellation_date IS NOT NULL;
 
 
 -- =============================================================================
@@ -222,6 +249,7 @@ CREATE TABLE gst_signatories (
 
 CREATE INDEX idx_gst_sig_registration ON gst_signatories (gst_registration_id);
 CREATE INDEX idx_gst_sig_client       ON gst_signatories (signatory_client_id);
+CREATE INDEX idx_gst_sig_updated_at   ON gst_signatories (updated_at);   -- client groups (see backend/groups.py)
 
 
 -- =============================================================================
@@ -246,6 +274,7 @@ CREATE TABLE directors (
 
 CREATE INDEX idx_directors_company    ON directors (company_client_id);
 CREATE INDEX idx_directors_individual ON directors (individual_client_id);
+CREATE INDEX idx_directors_updated_at ON directors (updated_at);   -- client groups (see backend/groups.py)
 
 
 -- =============================================================================
@@ -273,6 +302,7 @@ CREATE TABLE shareholders (
 CREATE INDEX idx_shareholders_company    ON shareholders (company_client_id);
 CREATE INDEX idx_shareholders_individual ON shareholders (individual_client_id) WHERE individual_client_id IS NOT NULL;
 CREATE INDEX idx_shareholders_entity     ON shareholders (holding_entity_client_id) WHERE holding_entity_client_id IS NOT NULL;
+CREATE INDEX idx_shareholders_updated_at ON shareholders (updated_at);   -- ownership index (see backend/ownership.py)
 
 
 -- =============================================================================
@@ -296,6 +326,7 @@ CREATE TABLE partners (
 
 CREATE INDEX idx_partners_firm       ON partners (firm_llp_client_id);
 CREATE INDEX idx_partners_individual ON partners (individual_client_id);
+CREATE INDEX idx_partners_updated_at ON partners (updated_at);   -- ownership index (see backend/ownership.py)
 
 
 -- =============================================================================
@@ -313,6 +344,7 @@ CREATE TABLE bank_accounts (
     is_primary              BOOLEAN NOT NULL DEFAULT FALSE,
     net_banking_user_id     TEXT,
     net_banking_password    TEXT,       -- encrypted
+    credentials_sealed      BYTEA,      -- AES-GCM envelope
     notes                   TEXT,
     created_at              TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW()
@@ -336,6 +368,7 @@ CREATE TABLE epf_esi_registrations (
     is_active           BOOLEAN NOT NULL DEFAULT TRUE,
     portal_user_id      TEXT,
     portal_password     TEXT,           -- encrypted
+    credentials_sealed  BYTEA,          -- AES-GCM envelope
     dsc_holder_name     TEXT,
     authorised_signatory TEXT,
     notes               TEXT,
@@ -344,6 +377,8 @@ CREATE TABLE epf_esi_registrations (
 );
 
 CREATE INDEX idx_epf_esi_client_id ON epf_esi_registrations (client_id);
+CREATE INDEX idx_epf_esi_updated_at ON epf_esi_registrations (updated_at);
+CREATE INDEX idx_epf_esi_cancellation_date ON epf_esi_registrations (cancellation_date) WHERE cancellation_date IS NOT NULL;
 
 
 -- =============================================================================
@@ -361,6 +396,7 @@ CREATE TABLE other_registrations (
     state_jurisdiction  TEXT,
     portal_user_id      TEXT,
     portal_password     TEXT,           -- encrypted
+    credentials_sealed  BYTEA,          -- AES-GCM envelope
     is_active           BOOLEAN NOT NULL DEFAULT TRUE,
     notes               TEXT,
     created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
@@ -369,37 +405,182 @@ CREATE TABLE other_registrations (
 
 CREATE INDEX idx_other_reg_client_id ON other_registrations (client_id);
 CREATE INDEX idx_other_reg_valid_until ON other_registrations (valid_until) WHERE valid_until IS NOT NULL;
+CREATE INDEX idx_other_reg_updated_at ON other_registrations (updated_at);
+
+
+-- =============================================================================
+-- TABLE: search_documents  (global search across clients and registrations)
+-- =============================================================================
+-- One row per client / GSTIN / bank account / EPF-ESI code / other registration.
+-- Maintained by the API's write paths (backend/search_index.py), not by hand.
+
+CREATE TABLE search_documents (
+    entity_type     TEXT NOT NULL,      -- client, gst, bank_account, epf_esi, other_registration
+    entity_id       UUID NOT NULL,
+    client_id       UUID NOT NULL REFERENCES clients (id) ON DELETE CASCADE,   -- owning client
+    title           TEXT NOT NULL,
+    subtitle        TEXT,
+    identifiers     TEXT[] NOT NULL,    -- normalised PAN / GSTIN / account no. / codes
+    search_text     TEXT NOT NULL,
+    tsv             TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', search_text)) STORED,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (entity_type, entity_id)
+);
+
+CREATE INDEX idx_search_docs_client      ON search_documents (client_id);
+CREATE INDEX idx_search_docs_identifiers ON search_documents USING gin (identifiers);
+CREATE INDEX idx_search_docs_text_trgm   ON search_documents USING gin (search_text gin_trgm_ops);
+CREATE INDEX idx_search_docs_tsv         ON search_documents USING gin (tsv);
+
+
+-- =============================================================================
+-- TABLE: dashboard_stats  (counts behind GET /api/stats)
+-- =============================================================================
+-- Kept current by the dashboard_stats triggers below and reconciled against
+-- the real counts by backend/stats.py, never written by hand.
+
+CREATE TABLE dashboard_stats (
+    metric      TEXT NOT NULL,      -- clients, clients.constitution, gst.registration_type, ...
+    key         TEXT NOT NULL,      -- the value counted ('total' for a table's own count)
+    count       BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, key)
+);
+
+
+-- =============================================================================
+-- TABLE WRITERS — what a reader's version must also cover
+-- =============================================================================
+
+-- The transactions in flight at the calling statement's snapshot, minus those
+-- still running without a write lock on any of tables (they have not written
+-- them). Versions are count(*), max(updated_at) and this: a write the reader
+-- cannot see yet changes the version when it commits, whatever its stamps.
+CREATE OR REPLACE FUNCTION table_writers(VARIADIC tables TEXT[])
+RETURNS TEXT AS $$
+    SELECT string_agg(x::text, ',' ORDER BY x)
+    FROM pg_snapshot_xip(pg_current_snapshot()) x
+    WHERE NOT EXISTS (
+        SELECT 1 FROM pg_locks t
+        WHERE t.locktype = 'transactionid' AND t.transactionid = x::xid AND t.granted
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_locks w
+              WHERE w.virtualtransaction = t.virtualtransaction AND w.locktype = 'relation'
+                AND w.mode = 'RowExclusiveLock' AND w.granted
+                AND w.relation = ANY (CAST(tables AS regclass[]))
+          )
+    )
+$$ LANGUAGE sql STABLE;
 
 
 -- =============================================================================
 -- AUTO-UPDATE updated_at on every row change
 -- =============================================================================
 
+-- clock_timestamp(), not NOW() (the transaction's start), taken once the
+-- transaction has an id: a writer missing from a reader's snapshot stamps
+-- after that snapshot (see table_writers)
 CREATE OR REPLACE FUNCTION trigger_set_updated_at()
 RETURNS TRIGGER AS $$
 BEGIN
-    NEW.updated_at = NOW();
+    PERFORM pg_current_xact_id();
+    NEW.updated_at = clock_timestamp();
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER set_updated_at BEFORE UPDATE ON users
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON clients
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON clients
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON gst_registrations
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON client_credentials
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON gst_signatories
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON gst_registrations
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON directors
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON gst_signatories
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON shareholders
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON directors
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON partners
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON shareholders
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON bank_accounts
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON partners
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON epf_esi_registrations
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON bank_accounts
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
-CREATE TRIGGER set_updated_at BEFORE UPDATE ON other_registrations
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON epf_esi_registrations
     FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
+CREATE TRIGGER set_updated_at BEFORE INSERT OR UPDATE ON other_registrations
+    FOR EACH ROW EXECUTE FUNCTION trigger_set_updated_at();
+
+
+-- =============================================================================
+-- DASHBOARD COUNTS — net change of every statement applied to dashboard_stats
+-- =============================================================================
+
+-- The counts one row contributes to, as (metric, key) pairs: one function
+-- per row shape, taking the counted columns so that the planner inlines it
+-- (a lateral VALUES over the row) instead of calling it row by row
+CREATE OR REPLACE FUNCTION dashboard_stats_client_keys(
+    constitution TEXT, is_active BOOLEAN, is_direct_client BOOLEAN, is_on_retainer BOOLEAN)
+RETURNS TABLE (metric TEXT, key TEXT) AS $$
+    VALUES ('clients',                  'total'),
+           ('clients.constitution',     constitution),
+           ('clients.is_active',        is_active::text),
+           ('clients.is_direct_client', is_direct_client::text),
+           ('clients.is_on_retainer',   is_on_retainer::text)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- GST and EPF/ESI registrations, counted under metric prefix 'gst' / 'epf_esi'
+CREATE OR REPLACE FUNCTION dashboard_stats_registration_keys(
+    prefix TEXT, registration_type TEXT, is_active BOOLEAN)
+RETURNS TABLE (metric TEXT, key TEXT) AS $$
+    VALUES (prefix,                        'total'),
+           (prefix || '.registration_type', coalesce(registration_type, 'Unspecified')),
+           (prefix || '.is_active',         is_active::text)
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Applies one statement's net change. TG_ARGV[0] is the table's key call
+-- over a row r of the transition table(s), run as dynamic SQL because a
+-- generic trigger function cannot name the table's columns itself.
+-- Counts are upserted in (metric, key) order so concurrent writers lock them in the same order.
+CREATE OR REPLACE FUNCTION dashboard_stats_apply()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        delta := format('SELECT k.metric, k.key, 1 AS delta FROM new_rows r, %s k', TG_ARGV[0]);
+    ELSIF TG_OP = 'DELETE' THEN
+        delta := format('SELECT k.metric, k.key, -1 AS delta FROM old_rows r, %s k', TG_ARGV[0]);
+    ELSE
+        delta := format('SELECT k.metric, k.key, 1 AS delta FROM new_rows r, %1$s k '
+                        'UNION ALL SELECT k.metric, k.key, -1 FROM old_rows r, %1$s k', TG_ARGV[0]);
+    END IF;
+    EXECUTE format(
+        'INSERT INTO dashboard_stats AS s (metric, key, count) '
+        'SELECT metric, key, sum(delta) FROM (%s) d '
+        'GROUP BY 1, 2 HAVING sum(delta) <> 0 ORDER BY 1, 2 '
+        'ON CONFLICT (metric, key) DO UPDATE SET count = s.count + EXCLUDED.count', delta);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A trigger with transition tables can only fire on one event, hence three per table
+CREATE TRIGGER dashboard_stats_insert AFTER INSERT ON clients
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_client_keys(r.constitution::text, r.is_active, r.is_direct_client, r.is_on_retainer)');
+CREATE TRIGGER dashboard_stats_update AFTER UPDATE ON clients
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_client_keys(r.constitution::text, r.is_active, r.is_direct_client, r.is_on_retainer)');
+CREATE TRIGGER dashboard_stats_delete AFTER DELETE ON clients
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_client_keys(r.constitution::text, r.is_active, r.is_direct_client, r.is_on_retainer)');
+CREATE TRIGGER dashboard_stats_insert AFTER INSERT ON gst_registrations
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_registration_keys(''gst'', r.registration_type::text, r.is_active)');
+CREATE TRIGGER dashboard_stats_update AFTER UPDATE ON gst_registrations
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_registration_keys(''gst'', r.registration_type::text, r.is_active)');
+CREATE TRIGGER dashboard_stats_delete AFTER DELETE ON gst_registrations
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_registration_keys(''gst'', r.registration_type::text, r.is_active)');
+CREATE TRIGGER dashboard_stats_insert AFTER INSERT ON epf_esi_registrations
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_registration_keys(''epf_esi'', r.registration_type::text, r.is_active)');
+CREATE TRIGGER dashboard_stats_update AFTER UPDATE ON epf_esi_registrations
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_registration_keys(''epf_esi'', r.registration_type::text, r.is_active)');
+CREATE TRIGGER dashboard_stats_delete AFTER DELETE ON epf_esi_registrations
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION dashboard_stats_apply('dashboard_stats_registration_keys(''epf_esi'', r.registration_type::text, r.is_active)');
@@ -21,6 +21,9 @@ api.interceptors.response.use(
   }
 )
 
+// Stored credentials come back as this placeholder unless revealed (reveal=… or /secrets)
+export const MASKED = '********'
+
 // ── Auth ──────────────────────────────────────────────────────────────────────
 export const authApi = {
   login:      (email, password) => api.post('/auth/login', { email, password }),
@@ -34,6 +37,12 @@ export const authApi = {
 export const clientsApi = {
   list:   (params) => api.get('/clients', { params }),
   get:    (id)     => api.get(`/clients/${id}`),
+  full:   (id, include, reveal) => api.get(`/clients/${id}/full`, { params: { include, reveal } }),
+  secrets: (id)    => api.get(`/clients/${id}/secrets`),
+  dossier: (id, reveal) => api.get(`/clients/${id}/dossier`, { params: { reveal }, responseType: 'blob' }),
+  dossiers: (clientIds, reveal) => api.post('/clients/dossiers', { client_ids: clientIds, reveal }, { responseType: 'blob' }),
+  ubo:    (id, threshold) => api.get(`/clients/${id}/ubo`, { params: { threshold } }),
+  group:  (id)     => api.get(`/clients/${id}/group`),
   create: (data)   => api.post('/clients', data),
   update: (id, data) => api.put(`/clients/${id}`, data),
   delete: (id)     => api.delete(`/clients/${id}`),
@@ -43,9 +52,12 @@ export const clientsApi = {
 export const gstApi = {
   list:            (clientId)        => api.get('/gst', { params: { client_id: clientId } }),
   get:             (id)              => api.get(`/gst/${id}`),
+  secrets:         (id)              => api.get(`/gst/${id}/secrets`),
   create:          (data)            => api.post('/gst', data),
   update:          (id, data)        => api.put(`/gst/${id}`, data),
   delete:          (id)              => api.delete(`/gst/${id}`),
+  lookup:          (gstin)           => api.get(`/gst/lookup/${gstin}`),
+  refresh:         (id)              => api.post(`/gst/${id}/refresh`),
   addSignatory:    (gstId, clientId) => api.post(`/gst/${gstId}/signatories`, { signatory_client_id: clientId }),
   removeSignatory: (gstId, sigId)    => api.delete(`/gst/${gstId}/signatories/${sigId}`),
 }
@@ -76,7 +88,8 @@ export const partnersApi = {
 
 // ── Bank Accounts ─────────────────────────────────────────────────────────────
 export const bankApi = {
-  list:   (clientId) => api.get('/bank-accounts', { params: { client_id: clientId } }),
+  list:   (clientId, reveal) => api.get('/bank-accounts', { params: { client_id: clientId, reveal } }),
+  secrets: (id)      => api.get(`/bank-accounts/${id}/secrets`),
   create: (data)     => api.post('/bank-accounts', data),
   update: (id, data) => api.put(`/bank-accounts/${id}`, data),
   delete: (id)       => api.delete(`/bank-accounts/${id}`),
@@ -84,7 +97,8 @@ export const bankApi = {
 
 // ── EPF/ESI ───────────────────────────────────────────────────────────────────
 export const epfEsiApi = {
-  list:   (clientId) => api.get('/epf-esi', { params: { client_id: clientId } }),
+  list:   (clientId, reveal) => api.get('/epf-esi', { params: { client_id: clientId, reveal } }),
+  secrets: (id)      => api.get(`/epf-esi/${id}/secrets`),
   create: (data)     => api.post('/epf-esi', data),
   update: (id, data) => api.put(`/epf-esi/${id}`, data),
   delete: (id)       => api.delete(`/epf-esi/${id}`),
@@ -92,8 +106,34 @@ export const epfEsiApi = {
 
 // ── Other Registrations ───────────────────────────────────────────────────────
 export const otherRegApi = {
-  list:   (clientId) => api.get('/other-registrations', { params: { client_id: clientId } }),
+  list:   (clientId, reveal) => api.get('/other-registrations', { params: { client_id: clientId, reveal } }),
+  secrets: (id)      => api.get(`/other-registrations/${id}/secrets`),
   create: (data)     => api.post('/other-registrations', data),
   update: (id, data) => api.put(`/other-registrations/${id}`, data),
   delete: (id)       => api.delete(`/other-registrations/${id}`),
 }
+
+// ── Export ────────────────────────────────────────────────────────────────────
+// The whole book, built and streamed by the server (format: xlsx | csv | ndjson)
+export const exportApi = {
+  book: (format, params) => api.get('/export', { params: { format, ...params }, responseType: 'blob' }),
+}
+
+// ── Compliance ────────────────────────────────────────────────────────────────
+// Expiries and cancellations across the book (within / overdue: e.g. '30d', '3m')
+export const complianceApi = {
+  calendar: (params) => api.get('/compliance/calendar', { params }),
+  upcoming: (params) => api.get('/compliance/upcoming', { params }),
+}
+
+// ── Stats ─────────────────────────────────────────────────────────────────────
+// Dashboard counts of clients and registrations, kept up to date by the database
+export const statsApi = {
+  get: () => api.get('/stats'),
+}
+
+// ── Client groups ─────────────────────────────────────────────────────────────
+// Clients linked through directors, partners, shareholders or GST signatories, largest first
+export const groupsApi = {
+  list: (params) => api.get('/groups', { params }),
+}
@@ -0,0 +1,37 @@
+import { useState, useEffect } from 'react'
+import { statsApi } from '../api'
+
+/**
+ * Dashboard strip: how many clients and registrations the firm holds.
+ * Counts come from GET /stats, which the database keeps current.
+ */
+export default function BookStats() {
+  const [stats, setStats] = useState(null)
+
+  useEffect(() => {
+    statsApi.get().then(res => setStats(res.data)).catch(e => console.error(e))
+  }, [])
+
+  if (!stats) return null
+
+  const { clients, gst, epf_esi } = stats
+  const tiles = [
+    { label: 'Active clients', value: clients.active,      note: `${clients.inactive} inactive` },
+    { label: 'Direct',         value: clients.direct,      note: `${clients.referred} referred` },
+    { label: 'On retainer',    value: clients.on_retainer, note: `of ${clients.total}` },
+    { label: 'GST',            value: gst.active,          note: `${gst.inactive} inactive` },
+    { label: 'EPF / ESI',      value: epf_esi.active,      note: `${epf_esi.inactive} inactive` },
+  ]
+
+  return (
+    <div className="grid grid-cols-2 md:grid-cols-5 gap-3 mb-5">
+      {tiles.map(t => (
+        <div key={t.label} className="bg-white rounded-xl border border-gray-200 px-4 py-3">
+          <div className="text-xs font-medium text-gray-500">{t.label}</div>
+          <div className="text-xl font-bold text-gray-900">{t.value}</div>
+          <div className="text-xs text-gray-400">{t.note}</div>
+        </div>
+      ))}
+    </div>
+  )
+}
@@ -0,0 +1,71 @@
+import { useState, useEffect } from 'react'
+import { useNavigate } from 'react-router-dom'
+import { CalendarClock } from 'lucide-react'
+import { complianceApi } from '../api'
+
+const KIND_LABELS = {
+  dsc:                  'DSC',
+  passport:             'Passport',
+  other_registration:   'Registration',
+  gst_cancellation:     'GST cancellation',
+  epf_esi_cancellation: 'EPF/ESI cancellation',
+}
+
+/**
+ * Dashboard card: what expires in the next `within` (default 30 days).
+ * Counts come from the server's precomputed calendar; the list is the first
+ * few items, soonest first.
+ */
+export default function ExpiryWidget({ within = '30d', shown = 6 }) {
+  const navigate = useNavigate()
+  const [summary, setSummary] = useState(null)
+  const [items,   setItems]   = useState([])
+
+  useEffect(() => {
+    Promise.all([
+      complianceApi.calendar({ within }),
+      complianceApi.upcoming({ within, limit: shown }),
+    ])
+      .then(([cal, next]) => { setSummary(cal.data); setItems(next.data) })
+      .catch(e => console.error(e))
+  }, [within, shown])
+
+  if (!summary || summary.total === 0) return null
+
+  return (
+    <div className="bg-white rounded-xl border border-gray-200 p-4 mb-5">
+      <div className="flex items-center justify-between mb-3">
+        <div className="flex items-center gap-2 text-sm font-semibold text-gray-700">
+          <CalendarClock size={16} className="text-amber-600" />
+          {summary.total} due by {summary.end}
+        </div>
+        <div className="flex flex-wrap gap-1.5">
+          {Object.entries(summary.by_kind).filter(([, n]) => n > 0).map(([kind, n]) => (
+            <span key={kind} className="px-2 py-0.5 rounded-full text-xs font-medium bg-amber-50 text-amber-800">
+              {KIND_LABELS[kind] ?? kind} · {n}
+            </span>
+          ))}
+        </div>
+      </div>
+      <ul className="divide-y divide-gray-100">
+        {items.map(i => (
+          <li
+            key={`${i.kind}-${i.entity_id}`}
+            onClick={() => navigate(`/clients/${i.client_id}`)}
+            className="flex items-center justify-between py-1.5 text-sm cursor-pointer hover:bg-gray-50"
+          >
+            <span className="text-gray-800">
+              {i.client_name}
+              <span className="text-gray-400 ml-2">
+                {KIND_LABELS[i.kind] ?? i.kind}{i.registration_type ? ` (${i.registration_type})` : ''}{i.reference ? ` · ${i.reference}` : ''}
+              </span>
+            </span>
+            <span className={i.days_left <= 7 ? 'text-red-600 font-medium' : 'text-gray-500'}>
+              {i.due_date} · {i.days_left === 0 ? 'today' : `${i.days_left}d`}
+            </span>
+          </li>
+        ))}
+      </ul>
+    </div>
+  )
+}
@@ -0,0 +1,63 @@
+import { useState, useEffect } from 'react'
+import { useNavigate } from 'react-router-dom'
+import { Users } from 'lucide-react'
+import { clientsApi } from '../api'
+
+const KIND_LABELS = {
+  director:      'director',
+  partner:       'partner',
+  shareholder:   'shareholder',
+  gst_signatory: 'GST signatory',
+}
+
+/**
+ * The client's group: everyone linked to it through directors, partners,
+ * shareholders or GST signatories, directly or through others. Hidden when
+ * the client has no links.
+ */
+export default function GroupPanel({ clientId }) {
+  const navigate = useNavigate()
+  const [group, setGroup] = useState(null)
+
+  useEffect(() => {
+    setGroup(null)
+    clientsApi.group(clientId)
+      .then(r => setGroup(r.data))
+      .catch(e => console.error(e))
+  }, [clientId])
+
+  if (!group || group.size < 2) return null
+
+  const names = Object.fromEntries(group.members.map(m => [m.client_id, m.display_name]))
+  const direct = group.links.filter(l => l.entity_id === clientId || l.client_id === clientId)
+
+  return (
+    <div className="mb-6">
+      <div className="flex items-center gap-2 mb-3">
+        <Users size={14} className="text-[#1F3864]" />
+        <p className="text-xs text-gray-500 font-medium uppercase tracking-wide">
+          Group · {group.size} clients, {group.links.length} links
+        </p>
+      </div>
+      <div className="flex flex-wrap gap-1.5 mb-2">
+        {group.members.filter(m => m.client_id !== clientId).map(m => (
+          <button
+            key={m.client_id}
+            onClick={() => navigate(`/clients/${m.client_id}`)}
+            className={`px-2 py-0.5 rounded-full text-xs border hover:bg-gray-50 ${m.is_active ? 'border-gray-200 text-gray-700' : 'border-gray-100 text-gray-400'}`}
+            title={`${m.pan} · ${m.constitution} · ${m.links} link${m.links === 1 ? '' : 's'}`}
+          >
+            {m.display_name}
+          </button>
+        ))}
+      </div>
+      {direct.length > 0 && (
+        <p className="text-xs text-gray-400">
+          Directly: {direct.map(l => l.entity_id === clientId
+            ? `${names[l.client_id] ?? '?'} (${KIND_LABELS[l.kind]})`
+            : `${KIND_LABELS[l.kind]} of ${names[l.entity_id] ?? '?'}`).join(', ')}
+        </p>
+      )}
+    </div>
+  )
+}
@@ -0,0 +1,42 @@
+import { useState, useEffect } from 'react'
+import { useNavigate } from 'react-router-dom'
+import { Users } from 'lucide-react'
+import { groupsApi } from '../api'
+
+/**
+ * Dashboard card: the largest client groups, each opened at its
+ * best-linked client. The total is every group of two or more.
+ */
+export default function GroupsWidget({ shown = 6 }) {
+  const navigate = useNavigate()
+  const [groups, setGroups] = useState([])
+  const [total,  setTotal]  = useState(0)
+
+  useEffect(() => {
+    groupsApi.list({ limit: shown })
+      .then(r => { setGroups(r.data); setTotal(Number(r.headers['x-total-count'] ?? r.data.length)) })
+      .catch(e => console.error(e))
+  }, [shown])
+
+  if (groups.length === 0) return null
+
+  return (
+    <div className="bg-white rounded-xl border border-gray-200 p-4 mb-5">
+      <div className="flex items-center gap-2 text-sm font-semibold text-gray-700 mb-3">
+        <Users size={16} className="text-[#1F3864]" />
+        {total} client group{total === 1 ? '' : 's'}
+      </div>
+      <div className="flex flex-wrap gap-1.5">
+        {groups.map(g => (
+          <button
+            key={g.group_id}
+            onClick={() => navigate(`/clients/${g.hub_client_id}`)}
+            className="px-2.5 py-1 rounded-full text-xs border border-gray-200 text-gray-700 hover:bg-gray-50"
+          >
+            {g.hub_name ?? '?'} <span className="text-gray-400">· {g.size} clients</span>
+          </button>
+        ))}
+      </div>
+    </div>
+  )
+}
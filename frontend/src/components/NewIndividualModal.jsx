@@ -30,7 +30,7 @@ export default function NewIndividualModal({ onClose, onCreated }) {
     setPanChecking(true)
     setPanStatus(null)
     try {
-      const r = await clientsApi.list({ search: pan })
+      const r = await clientsApi.list({ search: pan, fields: 'id,display_name,pan,constitution' })
       const match = r.data.find(c => c.pan?.toUpperCase() === pan)
       setPanStatus(match ? { duplicate: match } : 'clear')
     } catch {
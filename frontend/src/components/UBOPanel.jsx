@@ -0,0 +1,78 @@
+import { useState, useEffect } from 'react'
+import { useNavigate } from 'react-router-dom'
+import { Network, RefreshCw } from 'lucide-react'
+import { clientsApi } from '../api'
+
+const pct = n => `${Number(n.toFixed(2))}%`
+
+/**
+ * Ultimate beneficial owners of a client, resolved by the server through
+ * every holding entity. `refreshKey` changes whenever the shareholding
+ * does, to fetch again.
+ */
+export default function UBOPanel({ clientId, refreshKey }) {
+  const navigate = useNavigate()
+  const [report,  setReport]  = useState(null)
+  const [loading, setLoading] = useState(true)
+
+  useEffect(() => {
+    setLoading(true)
+    clientsApi.ubo(clientId)
+      .then(r => setReport(r.data))
+      .catch(e => console.error(e))
+      .finally(() => setLoading(false))
+  }, [clientId, refreshKey])
+
+  if (!report || report.owners.length === 0 && report.senior_managing_officials.length === 0) return null
+
+  const beneficial = report.owners.filter(o => o.is_beneficial_owner)
+  const others     = report.owners.filter(o => !o.is_beneficial_owner)
+
+  return (
+    <div className="mt-5 border-t border-gray-100 pt-4">
+      <div className="flex items-center justify-between mb-3">
+        <div className="flex items-center gap-2 text-sm font-semibold text-gray-700">
+          <Network size={15} className="text-[#1F3864]" />
+          Beneficial owners <span className="font-normal text-gray-400">(more than {report.threshold}% effective)</span>
+        </div>
+        {loading && <RefreshCw size={13} className="animate-spin text-gray-400" />}
+      </div>
+
+      {beneficial.length === 0 ? (
+        <p className="text-sm text-gray-500 mb-2">
+          No natural person holds more than {report.threshold}%
+          {report.senior_managing_officials.length > 0 && (
+            <> — senior managing officials: {report.senior_managing_officials.map(o => `${o.name} (${o.designation})`).join(', ')}</>
+          )}
+        </p>
+      ) : (
+        <table className="w-full text-sm mb-2">
+          <tbody className="divide-y divide-gray-50">
+            {beneficial.map(o => (
+              <tr key={o.client_id} className="cursor-pointer hover:bg-gray-50" onClick={() => navigate(`/clients/${o.client_id}`)}>
+                <td className="py-1.5 pr-4 font-medium">{o.name}</td>
+                <td className="py-1.5 pr-4 font-mono text-gray-600">{o.pan}</td>
+                <td className="py-1.5 pr-4 text-gray-700">{pct(o.effective_percentage)}</td>
+                <td className="py-1.5 text-xs text-gray-400">
+                  {o.layers === 1 ? 'direct' : `${o.layers} layers up`}
+                  {o.direct_percentage != null && o.layers > 1 ? ` · ${pct(o.direct_percentage)} direct` : ''}
+                </td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      )}
+
+      <div className="flex flex-wrap gap-x-4 gap-y-1 text-xs text-gray-400">
+        {others.length > 0 && <span>{others.length} other ultimate owner{others.length > 1 ? 's' : ''}</span>}
+        {report.unattributed_percentage > 0.01 && <span>{pct(report.unattributed_percentage)} not traced to an owner</span>}
+        {report.cycles.length > 0 && (
+          <span className="text-amber-700">
+            Cross-holding: {report.cycles.map(c => c.map(m => m.name ?? '?').join(' → ')).join('; ')}
+            {report.circular_percentage > 0.01 ? ` (${pct(report.circular_percentage)} circular)` : ''}
+          </span>
+        )}
+      </div>
+    </div>
+  )
+}
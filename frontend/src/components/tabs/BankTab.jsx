@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { bankApi } from '../../api'
+import { bankApi, MASKED } from '../../api'
 import Modal from '../Modal'
 import ExportMenu from '../ExportMenu'
 import { exportSectionPDF, exportSectionExcel } from '../../utils/exportClient'
@@ -7,22 +7,30 @@ import { Plus, Trash2, Edit2, Eye, EyeOff } from 'lucide-react'
 
 const ACCOUNT_TYPES = ['Current', 'Savings', 'Cash Credit', 'Overdraft', 'EEFC']
 
-function PwdCell({ value }) {
-  const [show, setShow] = useState(false)
+function PwdCell({ value, load }) {
+  const [show,  setShow]  = useState(false)
+  const [plain, setPlain] = useState(null)
   if (!value) return <span className="text-gray-400 text-xs">—</span>
+  // Lists arrive masked — fetch the real value each time it is shown
+  const toggle = async () => {
+    if (!show && value === MASKED) {
+      try { setPlain(await load()) } catch { return }
+    }
+    setShow(s => !s)
+  }
   return (
     <span className="flex items-center gap-1 font-mono text-xs">
-      {show ? value : '••••••••'}
-      <button onClick={() => setShow(s => !s)} className="text-gray-400 hover:text-gray-600">
+      {show ? (value === MASKED ? plain : value) : '••••••••'}
+      <button onClick={toggle} className="text-gray-400 hover:text-gray-600">
         {show ? <EyeOff size={11} /> : <Eye size={11} />}
       </button>
     </span>
   )
 }
 
-export default function BankTab({ clientId, client }) {
-  const [records, setRecords] = useState([])
-  const [loading, setLoading] = useState(true)
+export default function BankTab({ clientId, client, initial, onRecords }) {
+  const [records, setRecords] = useState(initial ?? [])
+  const [loading, setLoading] = useState(!initial)
   const [modal,   setModal]   = useState(false)
   const [editing, setEditing] = useState(null)
   const [form,    setForm]    = useState({})
@@ -30,11 +38,11 @@ export default function BankTab({ clientId, client }) {
   const [error,   setError]   = useState('')
 
   const fetchRecords = async () => {
-    try { const r = await bankApi.list(clientId); setRecords(r.data) }
+    try { const r = await bankApi.list(clientId); setRecords(r.data); onRecords?.(r.data) }
     catch (e) { console.error(e) }
     finally { setLoading(false) }
   }
-  useEffect(() => { fetchRecords() }, [clientId])
+  useEffect(() => { if (!initial) fetchRecords() }, [clientId])
 
   const openAdd  = () => { setForm({ client_id: clientId, is_primary: false }); setEditing(null); setModal(true) }
   const openEdit = rec => { setForm({ ...rec }); setEditing(rec); setModal(true) }
@@ -56,7 +64,12 @@ export default function BankTab({ clientId, client }) {
   }
 
   const exportHead = ['Bank', 'Account No.', 'IFSC', 'Branch', 'Type', 'Net Banking ID', 'Net Banking Password', 'Primary', 'Notes']
-  const exportRows = records.map(r => [r.bank_name, r.account_number, r.ifsc_code, r.branch_name, r.account_type, r.net_banking_user_id, r.net_banking_password, r.is_primary ? 'Yes' : 'No', r.notes])
+  // Exports need the real passwords, which the list masks
+  const exportWith = async exportFn => {
+    const r = await bankApi.list(clientId, 'all')
+    exportFn({ client, title: 'Bank Accounts', head: exportHead, rows: r.data.map(exportRow) })
+  }
+  const exportRow  = r => [r.bank_name, r.account_number, r.ifsc_code, r.branch_name, r.account_type, r.net_banking_user_id, r.net_banking_password, r.is_primary ? 'Yes' : 'No', r.notes]
 
   return (
     <div className="bg-white rounded-xl border border-gray-200 p-5">
@@ -66,8 +79,8 @@ export default function BankTab({ clientId, client }) {
           {records.length > 0 && client && (
             <ExportMenu
               small label="Export"
-              onExportPDF={() => exportSectionPDF({ client, title: 'Bank Accounts', head: exportHead, rows: exportRows })}
-              onExportExcel={() => exportSectionExcel({ client, title: 'Bank Accounts', head: exportHead, rows: exportRows })}
+              onExportPDF={() => exportWith(exportSectionPDF)}
+              onExportExcel={() => exportWith(exportSectionExcel)}
             />
           )}
           <button onClick={openAdd} className="flex items-center gap-1.5 bg-[#1F3864] text-white px-3 py-1.5 rounded-lg text-xs font-medium hover:bg-[#162848]">
@@ -101,7 +114,7 @@ export default function BankTab({ clientId, client }) {
                 <td className="py-2 pr-4 font-mono text-gray-600">{rec.ifsc_code}</td>
                 <td className="py-2 pr-4 text-gray-600">{rec.account_type || '—'}</td>
                 <td className="py-2 pr-4 text-gray-600 text-xs">{rec.net_banking_user_id || '—'}</td>
-                <td className="py-2 pr-4"><PwdCell value={rec.net_banking_password} /></td>
+                <td className="py-2 pr-4"><PwdCell value={rec.net_banking_password} load={() => bankApi.secrets(rec.id).then(r => r.data.net_banking_password)} /></td>
                 <td className="py-2 flex gap-1">
                   <button onClick={() => openEdit(rec)} className="p-1 hover:bg-gray-100 rounded text-gray-500"><Edit2 size={13} /></button>
                   <button onClick={() => del(rec.id)} className="p-1 hover:bg-red-50 rounded text-red-400"><Trash2 size={13} /></button>
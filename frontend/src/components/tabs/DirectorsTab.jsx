@@ -8,9 +8,9 @@ import { Plus, Trash2, Edit2, UserPlus } from 'lucide-react'
 
 const DESIGNATIONS = ['Director', 'Managing Director', 'Whole-time Director', 'Independent Director', 'Nominee Director', 'Additional Director']
 
-export default function DirectorsTab({ companyId, client }) {
-  const [records, setRecords] = useState([])
-  const [loading, setLoading] = useState(true)
+export default function DirectorsTab({ companyId, client, initial, onRecords }) {
+  const [records, setRecords] = useState(initial ?? [])
+  const [loading, setLoading] = useState(!initial)
   const [modal,   setModal]   = useState(false)
   const [editing, setEditing] = useState(null)
   const [form,    setForm]    = useState({})
@@ -20,14 +20,14 @@ export default function DirectorsTab({ companyId, client }) {
   const [showNewIndiv, setShowNewIndiv] = useState(false)
 
   const fetchRecords = async () => {
-    try { const r = await directorsApi.list({ company_client_id: companyId }); setRecords(r.data) }
+    try { const r = await directorsApi.list({ company_client_id: companyId }); setRecords(r.data); onRecords?.(r.data) }
     catch (e) { console.error(e) }
     finally { setLoading(false) }
   }
   const fetchIndivs = () =>
-    clientsApi.list({ constitution: 'Individual' }).then(r => setIndivs(r.data)).catch(() => {})
+    clientsApi.list({ constitution: 'Individual', fields: 'id,display_name,pan,din' }).then(r => setIndivs(r.data)).catch(() => {})
 
-  useEffect(() => { fetchRecords(); fetchIndivs() }, [companyId])
+  useEffect(() => { if (!initial) fetchRecords(); fetchIndivs() }, [companyId])
 
   const openAdd  = () => { setForm({ company_client_id: companyId, is_active: true, is_kmp: false }); setEditing(null); setModal(true) }
   const openEdit = rec => { setForm({ ...rec }); setEditing(rec); setModal(true) }
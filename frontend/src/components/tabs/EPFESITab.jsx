@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { epfEsiApi } from '../../api'
+import { epfEsiApi, MASKED } from '../../api'
 import Modal from '../Modal'
 import ExportMenu from '../ExportMenu'
 import { exportSectionPDF, exportSectionExcel } from '../../utils/exportClient'
@@ -7,22 +7,30 @@ import { Plus, Trash2, Edit2, Eye, EyeOff } from 'lucide-react'
 
 const STATES = ['Andhra Pradesh','Arunachal Pradesh','Assam','Bihar','Chhattisgarh','Goa','Gujarat','Haryana','Himachal Pradesh','Jharkhand','Karnataka','Kerala','Madhya Pradesh','Maharashtra','Manipur','Meghalaya','Mizoram','Nagaland','Odisha','Punjab','Rajasthan','Sikkim','Tamil Nadu','Telangana','Tripura','Uttar Pradesh','Uttarakhand','West Bengal','Delhi','Other']
 
-function PwdCell({ value }) {
-  const [show, setShow] = useState(false)
+function PwdCell({ value, load }) {
+  const [show,  setShow]  = useState(false)
+  const [plain, setPlain] = useState(null)
   if (!value) return <span className="text-gray-400 text-xs">—</span>
+  // Lists arrive masked — fetch the real value each time it is shown
+  const toggle = async () => {
+    if (!show && value === MASKED) {
+      try { setPlain(await load()) } catch { return }
+    }
+    setShow(s => !s)
+  }
   return (
     <span className="flex items-center gap-1 font-mono text-xs">
-      {show ? value : '••••••••'}
-      <button onClick={() => setShow(s => !s)} className="text-gray-400 hover:text-gray-600">
+      {show ? (value === MASKED ? plain : value) : '••••••••'}
+      <button onClick={toggle} className="text-gray-400 hover:text-gray-600">
         {show ? <EyeOff size={11} /> : <Eye size={11} />}
       </button>
     </span>
   )
 }
 
-export default function EPFESITab({ clientId, client }) {
-  const [records, setRecords] = useState([])
-  const [loading, setLoading] = useState(true)
+export default function EPFESITab({ clientId, client, initial, onRecords }) {
+  const [records, setRecords] = useState(initial ?? [])
+  const [loading, setLoading] = useState(!initial)
   const [modal,   setModal]   = useState(false)
   const [editing, setEditing] = useState(null)
   const [form,    setForm]    = useState({})
@@ -30,11 +38,11 @@ export default function EPFESITab({ clientId, client }) {
   const [error,   setError]   = useState('')
 
   const fetchRecords = async () => {
-    try { const r = await epfEsiApi.list(clientId); setRecords(r.data) }
+    try { const r = await epfEsiApi.list(clientId); setRecords(r.data); onRecords?.(r.data) }
     catch (e) { console.error(e) }
     finally { setLoading(false) }
   }
-  useEffect(() => { fetchRecords() }, [clientId])
+  useEffect(() => { if (!initial) fetchRecords() }, [clientId])
 
   const openAdd  = () => { setForm({ client_id: clientId, registration_type: 'EPF', is_active: true }); setEditing(null); setModal(true) }
   const openEdit = rec => { setForm({ ...rec }); setEditing(rec); setModal(true) }
@@ -56,7 +64,12 @@ export default function EPFESITab({ clientId, client }) {
   }
 
   const exportHead = ['Type', 'Estab. Code', 'State', 'Reg Date', 'Portal ID', 'Password', 'DSC Holder', 'Auth Signatory', 'Status', 'Notes']
-  const exportRows = records.map(r => [r.registration_type, r.establishment_code, r.state, r.registration_date, r.portal_user_id, r.portal_password, r.dsc_holder_name, r.authorised_signatory, r.is_active ? 'Active' : 'Inactive', r.notes])
+  // Exports need the real passwords, which the list masks
+  const exportWith = async exportFn => {
+    const r = await epfEsiApi.list(clientId, 'all')
+    exportFn({ client, title: 'EPF-ESI', head: exportHead, rows: r.data.map(exportRow) })
+  }
+  const exportRow  = r => [r.registration_type, r.establishment_code, r.state, r.registration_date, r.portal_user_id, r.portal_password, r.dsc_holder_name, r.authorised_signatory, r.is_active ? 'Active' : 'Inactive', r.notes]
 
   return (
     <div className="bg-white rounded-xl border border-gray-200 p-5">
@@ -66,8 +79,8 @@ export default function EPFESITab({ clientId, client }) {
           {records.length > 0 && client && (
             <ExportMenu
               small label="Export"
-              onExportPDF={() => exportSectionPDF({ client, title: 'EPF-ESI', head: exportHead, rows: exportRows })}
-              onExportExcel={() => exportSectionExcel({ client, title: 'EPF-ESI', head: exportHead, rows: exportRows })}
+              onExportPDF={() => exportWith(exportSectionPDF)}
+              onExportExcel={() => exportWith(exportSectionExcel)}
             />
           )}
           <button onClick={openAdd} className="flex items-center gap-1.5 bg-[#1F3864] text-white px-3 py-1.5 rounded-lg text-xs font-medium hover:bg-[#162848]">
@@ -96,7 +109,7 @@ export default function EPFESITab({ clientId, client }) {
                 <td className="py-2 pr-4 font-mono text-gray-700">{rec.establishment_code}</td>
                 <td className="py-2 pr-4 text-gray-600">{rec.state || '—'}</td>
                 <td className="py-2 pr-4 text-gray-600 text-xs">{rec.portal_user_id || '—'}</td>
-                <td className="py-2 pr-4"><PwdCell value={rec.portal_password} /></td>
+                <td className="py-2 pr-4"><PwdCell value={rec.portal_password} load={() => epfEsiApi.secrets(rec.id).then(r => r.data.portal_password)} /></td>
                 <td className="py-2 pr-4"><span className={`px-2 py-0.5 rounded-full text-xs ${rec.is_active ? 'bg-green-100 text-green-700' : 'bg-red-100 text-red-700'}`}>{rec.is_active ? 'Active' : 'Inactive'}</span></td>
                 <td className="py-2 flex gap-1">
                   <button onClick={() => openEdit(rec)} className="p-1 hover:bg-gray-100 rounded text-gray-500"><Edit2 size={13} /></button>
@@ -1,19 +1,27 @@
 import { useState, useEffect } from 'react'
-import { gstApi, clientsApi } from '../../api'
+import { gstApi, clientsApi, MASKED } from '../../api'
 import Modal from '../Modal'
 import ExportMenu from '../ExportMenu'
 import { exportSectionPDF, exportSectionExcel } from '../../utils/exportClient'
-import { Plus, Trash2, Edit2, Eye, EyeOff, UserPlus, UserMinus } from 'lucide-react'
+import { Plus, Trash2, Edit2, Eye, EyeOff, UserPlus, UserMinus, RefreshCw } from 'lucide-react'
 
 const GST_TYPES = ['Regular', 'Composition', 'QRMP', 'SEZ Unit', 'SEZ Developer', 'Casual', 'Non-Resident']
 
-function PwdField({ value }) {
-  const [show, setShow] = useState(false)
+function PwdField({ value, load }) {
+  const [show,  setShow]  = useState(false)
+  const [plain, setPlain] = useState(null)
   if (!value) return <span className="text-gray-400 text-xs">—</span>
+  // The client page loads registrations masked — fetch the real value each time it is shown
+  const toggle = async () => {
+    if (!show && value === MASKED) {
+      try { setPlain(await load()) } catch { return }
+    }
+    setShow(s => !s)
+  }
   return (
     <span className="flex items-center gap-1 font-mono text-xs">
-      {show ? value : '••••••••'}
-      <button onClick={() => setShow(s => !s)} className="text-gray-400 hover:text-gray-600">
+      {show ? (value === MASKED ? plain : value) : '••••••••'}
+      <button onClick={toggle} className="text-gray-400 hover:text-gray-600">
         {show ? <EyeOff size={11} /> : <Eye size={11} />}
       </button>
     </span>
@@ -41,9 +49,9 @@ function _mapRegType(dty) {
   return Object.entries(map).find(([k]) => dty.includes(k))?.[1] || ''
 }
 
-export default function GSTTab({ clientId, client }) {
-  const [records, setRecords]   = useState([])
-  const [loading, setLoading]   = useState(true)
+export default function GSTTab({ clientId, client, initial, onRecords }) {
+  const [records, setRecords]   = useState(initial ?? [])
+  const [loading, setLoading]   = useState(!initial)
   const [modal,   setModal]     = useState(null)
   const [editing, setEditing]   = useState(null)
   const [sigGst,  setSigGst]    = useState(null)
@@ -52,18 +60,20 @@ export default function GSTTab({ clientId, client }) {
   const [clients, setClients]   = useState([])
   const [saving,  setSaving]    = useState(false)
   const [error,   setError]     = useState('')
+  const [refreshing,  setRefreshing]  = useState(null)
+  const [portalError, setPortalError] = useState({ id: null, text: '' })
 
   const fetchRecords = async () => {
-    try { const r = await gstApi.list(clientId); setRecords(r.data) }
+    try { const r = await clientsApi.full(clientId, 'gst'); setRecords(r.data.gst); onRecords?.(r.data.gst) }
     catch (e) { console.error(e) }
     finally { setLoading(false) }
   }
   const fetchClients = async () => {
-    try { const r = await clientsApi.list({ constitution: 'Individual', is_active: true }); setClients(r.data) }
+    try { const r = await clientsApi.list({ constitution: 'Individual', is_active: true, fields: 'id,display_name,pan' }); setClients(r.data) }
     catch {}
   }
 
-  useEffect(() => { fetchRecords(); fetchClients() }, [clientId])
+  useEffect(() => { if (!initial) fetchRecords(); fetchClients() }, [clientId])
 
   const openAdd  = () => {
     setForm({ client_id: clientId, is_active: true })
@@ -89,6 +99,13 @@ export default function GSTTab({ clientId, client }) {
     await gstApi.delete(id); fetchRecords()
   }
 
+  const refreshFromPortal = async id => {
+    setRefreshing(id); setPortalError({ id: null, text: '' })
+    try { await gstApi.refresh(id); fetchRecords() }
+    catch (err) { setPortalError({ id, text: err.response?.data?.detail || 'Could not fetch from GST portal.' }) }
+    finally { setRefreshing(null) }
+  }
+
   const addSignatory = async e => {
     e.preventDefault(); setSaving(true); setError('')
     try {
@@ -118,7 +135,12 @@ export default function GSTTab({ clientId, client }) {
     'Principal Address', 'Nature of Business', 'E-Invoice',
     'Portal User ID', 'Portal Pwd', 'EWB User ID', 'EWB Pwd', 'Active', 'Signatories',
   ]
-  const exportRows = records.map(r => [
+  // Exports need the real passwords, which the client page loads masked
+  const exportWith = async exportFn => {
+    const r = await clientsApi.full(clientId, 'gst', 'all')
+    exportFn({ client, title: 'GST Registrations', head: exportHead, rows: r.data.gst.map(exportRow) })
+  }
+  const exportRow = r => [
     r.gstin,
     r.trade_name || '—',
     r.gstin_status || (r.is_active ? 'Active' : 'Inactive'),
@@ -135,7 +157,7 @@ export default function GSTTab({ clientId, client }) {
     r.ewb_password || '—',
     r.is_active ? 'Yes' : 'No',
     r.signatories?.map(s => `${s.signatory_name} (${s.signatory_pan})`).join('; ') || '—',
-  ])
+  ]
 
   return (
     <div className="bg-white rounded-xl border border-gray-200 p-5">
@@ -145,8 +167,8 @@ export default function GSTTab({ clientId, client }) {
           {records.length > 0 && client && (
             <ExportMenu
               small label="Export"
-              onExportPDF={() => exportSectionPDF({ client, title: 'GST Registrations', head: exportHead, rows: exportRows })}
-              onExportExcel={() => exportSectionExcel({ client, title: 'GST Registrations', head: exportHead, rows: exportRows })}
+              onExportPDF={() => exportWith(exportSectionPDF)}
+              onExportExcel={() => exportWith(exportSectionExcel)}
             />
           )}
           <button onClick={openAdd} className="flex items-center gap-1.5 bg-[#1F3864] text-white px-3 py-1.5 rounded-lg text-xs font-medium hover:bg-[#162848]">
@@ -178,6 +200,9 @@ export default function GSTTab({ clientId, client }) {
                   )}
                 </div>
                 <div className="flex gap-1 flex-shrink-0">
+                  <button onClick={() => refreshFromPortal(rec.id)} disabled={refreshing === rec.id} className="p-1.5 hover:bg-gray-100 rounded text-gray-500 disabled:opacity-50" title="Refresh from GST portal">
+                    <RefreshCw size={14} className={refreshing === rec.id ? 'animate-spin' : ''} />
+                  </button>
                   <button onClick={() => { setSigGst(rec); setModal('signatory') }} className="p-1.5 hover:bg-blue-50 rounded text-blue-500" title="Manage signatories">
                     <UserPlus size={14} />
                   </button>
@@ -190,15 +215,17 @@ export default function GSTTab({ clientId, client }) {
                 </div>
               </div>
 
+              {portalError.id === rec.id && <p className="mt-1 text-xs text-red-600">{portalError.text}</p>}
+
               <div className="mt-2 grid grid-cols-3 gap-x-4 gap-y-1.5 text-xs text-gray-500">
                 {rec.trade_name && <span className="col-span-2">Trade Name: <span className="text-gray-700 font-medium">{rec.trade_name}</span></span>}
                 <span>State: {rec.state || '—'}</span>
                 <span>Reg Date: {rec.registration_date || '—'}</span>
                 {rec.cancellation_date && <span>Cancel Date: {rec.cancellation_date}</span>}
                 <span>Portal ID: {rec.gst_user_id || '—'}</span>
-                <span>Portal Pwd: <PwdField value={rec.gst_password} /></span>
+                <span>Portal Pwd: <PwdField value={rec.gst_password} load={() => gstApi.secrets(rec.id).then(r => r.data.gst_password)} /></span>
                 <span>EWB API ID: {rec.ewb_api_user_id || '—'}</span>
-                <span>EWB API Pwd: <PwdField value={rec.ewb_api_password} /></span>
+                <span>EWB API Pwd: <PwdField value={rec.ewb_api_password} load={() => gstApi.secrets(rec.id).then(r => r.data.ewb_api_password)} /></span>
                 {rec.principal_address && (
                   <span className="col-span-3 text-gray-600">Address: {rec.principal_address}</span>
                 )}
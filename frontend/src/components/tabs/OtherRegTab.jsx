@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { otherRegApi } from '../../api'
+import { otherRegApi, MASKED } from '../../api'
 import Modal from '../Modal'
 import ExportMenu from '../ExportMenu'
 import { exportSectionPDF, exportSectionExcel } from '../../utils/exportClient'
@@ -8,13 +8,21 @@ import { Plus, Trash2, Edit2, Eye, EyeOff, AlertTriangle } from 'lucide-react'
 const REG_TYPES = ['MSME/Udyam','IEC','FSSAI','Professional Tax','Shops & Estab','Trade License','Drug License','Import Export Code','Others']
 const STATES = ['Andhra Pradesh','Arunachal Pradesh','Assam','Bihar','Chhattisgarh','Goa','Gujarat','Haryana','Himachal Pradesh','Jharkhand','Karnataka','Kerala','Madhya Pradesh','Maharashtra','Manipur','Meghalaya','Mizoram','Nagaland','Odisha','Punjab','Rajasthan','Sikkim','Tamil Nadu','Telangana','Tripura','Uttar Pradesh','Uttarakhand','West Bengal','Delhi','Other']
 
-function PwdCell({ value }) {
-  const [show, setShow] = useState(false)
+function PwdCell({ value, load }) {
+  const [show,  setShow]  = useState(false)
+  const [plain, setPlain] = useState(null)
   if (!value) return <span className="text-gray-400 text-xs">—</span>
+  // Lists arrive masked — fetch the real value each time it is shown
+  const toggle = async () => {
+    if (!show && value === MASKED) {
+      try { setPlain(await load()) } catch { return }
+    }
+    setShow(s => !s)
+  }
   return (
     <span className="flex items-center gap-1 font-mono text-xs">
-      {show ? value : '••••••••'}
-      <button onClick={() => setShow(s => !s)} className="text-gray-400 hover:text-gray-600">
+      {show ? (value === MASKED ? plain : value) : '••••••••'}
+      <button onClick={toggle} className="text-gray-400 hover:text-gray-600">
         {show ? <EyeOff size={11} /> : <Eye size={11} />}
       </button>
     </span>
@@ -31,9 +39,9 @@ function isExpired(dateStr) {
   return new Date(dateStr) < new Date()
 }
 
-export default function OtherRegTab({ clientId, client }) {
-  const [records, setRecords] = useState([])
-  const [loading, setLoading] = useState(true)
+export default function OtherRegTab({ clientId, client, initial, onRecords }) {
+  const [records, setRecords] = useState(initial ?? [])
+  const [loading, setLoading] = useState(!initial)
   const [modal,   setModal]   = useState(false)
   const [editing, setEditing] = useState(null)
   const [form,    setForm]    = useState({})
@@ -41,11 +49,11 @@ export default function OtherRegTab({ clientId, client }) {
   const [error,   setError]   = useState('')
 
   const fetchRecords = async () => {
-    try { const r = await otherRegApi.list(clientId); setRecords(r.data) }
+    try { const r = await otherRegApi.list(clientId); setRecords(r.data); onRecords?.(r.data) }
     catch (e) { console.error(e) }
     finally { setLoading(false) }
   }
-  useEffect(() => { fetchRecords() }, [clientId])
+  useEffect(() => { if (!initial) fetchRecords() }, [clientId])
 
   const openAdd  = () => { setForm({ client_id: clientId, is_active: true }); setEditing(null); setModal(true) }
   const openEdit = rec => { setForm({ ...rec }); setEditing(rec); setModal(true) }
@@ -67,7 +75,12 @@ export default function OtherRegTab({ clientId, client }) {
   }
 
   const exportHead = ['Type', 'Reg. Number', 'Reg Date', 'Valid Until', 'Issuing Authority', 'State/Jurisdiction', 'Portal ID', 'Password', 'Status', 'Notes']
-  const exportRows = records.map(r => [r.registration_type, r.registration_number, r.registration_date, r.valid_until, r.issuing_authority, r.state_jurisdiction, r.portal_user_id, r.portal_password, r.is_active ? 'Active' : 'Inactive', r.notes])
+  // Exports need the real passwords, which the list masks
+  const exportWith = async exportFn => {
+    const r = await otherRegApi.list(clientId, 'all')
+    exportFn({ client, title: 'Other Registrations', head: exportHead, rows: r.data.map(exportRow) })
+  }
+  const exportRow  = r => [r.registration_type, r.registration_number, r.registration_date, r.valid_until, r.issuing_authority, r.state_jurisdiction, r.portal_user_id, r.portal_password, r.is_active ? 'Active' : 'Inactive', r.notes]
 
   return (
     <div className="bg-white rounded-xl border border-gray-200 p-5">
@@ -77,8 +90,8 @@ export default function OtherRegTab({ clientId, client }) {
           {records.length > 0 && client && (
             <ExportMenu
               small label="Export"
-              onExportPDF={() => exportSectionPDF({ client, title: 'Other Registrations', head: exportHead, rows: exportRows })}
-              onExportExcel={() => exportSectionExcel({ client, title: 'Other Registrations', head: exportHead, rows: exportRows })}
+              onExportPDF={() => exportWith(exportSectionPDF)}
+              onExportExcel={() => exportWith(exportSectionExcel)}
             />
           )}
           <button onClick={openAdd} className="flex items-center gap-1.5 bg-[#1F3864] text-white px-3 py-1.5 rounded-lg text-xs font-medium hover:bg-[#162848]">
@@ -116,7 +129,7 @@ export default function OtherRegTab({ clientId, client }) {
                   ) : <span className="text-gray-400 text-xs">—</span>}
                 </td>
                 <td className="py-2 pr-4 text-gray-600 text-xs">{rec.portal_user_id || '—'}</td>
-                <td className="py-2 pr-4"><PwdCell value={rec.portal_password} /></td>
+                <td className="py-2 pr-4"><PwdCell value={rec.portal_password} load={() => otherRegApi.secrets(rec.id).then(r => r.data.portal_password)} /></td>
                 <td className="py-2 pr-4"><span className={`px-2 py-0.5 rounded-full text-xs ${rec.is_active ? 'bg-green-100 text-green-700' : 'bg-red-100 text-red-700'}`}>{rec.is_active ? 'Active' : 'Inactive'}</span></td>
                 <td className="py-2 flex gap-1">
                   <button onClick={() => openEdit(rec)} className="p-1 hover:bg-gray-100 rounded text-gray-500"><Edit2 size={13} /></button>
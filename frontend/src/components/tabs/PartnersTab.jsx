@@ -3,14 +3,15 @@ import { partnersApi, clientsApi } from '../../api'
 import Modal from '../Modal'
 import ExportMenu from '../ExportMenu'
 import NewIndividualModal from '../NewIndividualModal'
+import UBOPanel from '../UBOPanel'
 import { exportSectionPDF, exportSectionExcel } from '../../utils/exportClient'
 import { Plus, Trash2, Edit2, UserPlus } from 'lucide-react'
 
 const ROLES = ['Partner', 'Designated Partner', 'Managing Partner', 'Sleeping Partner', 'Minor Partner']
 
-export default function PartnersTab({ clientId, client }) {
-  const [records, setRecords] = useState([])
-  const [loading, setLoading] = useState(true)
+export default function PartnersTab({ clientId, client, initial, onRecords }) {
+  const [records, setRecords] = useState(initial ?? [])
+  const [loading, setLoading] = useState(!initial)
   const [modal,   setModal]   = useState(false)
   const [editing, setEditing] = useState(null)
   const [form,    setForm]    = useState({})
@@ -20,14 +21,14 @@ export default function PartnersTab({ clientId, client }) {
   const [showNewIndiv, setShowNewIndiv] = useState(false)
 
   const fetchRecords = async () => {
-    try { const r = await partnersApi.list(clientId); setRecords(r.data) }
+    try { const r = await partnersApi.list(clientId); setRecords(r.data); onRecords?.(r.data) }
     catch (e) { console.error(e) }
     finally { setLoading(false) }
   }
   const fetchIndivs = () =>
-    clientsApi.list({ constitution: 'Individual' }).then(r => setIndivs(r.data)).catch(() => {})
+    clientsApi.list({ constitution: 'Individual', fields: 'id,display_name,pan' }).then(r => setIndivs(r.data)).catch(() => {})
 
-  useEffect(() => { fetchRecords(); fetchIndivs() }, [clientId])
+  useEffect(() => { if (!initial) fetchRecords(); fetchIndivs() }, [clientId])
 
   const openAdd  = () => { setForm({ firm_llp_client_id: clientId, is_active: true }); setEditing(null); setModal(true) }
   const openEdit = rec => { setForm({ ...rec }); setEditing(rec); setModal(true) }
@@ -105,6 +106,8 @@ export default function PartnersTab({ clientId, client }) {
         </table>
       )}
 
+      {records.length > 0 && <UBOPanel clientId={clientId} refreshKey={records} />}
+
       {modal && (
         <Modal title={editing ? 'Edit Partner' : 'Add Partner'} onClose={() => setModal(false)}>
           <form onSubmit={save} className="space-y-3">
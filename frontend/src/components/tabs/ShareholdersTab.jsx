@@ -3,15 +3,16 @@ import { shareholdersApi, clientsApi } from '../../api'
 import Modal from '../Modal'
 import ExportMenu from '../ExportMenu'
 import NewIndividualModal from '../NewIndividualModal'
+import UBOPanel from '../UBOPanel'
 import { exportSectionPDF, exportSectionExcel } from '../../utils/exportClient'
 import { Plus, Trash2, Edit2, UserPlus } from 'lucide-react'
 
 const HOLDER_TYPES = ['Individual', 'Company', 'Trust', 'HUF', 'LLP']
 const SHARE_TYPES  = ['Equity', 'Preference', 'CCPS', 'OCPS']
 
-export default function ShareholdersTab({ clientId, client }) {
-  const [records,  setRecords]  = useState([])
-  const [loading,  setLoading]  = useState(true)
+export default function ShareholdersTab({ clientId, client, initial, onRecords }) {
+  const [records,  setRecords]  = useState(initial ?? [])
+  const [loading,  setLoading]  = useState(!initial)
   const [modal,    setModal]    = useState(false)
   const [editing,  setEditing]  = useState(null)
   const [form,     setForm]     = useState({})
@@ -21,14 +22,14 @@ export default function ShareholdersTab({ clientId, client }) {
   const [showNewIndiv, setShowNewIndiv] = useState(false)
 
   const fetchRecords = async () => {
-    try { const r = await shareholdersApi.list(clientId); setRecords(r.data) }
+    try { const r = await shareholdersApi.list(clientId); setRecords(r.data); onRecords?.(r.data) }
     catch (e) { console.error(e) }
     finally { setLoading(false) }
   }
   const fetchClients = () =>
-    clientsApi.list({}).then(r => setClients(r.data)).catch(() => {})
+    clientsApi.list({ fields: 'id,display_name,pan,constitution' }).then(r => setClients(r.data)).catch(() => {})
 
-  useEffect(() => { fetchRecords(); fetchClients() }, [clientId])
+  useEffect(() => { if (!initial) fetchRecords(); fetchClients() }, [clientId])
 
   const openAdd  = () => { setForm({ company_client_id: clientId, holder_type: 'Individual', is_active: true }); setEditing(null); setModal(true) }
   const openEdit = rec => { setForm({ ...rec }); setEditing(rec); setModal(true) }
@@ -104,6 +105,8 @@ export default function ShareholdersTab({ clientId, client }) {
         </table>
       )}
 
+      {records.length > 0 && <UBOPanel clientId={clientId} refreshKey={records} />}
+
       {modal && (
         <Modal title={editing ? 'Edit Shareholder' : 'Add Shareholder'} onClose={() => setModal(false)}>
           <form onSubmit={save} className="space-y-3">
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { clientsApi, gstApi, directorsApi, shareholdersApi, partnersApi, bankApi, epfEsiApi, otherRegApi } from '../api'
+import { clientsApi, MASKED } from '../api'
 import { ArrowLeft, Edit2, Eye, EyeOff, Copy, Check } from 'lucide-react'
 import GSTTab          from '../components/tabs/GSTTab'
 import DirectorsTab    from '../components/tabs/DirectorsTab'
@@ -10,8 +10,9 @@ import BankTab         from '../components/tabs/BankTab'
 import EPFESITab       from '../components/tabs/EPFESITab'
 import OtherRegTab     from '../components/tabs/OtherRegTab'
 import ClientForm      from '../components/ClientForm'
+import GroupPanel      from '../components/GroupPanel'
 import ExportMenu      from '../components/ExportMenu'
-import { exportFullClientPDF, exportFullClientExcel, exportSectionPDF, exportSectionExcel } from '../utils/exportClient'
+import { exportFullClientExcel, exportSectionPDF, exportSectionExcel } from '../utils/exportClient'
 
 const CONSTITUTION_COLORS = {
   'Individual':       'bg-blue-100 text-blue-700',
@@ -24,10 +25,11 @@ const CONSTITUTION_COLORS = {
   'BOI':              'bg-rose-100 text-rose-700',
 }
 
-function CopyBtn({ value }) {
+function CopyBtn({ value: shown, getValue }) {
   const [copied, setCopied] = useState(false)
   const copy = async () => {
     try {
+      const value = getValue ? await getValue() : shown
       if (navigator.clipboard) {
         await navigator.clipboard.writeText(value || '')
       } else {
@@ -61,13 +63,21 @@ function CopyBtn({ value }) {
   )
 }
 
-function HeaderCredPill({ label, value }) {
+function HeaderCredPill({ label, value: stored, onReveal }) {
   const [show, setShow] = useState(false)
   const [copied, setCopied] = useState(false)
-  if (!value) return null
+  const [plain, setPlain] = useState(null)
+  if (!stored) return null
+  const value = stored === MASKED ? plain : stored
+  const reveal = async () => {
+    if (stored !== MASKED) return stored
+    const v = await onReveal(); setPlain(v); return v
+  }
+  const toggle = async () => { if (!show) await reveal(); setShow(s => !s) }
 
   const copy = async () => {
     try {
+      const value = await reveal()
       if (navigator.clipboard) {
         await navigator.clipboard.writeText(value)
       } else {
@@ -84,7 +94,7 @@ function HeaderCredPill({ label, value }) {
     <span className="inline-flex items-center gap-1 bg-gray-100 border border-gray-200 rounded px-2 py-0.5 text-xs group">
       <span className="text-gray-500 mr-0.5">{label}:</span>
       <span className="font-mono text-gray-800">{show ? value : '••••••'}</span>
-      <button onClick={() => setShow(s => !s)} className="text-gray-400 hover:text-gray-600">
+      <button onClick={toggle} className="text-gray-400 hover:text-gray-600">
         {show ? <EyeOff size={10} /> : <Eye size={10} />}
       </button>
       <button onClick={copy} className="text-gray-400 hover:text-gray-600">
@@ -94,10 +104,18 @@ function HeaderCredPill({ label, value }) {
   )
 }
 
-function Field({ label, value, secret }) {
+function Field({ label, value: stored, secret, onReveal }) {
   const [show, setShow] = useState(false)
-  const hasValue = !!value
+  const [plain, setPlain] = useState(null)
+  const hasValue = !!stored
+  const value = stored === MASKED ? plain : stored
   const displayValue = value || '—'
+  // Credentials arrive masked — fetch the real value when shown or copied
+  const reveal = async () => {
+    if (stored !== MASKED) return stored
+    const v = await onReveal(); setPlain(v); return v
+  }
+  const toggle = async () => { if (!show) await reveal(); setShow(s => !s) }
   return (
     <div>
       <p className="text-xs text-gray-500 font-medium uppercase tracking-wide mb-0.5">{label}</p>
@@ -106,11 +124,11 @@ function Field({ label, value, secret }) {
           {secret && hasValue && !show ? '••••••••' : displayValue}
         </p>
         {secret && hasValue && (
-          <button onClick={() => setShow(s => !s)} className="text-gray-400 hover:text-gray-600 flex-shrink-0">
+          <button onClick={toggle} className="text-gray-400 hover:text-gray-600 flex-shrink-0">
             {show ? <EyeOff size={13} /> : <Eye size={13} />}
           </button>
         )}
-        {hasValue && <CopyBtn value={value} />}
+        {hasValue && <CopyBtn value={value} getValue={reveal} />}
       </div>
     </div>
   )
@@ -142,16 +160,26 @@ export default function ClientDetail() {
   const [loading,  setLoading]  = useState(true)
   const [tab,      setTab]      = useState('overview')
   const [editing,  setEditing]  = useState(false)
+  const [secrets,  setSecrets]  = useState(null)
 
   const fetchClient = async () => {
     try {
-      const res = await clientsApi.get(id)
+      const res = await clientsApi.full(id)
       setClient(res.data)
     } catch { navigate('/') }
     finally  { setLoading(false) }
   }
 
-  useEffect(() => { fetchClient() }, [id])
+  useEffect(() => { fetchClient(); setSecrets(null) }, [id])
+
+  // The client's own credentials, decrypted on first use (/full returns them masked)
+  const loadSecrets = async () => {
+    if (secrets) return secrets
+    const res = await clientsApi.secrets(id)
+    setSecrets(res.data)
+    return res.data
+  }
+  const reveal = field => async () => (await loadSecrets())[field]
 
   if (loading) return <div className="flex items-center justify-center h-64 text-gray-500">Loading…</div>
   if (!client) return null
@@ -175,17 +203,36 @@ export default function ClientDetail() {
     { key: 'otherreg',     label: 'Other Registrations' },
   ]
 
-  // ── Fetchers for full export ──────────────────────────────────────────────
-  const fetchers = {
-    gst:          () => gstApi.list(id).then(r => r.data),
-    directors:    () => directorsApi.list({ company_client_id: id }).then(r => r.data),
-    shareholders: () => shareholdersApi.list(id).then(r => r.data),
-    partners:     () => partnersApi.list(id).then(r => r.data),
-    bank:         () => bankApi.list(id).then(r => r.data),
-    epfesi:       () => epfEsiApi.list(id).then(r => r.data),
-    otherReg:     () => otherRegApi.list(id).then(r => r.data),
+  // ── Full export ───────────────────────────────────────────────────────────
+  // One /full call with every credential revealed; the page itself holds them masked
+  const exportAll = async exportFn => {
+    const { data: full } = await clientsApi.full(id, null, 'all')
+    exportFn(full, {
+      gst:          async () => full.gst,
+      directors:    async () => full.directors,
+      shareholders: async () => full.shareholders,
+      partners:     async () => full.partners,
+      bank:         async () => full.bank_accounts,
+      epfesi:       async () => full.epf_esi,
+      otherReg:     async () => full.other_registrations,
+    })
   }
 
+  // The PDF dossier is rendered (and cached) by the server
+  const exportDossier = async () => {
+    const res = await clientsApi.dossier(id, 'all')
+    const encoded = res.headers['content-disposition']?.match(/filename\*=UTF-8''([^;]+)/)?.[1]
+    const url = URL.createObjectURL(res.data)
+    const a = document.createElement('a')
+    a.href = url
+    a.download = encoded ? decodeURIComponent(encoded) : `${client.pan}.pdf`
+    a.click()
+    URL.revokeObjectURL(url)
+  }
+
+  // Tabs report back after their own edits so the snapshot above stays current
+  const sectionSetter = key => records => setClient(c => ({ ...c, [key]: records }))
+
   // ── Section export helpers (overview / kyc / credentials) ────────────────
   const overviewRows = [
     [client.pan,          'PAN'],
@@ -205,7 +252,9 @@ export default function ClientDetail() {
     [client.notes, 'Notes'],
   ].filter(([val]) => val).map(([val, label]) => [label, val])
 
-  const kycRows = [
+  const withSecrets = async () => ({ ...client, ...(await loadSecrets()) })
+
+  const kycRows = client => [
     [client.father_name, "Father's Name"],
     [client.mother_name, "Mother's Name"],
     [client.gender, 'Gender'],
@@ -221,7 +270,7 @@ export default function ClientDetail() {
     [client.dsc_token_password, 'DSC Token Password'],
   ].filter(([val]) => val).map(([val, label]) => [label, val])
 
-  const credRows = [
+  const credRows = client => [
     [client.it_portal_user_id, 'IT Portal User ID'],
     [client.it_portal_password, 'IT Portal Password'],
     [client.it_portal_user_id_tds, 'IT Portal User ID (TDS)'],
@@ -253,15 +302,15 @@ export default function ClientDetail() {
             </div>
             <div className="flex items-center flex-wrap gap-2 mt-1">
               <p className="text-gray-500 text-sm">{client.legal_name} &nbsp;·&nbsp; PAN: <span className="font-mono">{client.pan}</span></p>
-              <HeaderCredPill label="AIS/TIS Pwd" value={client.password_ais_tis} />
+              <HeaderCredPill label="AIS/TIS Pwd" value={client.password_ais_tis} onReveal={reveal('password_ais_tis')} />
             </div>
           </div>
         </div>
         <div className="flex items-center gap-2">
           <ExportMenu
             label="Export All"
-            onExportPDF={() => exportFullClientPDF(client, fetchers)}
-            onExportExcel={() => exportFullClientExcel(client, fetchers)}
+            onExportPDF={exportDossier}
+            onExportExcel={() => exportAll(exportFullClientExcel)}
           />
           <button
             onClick={() => setEditing(true)}
@@ -320,6 +369,7 @@ export default function ClientDetail() {
               <Field label="State"          value={client.state} />
               <Field label="Pin Code"       value={client.pin_code} />
             </Section>
+            <GroupPanel clientId={id} />
             {client.notes && (
               <div>
                 <p className="text-xs text-gray-500 font-medium uppercase tracking-wide mb-1">Notes</p>
@@ -333,8 +383,8 @@ export default function ClientDetail() {
           <div className="bg-white rounded-xl border border-gray-200 p-6">
             <Section
               title="Personal Identity"
-              onExportPDF={() => exportSectionPDF({ client, title: 'KYC & DSC', head: ['Field', 'Value'], rows: kycRows })}
-              onExportExcel={() => exportSectionExcel({ client, title: 'KYC & DSC', head: ['Field', 'Value'], rows: kycRows })}
+              onExportPDF={async () => exportSectionPDF({ client, title: 'KYC & DSC', head: ['Field', 'Value'], rows: kycRows(await withSecrets()) })}
+              onExportExcel={async () => exportSectionExcel({ client, title: 'KYC & DSC', head: ['Field', 'Value'], rows: kycRows(await withSecrets()) })}
             >
               <Field label="Father's Name" value={client.father_name} />
               <Field label="Mother's Name" value={client.mother_name} />
@@ -349,12 +399,12 @@ export default function ClientDetail() {
             </Section>
             <Section title="MCA v3 Login">
               <Field label="MCA User ID"  value={client.mca_user_id} />
-              <Field label="MCA Password" value={client.mca_password} secret />
+              <Field label="MCA Password" value={client.mca_password} secret onReveal={reveal('mca_password')} />
             </Section>
             <Section title="DSC (Digital Signature Certificate)">
               <Field label="DSC Provider"       value={client.dsc_provider} />
               <Field label="DSC Expiry Date"    value={client.dsc_expiry_date} />
-              <Field label="DSC Token Password" value={client.dsc_token_password} secret />
+              <Field label="DSC Token Password" value={client.dsc_token_password} secret onReveal={reveal('dsc_token_password')} />
             </Section>
           </div>
         )}
@@ -363,32 +413,32 @@ export default function ClientDetail() {
           <div className="bg-white rounded-xl border border-gray-200 p-6">
             <Section
               title="Income Tax Portal"
-              onExportPDF={() => exportSectionPDF({ client, title: 'Credentials', head: ['Field', 'Value'], rows: credRows })}
-              onExportExcel={() => exportSectionExcel({ client, title: 'Credentials', head: ['Field', 'Value'], rows: credRows })}
+              onExportPDF={async () => exportSectionPDF({ client, title: 'Credentials', head: ['Field', 'Value'], rows: credRows(await withSecrets()) })}
+              onExportExcel={async () => exportSectionExcel({ client, title: 'Credentials', head: ['Field', 'Value'], rows: credRows(await withSecrets()) })}
             >
               <Field label="IT Portal User ID"            value={client.it_portal_user_id} />
-              <Field label="IT Portal Password"           value={client.it_portal_password} secret />
+              <Field label="IT Portal Password"           value={client.it_portal_password} secret onReveal={reveal('it_portal_password')} />
               <Field label="IT Portal User ID (TDS)"      value={client.it_portal_user_id_tds} />
-              <Field label="IT Password (TDS)"            value={client.it_password_tds} secret />
-              <Field label="Password for 26AS"            value={client.password_26as} secret />
-              <Field label="Password for AIS / TIS"       value={client.password_ais_tis} secret />
+              <Field label="IT Password (TDS)"            value={client.it_password_tds} secret onReveal={reveal('it_password_tds')} />
+              <Field label="Password for 26AS"            value={client.password_26as} secret onReveal={reveal('password_26as')} />
+              <Field label="Password for AIS / TIS"       value={client.password_ais_tis} secret onReveal={reveal('password_ais_tis')} />
             </Section>
             <Section title="TRACES">
               <Field label="TRACES User ID (Deductor)"   value={client.traces_user_id_deductor} />
-              <Field label="TRACES Password (Deductor)"  value={client.traces_password_deductor} secret />
+              <Field label="TRACES Password (Deductor)"  value={client.traces_password_deductor} secret onReveal={reveal('traces_password_deductor')} />
               <Field label="TRACES User ID (Tax Payer)"  value={client.traces_user_id_taxpayer} />
-              <Field label="TRACES Password (Tax Payer)" value={client.traces_password_taxpayer} secret />
+              <Field label="TRACES Password (Tax Payer)" value={client.traces_password_taxpayer} secret onReveal={reveal('traces_password_taxpayer')} />
             </Section>
           </div>
         )}
 
-        {tab === 'gst'          && <GSTTab          clientId={id} client={client} />}
-        {tab === 'directors'    && <DirectorsTab     clientId={id} companyId={id} client={client} />}
-        {tab === 'shareholders' && <ShareholdersTab  clientId={id} client={client} />}
-        {tab === 'partners'     && <PartnersTab      clientId={id} client={client} />}
-        {tab === 'bank'         && <BankTab          clientId={id} client={client} />}
-        {tab === 'epfesi'       && <EPFESITab        clientId={id} client={client} />}
-        {tab === 'otherreg'     && <OtherRegTab      clientId={id} client={client} />}
+        {tab === 'gst'          && <GSTTab          clientId={id} client={client} initial={client.gst}                 onRecords={sectionSetter('gst')} />}
+        {tab === 'directors'    && <DirectorsTab     clientId={id} companyId={id} client={client} initial={client.directors} onRecords={sectionSetter('directors')} />}
+        {tab === 'shareholders' && <ShareholdersTab  clientId={id} client={client} initial={client.shareholders}        onRecords={sectionSetter('shareholders')} />}
+        {tab === 'partners'     && <PartnersTab      clientId={id} client={client} initial={client.partners}            onRecords={sectionSetter('partners')} />}
+        {tab === 'bank'         && <BankTab          clientId={id} client={client} initial={client.bank_accounts}       onRecords={sectionSetter('bank_accounts')} />}
+        {tab === 'epfesi'       && <EPFESITab        clientId={id} client={client} initial={client.epf_esi}             onRecords={sectionSetter('epf_esi')} />}
+        {tab === 'otherreg'     && <OtherRegTab      clientId={id} client={client} initial={client.other_registrations} onRecords={sectionSetter('other_registrations')} />}
       </div>
 
       {/* Edit modal */}
@@ -396,7 +446,7 @@ export default function ClientDetail() {
         <ClientForm
           client={client}
           onClose={() => setEditing(false)}
-          onSaved={updated => { setClient(updated); setEditing(false) }}
+          onSaved={updated => { setClient(c => ({ ...c, ...updated })); setSecrets(null); setEditing(false) }}
         />
       )}
     </div>
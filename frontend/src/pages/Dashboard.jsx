@@ -1,8 +1,11 @@
 import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { clientsApi } from '../api'
-import { Search, Plus, Phone, Mail, RefreshCw, Zap } from 'lucide-react'
+import { clientsApi, exportApi } from '../api'
+import { Search, Plus, Phone, Mail, RefreshCw, Zap, Download } from 'lucide-react'
 import ClientForm from '../components/ClientForm'
+import ExpiryWidget from '../components/ExpiryWidget'
+import BookStats from '../components/BookStats'
+import GroupsWidget from '../components/GroupsWidget'
 
 const CONSTITUTION_COLORS = {
   'Individual':       'bg-blue-100 text-blue-800',
@@ -16,6 +19,7 @@ const CONSTITUTION_COLORS = {
 }
 
 const CONSTITUTIONS = ['Individual', 'Company', 'LLP', 'Partnership Firm', 'HUF', 'Trust', 'AOP', 'BOI']
+const PAGE_SIZE = 100
 
 export default function Dashboard() {
   const navigate = useNavigate()
@@ -26,26 +30,60 @@ export default function Dashboard() {
   const [isActive,     setIsActive]     = useState('')
   const [isDirect,     setIsDirect]     = useState('')
   const [quickCreate,  setQuickCreate]  = useState(false)
+  const [nextCursor,   setNextCursor]   = useState(null)
+  const [total,        setTotal]        = useState(0)
+  const [loadingMore,  setLoadingMore]  = useState(false)
+  const [closestMatches, setClosestMatches] = useState(false)
+  const [exporting,    setExporting]    = useState(false)
 
-  const fetchClients = async () => {
-    setLoading(true)
+  // First page (with total count) when cursor is null, otherwise the page after it
+  const fetchClients = async (cursor = null) => {
+    cursor ? setLoadingMore(true) : setLoading(true)
     try {
-      const params = {}
+      const params = { limit: PAGE_SIZE }
       if (search)       params.search       = search
       if (constitution) params.constitution = constitution
       if (isActive)     params.is_active    = isActive === 'true'
       if (isDirect)     params.is_direct    = isDirect === 'true'
-      const res = await clientsApi.list(params)
-      setClients(res.data)
+      if (cursor)       params.cursor       = cursor
+      else              params.with_total   = true
+      let res = await clientsApi.list(params)
+      // Nothing contains the search text — fall back to typo-tolerant ranked matches
+      const fuzzy = !cursor && !!search && res.data.length === 0
+      if (fuzzy) res = await clientsApi.list({ ...params, match: 'fuzzy', limit: 20, with_total: undefined })
+      setClients(prev => cursor ? [...prev, ...res.data] : res.data)
+      setNextCursor(res.headers['x-next-cursor'] || null)
+      if (!cursor) setTotal(Number(res.headers['x-total-count'] ?? res.data.length))
+      if (!cursor) setClosestMatches(fuzzy && res.data.length > 0)
     } catch (e) {
       console.error(e)
     } finally {
       setLoading(false)
+      setLoadingMore(false)
     }
   }
 
   useEffect(() => { fetchClients() }, [constitution, isActive, isDirect])
 
+  // Every client and registration as one workbook, one sheet per table
+  const handleExport = async () => {
+    setExporting(true)
+    try {
+      const res = await exportApi.book('xlsx')
+      const name = res.headers['content-disposition']?.match(/filename="(.+)"/)?.[1] || 'client-book.xlsx'
+      const url = URL.createObjectURL(res.data)
+      const a = document.createElement('a')
+      a.href = url
+      a.download = name
+      a.click()
+      URL.revokeObjectURL(url)
+    } catch (e) {
+      console.error(e)
+    } finally {
+      setExporting(false)
+    }
+  }
+
   const handleSearch = e => {
     e.preventDefault()
     fetchClients()
@@ -57,9 +95,18 @@ export default function Dashboard() {
       <div className="flex items-center justify-between mb-6">
         <div>
           <h1 className="text-2xl font-bold text-gray-900">All Clients</h1>
-          <p className="text-gray-500 text-sm mt-0.5">{clients.length} records</p>
+          <p className="text-gray-500 text-sm mt-0.5">
+            {closestMatches ? `No exact matches — showing ${clients.length} closest` : `${total} records`}
+          </p>
         </div>
         <div className="flex items-center gap-2">
+          <button
+            onClick={handleExport}
+            disabled={exporting}
+            className="flex items-center gap-2 border border-gray-300 text-gray-700 hover:bg-gray-50 disabled:opacity-50 px-4 py-2.5 rounded-lg text-sm font-medium transition-colors"
+          >
+            <Download size={16} /> {exporting ? 'Exporting…' : 'Export'}
+          </button>
           <button
             onClick={() => setQuickCreate(true)}
             className="flex items-center gap-2 border border-[#1F3864] text-[#1F3864] hover:bg-blue-50 px-4 py-2.5 rounded-lg text-sm font-medium transition-colors"
@@ -75,6 +122,10 @@ export default function Dashboard() {
         </div>
       </div>
 
+      <BookStats />
+      <ExpiryWidget />
+      <GroupsWidget />
+
       {/* Filters */}
       <div className="bg-white rounded-xl border border-gray-200 p-4 mb-5">
         <form onSubmit={handleSearch} className="flex flex-wrap gap-3">
@@ -191,6 +242,17 @@ export default function Dashboard() {
             </tbody>
           </table>
         )}
+        {!loading && nextCursor && (
+          <div className="border-t border-gray-100 p-3 text-center">
+            <button
+              onClick={() => fetchClients(nextCursor)}
+              disabled={loadingMore}
+              className="text-sm font-medium text-[#1F3864] hover:underline disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading…' : `Load more (${clients.length} of ${total} shown)`}
+            </button>
+          </div>
+        )}
       </div>
       {quickCreate && (
         <ClientForm